@@ -0,0 +1,81 @@
+"""
+Compares the rate at which cherrypicked samples are filtered out of a list of samples using a set of
+(root sample ID, plate barcode) keys against the previous approach: checking each sample against a list of
+{root sample ID, plate barcode} sets.
+
+Everything runs in memory on synthetic samples, so no databases are needed. The previous filter checks every sample
+against every cherrypicked sample, so it is only run on the first --legacy-samples samples.
+
+To run:
+
+    python -m benchmarks.cherrypicked_samples --samples 1000000 --cherrypicked 10000
+"""
+
+import argparse
+import time
+from typing import Callable, List
+
+
+from crawler.constants import FIELD_PLATE_BARCODE, FIELD_ROOT_SAMPLE_ID
+from crawler.helpers.cherrypicked_samples import remove_cherrypicked_samples
+from crawler.types import SampleDoc
+
+
+def synthetic_samples(count: int) -> List[SampleDoc]:
+    return [{FIELD_ROOT_SAMPLE_ID: f"RSID-{i:08}", FIELD_PLATE_BARCODE: f"AP-rna-{i // 96:08}"} for i in range(count)]
+
+
+def legacy_remove_cherrypicked_samples(samples: List[SampleDoc], cherry_picked_samples: List[List[str]]) -> List:
+    """The previous implementation of filtering out the cherrypicked samples, kept here to compare against."""
+    cherry_picked_sets = [{cp_sample[0], cp_sample[1]} for cp_sample in cherry_picked_samples]
+
+    return [
+        sample
+        for sample in samples
+        if {sample[FIELD_ROOT_SAMPLE_ID], sample[FIELD_PLATE_BARCODE]} not in cherry_picked_sets
+    ]
+
+
+def seconds(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+
+    return time.perf_counter() - start
+
+
+def run(sample_count: int, cherrypicked_count: int, legacy_sample_count: int) -> None:
+    samples = synthetic_samples(sample_count)
+    # spread the cherrypicked samples across the whole list
+    step = max(sample_count // cherrypicked_count, 1)
+    cherrypicked = [
+        [str(sample[FIELD_ROOT_SAMPLE_ID]), str(sample[FIELD_PLATE_BARCODE])]
+        for sample in samples[::step][:cherrypicked_count]
+    ]
+    cherrypicked_keys = {(root_sample_id, plate_barcode) for root_sample_id, plate_barcode in cherrypicked}
+
+    legacy_samples = samples[:legacy_sample_count]
+    legacy_time = seconds(lambda: legacy_remove_cherrypicked_samples(legacy_samples, cherrypicked))
+    set_time = seconds(lambda: remove_cherrypicked_samples(samples, cherrypicked_keys))
+
+    print(f"filtering {cherrypicked_count:,} cherrypicked samples out of the samples:")
+    print(f"  list of sets: {legacy_sample_count / legacy_time:,.0f} samples/s ({legacy_sample_count:,} samples)")
+    print(f"  set of keys: {sample_count / set_time:,.0f} samples/s ({sample_count:,} samples)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark filtering out cherrypicked samples")
+
+    parser.add_argument("--samples", dest="samples", type=int, help="number of samples to filter")
+    parser.add_argument("--cherrypicked", dest="cherrypicked", type=int, help="number of cherrypicked samples")
+    parser.add_argument(
+        "--legacy-samples",
+        dest="legacy_samples",
+        type=int,
+        help="number of samples to filter with the previous approach",
+    )
+
+    parser.set_defaults(samples=1000000, cherrypicked=10000, legacy_samples=10000)
+
+    args = parser.parse_args()
+
+    run(args.samples, args.cherrypicked, args.legacy_samples)
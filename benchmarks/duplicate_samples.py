@@ -0,0 +1,128 @@
+"""
+Compares the rate at which the samples of create plate messages are checked for duplicates in mongo using a single $in
+on the root sample ID, matched on a set of (lab ID, root sample ID, RNA ID, result) keys, against the previous approach:
+an $or with a clause per sample, with every duplicate found compared against every sample in the message.
+
+This needs the mongo database in the config to be available, e.g. the mongo container from docker-compose.yml. The
+samples are written to a scratch collection, which is dropped before and after each run.
+
+To run:
+
+    SETTINGS_MODULE=crawler.config.test python -m benchmarks.duplicate_samples --existing 100000
+"""
+
+import argparse
+import time
+from typing import Any, Callable, List, Mapping, Tuple, cast
+
+import pymongo
+from lab_share_lib.config_readers import get_config
+from pymongo.collection import Collection
+
+from crawler.constants import FIELD_MONGO_LAB_ID, FIELD_MONGO_RESULT, FIELD_MONGO_RNA_ID, FIELD_MONGO_ROOT_SAMPLE_ID
+from crawler.db.mongo import create_mongo_client, get_mongo_db
+from crawler.helpers.db_helpers import samples_filtered_for_duplicates_in_mongo
+from crawler.types import Config
+
+BENCHMARK_COLLECTION = "benchmark_duplicate_samples"
+
+# the sizes of message to check, from a single sample up to four full 96 well plates
+MESSAGE_SIZES = (1, 8, 24, 96, 192, 384)
+
+
+def synthetic_samples(start: int, count: int) -> List[Mapping[str, Any]]:
+    return [
+        {
+            FIELD_MONGO_LAB_ID: "AP",
+            FIELD_MONGO_ROOT_SAMPLE_ID: f"RSID-{i:08}",
+            FIELD_MONGO_RNA_ID: f"AP-rna-{i // 96:08}_{i % 96:02}",
+            FIELD_MONGO_RESULT: "Positive",
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def legacy_samples_filtered_for_duplicates_in_mongo(
+    samples_collection: Collection, samples: List[Mapping[str, Any]]
+) -> List[Mapping[str, Any]]:
+    """The previous implementation of finding the duplicate samples, kept here to compare against."""
+    dup_query = {
+        "$or": [
+            {
+                FIELD_MONGO_LAB_ID: sample[FIELD_MONGO_LAB_ID],
+                FIELD_MONGO_ROOT_SAMPLE_ID: sample[FIELD_MONGO_ROOT_SAMPLE_ID],
+                FIELD_MONGO_RNA_ID: sample[FIELD_MONGO_RNA_ID],
+                FIELD_MONGO_RESULT: sample[FIELD_MONGO_RESULT],
+            }
+            for sample in samples
+        ]
+    }
+
+    return [
+        sample
+        for dup_sample in samples_collection.find(dup_query)
+        for sample in samples
+        if sample[FIELD_MONGO_LAB_ID] == dup_sample[FIELD_MONGO_LAB_ID]
+        and sample[FIELD_MONGO_ROOT_SAMPLE_ID] == dup_sample[FIELD_MONGO_ROOT_SAMPLE_ID]
+        and sample[FIELD_MONGO_RNA_ID] == dup_sample[FIELD_MONGO_RNA_ID]
+        and sample[FIELD_MONGO_RESULT] == dup_sample[FIELD_MONGO_RESULT]
+    ]
+
+
+def samples_per_second(samples: int, repeats: int, func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+
+    return samples * repeats / (time.perf_counter() - start)
+
+
+def run(existing_count: int, repeats: int) -> None:
+    config, _ = cast(Tuple[Config, str], get_config(""))
+
+    with create_mongo_client(config) as client:
+        database = get_mongo_db(config, client)
+        database.drop_collection(BENCHMARK_COLLECTION)
+        samples_collection = database[BENCHMARK_COLLECTION]
+
+        try:
+            # the same compound unique index as on the samples collection
+            samples_collection.create_index(
+                [
+                    (FIELD_MONGO_ROOT_SAMPLE_ID, pymongo.ASCENDING),
+                    (FIELD_MONGO_RNA_ID, pymongo.ASCENDING),
+                    (FIELD_MONGO_RESULT, pymongo.ASCENDING),
+                    (FIELD_MONGO_LAB_ID, pymongo.ASCENDING),
+                ],
+                unique=True,
+            )
+            samples_collection.insert_many(synthetic_samples(0, existing_count))
+
+            print(f"checking messages for duplicates among {existing_count:,} samples:")
+            for size in MESSAGE_SIZES:
+                # half of each message is already in mongo, so both the query and the matching have work to do
+                samples = synthetic_samples(existing_count - size // 2, size)
+
+                legacy_rate = samples_per_second(
+                    size, repeats, lambda: legacy_samples_filtered_for_duplicates_in_mongo(samples_collection, samples)
+                )
+                rate = samples_per_second(
+                    size, repeats, lambda: samples_filtered_for_duplicates_in_mongo(samples_collection, samples)
+                )
+
+                print(f"  {size:>3} samples: $or {legacy_rate:,.0f} samples/s, $in {rate:,.0f} samples/s")
+        finally:
+            database.drop_collection(BENCHMARK_COLLECTION)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark checking the samples of a message for duplicates")
+
+    parser.add_argument("--existing", dest="existing", type=int, help="number of samples already in mongo")
+    parser.add_argument("--repeats", dest="repeats", type=int, help="number of times each message size is checked")
+
+    parser.set_defaults(existing=100000, repeats=100)
+
+    args = parser.parse_args()
+
+    run(args.existing, args.repeats)
@@ -0,0 +1,149 @@
+"""
+Compares the rate at which CSV rows are filtered and parsed using the header plan against the previous approach, which
+matched every column of every row against the channel header regexes.
+
+To run:
+
+    python -m benchmarks.header_plan --rows 100000
+"""
+
+import argparse
+import re
+import time
+from csv import DictReader
+from io import StringIO
+from typing import Callable, List, Tuple, cast
+from unittest.mock import patch
+
+from lab_share_lib.config_readers import get_config
+
+from crawler.constants import (
+    FIELD_DATE_TESTED,
+    FIELD_LAB_ID,
+    FIELD_PICK_RESULT,
+    FIELD_RESULT,
+    FIELD_RNA_ID,
+    FIELD_RNA_PCR_ID,
+    FIELD_ROOT_SAMPLE_ID,
+    FIELD_VIRAL_PREP_ID,
+    IGNORED_HEADERS,
+)
+from crawler.file_processing import Centre, CentreFile
+from crawler.types import Config, CSVRow, ModifiedRow
+
+# the channel columns are written the way some of the centres write them, rather than using the field names
+HEADERS = [
+    FIELD_ROOT_SAMPLE_ID,
+    FIELD_VIRAL_PREP_ID,
+    FIELD_RNA_ID,
+    FIELD_RNA_PCR_ID,
+    FIELD_RESULT,
+    FIELD_DATE_TESTED,
+    FIELD_LAB_ID,
+    *(f"CH{channel} - {word}" for channel in range(1, 5) for word in ("Target", "Result", "Cq")),
+    FIELD_PICK_RESULT,
+]
+
+
+def synthetic_csv(rows: int) -> StringIO:
+    csvfile = StringIO()
+    csvfile.write(",".join(HEADERS) + "\n")
+
+    for i in range(rows):
+        well = f"{'ABCDEFGH'[i % 8]}{(i // 8) % 12 + 1:02}"
+        csvfile.write(
+            f"RSID-{i:08},AP-kfr-{i:08}_{well},AP-rna-{i // 96:08}_{well},CF{i:08}_{well},Positive,"
+            "2020-07-20 07:54:34 UTC,AP,ORF1ab,Positive,12.46,N gene,Positive,13.24,S gene,Negative,,"
+            "MS2,Positive,24.98,Good pick\n"
+        )
+
+    csvfile.seek(0)
+
+    return csvfile
+
+
+def legacy_filtered_row(centre_file: CentreFile, row: CSVRow, line_number: int) -> ModifiedRow:
+    """The previous implementation of CentreFile.filtered_row, kept here to compare against."""
+    modified_row: ModifiedRow = {}
+    seen_headers: List[str] = []
+
+    if centre_file.config.ADD_LAB_ID:
+        centre_file.determine_lab_id(row, line_number, modified_row)
+
+    for key in centre_file.ACCEPTED_FIELDS:
+        if key in row:
+            seen_headers.append(key)
+            modified_row[key] = row[key].strip() if type(row[key]) is str else row[key]
+
+    for channel_field, regex in centre_file.get_channel_headers_mapping().items():
+        pattern = re.compile(regex, re.IGNORECASE)
+
+        for csv_field in row:
+            if csv_field in seen_headers:
+                continue
+
+            if pattern.match(csv_field):
+                seen_headers.append(csv_field)
+
+                if row[csv_field]:
+                    modified_row[channel_field] = row[csv_field].strip()
+
+    pattern = re.compile(r"^unknown$", re.IGNORECASE)
+    for channel_field_header in centre_file.get_channel_headers_mapping():
+        if pattern.match(str(row.get(channel_field_header))):
+            modified_row[channel_field_header] = None
+
+    unexpected_headers = list(row.keys() - seen_headers - IGNORED_HEADERS)
+
+    if len(unexpected_headers) > 0:
+        centre_file.logging_collection.add_error("TYPE 13", f"Unexpected headers, line: {line_number}")
+
+    return modified_row
+
+
+def rows_per_second(rows: int, func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+
+    return rows / (time.perf_counter() - start)
+
+
+def run(rows: int) -> None:
+    config, _ = cast(Tuple[Config, str], get_config(""))
+    centre = Centre(config, config.CENTRES[0])
+
+    csv_rows = list(DictReader(synthetic_csv(rows)))
+
+    def filter_rows(centre_file: CentreFile) -> Callable[[], object]:
+        return lambda: [centre_file.filtered_row(row, line_number) for line_number, row in enumerate(csv_rows, 2)]
+
+    def parse_rows(centre_file: CentreFile) -> Callable[[], object]:
+        return lambda: centre_file.parse_and_format_file_rows(DictReader(synthetic_csv(rows)))
+
+    for name, benchmark in (("filtered_row", filter_rows), ("parse_and_format_file_rows", parse_rows)):
+        centre_file = CentreFile("benchmark.csv", centre)
+        with patch.object(
+            centre_file,
+            "filtered_row",
+            side_effect=lambda row, line_number: legacy_filtered_row(centre_file, row, line_number),
+        ):
+            legacy_rate = rows_per_second(rows, benchmark(centre_file))
+
+        header_plan_rate = rows_per_second(rows, benchmark(CentreFile("benchmark.csv", centre)))
+
+        print(
+            f"{name}: {legacy_rate:,.0f} rows/s per-row regexes, {header_plan_rate:,.0f} rows/s header plan "
+            f"({header_plan_rate / legacy_rate:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark filtering the CSV rows using the header plan")
+
+    parser.add_argument("--rows", dest="rows", type=int, help="number of rows in the synthetic file")
+
+    parser.set_defaults(rows=100000)
+
+    args = parser.parse_args()
+
+    run(args.rows)
@@ -0,0 +1,130 @@
+"""
+Compares the rate at which samples are inserted and then updated in the MLWH lighthouse_sample table using multi-row
+INSERT statements, with and without a staging table, against the previous approach: resetting the is_current flags for
+all the samples up front, then running executemany on SQL_MLWH_MULTIPLE_INSERT in batches of 15000.
+
+This needs the MLWH database in the config to be available, e.g. the MySQL container from docker-compose.yml set up
+with setup_test_db.py. The lighthouse_sample table is truncated before each run, so do not point it at real data.
+
+To run:
+
+    SETTINGS_MODULE=crawler.config.test python -m benchmarks.mlwh_upsert --rows 100000
+"""
+
+import argparse
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List, Sequence, Tuple, cast
+
+from lab_share_lib.config_readers import get_config
+from mysql.connector.connection_cext import MySQLConnectionAbstract
+from mysql.connector.types import MySQLConvertibleType
+
+from crawler.constants import MLWH_RNA_ID, MLWH_TABLE_NAME
+from crawler.db.mysql import create_mysql_connection, reset_is_current_flags, run_mysql_multi_row_upsert
+from crawler.helpers.general_helpers import set_is_current_on_mysql_samples
+from crawler.sql_queries import MLWH_MULTI_ROW_INSERT_COLUMNS, SQL_MLWH_MULTIPLE_INSERT
+from crawler.types import Config
+
+Samples = Sequence[Dict[str, MySQLConvertibleType]]
+
+
+def synthetic_samples(rows: int) -> Samples:
+    now = datetime.now(tz=timezone.utc)
+    samples = []
+
+    for i in range(rows):
+        well = f"{'ABCDEFGH'[i % 8]}{(i // 8) % 12 + 1}"
+        sample: Dict[str, MySQLConvertibleType] = {column: None for column in MLWH_MULTI_ROW_INSERT_COLUMNS}
+        sample.update(
+            {
+                "mongodb_id": f"{i:024x}",
+                "root_sample_id": f"RSID-{i:08}",
+                "cog_uk_id": f"TEST-{i:08X}",
+                "rna_id": f"AP-rna-{i // 96:08}_{well}",
+                "plate_barcode": f"AP-rna-{i // 96:08}",
+                "coordinate": well,
+                "result": "Positive",
+                "date_tested": now,
+                "source": "Alderley",
+                "lab_id": "AP",
+                "ch1_target": "ORF1ab",
+                "ch1_result": "Positive",
+                "ch1_cq": Decimal("12.46"),
+                "filtered_positive": True,
+                "filtered_positive_version": "v3",
+                "filtered_positive_timestamp": now,
+                "lh_sample_uuid": f"00000000-0000-0000-0000-{i:012}",
+                "lh_source_plate_uuid": f"00000000-0000-0000-0001-{i // 96:012}",
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+        samples.append(sample)
+
+    return set_is_current_on_mysql_samples(cast(List[Dict[str, str]], samples))
+
+
+def legacy_upsert(mysql_conn: MySQLConnectionAbstract, values: Samples) -> None:
+    """The previous implementation of writing samples to the MLWH, kept here to compare against."""
+    cursor = mysql_conn.cursor()
+    try:
+        reset_is_current_flags(cursor, [sample[MLWH_RNA_ID] for sample in values])
+
+        for index in range(0, len(values), 15000):
+            cursor.executemany(SQL_MLWH_MULTIPLE_INSERT, values[index : index + 15000])  # noqa: E203
+            mysql_conn.commit()
+
+        mysql_conn.commit()
+    finally:
+        cursor.close()
+
+
+def truncate_lighthouse_sample(mysql_conn: MySQLConnectionAbstract) -> None:
+    cursor = mysql_conn.cursor()
+    cursor.execute(f"TRUNCATE TABLE {MLWH_TABLE_NAME}")
+    mysql_conn.commit()
+    cursor.close()
+
+
+def rows_per_second(rows: int, func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+
+    return rows / (time.perf_counter() - start)
+
+
+def run(rows: int) -> None:
+    config, _ = cast(Tuple[Config, str], get_config(""))
+    samples = synthetic_samples(rows)
+
+    upserts: Dict[str, Callable[[MySQLConnectionAbstract], None]] = {
+        "executemany": lambda conn: legacy_upsert(conn, samples),
+        "multi-row": lambda conn: run_mysql_multi_row_upsert(conn, samples),
+        "staging table": lambda conn: run_mysql_multi_row_upsert(conn, samples, use_staging_table=True),
+    }
+
+    with closing(create_mysql_connection(config, readonly=False)) as mysql_conn:
+        for name, upsert in upserts.items():
+            truncate_lighthouse_sample(mysql_conn)
+
+            insert_rate = rows_per_second(rows, lambda: upsert(mysql_conn))
+            update_rate = rows_per_second(rows, lambda: upsert(mysql_conn))
+
+            print(f"{name}: {insert_rate:,.0f} rows/s inserting, {update_rate:,.0f} rows/s updating")
+
+        truncate_lighthouse_sample(mysql_conn)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark writing samples to the MLWH")
+
+    parser.add_argument("--rows", dest="rows", type=int, help="number of samples to write")
+
+    parser.set_defaults(rows=100000)
+
+    args = parser.parse_args()
+
+    run(args.rows)
@@ -10,9 +10,12 @@ from flask_apscheduler import APScheduler
 from lab_share_lib.config_readers import get_config
 from lab_share_lib.rabbit.rabbit_stack import RabbitStack
 
-from crawler.constants import SCHEDULER_JOB_ID_RUN_CRAWLER
-from crawler.db.mongo import create_mongo_client, get_mongo_db
-from crawler.helpers.db_helpers import ensure_mongo_collections_indexed
+from crawler.constants import SCHEDULER_JOB_ID_REFILL_COG_UK_ID_POOLS, SCHEDULER_JOB_ID_RUN_CRAWLER
+from crawler.dart_export_worker import DartExportWorker
+from crawler.db.mongo import get_mongo_db, get_shared_mongo_client
+from crawler.helpers.db_helpers import ensure_mongo_collections_indexed, init_connection_pools
+from crawler.priority_samples_worker import PrioritySamplesWorker
+from crawler.rabbit.concurrent_consumer import ConcurrentConsumer
 
 scheduler = APScheduler()
 
@@ -34,18 +37,23 @@ def create_app(config_object: Optional[str] = None) -> flask.Flask:
 
     config, _ = get_config(config_object or "")
 
-    rabbit_stack = RabbitStack(config_object)
+    rabbit_consumer = ConcurrentConsumer(config) if config.RABBITMQ_CONCURRENT_CONSUMER else RabbitStack(config_object)
 
+    init_connection_pools(config)
     setup_mongo_indexes(config)
-    start_rabbit_consumer(rabbit_stack, config)
+    start_rabbit_consumer(rabbit_consumer, config)
+    start_priority_samples_worker(config)
+    start_dart_export_worker(config)
+    schedule_cog_uk_id_pools_refill(app, config)
     setup_routes(app)
 
     @app.get("/health")
     def _health_check():
         """Checks the health of Crawler by checking that there is a scheduled job to run Crawler periodically and an
-        instance of the Rabbit Stack subscribed to the message queue or waiting to reconnect.
+        instance of the Rabbit Stack, or of the concurrent consumer, subscribed to the message queue or waiting to
+        reconnect.
         """
-        if scheduler.get_job(SCHEDULER_JOB_ID_RUN_CRAWLER) and rabbit_stack.is_healthy:
+        if scheduler.get_job(SCHEDULER_JOB_ID_RUN_CRAWLER) and rabbit_consumer.is_healthy:
             return "Crawler is working", HTTPStatus.OK
 
         return "Crawler is not working correctly", HTTPStatus.INTERNAL_SERVER_ERROR
@@ -54,18 +62,54 @@ def create_app(config_object: Optional[str] = None) -> flask.Flask:
 
 
 def setup_mongo_indexes(config):
-    with create_mongo_client(config) as client:
-        db = get_mongo_db(config, client)
-        ensure_mongo_collections_indexed(db)
+    db = get_mongo_db(config, get_shared_mongo_client(config))
+    ensure_mongo_collections_indexed(db)
 
 
-def start_rabbit_consumer(rabbit_stack, config):
+def start_rabbit_consumer(rabbit_consumer, config):
     # Flask in debug mode spawns a child process so that it can restart the process each time your code changes,
     # the new child process initializes and starts a new consumer causing more than one to exist.
     if (flask.helpers.get_debug_flag() and not werkzeug.serving.is_running_from_reloader()) or not config.RABBITMQ_HOST:
         return
 
-    rabbit_stack.bring_stack_up()
+    if isinstance(rabbit_consumer, ConcurrentConsumer):
+        rabbit_consumer.start()
+    else:
+        rabbit_consumer.bring_stack_up()
+
+
+def start_priority_samples_worker(config):
+    # as for the rabbit consumer, only the reloaded child process of Flask in debug mode starts a worker
+    if (
+        flask.helpers.get_debug_flag() and not werkzeug.serving.is_running_from_reloader()
+    ) or not config.PRIORITY_SAMPLES_WORKER:
+        return
+
+    PrioritySamplesWorker(config, get_mongo_db(config, get_shared_mongo_client(config))).start()
+
+
+def start_dart_export_worker(config):
+    # as for the rabbit consumer, only the reloaded child process of Flask in debug mode starts a worker
+    if (
+        flask.helpers.get_debug_flag() and not werkzeug.serving.is_running_from_reloader()
+    ) or not config.DART_EXPORT_OUTBOX:
+        return
+
+    DartExportWorker(config, get_mongo_db(config, get_shared_mongo_client(config))).start()
+
+
+def schedule_cog_uk_id_pools_refill(app, config):
+    # the pools are only drawn from, so only need topping up, when the crawler is configured to use them
+    if not app.config.get("SCHEDULER_RUN", False) or not config.COG_UK_ID_POOL:
+        return
+
+    scheduler.add_job(
+        id=SCHEDULER_JOB_ID_REFILL_COG_UK_ID_POOLS,
+        func="crawler.jobs.apscheduler:scheduled_cog_uk_id_pools_refill",
+        trigger="interval",
+        minutes=5,
+        replace_existing=True,
+    )
 
 
 def setup_routes(app):
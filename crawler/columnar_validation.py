@@ -0,0 +1,293 @@
+import re
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+from bson.decimal128 import Decimal128
+from pandas import DataFrame, Series
+
+from crawler.constants import (
+    ALLOWED_CH_RESULT_VALUES,
+    ALLOWED_CH_TARGET_VALUES,
+    ALLOWED_RESULT_VALUES,
+    DATE_TESTED_REGEXES,
+    FIELD_CH1_CQ,
+    FIELD_CH1_RESULT,
+    FIELD_CH1_TARGET,
+    FIELD_CH2_CQ,
+    FIELD_CH2_RESULT,
+    FIELD_CH2_TARGET,
+    FIELD_CH3_CQ,
+    FIELD_CH3_RESULT,
+    FIELD_CH3_TARGET,
+    FIELD_CH4_CQ,
+    FIELD_CH4_RESULT,
+    FIELD_CH4_TARGET,
+    FIELD_DATE_TESTED,
+    FIELD_RESULT,
+    FIELD_ROOT_SAMPLE_ID,
+    MAX_CQ_VALUE,
+    MIN_CQ_VALUE,
+    RESULT_VALUE_POSITIVE,
+)
+from crawler.types import ModifiedRow
+
+CHANNEL_TARGET_FIELDS: Tuple[str, ...] = (FIELD_CH1_TARGET, FIELD_CH2_TARGET, FIELD_CH3_TARGET, FIELD_CH4_TARGET)
+CHANNEL_RESULT_FIELDS: Tuple[str, ...] = (FIELD_CH1_RESULT, FIELD_CH2_RESULT, FIELD_CH3_RESULT, FIELD_CH4_RESULT)
+CHANNEL_CQ_FIELDS: Tuple[str, ...] = (FIELD_CH1_CQ, FIELD_CH2_CQ, FIELD_CH3_CQ, FIELD_CH4_CQ)
+
+VALIDATED_FIELDS: Tuple[str, ...] = (
+    FIELD_ROOT_SAMPLE_ID,
+    FIELD_RESULT,
+    FIELD_DATE_TESTED,
+    *CHANNEL_TARGET_FIELDS,
+    *CHANNEL_RESULT_FIELDS,
+    *CHANNEL_CQ_FIELDS,
+)
+
+# Plain decimal numbers (e.g. 23.12345678) that are short enough to always fit in a Decimal128. These can be validated
+# and range checked without being converted; anything else (e.g. 1E+2, NaN) is converted to check it.
+PLAIN_DECIMAL_REGEX = r"^[+-]?(\d+(\.\d*)?|\.\d+)$"
+PLAIN_DECIMAL_MAX_LENGTH = 34
+
+# (error type, message) for a row that failed validation, or None when the row is rejected without logging an error
+RowError = Optional[Tuple[str, str]]
+
+
+class ColumnarValidation(NamedTuple):
+    # the rows that failed validation, by position in the batch
+    errors: Dict[int, RowError]
+    # the Decimal128 for each of the channel Cq values in the valid rows
+    cq_values: Dict[str, Decimal128]
+    # the date time components for each of the date tested values in the valid rows
+    date_tested_parts: Dict[str, Dict[str, str]]
+
+
+def is_present(column: Series) -> Series:
+    """Equivalent of checking a value from the row is truthy: the values are either None or strings."""
+    return column.notna() & (column != "")
+
+
+def to_decimal128(value: str) -> Optional[Decimal128]:
+    """Converts a channel Cq value to a Decimal128, as CentreFile.convert_and_validate_cq_value does.
+
+    Returns:
+        Optional[Decimal128] -- the converted value, or None if it is not a valid number
+    """
+    try:
+        # pymongo requires Decimal128 format for numbers rather than normal Decimal
+        return Decimal128(str(value))
+    except Exception:
+        return None
+
+
+def is_within_cq_range(num: Decimal128) -> bool:
+    """The same check as CentreFile.is_within_cq_range, for the values which cannot be range checked as floats."""
+    min_compare = MIN_CQ_VALUE.compare(num.to_decimal())
+    is_within_min = (min_compare != Decimal("1")) and not min_compare.is_nan()
+
+    max_compare = MAX_CQ_VALUE.compare(num.to_decimal())
+    is_within_max = (max_compare != Decimal("-1")) and not max_compare.is_nan()
+
+    return is_within_min and is_within_max
+
+
+class ColumnarValidator:
+    """Validates a batch of filtered rows in the same way as CentreFile.parse_and_format_row does one row at a time,
+    but evaluating each rule for the whole batch at once. The rules are evaluated in the same order as the row by row
+    checks and only the first rule failed by a row is reported, so each invalid row gets the same TYPE 16-21 or TYPE 27
+    error (or none, for a root sample ID of "empty") as it would row by row.
+    """
+
+    def __init__(self, rows: List[ModifiedRow], line_numbers: List[int]):
+        """Initialiser for the validator of a batch of rows.
+
+        Arguments:
+            rows {List[ModifiedRow]} -- the filtered rows to validate
+            line_numbers {List[int]} -- the line number within the file of each row
+        """
+        self.frame = DataFrame(rows, columns=VALIDATED_FIELDS, dtype=object)
+        self.line_numbers = line_numbers
+
+        self.failed = Series(False, index=self.frame.index)
+        self.errors: Dict[int, RowError] = {}
+
+        self.cq_values: Dict[str, Decimal128] = {}
+        self.cq_plain: Dict[str, Series] = {}
+
+    def validate(self) -> ColumnarValidation:
+        """Runs each of the rules over the batch, in the same order as CentreFile.parse_and_format_row.
+
+        Returns:
+            ColumnarValidation -- the errors for the invalid rows and the converted values for the valid rows
+        """
+        # ---- convert data types for channel fields ----
+        self.check_cq_values_convert()
+
+        # ---- perform various validations on row values ----
+        self.check_root_sample_ids()
+        self.check_date_tested_formats()
+        self.check_result_values()
+        self.check_channel_values(CHANNEL_TARGET_FIELDS, ALLOWED_CH_TARGET_VALUES, "TYPE 17")
+        self.check_channel_values(CHANNEL_RESULT_FIELDS, ALLOWED_CH_RESULT_VALUES, "TYPE 18")
+        self.check_cq_values_in_range()
+        self.check_positive_results_match_channel_results()
+
+        return ColumnarValidation(self.errors, self.converted_cq_values(), self.date_tested_parts())
+
+    def reject(self, mask: Series, error: Optional[Callable[[int], Tuple[str, str]]] = None) -> None:
+        """Records the rows matching the mask as failed, unless they have already failed an earlier rule.
+
+        Arguments:
+            mask {Series} -- the rows failing the rule
+            error {Optional[Callable[[int], Tuple[str, str]]]} -- builds the error for the row at a position, or None
+                to reject the rows without an error
+        """
+        rejected = mask & ~self.failed
+        for position in rejected[rejected].index:
+            self.errors[position] = error(position) if error else None
+
+        self.failed = self.failed | rejected
+
+    def value(self, field: str, position: int) -> Any:
+        return self.frame.at[position, field]
+
+    def check_cq_values_convert(self) -> None:
+        for field in CHANNEL_CQ_FIELDS:
+            column = self.frame[field]
+            present = is_present(column)
+
+            plain = present & column.str.match(PLAIN_DECIMAL_REGEX, na=False)
+            plain &= column.str.len() <= PLAIN_DECIMAL_MAX_LENGTH
+            self.cq_plain[field] = plain
+
+            # the values which are not plain decimals are converted one by one to find out whether they are valid
+            for cq_value in column[present & ~plain].unique():
+                if (converted := to_decimal128(cq_value)) is not None:
+                    self.cq_values[cq_value] = converted
+
+            self.reject(
+                present & ~plain & ~column.isin(list(self.cq_values)),
+                lambda position: (
+                    "TYPE 19",
+                    f"{field} invalid, line: {self.line_numbers[position]}, value: {self.value(field, position)}",
+                ),
+            )
+
+    def check_root_sample_ids(self) -> None:
+        root_sample_ids = self.frame[FIELD_ROOT_SAMPLE_ID].map(str).str.strip()
+
+        self.reject(root_sample_ids.str.match(r"^empty$", flags=re.IGNORECASE))
+
+    def check_date_tested_formats(self) -> None:
+        date_tested = self.frame[FIELD_DATE_TESTED]
+
+        # the date could be an empty string
+        valid = ~is_present(date_tested)
+        for pattern in DATE_TESTED_REGEXES:
+            valid |= date_tested.map(str).str.match(pattern)
+
+        self.reject(
+            ~valid,
+            lambda position: (
+                "TYPE 27",
+                f"{FIELD_DATE_TESTED} has an unknown date format, line: {self.line_numbers[position]}",
+            ),
+        )
+
+    def check_result_values(self) -> None:
+        self.reject(
+            ~self.frame[FIELD_RESULT].isin(ALLOWED_RESULT_VALUES),
+            lambda position: (
+                "TYPE 16",
+                f"{FIELD_RESULT} invalid, line: {self.line_numbers[position]}, "
+                f"result: {self.value(FIELD_RESULT, position)}",
+            ),
+        )
+
+    def check_channel_values(self, fields: Tuple[str, ...], allowed_values: Tuple[str, ...], error_type: str) -> None:
+        for field in fields:
+            column = self.frame[field]
+
+            self.reject(
+                column.notna() & ~column.isin(allowed_values),
+                lambda position: (
+                    error_type,
+                    f"{field} invalid, line: {self.line_numbers[position]}, result: {self.value(field, position)}",
+                ),
+            )
+
+    def check_cq_values_in_range(self) -> None:
+        for field in CHANNEL_CQ_FIELDS:
+            column = self.frame[field]
+            present = is_present(column) & ~self.failed
+
+            # A plain decimal which is strictly within the range once converted to a float is also within it as a
+            # decimal. The rest (out of range, on a bound or not plain decimals) are few, so are compared one by one.
+            as_float = pd.to_numeric(column.where(self.cq_plain[field] & present), errors="coerce")
+            in_range = (as_float > float(MIN_CQ_VALUE)) & (as_float < float(MAX_CQ_VALUE))
+
+            for position in in_range[present & ~in_range].index:
+                in_range[position] = is_within_cq_range(self.cq_value(field, position))
+
+            self.reject(
+                present & ~in_range,
+                lambda position: (
+                    "TYPE 20",
+                    f"{field} not in range ({MIN_CQ_VALUE}, {MAX_CQ_VALUE}), "
+                    f"line: {self.line_numbers[position]}, result: {self.cq_value(field, position)}",
+                ),
+            )
+
+    def check_positive_results_match_channel_results(self) -> None:
+        channel_results = self.frame[list(CHANNEL_RESULT_FIELDS)]
+        channel_results_present = channel_results.apply(is_present).sum(axis=1)
+        channel_results_positive = (channel_results == RESULT_VALUE_POSITIVE).sum(axis=1)
+
+        self.reject(
+            (self.frame[FIELD_RESULT] == RESULT_VALUE_POSITIVE)
+            & (channel_results_present > 0)
+            & (channel_results_positive == 0),
+            lambda position: (
+                "TYPE 21",
+                "Positive Result does not match to CT Channel Results (none are positive), "
+                f"line: {self.line_numbers[position]}",
+            ),
+        )
+
+    def cq_value(self, field: str, position: int) -> Decimal128:
+        return self.cq_values.get(cq_value := self.value(field, position)) or Decimal128(cq_value)
+
+    def converted_cq_values(self) -> Dict[str, Decimal128]:
+        """Converts the channel Cq values of the valid rows, once for each distinct value."""
+        for field in CHANNEL_CQ_FIELDS:
+            for cq_value in self.frame[field][self.cq_plain[field] & ~self.failed].unique():
+                self.cq_values[cq_value] = Decimal128(cq_value)
+
+        return self.cq_values
+
+    def date_tested_parts(self) -> Dict[str, Dict[str, str]]:
+        """Splits the date tested values of the valid rows into their components, once for each distinct value."""
+        date_tested = self.frame[FIELD_DATE_TESTED]
+
+        date_tested_parts = {}
+        for date_tested_value in date_tested[is_present(date_tested) & ~self.failed].unique():
+            for pattern in DATE_TESTED_REGEXES:
+                if match := re.match(pattern, str(date_tested_value)):
+                    date_tested_parts[date_tested_value] = match.groupdict()
+                    break
+
+        return date_tested_parts
+
+
+def validate_rows(rows: List[ModifiedRow], line_numbers: List[int]) -> ColumnarValidation:
+    """Validates a batch of filtered rows using a ColumnarValidator.
+
+    Arguments:
+        rows {List[ModifiedRow]} -- the filtered rows to validate
+        line_numbers {List[int]} -- the line number within the file of each row
+
+    Returns:
+        ColumnarValidation -- the errors for the invalid rows and the converted values for the valid rows
+    """
+    return ColumnarValidator(rows, line_numbers).validate()
@@ -12,6 +12,8 @@ from crawler.constants import SCHEDULER_JOB_ID_RUN_CRAWLER
 ###
 DIR_DOWNLOADED_DATA = "data/sftp_files/"
 ADD_LAB_ID = False
+# validate the rows of each file in columnar batches using pandas, rather than one row at a time
+COLUMNAR_VALIDATION = False
 
 ###
 # cherrypicker test data options
@@ -27,6 +29,23 @@ CPTD_FEEDBACK_WAIT_TIME = 30
 USE_SFTP = True
 KEEP_FILES = False
 ADD_TO_DART = True
+# number of centres to process concurrently; 1 processes the centres one after another
+WORKERS = 1
+# drop the rows of a file already in mongo before inserting the rest, with one query per chunk of rows on their plate
+# barcodes, rather than sending every row and leaving the unique index to reject those already there; this helps
+# centres which often send files again
+FILTER_EXISTING_SAMPLES = False
+
+###
+# priority samples
+###
+# watch the priority_samples collection and prioritise new priority samples as they arrive, rather than only once at
+# the end of each crawler run; this needs the mongo server to be a replica set, otherwise the collection is polled
+PRIORITY_SAMPLES_WORKER = False
+# maximum number of priority samples prioritised together when they arrive
+PRIORITY_SAMPLES_WORKER_BATCH_SIZE = 500
+# seconds between polls of the collection when it cannot be watched
+PRIORITY_SAMPLES_WORKER_POLL_INTERVAL = 60
 
 # If we're running in a container, then instead of localhost
 # we want host.docker.internal, you can specify this in the
@@ -40,6 +59,13 @@ ROOT_PASSWORD = os.environ.get("ROOT_PASSWORD", "")
 ###
 BARACODA_BASE_URL = f"http://{LOCALHOST}:7900"
 BARACODA_RETRY_ATTEMPTS = 3
+# draw the COG UK IDs for samples from a pool in mongo, rather than requesting them from Baracoda for each file; the
+# pool for each centre prefix is topped up when it falls below the low water mark by a scheduled job, which is only added
+# when this is enabled
+COG_UK_ID_POOL = False
+COG_UK_ID_POOL_SIZE = 20000
+COG_UK_ID_POOL_LOW_WATER_MARK = 5000
+COG_UK_ID_POOL_REFILL_BATCH_SIZE = 5000
 
 ###
 # Cherrytrack
@@ -51,6 +77,8 @@ CHERRYTRACK_BASE_URL = f"http://{LOCALHOST}:8000"
 ###
 MONGO_DB = "lighthouseDevelopmentDB"
 MONGO_URI = f"mongodb://{LOCALHOST}:27017/{MONGO_DB}?replicaSet=heron_rs"
+# the maximum number of connections in the pool of the MongoClient shared by the process
+MONGO_MAX_POOL_SIZE = 50
 
 
 ###
@@ -63,6 +91,9 @@ MLWH_DB_RO_USER = "root"
 MLWH_DB_RO_PASSWORD = ROOT_PASSWORD
 MLWH_DB_RW_USER = "root"
 MLWH_DB_RW_PASSWORD = ROOT_PASSWORD
+# load the samples into a temporary staging table and merge them into lighthouse_sample in a single transaction, rather
+# than writing them in batches which are committed one at a time
+MLWH_USE_STAGING_TABLE = False
 
 EVENTS_WH_DB = "event_warehouse_development"
 
@@ -75,6 +106,27 @@ DART_DB_PORT = 1433
 DART_DB_RW_USER = "sa"
 DART_DB_RW_PASSWORD = "MyS3cr3tPassw0rd"
 DART_DB_DRIVER = "{ODBC Driver 18 for SQL Server}"
+# record the DART export of each create plate message in an outbox in mongo, in the same transaction as its samples,
+# so the message is acknowledged without waiting for DART; a worker exports the plates in the outbox to DART
+DART_EXPORT_OUTBOX = False
+# maximum number of plates exported to DART together by the worker
+DART_EXPORT_WORKER_BATCH_SIZE = 50
+# seconds between checks of the outbox for plates to export
+DART_EXPORT_WORKER_POLL_INTERVAL = 10
+# number of times a plate is tried before its export is given up on and the failure recorded in an import record
+DART_EXPORT_MAX_ATTEMPTS = 5
+# seconds before a failed export is first retried; the delay doubles with each further attempt
+DART_EXPORT_RETRY_DELAY = 60
+
+###
+# MLWH and DART connection pools
+###
+# each pool hands out at most one connection at once for each thread which draws on it: the WORKERS processing
+# centres, the RABBITMQ_CONSUMER_WORKERS of the concurrent consumer (or the one of the lab share lib consumer) and the
+# DART export and priority samples workers when enabled; set this to allow more connections than that
+DB_POOL_MAX_SIZE = 4
+# seconds to wait for a connection when all of those in a pool are in use
+DB_POOL_TIMEOUT = 60
 
 ###
 # RabbitMQ details
@@ -96,6 +148,17 @@ RABBITMQ_CPTD_FEEDBACK_QUEUE = "cptd.heron.feedback"
 RABBITMQ_PUBLISH_RETRY_DELAY = 5
 RABBITMQ_PUBLISH_RETRIES = 36  # 3 minutes of retries
 
+# consume the CRUD queue with a pool of workers processing several messages at once, rather than one at a time through
+# the lab share lib consumer; messages for the same plate barcode or sample UUID are still processed in order
+RABBITMQ_CONCURRENT_CONSUMER = False
+# number of messages processed at once by the concurrent consumer
+RABBITMQ_CONSUMER_WORKERS = 4
+# number of messages delivered to the concurrent consumer before any is acknowledged; keep it at least
+# RABBITMQ_CONSUMER_WORKERS so each worker has a message to process
+RABBITMQ_PREFETCH_COUNT = 8
+# seconds to wait before the concurrent consumer reconnects after losing its connection or a processing error
+RABBITMQ_CONSUMER_RECONNECT_DELAY = 5
+
 ###
 # RedPanda details
 ###
@@ -111,6 +174,8 @@ SFTP_READ_PASSWORD = "pass"
 SFTP_READ_USERNAME = "foo"
 SFTP_WRITE_PASSWORD = "pass"
 SFTP_WRITE_USERNAME = "foo"
+# number of files downloaded from SFTP at once for a centre, each over its own channel of the connection
+SFTP_DOWNLOAD_WORKERS = 4
 
 ###
 # slack details
@@ -134,5 +199,5 @@ JOBS = [
         "day": "*",
         "hour": "*",
         "minute": "10/30",
-    }
+    },
 ]
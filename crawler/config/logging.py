@@ -7,44 +7,52 @@ LOGGING: Dict[str, Any] = {
         "colored": {
             "style": "{",
             "()": "colorlog.ColoredFormatter",
-            "format": "{asctime:<15} {name:<25}:{lineno:<3} {log_color}{levelname:<7} {message}",
+            "format": "{asctime:<15} {name:<25}:{lineno:<3} {log_color}{levelname:<7} {centre_context}{message}",
         },
         "colored_dev": {
             "style": "{",
             "()": "colorlog.ColoredFormatter",
-            "format": "{asctime:<15} {relative_path_and_lineno:<35} {log_color}{levelname:<7} {message}",
+            "format": (
+                "{asctime:<15} {relative_path_and_lineno:<35} {log_color}{levelname:<7} {centre_context}{message}"
+            ),
         },
         "verbose": {
             "style": "{",
-            "format": "{asctime:<15} {name:<45}:{lineno:<3} {levelname:<7} {message}",
+            "format": "{asctime:<15} {name:<45}:{lineno:<3} {levelname:<7} {centre_context}{message}",
         },
     },
     "filters": {
         "package_path": {
             "()": "crawler.utils.PackagePathFilter",
         },
+        "centre_context": {
+            "()": "crawler.utils.CentreContextFilter",
+        },
     },
     "handlers": {
         "colored_stream": {
             "level": "DEBUG",
             "class": "colorlog.StreamHandler",
             "formatter": "colored",
+            "filters": ["centre_context"],
         },
         "colored_stream_dev": {
             "level": "DEBUG",
             "class": "colorlog.StreamHandler",
             "formatter": "colored_dev",
-            "filters": ["package_path"],
+            "filters": ["package_path", "centre_context"],
         },
         "console": {
             "level": "INFO",
             "class": "logging.StreamHandler",
             "formatter": "verbose",
+            "filters": ["centre_context"],
         },
         "slack": {
             "level": "ERROR",
             "class": "crawler.utils.SlackHandler",
             "formatter": "verbose",
+            "filters": ["centre_context"],
             "token": "",
             "channel_id": "",
         },
@@ -17,6 +17,13 @@ ENABLE_CHERRYPICKER_ENDPOINTS = True
 
 CPTD_FEEDBACK_WAIT_TIME = 2
 
+###
+# Baracoda
+###
+COG_UK_ID_POOL_SIZE = 10
+COG_UK_ID_POOL_LOW_WATER_MARK = 5
+COG_UK_ID_POOL_REFILL_BATCH_SIZE = 4
+
 ###
 # SFTP details
 ###
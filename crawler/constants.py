@@ -6,6 +6,7 @@ from typing import Final, Set, Tuple
 # AP Scheduler Jobs
 ###
 SCHEDULER_JOB_ID_RUN_CRAWLER: Final[str] = "run_crawler"
+SCHEDULER_JOB_ID_REFILL_COG_UK_ID_POOLS: Final[str] = "refill_cog_uk_id_pools"
 
 ###
 # Logger names
@@ -41,6 +42,10 @@ COLLECTION_SAMPLES: Final[str] = "samples"
 COLLECTION_PRIORITY_SAMPLES: Final[str] = "priority_samples"
 COLLECTION_SOURCE_PLATES: Final[str] = "source_plates"
 COLLECTION_CHERRYPICK_TEST_DATA: Final[str] = "cherrypick_test_data"
+COLLECTION_FILE_CHECKSUMS: Final[str] = "file_checksums"
+COLLECTION_COG_UK_IDS: Final[str] = "cog_uk_ids"
+COLLECTION_MIGRATION_CHECKPOINTS: Final[str] = "migration_checkpoints"
+COLLECTION_DART_EXPORTS: Final[str] = "dart_exports"
 
 ###
 # CSV file column names
@@ -73,7 +78,11 @@ FIELD_PICK_RESULT: Final[str] = "PickResult"
 FIELD_ADD_TO_DART: Final[str] = "add_to_dart"
 FIELD_BARCODE: Final[str] = "barcode"
 FIELD_BARCODES: Final[str] = "barcodes"
+FIELD_BACKUP_DIR: Final[str] = "backup_dir"
+FIELD_BACKUP_FILE_NAME: Final[str] = "backup_file_name"
 FIELD_CENTRE_NAME: Final[str] = "name"
+FIELD_CHECKSUM: Final[str] = "checksum"
+FIELD_COG_UK_ID: Final[str] = "cog_uk_id"
 FIELD_COORDINATE: Final[str] = "coordinate"
 FIELD_CREATED_AT: Final[str] = "created_at"
 FIELD_EVE_CREATED: Final[str] = "_created"
@@ -84,6 +93,7 @@ FIELD_FILE_NAME: Final[str] = "file_name"
 FIELD_LH_SAMPLE_UUID: Final[str] = "lh_sample_uuid"
 FIELD_LH_SOURCE_PLATE_UUID: Final[str] = "lh_source_plate_uuid"
 FIELD_LINE_NUMBER: Final[str] = "line_number"
+FIELD_MONGO_CENTRE_NAME: Final[str] = "centre_name"
 FIELD_MONGO_COG_UK_ID: Final[str] = "COG UK ID"
 FIELD_MONGO_DATE_TESTED: Final[str] = "Date Tested"
 FIELD_MONGO_FILTERED_POSITIVE: Final[str] = "filtered_positive"
@@ -98,8 +108,10 @@ FIELD_MONGODB_ID: Final[str] = "_id"
 FIELD_MUST_SEQUENCE: Final[str] = "must_sequence"
 FIELD_PLATE_BARCODE: Final[str] = "plate_barcode"
 FIELD_PLATE_SPECS: Final[str] = "plate_specs"
+FIELD_PREFIX: Final[str] = "prefix"
 FIELD_PREFERENTIALLY_SEQUENCE: Final[str] = "preferentially_sequence"
 FIELD_PROCESSED: Final[str] = "processed"
+FIELD_RESERVATION_ID: Final[str] = "reservation_id"
 FIELD_SAMPLE_ID: Final[str] = "sample_id"
 FIELD_SOURCE: Final[str] = "source"
 FIELD_STATUS: Final[str] = "status"
@@ -110,6 +122,18 @@ FIELD_FILTERED_POSITIVE_TIMESTAMP: Final[str] = "filtered_positive_timestamp"
 FIELD_FILTERED_POSITIVE_VERSION: Final[str] = "filtered_positive_version"
 FIELD_FILTERED_POSITIVE: Final[str] = "filtered_positive"
 
+# migration checkpoint field names
+FIELD_CHECKPOINT_LAST_ID: Final[str] = "last_id"
+FIELD_CHECKPOINT_PARAMETERS: Final[str] = "parameters"
+
+# DART export outbox field names
+FIELD_DART_EXPORT_ATTEMPTS: Final[str] = "attempts"
+FIELD_DART_EXPORT_CENTRE_CONFIG: Final[str] = "centre_config"
+FIELD_DART_EXPORT_LAST_ERROR: Final[str] = "last_error"
+FIELD_DART_EXPORT_NEXT_ATTEMPT_AT: Final[str] = "next_attempt_at"
+FIELD_DART_EXPORT_SAMPLE_UUIDS: Final[str] = "sample_uuids"
+FIELD_DART_EXPORT_SAMPLES_INSERTED: Final[str] = "samples_inserted"
+
 # status field values
 FIELD_STATUS_PENDING: Final[str] = "pending"
 FIELD_STATUS_STARTED: Final[str] = "started"
@@ -138,6 +162,14 @@ TEST_DATA_ERROR_PLATE_CREATION_FAILED: Final[str] = (
 )
 
 
+###
+# priority samples
+###
+# the number of priority samples to mark as processed in one update, keeping the list of their sample IDs well within
+# the 16MB limit on the size of a MongoDB command
+PRIORITY_SAMPLES_UPDATE_CHUNK_SIZE: Final[int] = 10000
+
+
 ###
 # Baracoda error messages
 ###
@@ -182,6 +214,10 @@ MLWH_UPDATED_AT: Final[str] = "updated_at"
 MLWH_MUST_SEQUENCE: Final[str] = "must_sequence"
 MLWH_PREFERENTIALLY_SEQUENCE: Final[str] = "preferentially_sequence"
 MLWH_IS_CURRENT: Final[str] = "is_current"
+# the number of cherrypicked samples queries to run against the MLWH at once, each on its own connection
+CHERRYPICKED_SAMPLES_QUERY_WORKERS: Final[int] = 4
+# the number of positive samples the filtered positives migration reads, and writes, at once
+FILTERED_POSITIVES_MIGRATION_BATCH_SIZE: Final[int] = 10000
 
 # datetime formats
 MONGO_DATETIME_FORMAT: Final[str] = "%y%m%d_%H%M"
@@ -229,6 +265,12 @@ ALLOWED_CH_RESULT_VALUES: Final[Tuple[str, str, str, str]] = (
 MIN_CQ_VALUE: Final[Decimal] = Decimal("0.0")
 MAX_CQ_VALUE: Final[Decimal] = Decimal("100.0")
 
+# The accepted formats of the date tested, e.g. 2020-11-22 04:36:38 UTC or 19/07/2020 21:41
+DATE_TESTED_REGEXES: Final[Tuple[str, str]] = (
+    r"^(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})[ ]+(?P<time>[0-2]\d:[0-5]\d:[0-5]\d)([ ]+(?P<timezone_name>UTC)?)?$",  # noqa: E501
+    r"^(?P<day>\d{2})/(?P<month>\d{2})/(?P<year>\d{4})[ ]+(?P<time>[0-2]\d:[0-5]\d)$",
+)
+
 ###
 # Ignored but understood headers
 # These are headers we know about and can safely ignore; therefore, we do not need warnings for these
@@ -255,6 +297,8 @@ DART_EMPTY_VALUE: Final[str] = ""
 
 # DART others
 DART_SET_PROP_STATUS_SUCCESS: Final[int] = 0
+# the number of plates to fetch the states of in one query; SQL Server allows at most 2100 parameters
+DART_PLATE_STATES_CHUNK_SIZE: Final[int] = 1000
 
 ###
 # Cut off date for v0 and v1 filtered positive
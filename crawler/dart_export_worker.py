@@ -0,0 +1,243 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import pymongo
+from pymongo.database import Database
+
+from crawler.constants import (
+    CENTRE_KEY_BIOMEK_LABWARE_CLASS,
+    COLLECTION_DART_EXPORTS,
+    COLLECTION_IMPORTS,
+    COLLECTION_SAMPLES,
+    DART_STATE_PENDING,
+    FIELD_CREATED_AT,
+    FIELD_DART_EXPORT_ATTEMPTS,
+    FIELD_DART_EXPORT_CENTRE_CONFIG,
+    FIELD_DART_EXPORT_LAST_ERROR,
+    FIELD_DART_EXPORT_NEXT_ATTEMPT_AT,
+    FIELD_DART_EXPORT_SAMPLE_UUIDS,
+    FIELD_DART_EXPORT_SAMPLES_INSERTED,
+    FIELD_LH_SAMPLE_UUID,
+    FIELD_MONGO_MESSAGE_UUID,
+    FIELD_MONGO_SAMPLE_INDEX,
+    FIELD_MONGODB_ID,
+    FIELD_PLATE_BARCODE,
+    FIELD_STATUS,
+    FIELD_STATUS_FAILED,
+    FIELD_STATUS_PENDING,
+    FIELD_UPDATED_AT,
+)
+from crawler.db.dart import add_dart_plate_if_doesnt_exist, add_dart_plate_well_properties, create_dart_sql_server_conn
+from crawler.db.mongo import get_mongo_collection
+from crawler.helpers.db_helpers import create_mongo_import_record
+from crawler.types import Config
+
+logger = logging.getLogger(__name__)
+
+DartExport = Dict[str, Any]
+
+
+class DartExportWorker:
+    """Exports the plates of create plate messages to DART, once their samples are in mongo and the messages have been
+    acknowledged.
+
+    The exporter of a create plate message adds a pending export to the dart_exports collection, in the same transaction
+    as the samples of the plate. The worker polls the collection and exports the pending plates in batches over a single
+    DART connection, committing each plate separately. A plate which is exported is removed from the collection; one
+    which fails is retried after a delay which doubles with each attempt. Once DART_EXPORT_MAX_ATTEMPTS have failed the
+    export is marked as failed and an import record is created for the plate with the error, as the exporter did when
+    exporting to DART as the message was processed.
+    """
+
+    def __init__(self, config: Config, db: Database):
+        """Initialiser for the DART export worker.
+
+        Arguments:
+            config {Config} -- application config specifying the DART details and the worker settings
+            db {Database} -- the mongo database holding the DART exports and the samples
+        """
+        self._config = config
+        self._db = db
+        self._stop_event = threading.Event()
+
+    def start(self) -> threading.Thread:
+        """Runs the worker in a background thread.
+
+        Returns:
+            threading.Thread -- the thread running the worker
+        """
+        thread = threading.Thread(target=self.run, name="dart-export-worker", daemon=True)
+        thread.start()
+
+        return thread
+
+    def stop(self) -> None:
+        """Stops the worker once it has finished exporting the current batch."""
+        self._stop_event.set()
+
+    def run(self) -> None:
+        """Runs the worker until it is stopped."""
+        logger.info("Starting the DART export worker")
+
+        while not self._stop_event.is_set():
+            self.poll()
+
+            if self._stop_event.wait(self._config.DART_EXPORT_WORKER_POLL_INTERVAL):
+                break
+
+        logger.info("Stopped the DART export worker")
+
+    def poll(self) -> None:
+        """Exports the plates due an export attempt. A failure is logged rather than stopping the worker."""
+        try:
+            self.drain()
+        except Exception as e:
+            logger.error("Failed exporting plates to DART")
+            logger.exception(e)
+
+    def drain(self) -> int:
+        """Exports the plates due an export attempt, a batch at a time, until none are left or the worker is stopped.
+
+        Returns:
+            int -- the number of plates exported
+        """
+        dart_exports_collection = get_mongo_collection(self._db, COLLECTION_DART_EXPORTS)
+        batch_size = self._config.DART_EXPORT_WORKER_BATCH_SIZE
+        exported = 0
+
+        while not self._stop_event.is_set():
+            # an export which fails is not due again until after its retry delay, so is not picked up twice in a drain
+            dart_exports = list(
+                dart_exports_collection.find(
+                    {
+                        FIELD_STATUS: FIELD_STATUS_PENDING,
+                        FIELD_DART_EXPORT_NEXT_ATTEMPT_AT: {"$lte": datetime.now(tz=timezone.utc)},
+                    },
+                    sort=[(FIELD_CREATED_AT, pymongo.ASCENDING)],
+                    limit=batch_size,
+                )
+            )
+
+            if not dart_exports:
+                break
+
+            exported += self.export(dart_exports)
+
+            if len(dart_exports) < batch_size:
+                break
+
+        return exported
+
+    def export(self, dart_exports: List[DartExport]) -> int:
+        """Exports the plates of a batch of DART exports to DART over a single connection, removing those exported from
+        the outbox and scheduling a retry of those which fail.
+
+        Arguments:
+            dart_exports {List[DartExport]} -- the DART exports to export
+
+        Returns:
+            int -- the number of plates exported
+        """
+        logger.info(f"Exporting {len(dart_exports)} plates to DART")
+
+        if (sql_server_connection := create_dart_sql_server_conn(self._config)) is None:
+            for dart_export in dart_exports:
+                self._record_failure(dart_export, "Error connecting to DART database")
+
+            return 0
+
+        dart_exports_collection = get_mongo_collection(self._db, COLLECTION_DART_EXPORTS)
+        exported = 0
+
+        try:
+            cursor = sql_server_connection.cursor()
+
+            for dart_export in dart_exports:
+                try:
+                    self._export_plate(cursor, dart_export)
+                    cursor.commit()
+                except Exception as ex:
+                    logger.exception(ex)
+
+                    # Rollback statements executed since previous commit/rollback
+                    cursor.rollback()
+
+                    self._record_failure(dart_export, "DART database inserts failed")
+                    continue
+
+                dart_exports_collection.delete_one({FIELD_MONGODB_ID: dart_export[FIELD_MONGODB_ID]})
+                exported += 1
+        finally:
+            sql_server_connection.close()
+
+        logger.info(f"{exported} plates exported to DART")
+
+        return exported
+
+    def _export_plate(self, cursor: Any, dart_export: DartExport) -> None:
+        plate_barcode = dart_export[FIELD_PLATE_BARCODE]
+        centre_config = dart_export[FIELD_DART_EXPORT_CENTRE_CONFIG]
+
+        plate_state = add_dart_plate_if_doesnt_exist(
+            cursor, plate_barcode, centre_config[CENTRE_KEY_BIOMEK_LABWARE_CLASS]
+        )
+
+        if plate_state == DART_STATE_PENDING:
+            samples_collection = get_mongo_collection(self._db, COLLECTION_SAMPLES)
+            samples = samples_collection.find(
+                {FIELD_LH_SAMPLE_UUID: {"$in": dart_export[FIELD_DART_EXPORT_SAMPLE_UUIDS]}},
+                sort=[(FIELD_MONGO_SAMPLE_INDEX, pymongo.ASCENDING)],
+            )
+
+            add_dart_plate_well_properties(cursor, samples, plate_barcode)
+
+        logger.debug(
+            f"DART database inserts completed successfully for plate with barcode '{plate_barcode}' "
+            f"in message with UUID '{dart_export[FIELD_MONGO_MESSAGE_UUID]}'"
+        )
+
+    def _record_failure(self, dart_export: DartExport, reason: str) -> None:
+        """Schedules a retry of a DART export which failed or, once it has been tried DART_EXPORT_MAX_ATTEMPTS times,
+        marks it as failed and records the failure in an import record for the plate.
+        """
+        plate_barcode = dart_export[FIELD_PLATE_BARCODE]
+        error_description = (
+            f"{reason} for plate with barcode '{plate_barcode}' "
+            f"in message with UUID '{dart_export[FIELD_MONGO_MESSAGE_UUID]}'"
+        )
+        logger.critical(error_description)
+
+        attempts = dart_export[FIELD_DART_EXPORT_ATTEMPTS] + 1
+        timestamp = datetime.now(tz=timezone.utc)
+        update: Dict[str, Any] = {
+            FIELD_DART_EXPORT_ATTEMPTS: attempts,
+            FIELD_DART_EXPORT_LAST_ERROR: error_description,
+            FIELD_UPDATED_AT: timestamp,
+        }
+
+        if attempts >= self._config.DART_EXPORT_MAX_ATTEMPTS:
+            update[FIELD_STATUS] = FIELD_STATUS_FAILED
+        else:
+            retry_delay = self._config.DART_EXPORT_RETRY_DELAY * 2 ** (attempts - 1)
+            update[FIELD_DART_EXPORT_NEXT_ATTEMPT_AT] = timestamp + timedelta(seconds=retry_delay)
+
+        try:
+            dart_exports_collection = get_mongo_collection(self._db, COLLECTION_DART_EXPORTS)
+            dart_exports_collection.update_one({FIELD_MONGODB_ID: dart_export[FIELD_MONGODB_ID]}, {"$set": update})
+
+            if update.get(FIELD_STATUS) == FIELD_STATUS_FAILED:
+                logger.error(
+                    f"Giving up exporting plate with barcode '{plate_barcode}' to DART after {attempts} attempts"
+                )
+
+                create_mongo_import_record(
+                    get_mongo_collection(self._db, COLLECTION_IMPORTS),
+                    dart_export[FIELD_DART_EXPORT_CENTRE_CONFIG],
+                    dart_export[FIELD_DART_EXPORT_SAMPLES_INSERTED],
+                    plate_barcode,
+                    ["1 error was reported during processing.", error_description],
+                )
+        except Exception as ex:
+            logger.exception(ex)
@@ -1,9 +1,11 @@
 import logging
-from typing import Dict, Optional
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple, cast
 
 import pyodbc
 
 from crawler.constants import (
+    DART_PLATE_STATES_CHUNK_SIZE,
     DART_SET_PROP_STATUS_SUCCESS,
     DART_STATE,
     DART_STATE_NO_PLATE,
@@ -12,11 +14,20 @@ from crawler.constants import (
     FIELD_COORDINATE,
     FIELD_ROOT_SAMPLE_ID,
 )
+from crawler.db.pools import (
+    POOL_DART,
+    ConnectionPool,
+    connection_pool_size,
+    get_connection_pool,
+    register_connection_pool,
+)
 from crawler.exceptions import DartStateError
 from crawler.helpers.general_helpers import get_dart_well_index, is_sample_positive, map_mongo_doc_to_dart_well_props
 from crawler.sql_queries import (
     SQL_DART_ADD_PLATE,
     SQL_DART_GET_PLATE_PROPERTY,
+    SQL_DART_GET_PLATE_STATES,
+    SQL_DART_HEALTH_CHECK,
     SQL_DART_SET_PLATE_PROPERTY,
     SQL_DART_SET_WELL_PROPERTY,
 )
@@ -24,8 +35,27 @@ from crawler.types import Config, SampleDoc
 
 logger = logging.getLogger(__name__)
 
+# the plate barcode, property name, property value and well index for a call to SQL_DART_SET_WELL_PROPERTY
+DartWellPropParams = Tuple[str, str, str, int]
+
 
 def create_dart_sql_server_conn(config: Config) -> Optional[pyodbc.Connection]:
+    """Get a SQL Server connection to DART. If the DART connection pool has been initialised the connection comes
+    from the pool, and closing it returns it to the pool; otherwise a new connection is opened.
+
+    Arguments:
+        config {Config} -- application config specifying database details
+
+    Returns:
+        pyodbc.Connection -- connection object used to interact with the sql server database
+    """
+    if (pool := get_connection_pool(POOL_DART)) is not None:
+        return cast(Optional[pyodbc.Connection], pool.acquire())
+
+    return open_dart_sql_server_conn(config)
+
+
+def open_dart_sql_server_conn(config: Config) -> Optional[pyodbc.Connection]:
     """Create a SQL Server connection to DART with the given config parameters.
 
     Arguments:
@@ -67,6 +97,45 @@ def create_dart_sql_server_conn(config: Config) -> Optional[pyodbc.Connection]:
     return sql_server_conn
 
 
+def is_dart_sql_server_conn_healthy(sql_server_conn: pyodbc.Connection) -> bool:
+    """Checks an idle DART connection can still be used, by running a trivial query.
+
+    Arguments:
+        sql_server_conn {pyodbc.Connection} -- the connection to check
+
+    Returns:
+        {bool} -- True if the connection can be used; otherwise False
+    """
+    try:
+        cursor = sql_server_conn.cursor()
+        try:
+            return cursor.execute(SQL_DART_HEALTH_CHECK).fetchone() is not None
+        finally:
+            cursor.close()
+    except pyodbc.Error:
+        return False
+
+
+def init_dart_connection_pool(config: Config, workers: Optional[int] = None) -> None:
+    """Initialise the pool of DART connections, if it has not been already.
+
+    Arguments:
+        config {Config} -- application config specifying database details and the pool size
+        workers {Optional[int]} -- the number of centres processed at once, see connection_pool_size
+    """
+    register_connection_pool(
+        POOL_DART,
+        partial(
+            ConnectionPool,
+            POOL_DART,
+            partial(open_dart_sql_server_conn, config),
+            is_dart_sql_server_conn_healthy,
+            connection_pool_size(config, workers),
+            config.DB_POOL_TIMEOUT,
+        ),
+    )
+
+
 def get_dart_plate_state(cursor: pyodbc.Cursor, plate_barcode: str) -> str:
     """Gets the state of a DART plate.
 
@@ -103,6 +172,31 @@ def set_dart_plate_state_pending(cursor: pyodbc.Cursor, plate_barcode: str) -> b
     return response == DART_SET_PROP_STATUS_SUCCESS
 
 
+def get_dart_plate_states(cursor: pyodbc.Cursor, plate_barcodes: Iterable[str]) -> Dict[str, str]:
+    """Gets the states of DART plates, querying for up to DART_PLATE_STATES_CHUNK_SIZE plates at a time rather than one
+    plate at a time.
+
+    Arguments:
+        cursor {pyodbc.Cursor} -- The cursor with which to execute queries.
+        plate_barcodes {Iterable[str]} -- The barcodes of the plates whose states to fetch.
+
+    Returns:
+        Dict[str, str] -- The state of each plate by barcode. Plates which are not in DART, or do not have a state, are
+        left out.
+    """
+    plate_barcodes = list(dict.fromkeys(plate_barcodes))
+
+    plate_states = {}
+    for index in range(0, len(plate_barcodes), DART_PLATE_STATES_CHUNK_SIZE):
+        chunk = plate_barcodes[index : index + DART_PLATE_STATES_CHUNK_SIZE]  # noqa: E203
+        sql_query = SQL_DART_GET_PLATE_STATES.format(placeholders=",".join("?" * len(chunk)))
+
+        for plate_barcode, state in cursor.execute(sql_query, *chunk).fetchall():
+            plate_states[str(plate_barcode)] = str(state)
+
+    return plate_states
+
+
 def set_dart_well_properties(
     cursor: pyodbc.Cursor, plate_barcode: str, well_props: Dict[str, str], well_index: int
 ) -> None:
@@ -114,9 +208,29 @@ def set_dart_well_properties(
         well_props {Dict[str, str]} -- The names and values of the well properties to update.
         well_index {int} -- The index of the well to update.
     """
-    for prop_name, prop_value in well_props.items():
-        params = (plate_barcode, prop_name, prop_value, well_index)
-        cursor.execute(SQL_DART_SET_WELL_PROPERTY, params)
+    set_dart_well_properties_in_bulk(cursor, dart_well_properties_params(plate_barcode, well_props, well_index))
+
+
+def set_dart_well_properties_in_bulk(cursor: pyodbc.Cursor, params: List[DartWellPropParams]) -> None:
+    """Calls the DART stored procedure to add or update properties on wells once for each set of parameters, sending
+    them all to the database in one round trip using fast_executemany.
+
+    Arguments:
+        cursor {pyodbc.Cursor} -- The cursor with which to execute queries.
+        params {List[DartWellPropParams]} -- The plate barcode, property name, property value and well index of each
+        well property to update.
+    """
+    if not params:
+        return
+
+    cursor.fast_executemany = True
+    cursor.executemany(SQL_DART_SET_WELL_PROPERTY, params)
+
+
+def dart_well_properties_params(
+    plate_barcode: str, well_props: Dict[str, str], well_index: int
+) -> List[DartWellPropParams]:
+    return [(plate_barcode, prop_name, prop_value, well_index) for prop_name, prop_value in well_props.items()]
 
 
 def add_dart_plate_if_doesnt_exist(cursor: pyodbc.Cursor, plate_barcode: str, biomek_labclass: str) -> str:
@@ -153,15 +267,43 @@ def add_dart_well_properties(cursor: pyodbc.Cursor, sample: SampleDoc, plate_bar
         sample {Sample} -- The sample for which to add well properties.
         plate_barcode {str} -- The barcode of the plate to which this sample belongs.
     """
-    well_index = get_dart_well_index(str(sample.get(FIELD_COORDINATE)))
-    if well_index is not None:
-        dart_well_props = map_mongo_doc_to_dart_well_props(sample)
-        set_dart_well_properties(cursor, plate_barcode, dart_well_props, well_index)
-    else:
+    well_index = get_dart_well_index_for_sample(sample, plate_barcode)
+    dart_well_props = map_mongo_doc_to_dart_well_props(sample)
+    set_dart_well_properties(cursor, plate_barcode, dart_well_props, well_index)
+
+
+def add_dart_plate_well_properties(
+    cursor: pyodbc.Cursor, samples: Iterable[SampleDoc], plate_barcode: str, positive_only: bool = True
+) -> None:
+    """Adds the well properties of the samples on a plate to DART in one round trip, rather than one per property.
+
+    Arguments:
+        cursor {pyodbc.Cursor} -- The cursor with which to execute queries.
+        samples {Iterable[SampleDoc]} -- The samples on the plate for which to add well properties.
+        plate_barcode {str} -- The barcode of the plate to which the samples belong.
+        positive_only {bool} -- Only add the well properties of the positive samples, as
+        add_dart_well_properties_if_positive does; otherwise add them for all the samples, as add_dart_well_properties
+        does. Defaults to True.
+    """
+    params = []
+    for sample in samples:
+        if positive_only and not is_sample_positive(sample):
+            continue
+
+        well_index = get_dart_well_index_for_sample(sample, plate_barcode)
+        params.extend(dart_well_properties_params(plate_barcode, map_mongo_doc_to_dart_well_props(sample), well_index))
+
+    set_dart_well_properties_in_bulk(cursor, params)
+
+
+def get_dart_well_index_for_sample(sample: SampleDoc, plate_barcode: str) -> int:
+    if (well_index := get_dart_well_index(str(sample.get(FIELD_COORDINATE)))) is None:
         raise ValueError(
             f"Unable to determine DART well index for {sample[FIELD_ROOT_SAMPLE_ID]} in plate {plate_barcode}"
         )
 
+    return well_index
+
 
 def add_dart_well_properties_if_positive(cursor: pyodbc.Cursor, sample: SampleDoc, plate_barcode: str) -> None:
     """Adds well properties to DART for the specified sample if that sample is positive
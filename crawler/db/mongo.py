@@ -1,4 +1,6 @@
 import logging
+import threading
+from typing import Dict
 
 from pymongo import MongoClient
 from pymongo.collection import Collection
@@ -8,6 +10,9 @@ from crawler.types import Config
 
 logger = logging.getLogger(__name__)
 
+_shared_clients: Dict[str, MongoClient] = {}
+_shared_clients_lock = threading.Lock()
+
 
 def create_mongo_client(config: Config) -> MongoClient:
     """Create a MongoClient with the given config parameters.
@@ -22,6 +27,36 @@ def create_mongo_client(config: Config) -> MongoClient:
     return MongoClient(config.MONGO_URI)
 
 
+def get_shared_mongo_client(config: Config) -> MongoClient:
+    """Get the MongoClient shared by the whole process for the config's MONGO_URI, creating it the first time it is
+    needed. A MongoClient is thread safe and holds its own pool of connections, which its monitors keep healthy, so
+    sharing one saves a handshake for every file and message. It is closed by close_shared_mongo_clients, not by its
+    users.
+
+    Arguments:
+        config {Config}: application config specifying host, port and the maximum size of the connection pool
+
+    Returns:
+        MongoClient: a client used to interact with the database server
+    """
+    with _shared_clients_lock:
+        if config.MONGO_URI not in _shared_clients:
+            logger.debug("Connecting to mongo with a shared client")
+            _shared_clients[config.MONGO_URI] = MongoClient(config.MONGO_URI, maxPoolSize=config.MONGO_MAX_POOL_SIZE)
+
+        return _shared_clients[config.MONGO_URI]
+
+
+def close_shared_mongo_clients() -> None:
+    """Close the MongoClients shared by the process."""
+    with _shared_clients_lock:
+        clients = list(_shared_clients.values())
+        _shared_clients.clear()
+
+    for client in clients:
+        client.close()
+
+
 def get_mongo_db(config: Config, client: MongoClient) -> Database:
     """Get a handle on a mongodb database - remember that it is lazy and is only created when
     documents are added to a collection.
@@ -1,7 +1,8 @@
 import logging
 from datetime import datetime
+from functools import partial
 from itertools import islice
-from typing import Any, Dict, Generator, Iterable, List, cast, Sequence
+from typing import Any, Dict, Generator, Iterable, List, Optional, Sequence, Tuple, cast
 
 import mysql.connector as mysql
 import sqlalchemy
@@ -11,15 +12,54 @@ from mysql.connector.cursor_cext import MySQLCursorAbstract
 from sqlalchemy.engine.base import Engine
 
 from crawler.constants import MLWH_RNA_ID
+from crawler.db.pools import (
+    POOL_MLWH_READONLY,
+    POOL_MLWH_READWRITE,
+    ConnectionPool,
+    connection_pool_size,
+    get_connection_pool,
+    register_connection_pool,
+)
 from crawler.helpers.general_helpers import map_mongo_sample_to_mysql, set_is_current_on_mysql_samples
 from crawler.helpers.logging_helpers import LoggingCollection
-from crawler.sql_queries import SQL_MLWH_MARK_ALL_SAMPLES_NOT_MOST_RECENT, SQL_MLWH_MULTIPLE_INSERT
+from crawler.sql_queries import (
+    MLWH_MULTI_ROW_INSERT_COLUMNS,
+    SQL_MLWH_CREATE_STAGING_TABLE,
+    SQL_MLWH_DROP_STAGING_TABLE,
+    SQL_MLWH_GET_MAX_ALLOWED_PACKET,
+    SQL_MLWH_MARK_ALL_SAMPLES_NOT_MOST_RECENT,
+    SQL_MLWH_MARK_STAGED_SAMPLES_NOT_MOST_RECENT,
+    SQL_MLWH_MERGE_STAGING_TABLE,
+    SQL_MLWH_MULTI_ROW_INSERT,
+    SQL_MLWH_MULTI_ROW_INSERT_STAGING,
+)
 from crawler.types import Config, ModifiedRow
 
 logger = logging.getLogger(__name__)
 
+# The proportion of the server's max_allowed_packet that each multi-row statement is sized to fill, leaving room for the
+# rest of the statement and for values which take up more space than estimated once they are escaped
+MAX_ALLOWED_PACKET_USAGE = 0.5
+
 
 def create_mysql_connection(config: Config, readonly: bool = True) -> MySQLConnectionAbstract:
+    """Get a connection to the MLWH. If the MLWH connection pools have been initialised the connection comes from a
+    pool, and closing it returns it to the pool; otherwise a new connection is opened.
+
+    Arguments:
+        config (Config): application config specifying database details
+        readonly (bool, optional): use the readonly credentials. Defaults to True.
+
+    Returns:
+        MySQLConnectionAbstract: a client used to interact with the database server
+    """
+    if (pool := get_connection_pool(POOL_MLWH_READONLY if readonly else POOL_MLWH_READWRITE)) is not None:
+        return cast(MySQLConnectionAbstract, pool.acquire())
+
+    return open_mysql_connection(config, readonly)
+
+
+def open_mysql_connection(config: Config, readonly: bool = True) -> MySQLConnectionAbstract:
     """Create a MySQLConnectionAbstract with the given config parameters.
 
     Arguments:
@@ -65,6 +105,39 @@ def create_mysql_connection(config: Config, readonly: bool = True) -> MySQLConne
     return cast(MySQLConnectionAbstract, mysql_conn)
 
 
+def is_mysql_connection_healthy(mysql_conn: MySQLConnectionAbstract) -> bool:
+    """Checks an idle MLWH connection can still be used, by pinging the server.
+
+    Arguments:
+        mysql_conn (MySQLConnectionAbstract): the connection to check
+
+    Returns:
+        bool: True if the connection can be used; otherwise False
+    """
+    return bool(mysql_conn.is_connected())
+
+
+def init_mlwh_connection_pools(config: Config, workers: Optional[int] = None) -> None:
+    """Initialise the pools of readonly and read/write MLWH connections, if they have not been already.
+
+    Arguments:
+        config (Config): application config specifying database details and the pool sizes
+        workers (Optional[int]): the number of centres processed at once, see connection_pool_size
+    """
+    for readonly, name in ((True, POOL_MLWH_READONLY), (False, POOL_MLWH_READWRITE)):
+        register_connection_pool(
+            name,
+            partial(
+                ConnectionPool,
+                name,
+                partial(open_mysql_connection, config, readonly),
+                is_mysql_connection_healthy,
+                connection_pool_size(config, workers),
+                config.DB_POOL_TIMEOUT,
+            ),
+        )
+
+
 def run_mysql_executemany_query(
     mysql_conn: MySQLConnectionAbstract, sql_query: str, values: Sequence[Dict[str, MySQLConvertibleType]]
 ) -> None:
@@ -92,9 +165,6 @@ def run_mysql_executemany_query(
             f"Attempting to insert or update {num_values} rows in the MLWH database in batches of {ROWS_PER_QUERY}"
         )
 
-        rna_ids = [sample[MLWH_RNA_ID] for sample in values if MLWH_RNA_ID in sample]
-        reset_is_current_flags(cursor, rna_ids)
-
         while values_index < num_values:
             logger.debug(f"Inserting records between {values_index} and {values_index + ROWS_PER_QUERY}")
             cursor.executemany(sql_query, values[values_index : (values_index + ROWS_PER_QUERY)])  # noqa: E203
@@ -126,6 +196,156 @@ def run_mysql_executemany_query(
         cursor.close()
 
 
+def run_mysql_multi_row_upsert(
+    mysql_conn: MySQLConnectionAbstract,
+    values: Sequence[Dict[str, MySQLConvertibleType]],
+    use_staging_table: bool = False,
+) -> None:
+    """Inserts or updates samples in the MLWH, as SQL_MLWH_MULTIPLE_INSERT does, using multi-row INSERT statements
+    sized to fit in the server's max_allowed_packet. The is_current flags of the existing rows for the RNA IDs of the
+    samples are reset in the same transaction as the samples are written.
+
+    By default, each batch of samples is written and committed in its own transaction. With use_staging_table, all the
+    samples are loaded into a temporary table first and then merged into lighthouse_sample in a single transaction.
+
+    Arguments:
+        mysql_conn {MySQLConnectionAbstract} -- a client used to interact with the database server
+        values {Sequence[Dict[str, MySQLConvertibleType]]} -- the samples to write, with values for each of the columns
+            in MLWH_MULTI_ROW_INSERT_COLUMNS
+        use_staging_table {bool} -- load the samples through a temporary staging table
+    """
+    cursor: MySQLCursorAbstract = mysql_conn.cursor()
+
+    try:
+        rows = [tuple(sample[column] for column in MLWH_MULTI_ROW_INSERT_COLUMNS) for sample in values]
+
+        cursor.execute(SQL_MLWH_GET_MAX_ALLOWED_PACKET)
+        max_allowed_packet = cast(Tuple[int], cursor.fetchone())[0]
+        batches = partition_by_size(rows, int(max_allowed_packet * MAX_ALLOWED_PACKET_USAGE))
+
+        logger.debug(f"Attempting to insert or update {len(rows)} rows in the MLWH database")
+
+        if use_staging_table:
+            total_rows_affected = upsert_rows_through_staging_table(mysql_conn, cursor, batches)
+        else:
+            total_rows_affected = upsert_rows_in_batches(mysql_conn, cursor, batches)
+
+        logger.info(
+            f"A total of {total_rows_affected} rows were affected in MLWH. (Note: each updated row "
+            "increases the count by 2, instead of 1)"
+        )
+    except Exception:
+        logger.error("MLWH database multi-row upsert transaction failed")
+        mysql_conn.rollback()
+        raise
+    finally:
+        logger.debug("Closing the cursor.")
+        cursor.close()
+
+
+def upsert_rows_in_batches(
+    mysql_conn: MySQLConnectionAbstract, cursor: MySQLCursorAbstract, batches: Iterable[List[Tuple[Any, ...]]]
+) -> int:
+    """Writes each batch of rows to lighthouse_sample with a multi-row INSERT, after resetting the is_current flags for
+    the RNA IDs in the batch, and commits them together.
+
+    Returns:
+        int -- the total number of rows affected
+    """
+    rna_id_index = MLWH_MULTI_ROW_INSERT_COLUMNS.index(MLWH_RNA_ID)
+
+    total_rows_affected = 0
+    for batch in batches:
+        logger.debug(f"Inserting a batch of {len(batch)} records")
+        reset_is_current_flags(cursor, [row[rna_id_index] for row in batch])
+
+        cursor.execute(multi_row_query(SQL_MLWH_MULTI_ROW_INSERT, batch), [value for row in batch for value in row])
+        total_rows_affected += cursor.rowcount
+
+        logger.debug("Committing changes to MLWH database.")
+        mysql_conn.commit()
+
+    return total_rows_affected
+
+
+def upsert_rows_through_staging_table(
+    mysql_conn: MySQLConnectionAbstract, cursor: MySQLCursorAbstract, batches: Iterable[List[Tuple[Any, ...]]]
+) -> int:
+    """Loads the batches of rows into a temporary staging table with multi-row INSERTs, then resets the is_current
+    flags for all the staged RNA IDs and merges the staged rows into lighthouse_sample, committing them together.
+
+    Returns:
+        int -- the number of rows affected by the merge
+    """
+    cursor.execute(SQL_MLWH_DROP_STAGING_TABLE)
+    cursor.execute(SQL_MLWH_CREATE_STAGING_TABLE)
+
+    try:
+        for batch in batches:
+            logger.debug(f"Staging a batch of {len(batch)} records")
+            cursor.execute(
+                multi_row_query(SQL_MLWH_MULTI_ROW_INSERT_STAGING, batch), [value for row in batch for value in row]
+            )
+
+        cursor.execute(SQL_MLWH_MARK_STAGED_SAMPLES_NOT_MOST_RECENT, [datetime.now()])
+        logger.info(f"Reset is_current to false for {cursor.rowcount} rows.")
+
+        cursor.execute(SQL_MLWH_MERGE_STAGING_TABLE)
+        rows_affected: int = cursor.rowcount
+
+        logger.debug("Committing changes to MLWH database.")
+        mysql_conn.commit()
+    finally:
+        cursor.execute(SQL_MLWH_DROP_STAGING_TABLE)
+
+    return rows_affected
+
+
+def multi_row_query(sql_query: str, rows: List[Tuple[Any, ...]]) -> str:
+    """Formats a multi-row query (see sql_queries.py) with a list of placeholders for each of the rows.
+
+    Arguments:
+        sql_query {str} -- the query, with a %s in place of the rows of values
+        rows {List[Tuple[Any, ...]]} -- the rows the query is for
+
+    Returns:
+        str -- the query, with placeholders for the values of the rows
+    """
+    row_placeholders = f"({','.join(['%s'] * len(MLWH_MULTI_ROW_INSERT_COLUMNS))})"
+
+    return sql_query % ",".join([row_placeholders] * len(rows))
+
+
+def estimated_row_size(row: Tuple[Any, ...]) -> int:
+    """Estimates the number of bytes a row of values takes up in a multi-row statement, allowing for the quotes,
+    separators and placeholder formatting around each value.
+    """
+    return sum(len(str(value)) + 4 for value in row) + 3
+
+
+def partition_by_size(rows: List[Tuple[Any, ...]], max_size: int) -> Generator[List[Tuple[Any, ...]], None, None]:
+    """Creates partitions of the rows whose estimated size in a multi-row statement is no more than max_size bytes.
+    A single row larger than max_size is put in a partition of its own.
+
+    Arguments:
+        rows (List[Tuple[Any, ...]]): the rows of values to split into partitions
+        max_size (int): maximum estimated size of each partition, in bytes
+    """
+    part: List[Tuple[Any, ...]] = []
+    part_size = 0
+    for row in rows:
+        row_size = estimated_row_size(row)
+        if part and part_size + row_size > max_size:
+            yield part
+            part, part_size = [], 0
+
+        part.append(row)
+        part_size += row_size
+
+    if part:
+        yield part
+
+
 def run_mysql_execute_formatted_query(
     mysql_conn: MySQLConnectionAbstract, formatted_sql_query: str, formatting_args: List[str], query_args: List[Any]
 ) -> None:
@@ -154,10 +374,8 @@ def run_mysql_execute_formatted_query(
         )
 
         while formatting_args_index < num_formatting_args:
-            logger.debug(
-                f"Executing sql for formatting args between {formatting_args_index} and \
-{formatting_args_index + FORMATTING_ARGS_PER_QUERY}"
-            )
+            logger.debug(f"Executing sql for formatting args between {formatting_args_index} and \
+{formatting_args_index + FORMATTING_ARGS_PER_QUERY}")
 
             formatting_args_batch = formatting_args[
                 formatting_args_index : (formatting_args_index + FORMATTING_ARGS_PER_QUERY)  # noqa: E203
@@ -272,8 +490,8 @@ def insert_or_update_samples_in_mlwh(
 
     if mysql_conn is not None and mysql_conn.is_connected():
         try:
-            run_mysql_executemany_query(
-                mysql_conn=mysql_conn, sql_query=SQL_MLWH_MULTIPLE_INSERT, values=parsed_samples
+            run_mysql_multi_row_upsert(
+                mysql_conn=mysql_conn, values=parsed_samples, use_staging_table=config.MLWH_USE_STAGING_TABLE
             )
 
             logger.debug(logging_messages["success"]["msg"])
@@ -284,6 +502,8 @@ def insert_or_update_samples_in_mlwh(
             )
             logger.critical(f"{logging_messages['insert_failure']['critical_msg']}: {e}")
             logger.exception(e)
+        finally:
+            mysql_conn.close()
     else:
         logging_collection.add_error(
             logging_messages["connection_failure"]["error_type"],
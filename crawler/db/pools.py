@@ -0,0 +1,221 @@
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from crawler.types import Config
+
+logger = logging.getLogger(__name__)
+
+# names of the connection pools shared by the whole crawler run
+POOL_MLWH_READONLY = "mlwh_readonly"
+POOL_MLWH_READWRITE = "mlwh_readwrite"
+POOL_DART = "dart"
+
+
+class PooledConnection:
+    """A connection handed out by a ConnectionPool. It behaves as the underlying connection, except that closing it
+    returns the connection to the pool instead of closing it, so the existing `try: ... finally: conn.close()` blocks
+    work unchanged with pooled connections.
+    """
+
+    def __init__(self, pool: "ConnectionPool", connection: Any):
+        self._pool = pool
+        self._connection: Optional[Any] = connection
+
+    def __getattr__(self, name: str) -> Any:
+        if self._connection is None:
+            raise AttributeError(f"Connection from pool '{self._pool.name}' has already been returned to the pool")
+
+        return getattr(self._connection, name)
+
+    def __enter__(self) -> "PooledConnection":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Returns the connection to the pool; closing it more than once does nothing."""
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool.release(connection)
+
+
+class ConnectionPool:
+    """A thread safe pool of database connections. Connections are created on demand, up to a maximum number in use
+    at once, and are kept once released to be handed out again. An idle connection is checked before it is handed
+    out and replaced if it is no longer healthy, e.g. if the server has closed it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connect: Callable[[], Optional[Any]],
+        is_healthy: Callable[[Any], bool],
+        max_size: int,
+        timeout: float,
+    ):
+        """Initialiser for a connection pool.
+
+        Arguments:
+            name {str} -- the name of the pool, used in the logs
+            connect {Callable[[], Optional[Any]]} -- creates a new connection, returning None if it could not connect
+            is_healthy {Callable[[Any], bool]} -- checks whether an idle connection can still be used
+            max_size {int} -- the maximum number of connections in use at once
+            timeout {float} -- seconds to wait for a connection when all of them are in use
+        """
+        self.name = name
+        self.max_size = max_size
+        self._connect = connect
+        self._is_healthy = is_healthy
+        self._timeout = timeout
+
+        self._idle: Deque[Any] = deque()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def acquire(self) -> Optional[PooledConnection]:
+        """Hands out a healthy connection from the pool, creating one if there is none idle.
+
+        Returns:
+            Optional[PooledConnection] -- the connection, or None if a connection could not be made or none became
+            free before the timeout
+        """
+        if not self._slots.acquire(timeout=self._timeout):
+            logger.error(f"Timed out waiting for a connection from pool '{self.name}'")
+            return None
+
+        try:
+            while (connection := self._pop_idle()) is not None:
+                if self._check_health(connection):
+                    return PooledConnection(self, connection)
+
+                logger.info(f"Replacing an unhealthy connection in pool '{self.name}'")
+                self._close_quietly(connection)
+
+            if (connection := self._connect()) is not None:
+                return PooledConnection(self, connection)
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._slots.release()
+        return None
+
+    def release(self, connection: Any) -> None:
+        """Returns a connection to the pool. Any work not committed on it is rolled back, so the next user of the
+        connection does not inherit it; a connection which cannot be rolled back is closed instead.
+
+        Arguments:
+            connection {Any} -- the connection to return
+        """
+        try:
+            connection.rollback()
+        except Exception as e:
+            logger.warning(f"Discarding a connection from pool '{self.name}' which could not be rolled back: {e}")
+            self._close_quietly(connection)
+        else:
+            with self._lock:
+                if not self._closed:
+                    self._idle.append(connection)
+                    return
+
+            self._close_quietly(connection)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Closes the idle connections of the pool. Connections still in use are closed when they are released."""
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+            self._closed = True
+
+        for connection in idle:
+            self._close_quietly(connection)
+
+    def _pop_idle(self) -> Optional[Any]:
+        with self._lock:
+            # the most recently used connection is the one most likely to still be open
+            return self._idle.pop() if self._idle else None
+
+    def _check_health(self, connection: Any) -> bool:
+        try:
+            return self._is_healthy(connection)
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection: Any) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def connection_pool_size(config: Config, workers: Optional[int] = None) -> int:
+    """The maximum number of connections each pool hands out at once. Every thread which can draw on the pools needs to
+    be able to get a connection while the others hold theirs, otherwise e.g. the messages processed by the consumer
+    time out waiting for a connection while centres hold them for long inserts. Those threads are the workers
+    processing centres, the messages processed at once by the consumer and the DART export and priority samples
+    workers, when enabled. DB_POOL_MAX_SIZE raises the size above that. Connections are only opened when needed, so
+    a pool larger than the threads ever use costs nothing.
+
+    Arguments:
+        config {Config} -- application config specifying the workers and the pool size
+        workers {Optional[int]} -- the number of centres processed at once, when run with other than WORKERS; defaults
+            to WORKERS
+
+    Returns:
+        int -- the maximum number of connections in use at once from each pool
+    """
+    centre_workers = config.WORKERS if workers is None else workers
+    consumer_workers = config.RABBITMQ_CONSUMER_WORKERS if config.RABBITMQ_CONCURRENT_CONSUMER else 1
+    background_workers = int(config.DART_EXPORT_OUTBOX) + int(config.PRIORITY_SAMPLES_WORKER)
+
+    return max(config.DB_POOL_MAX_SIZE, centre_workers + consumer_workers + background_workers)
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def register_connection_pool(name: str, create_pool: Callable[[], ConnectionPool]) -> ConnectionPool:
+    """Registers a pool under a name, unless one is already registered, so the pools are only created once however
+    many times they are initialised.
+
+    Arguments:
+        name {str} -- the name of the pool
+        create_pool {Callable[[], ConnectionPool]} -- creates the pool if there is not one registered
+
+    Returns:
+        ConnectionPool -- the pool registered under the name
+    """
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = create_pool()
+
+        return _pools[name]
+
+
+def get_connection_pool(name: str) -> Optional[ConnectionPool]:
+    """Get the pool registered under a name.
+
+    Arguments:
+        name {str} -- the name of the pool
+
+    Returns:
+        Optional[ConnectionPool] -- the pool, or None if connections of this kind are not pooled
+    """
+    return _pools.get(name)
+
+
+def close_connection_pools() -> None:
+    """Closes and unregisters all the pools."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    for pool in pools:
+        pool.close()
@@ -9,16 +9,18 @@ import uuid
 from csv import DictReader
 from datetime import datetime, timezone
 from decimal import Decimal
-from hashlib import md5
+from hashlib import file_digest, md5
 from itertools import groupby
 from logging import INFO, WARN
 from pathlib import Path
-from typing import Any, Dict, Final, Iterator, List, Optional, Set, Tuple, cast
+from typing import Any, Dict, Final, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, cast
 
 from bson.decimal128 import Decimal128
+from pymongo.collection import Collection
 from pymongo.database import Database
 from pymongo.errors import BulkWriteError
 
+from crawler.columnar_validation import ColumnarValidation, validate_rows
 from crawler.constants import (
     ALLOWED_CH_RESULT_VALUES,
     ALLOWED_CH_TARGET_VALUES,
@@ -36,10 +38,13 @@ from crawler.constants import (
     CENTRE_KEY_PREFIX,
     CENTRE_KEY_SFTP_ROOT_READ,
     CENTRE_KEY_SKIP_UNCONSOLIDATED_SURVEILLANCE_FILES,
+    COLLECTION_FILE_CHECKSUMS,
     COLLECTION_IMPORTS,
     COLLECTION_SAMPLES,
     COLLECTION_SOURCE_PLATES,
     DART_STATE_PENDING,
+    DATE_TESTED_REGEXES,
+    FIELD_BACKUP_DIR,
     FIELD_BARCODE,
     FIELD_CH1_CQ,
     FIELD_CH1_RESULT,
@@ -65,6 +70,7 @@ from crawler.constants import (
     FIELD_LH_SAMPLE_UUID,
     FIELD_LH_SOURCE_PLATE_UUID,
     FIELD_LINE_NUMBER,
+    FIELD_MONGO_CENTRE_NAME,
     FIELD_MONGO_COG_UK_ID,
     FIELD_MONGO_LAB_ID,
     FIELD_MONGODB_ID,
@@ -84,13 +90,20 @@ from crawler.constants import (
 )
 from crawler.db.dart import (
     add_dart_plate_if_doesnt_exist,
-    add_dart_well_properties_if_positive,
+    add_dart_plate_well_properties,
     create_dart_sql_server_conn,
+    get_dart_plate_states,
 )
-from crawler.db.mongo import create_mongo_client, get_mongo_collection, get_mongo_db
-from crawler.db.mysql import insert_or_update_samples_in_mlwh
+from crawler.db.mongo import get_mongo_collection, get_mongo_db, get_shared_mongo_client
+from crawler.db.mysql import insert_or_update_samples_in_mlwh, partition
 from crawler.filtered_positive_identifier import current_filtered_positive_identifier
-from crawler.helpers.db_helpers import create_mongo_import_record
+from crawler.helpers.cog_uk_id_pool import reserve_cog_uk_ids
+from crawler.helpers.db_helpers import (
+    create_mongo_file_checksum_record,
+    create_mongo_import_record,
+    duplicate_sample_key,
+    get_mongo_file_checksum_records,
+)
 from crawler.helpers.enums import CentreFileState
 from crawler.helpers.general_helpers import (
     create_source_plate_doc,
@@ -100,6 +113,13 @@ from crawler.helpers.general_helpers import (
     pad_coordinate,
 )
 from crawler.helpers.logging_helpers import LoggingCollection
+from crawler.helpers.sftp_sync import (
+    download_files,
+    is_downloaded,
+    read_manifest,
+    remote_file_from_attributes,
+    write_manifest,
+)
 from crawler.types import CentreConf, Config, CSVRow, ModifiedRow, RowSignature, SourcePlateDoc
 
 logger = logging.getLogger(__name__)
@@ -109,6 +129,64 @@ PROJECT_ROOT = pathlib.Path(__file__).parent.parent
 ERRORS_DIR = "errors"
 SUCCESSES_DIR = "successes"
 
+# backup copies of the files are named {timestamp}_{file name}_{checksum}
+BACKUP_FILENAME_REGEX = re.compile(r"^([\d]{6}_[\d]{4})_(.*)_(\w*)$")
+
+UNKNOWN_VALUE_REGEX = re.compile(r"^unknown$", re.IGNORECASE)
+EMPTY_ROOT_SAMPLE_ID_REGEX = re.compile(r"^empty$", re.IGNORECASE)
+
+
+def index_backed_up_file_checksums(file_checksums_collection: Collection, centre_config: CentreConf) -> int:
+    """Records the checksums of the files in the backup folders of a centre in the index of backed up files, from the
+    names of the backup copies. Files already recorded are not recorded again.
+
+    Arguments:
+        file_checksums_collection {Collection} -- the collection which stores the checksums of the backed up files
+        centre_config {CentreConf} -- the centre whose backup folders to index
+
+    Returns:
+        int -- the number of backed up files recorded
+    """
+    num_records = 0
+    for backup_dir in (ERRORS_DIR, SUCCESSES_DIR):
+        backup_folder = f"{centre_config[CENTRE_KEY_BACKUPS_FOLDER]}/{backup_dir}"
+
+        if not os.path.isdir(backup_folder):
+            logger.warning(f"Backup folder {backup_folder} does not exist, skipping")
+            continue
+
+        for backup_file_name in os.listdir(backup_folder):
+            if matches := BACKUP_FILENAME_REGEX.match(backup_file_name):
+                create_mongo_file_checksum_record(
+                    file_checksums_collection,
+                    centre_config,
+                    checksum=matches.group(3),
+                    backup_dir=backup_dir,
+                    file_name=matches.group(2),
+                    backup_file_name=backup_file_name,
+                )
+                num_records += 1
+            else:
+                logger.warning(f"Unrecognised backup file name {backup_file_name} in {backup_folder}, skipping")
+
+    logger.info(f"Recorded {num_records} checksums of backed up files for {centre_config[CENTRE_KEY_NAME]}")
+
+    return num_records
+
+
+class HeaderPlan(NamedTuple):
+    """How the columns of a CSV file map onto the fields of a sample. The headers are the same for every row in a file,
+    so this is worked out once per file instead of matching every column of every row against the header regexes."""
+
+    # accepted columns, copied across as they are
+    accepted_fields: Tuple[str, ...]
+    # (channel field, column) pairs, for the columns matching one of the channel regexes
+    channel_fields: Tuple[Tuple[str, str], ...]
+    # channel columns whose value is converted to None when it is "unknown"
+    unknown_value_fields: Tuple[str, ...]
+    # columns which are not recognised, logged as TYPE 13
+    unexpected_headers: List[str]
+
 
 class Centre:
     def __init__(self, config: Config, centre_config: CentreConf):
@@ -116,6 +194,7 @@ class Centre:
         self.centre_config = centre_config
         self.is_download_dir_walkable = False
         self._files: List[str] = []
+        self._is_file_checksums_index_checked = False
 
         # create backup directories for files
         os.makedirs(f"{self.centre_config[CENTRE_KEY_BACKUPS_FOLDER]}/{ERRORS_DIR}", exist_ok=True)
@@ -134,7 +213,7 @@ class Centre:
         path_to_walk = PROJECT_ROOT.joinpath(self.get_download_dir())
         try:
             logger.debug(f"Attempting to walk {path_to_walk}")
-            (_, _, files) = next(os.walk(path_to_walk))
+            _, _, files = next(os.walk(path_to_walk))
 
             self.is_download_dir_walkable = True
             self._files = [file for file in files if self.is_valid_filename(file)]
@@ -151,6 +230,9 @@ class Centre:
         try:
             shutil.rmtree(self.get_download_dir())
 
+            if os.path.exists(manifest_path := self.get_download_manifest_path()):
+                os.remove(manifest_path)
+
         except Exception as e:
             logger.error(f"Failed clean up: {e}")
 
@@ -189,6 +271,24 @@ class Centre:
                 # error unrecognised
                 logger.error(f"Unrecognised file state: {centre_file.file_state.name}")
 
+    def ensure_file_checksums_indexed(self, file_checksums_collection: Collection) -> None:
+        """Seeds the index of backed up files from the centre's backup folders if the index has no files of the centre,
+        e.g. when the index is first deployed, so the files already processed are not processed again. This is only
+        checked once per centre.
+
+        Arguments:
+            file_checksums_collection {Collection} -- the collection which stores the checksums of the backed up files
+        """
+        if self._is_file_checksums_index_checked:
+            return
+
+        centre_name = self.centre_config[CENTRE_KEY_NAME]
+        if file_checksums_collection.count_documents({FIELD_MONGO_CENTRE_NAME: centre_name}, limit=1) == 0:
+            logger.warning(f"No backed up files of {centre_name} are indexed, indexing its backup folders")
+            index_backed_up_file_checksums(file_checksums_collection, self.centre_config)
+
+        self._is_file_checksums_index_checked = True
+
     def get_download_dir(self) -> str:
         """Get the download directory where the files from the SFTP are stored.
 
@@ -207,31 +307,49 @@ class Centre:
         except FileExistsError:
             pass
 
+        download_dir = self.get_download_dir()
+        manifest_path = self.get_download_manifest_path()
+
         with get_sftp_connection(self.config) as sftp:
             logger.info("Connected to SFTP")
-            logger.debug("Listing centre's root directory")
-
-            sftp_root_read = self.centre_config[CENTRE_KEY_SFTP_ROOT_READ]
-            logger.debug(f"ls {self.config.SFTP_HOST}/{sftp_root_read}")
-            logger.debug(sftp.listdir(sftp_root_read))
-
-            # download recent plate map files
-            logger.info("Downloading plate map files")
-            for file_name in sftp.listdir(sftp_root_read):
-                source_path = os.path.join("/", sftp_root_read)
-                sftp.chdir(source_path)
-                mode = sftp.stat(file_name).st_mode
-                if self.is_csv_file(mode, file_name):
-                    timestamp = sftp.stat(file_name).st_mtime  # get timestamp of file
-                    modified_time = datetime.fromtimestamp(timestamp)
-                    now = datetime.now()
-                    delta = now - modified_time
-
-                    if delta.days < FILE_AGE_IN_DAYS:
-                        sftp.get(file_name, os.path.join(self.get_download_dir(), file_name))
+
+            sftp_root_read = os.path.join("/", self.centre_config[CENTRE_KEY_SFTP_ROOT_READ])
+            logger.debug(f"ls {self.config.SFTP_HOST}{sftp_root_read}")
+
+            # a single listing gives the mode, size and modification time of every file
+            now = datetime.now()
+            remote_files = [
+                remote_file_from_attributes(attributes)
+                for attributes in sftp.listdir_attr(sftp_root_read)
+                if self.is_csv_file(attributes.st_mode or 0, attributes.filename)
+                and (now - datetime.fromtimestamp(attributes.st_mtime or 0)).days < FILE_AGE_IN_DAYS
+            ]
+
+            # skip the files already downloaded, which are only still here if the files were kept from a previous run
+            manifest = read_manifest(manifest_path)
+            unchanged_files = [
+                remote_file for remote_file in remote_files if is_downloaded(remote_file, manifest, download_dir)
+            ]
+            changed_files = [remote_file for remote_file in remote_files if remote_file not in unchanged_files]
+
+            logger.info(f"Downloading {len(changed_files)} plate map files, {len(unchanged_files)} unchanged")
+            downloaded_files = download_files(
+                sftp, sftp_root_read, download_dir, changed_files, self.config.SFTP_DOWNLOAD_WORKERS
+            )
+
+        write_manifest(manifest_path, unchanged_files + downloaded_files)
 
         return None
 
+    def get_download_manifest_path(self) -> str:
+        """The path of the manifest of the files downloaded for the centre. It is kept beside the download directory
+        rather than in it, so that only the centre's files are in the directory.
+
+        Returns:
+            str -- the path of the manifest
+        """
+        return f"{str(self.get_download_dir()).rstrip('/')}.manifest.json"
+
     def is_csv_file(self, mode: int, file_name: str) -> bool:
         if stat.S_ISREG(mode):
             file_name, file_extension = os.path.splitext(file_name)
@@ -294,6 +412,14 @@ class CentreFile:
         FIELD_LAB_ID,
     }
 
+    # The number of parsed rows pushed through the source plate, COG UK ID, mongo, MLWH and DART steps at a time. This
+    # bounds the memory used when processing large (consolidated) files.
+    ROWS_PER_CHUNK: Final[int] = 10000
+
+    # The number of samples which failed to insert as duplicates looked up in mongo at a time, to tell TYPE 6 from
+    # TYPE 7 errors.
+    DUPLICATES_PER_QUERY: Final[int] = 1000
+
     filtered_positive_identifier = current_filtered_positive_identifier()
 
     def __init__(self, file_name: str, centre: Centre):
@@ -313,6 +439,12 @@ class CentreFile:
 
         self.docs_inserted = 0
 
+        # the checksum of the file, computed the first time it is needed, see checksum
+        self._checksum: Optional[str] = None
+
+        # header plans for the column layouts seen in the file, see header_plan
+        self.header_plans: Dict[Tuple[str, ...], HeaderPlan] = {}
+
         # These headers are required in ALL files from ALL lighthouses
         self.required_fields = {
             FIELD_ROOT_SAMPLE_ID,
@@ -335,17 +467,17 @@ class CentreFile:
         return PROJECT_ROOT.joinpath(f"{self.centre.get_download_dir()}{self.file_name}")
 
     def checksum(self) -> str:
-        """Returns the checksum for the file
+        """Returns the checksum for the file. The file is read once, the first time the checksum is needed, as the file
+        is not changed while it is processed.
 
         Returns:
             str -- the checksum for the file
         """
-        with open(self.filepath(), "rb") as file:
-            file_hash = md5()
-            while chunk := file.read(8192):
-                file_hash.update(chunk)
+        if self._checksum is None:
+            with open(self.filepath(), "rb") as file:
+                self._checksum = file_digest(file, md5).hexdigest()
 
-        return file_hash.hexdigest()
+        return self._checksum
 
     def checksum_match(self, dir_path: str) -> bool:
         """Checks a directory for a file matching the checksum of this file
@@ -356,28 +488,35 @@ class CentreFile:
         Returns:
             boolean -- whether the file matches or not
         """
-        regexp = re.compile(r"^([\d]{6}_[\d]{4})_(.*)_(\w*)$")
+        return dir_path in self.backup_dirs_matching_checksum()
 
+    def backup_dirs_matching_checksum(self) -> Set[str]:
+        """Looks up the checksum of this file in the index of backed up files for the centre. The index is kept up to
+        date by backup_file, so the backup folders themselves do not need to be listed, other than to seed the index
+        the first time it is used for the centre.
+
+        Returns:
+            Set[str] -- the backup directories (errors and/or successes) holding a file with the same checksum
+        """
         checksum_for_file = self.checksum()
         logger.debug(f"Checksum for file = {checksum_for_file}")
 
-        backup_folder = f"{self.centre_config[CENTRE_KEY_BACKUPS_FOLDER]}/{dir_path}"
-        files_from_backup_folder = os.listdir(backup_folder)
+        file_checksums_collection = get_mongo_collection(self.get_db(), COLLECTION_FILE_CHECKSUMS)
+        self.centre.ensure_file_checksums_indexed(file_checksums_collection)
 
-        for backup_copy_file in files_from_backup_folder:
-            if matches := regexp.match(backup_copy_file):
-                # backup_timestamp = matches.group(1)
-                backup_filename = matches.group(2)
-                backup_checksum = matches.group(3)
+        backup_dirs = set()
+        for record in get_mongo_file_checksum_records(file_checksums_collection, self.centre_config, checksum_for_file):
+            backup_dir = record[FIELD_BACKUP_DIR]
 
-                if checksum_for_file == backup_checksum:
-                    if backup_filename != self.file_name:
-                        logger.warning(
-                            f"Found an identical file {backup_filename} in path {dir_path} which has the same checksum "
-                            "but a different filename"
-                        )
-                    return True
-        return False
+            if (backup_filename := record[FIELD_FILE_NAME]) != self.file_name:
+                logger.warning(
+                    f"Found an identical file {backup_filename} in path {backup_dir} which has the same checksum "
+                    "but a different filename"
+                )
+
+            backup_dirs.add(backup_dir)
+
+        return backup_dirs
 
     def is_unconsolidated_surveillance_file(self) -> bool:
         """Identifies whether this file is from the batch of unconsolidated surveillance files for the centre that
@@ -404,12 +543,12 @@ class CentreFile:
             self.file_state = CentreFileState.FILE_IN_BLACKLIST
 
         # check whether file has already been processed to error directory
-        elif self.checksum_match(ERRORS_DIR):
+        elif ERRORS_DIR in (backup_dirs := self.backup_dirs_matching_checksum()):
             self.file_state = CentreFileState.FILE_PROCESSED_WITH_ERROR
 
         # if checksum differs or file is not present in errors we check whether file has already been processed
         # successfully
-        elif self.checksum_match(SUCCESSES_DIR):
+        elif SUCCESSES_DIR in backup_dirs:
             self.file_state = CentreFileState.FILE_PROCESSED_WITH_SUCCESS
 
         # check for this being an unconsolidated samples file where the centre doesn't support those
@@ -426,31 +565,56 @@ class CentreFile:
         return self.file_state
 
     def process_samples(self, add_to_dart: bool) -> None:
-        """Processes the samples extracted from the centre file.
+        """Processes the samples extracted from the centre file. The rows of the file are parsed lazily and pushed
+        through the downstream steps in chunks of ROWS_PER_CHUNK rows.
 
         Arguments:
             add_to_dart {bool} -- whether to add the samples to DART
         """
         logger.info("Processing samples")
 
-        # Internally traps TYPE 2: missing headers and TYPE 10 malformed files and returns
-        docs_to_insert = self.process_csv()
+        num_docs_processed = 0
+
+        # Internally traps TYPE 2: missing headers and TYPE 10 malformed files and yields no rows
+        for docs_to_insert in partition(self.iter_csv_rows(), self.ROWS_PER_CHUNK):
+            num_docs_processed += self.process_samples_chunk(docs_to_insert, add_to_dart)
 
         if self.logging_collection.get_count_of_all_errors_and_criticals() > 0:
             logger.error(f"Errors present in file {self.file_name}")
         else:
             logger.info(f"File {self.file_name} is valid")
 
+        if num_docs_processed == 0:
+            logger.info("No new docs to insert")
+
+        self.backup_file()
+        self.create_import_record_for_file()
+
+    def process_samples_chunk(self, docs_to_insert: List[ModifiedRow], add_to_dart: bool) -> int:
+        """Processes a chunk of the parsed rows of the file: assigns source plate UUIDs and COG UK IDs to the rows and
+        inserts them into mongo, MLWH and optionally, DART.
+
+        Arguments:
+            docs_to_insert {List[ModifiedRow]} -- the parsed rows of the chunk
+            add_to_dart {bool} -- whether to add the samples to DART
+
+        Returns:
+            int -- the number of docs which were attempted to be inserted into mongo
+        """
+        if self.config.FILTER_EXISTING_SAMPLES:
+            # Before the source plate UUIDs and COG UK IDs, so none are assigned to rows which are not inserted
+            docs_to_insert = self.docs_to_insert_filtered_for_samples_in_mongo(docs_to_insert)
+
         # Internally traps TYPE 26 failed assigning source plate UUIDs error and returns []
         docs_to_insert = self.docs_to_insert_updated_with_source_plate_uuids(docs_to_insert)
         docs_to_insert = self.docs_to_insert_updated_with_cog_uk_ids(docs_to_insert)
 
         if (num_docs_to_insert := len(docs_to_insert)) > 0:
-            # Mongodb, MLWH and DART will all be updated from the same memory object after parsing the files
+            # Mongodb, MLWH and DART will all be updated from the same memory object after parsing the chunk
             logger.debug(f"{num_docs_to_insert} docs to insert")
 
             # - Process files as is - insert data into mongo
-            mongo_ids_of_inserted = self.insert_samples_from_docs_into_mongo_db(docs_to_insert)
+            mongo_ids_of_inserted = set(self.insert_samples_from_docs_into_mongo_db(docs_to_insert))
 
             if len(mongo_ids_of_inserted) > 0:
                 # Filter out docs which failed to insert into mongo - we don't want to create MLWH records for these.
@@ -467,11 +631,7 @@ class CentreFile:
 
                     self.insert_plates_and_wells_from_docs_into_dart(docs_to_insert_mlwh)
 
-        else:
-            logger.info("No new docs to insert")
-
-        self.backup_file()
-        self.create_import_record_for_file()
+        return num_docs_to_insert
 
     def log_unprocessed(self) -> None:
         """Log the file as unprocessed and ensure it won't be processed in future.
@@ -490,16 +650,24 @@ class CentreFile:
         self.backup_file()
         self.create_import_record_for_file()
 
+    def backup_dir(self) -> str:
+        """The backup directory for the file, depending on whether errors were found when processing it.
+
+        Returns:
+            str -- the name of the backup directory
+        """
+        if self.logging_collection.get_count_of_all_errors_and_criticals() > 0:
+            return ERRORS_DIR
+        else:
+            return SUCCESSES_DIR
+
     def backup_filename(self) -> str:
         """Backup the file.
 
         Returns:
             str -- the filepath of the file backup
         """
-        if self.logging_collection.get_count_of_all_errors_and_criticals() > 0:
-            return f"{self.centre_config[CENTRE_KEY_BACKUPS_FOLDER]}/{ERRORS_DIR}/{self.timestamped_filename()}"
-        else:
-            return f"{self.centre_config[CENTRE_KEY_BACKUPS_FOLDER]}/{SUCCESSES_DIR}/{self.timestamped_filename()}"
+        return f"{self.centre_config[CENTRE_KEY_BACKUPS_FOLDER]}/{self.backup_dir()}/{self.timestamped_filename()}"
 
     def timestamped_filename(self) -> str:
         return f"{current_time()}_{self.file_name}_{self.checksum()}"
@@ -508,11 +676,20 @@ class CentreFile:
         return PROJECT_ROOT.joinpath(self.centre.get_download_dir(), self.file_name)
 
     def backup_file(self) -> None:
-        """Backup the file."""
+        """Backup the file and record its checksum in the index of backed up files."""
         destination = self.backup_filename()
 
         shutil.copyfile(self.full_path_to_file(), destination)
 
+        create_mongo_file_checksum_record(
+            get_mongo_collection(self.get_db(), COLLECTION_FILE_CHECKSUMS),
+            self.centre_config,
+            self.checksum(),
+            self.backup_dir(),
+            self.file_name,
+            os.path.basename(destination),
+        )
+
     def create_import_record_for_file(self) -> None:
         """Writes to the imports collection with information about the CSV file processed."""
         imports_collection = get_mongo_collection(self.get_db(), COLLECTION_IMPORTS)
@@ -532,8 +709,7 @@ class CentreFile:
             Database -- a reference to the database in mongo
         """
         if not hasattr(self, "db"):
-            client = create_mongo_client(self.config)
-            self.db = get_mongo_db(self.config, client)
+            self.db = get_mongo_db(self.config, get_shared_mongo_client(self.config))
 
         return self.db
 
@@ -545,40 +721,109 @@ class CentreFile:
         """
         try:
             wrong_instances = [write_error["op"] for write_error in exception.details["writeErrors"]]
-            samples_collection = get_mongo_collection(self.get_db(), COLLECTION_SAMPLES)
-            for wrong_instance in wrong_instances:
-                # To identify TYPE 7 we need to do a search for
-                entry = samples_collection.find(
-                    {
-                        FIELD_ROOT_SAMPLE_ID: wrong_instance[FIELD_ROOT_SAMPLE_ID],
-                        FIELD_RNA_ID: wrong_instance[FIELD_RNA_ID],
-                        FIELD_RESULT: wrong_instance[FIELD_RESULT],
-                        FIELD_MONGO_LAB_ID: wrong_instance[FIELD_MONGO_LAB_ID],
-                    }
-                )[0]
-                if not (entry):
-                    logger.critical(
-                        f"When trying to insert root_sample_id: "
-                        f"{wrong_instance[FIELD_ROOT_SAMPLE_ID]}, contents: {wrong_instance}"
-                    )
-                    continue
+            for wrong_instances_batch in partition(wrong_instances, self.DUPLICATES_PER_QUERY):
+                # To identify TYPE 7 we need the date tested of the samples already in the database, found with one
+                # query per batch of failed writes rather than one per failed write
+                existing_dates_tested = self.dates_tested_of_samples_in_mongo(
+                    FIELD_ROOT_SAMPLE_ID,
+                    {wrong_instance[FIELD_ROOT_SAMPLE_ID] for wrong_instance in wrong_instances_batch},
+                )
 
-                if entry[FIELD_DATE_TESTED] != wrong_instance[FIELD_DATE_TESTED]:
-                    self.logging_collection.add_error(
-                        "TYPE 7",
-                        f"Already in database, line: {wrong_instance['line_number']}, root sample "
-                        f"id: {wrong_instance['Root Sample ID']}, dates: "
-                        f"({entry[FIELD_DATE_TESTED]} != {wrong_instance[FIELD_DATE_TESTED]})",
-                    )
-                else:
-                    self.logging_collection.add_error(
-                        "TYPE 6",
-                        f"Already in database, line: {wrong_instance['line_number']}, root sample "
-                        f"id: {wrong_instance['Root Sample ID']}",
-                    )
+                for wrong_instance in wrong_instances_batch:
+                    self.add_duplication_error(wrong_instance, existing_dates_tested)
         except Exception as e:
             logger.critical(f"Unknown error with file {self.file_name}: {e}")
 
+    def dates_tested_of_samples_in_mongo(self, field: str, values: Iterable[Any]) -> Dict[Tuple, Any]:
+        """Finds the samples in mongo with any of the given values of an indexed field, projecting only the fields of
+        the compound unique index and the date tested.
+
+        Arguments:
+            field {str} -- the indexed field to query, e.g. the root sample ID or plate barcode
+            values {Iterable[Any]} -- the values of the field to find the samples for
+
+        Returns:
+            Dict[Tuple, Any] -- the date tested of the samples found, by their lab ID, root sample ID, RNA ID and result
+        """
+        samples_collection = get_mongo_collection(self.get_db(), COLLECTION_SAMPLES)
+        existing_samples = samples_collection.find(
+            {field: {"$in": list(values)}},
+            projection={
+                FIELD_MONGODB_ID: False,
+                FIELD_ROOT_SAMPLE_ID: True,
+                FIELD_RNA_ID: True,
+                FIELD_RESULT: True,
+                FIELD_MONGO_LAB_ID: True,
+                FIELD_DATE_TESTED: True,
+            },
+        )
+
+        return {duplicate_sample_key(entry): entry.get(FIELD_DATE_TESTED) for entry in existing_samples}
+
+    def docs_to_insert_filtered_for_samples_in_mongo(self, docs_to_insert: List[ModifiedRow]) -> List[ModifiedRow]:
+        """Drops the rows already in mongo before they are inserted, so rows of a file which is sent again are not
+        round tripped to mongo only to be rejected by the compound unique index. The samples already in mongo are found
+        with one query on the plate barcodes of the rows, and the rows dropped are logged as TYPE 6 or TYPE 7 errors,
+        as they would be when rejected by the index. If the query fails, all the rows are kept and left to the index.
+
+        Arguments:
+            docs_to_insert {List[ModifiedRow]} -- the parsed rows to filter
+
+        Returns:
+            List[ModifiedRow] -- the rows not already in mongo
+        """
+        try:
+            existing_dates_tested = self.dates_tested_of_samples_in_mongo(
+                FIELD_PLATE_BARCODE, {doc[FIELD_PLATE_BARCODE] for doc in docs_to_insert}
+            )
+        except Exception as e:
+            logger.warning(f"Unable to find the samples of file {self.file_name} already in mongo: {e}")
+            return docs_to_insert
+
+        if not existing_dates_tested:
+            return docs_to_insert
+
+        new_docs = []
+        for doc in docs_to_insert:
+            if duplicate_sample_key(doc) in existing_dates_tested:
+                self.add_duplication_error(doc, existing_dates_tested)
+            else:
+                new_docs.append(doc)
+
+        logger.info(f"{len(docs_to_insert) - len(new_docs)} docs already in mongo were not inserted")
+
+        return new_docs
+
+    def add_duplication_error(self, wrong_instance: ModifiedRow, existing_dates_tested: Dict[Tuple, Any]) -> None:
+        """Add a TYPE 6 or TYPE 7 error to the logging collection for a sample which failed to insert because it is
+        already in the database, depending on whether the date tested of the sample in the database differs.
+
+        Arguments:
+            wrong_instance {ModifiedRow} -- the sample which failed to insert
+            existing_dates_tested {Dict[Tuple, Any]} -- the date tested of the samples already in the database, by
+                their lab ID, root sample ID, RNA ID and result
+        """
+        if (key := duplicate_sample_key(wrong_instance)) not in existing_dates_tested:
+            logger.critical(
+                f"When trying to insert root_sample_id: "
+                f"{wrong_instance[FIELD_ROOT_SAMPLE_ID]}, contents: {wrong_instance}"
+            )
+            return
+
+        if (existing_date_tested := existing_dates_tested[key]) != wrong_instance[FIELD_DATE_TESTED]:
+            self.logging_collection.add_error(
+                "TYPE 7",
+                f"Already in database, line: {wrong_instance['line_number']}, root sample "
+                f"id: {wrong_instance['Root Sample ID']}, dates: "
+                f"({existing_date_tested} != {wrong_instance[FIELD_DATE_TESTED]})",
+            )
+        else:
+            self.logging_collection.add_error(
+                "TYPE 6",
+                f"Already in database, line: {wrong_instance['line_number']}, root sample "
+                f"id: {wrong_instance['Root Sample ID']}",
+            )
+
     def docs_to_insert_updated_with_source_plate_uuids(self, docs_to_insert: List[ModifiedRow]) -> List[ModifiedRow]:
         """Updates sample records with source plate UUIDs, returning only those for which a source plate UUID could
         be determined. Adds any new source plates to mongo.
@@ -608,27 +853,31 @@ class CentreFile:
                 logger.error(error_message)
 
         try:
-            new_plates: List[SourcePlateDoc] = []
             source_plates_collection = get_mongo_collection(self.get_db(), COLLECTION_SOURCE_PLATES)
 
-            for doc in docs_to_insert:
-                plate_barcode = doc[FIELD_PLATE_BARCODE]
+            # index the plates that already exist in mongo for all the barcodes in the samples, using a single query
+            plate_barcodes = list({str(doc[FIELD_PLATE_BARCODE]) for doc in docs_to_insert})
+            plates: Dict[str, SourcePlateDoc] = {}
+            for plate in source_plates_collection.find(
+                {FIELD_BARCODE: {"$in": plate_barcodes}},
+                projection={FIELD_BARCODE: True, FIELD_MONGO_LAB_ID: True, FIELD_LH_SOURCE_PLATE_UUID: True},
+            ):
+                plates.setdefault(plate[FIELD_BARCODE], plate)
 
-                # first attempt an update from new plates (added for other samples in this file)
-                existing_new_plate = next((x for x in new_plates if x[FIELD_BARCODE] == plate_barcode), None)
-                if existing_new_plate is not None:
-                    update_doc_from_source_plate(doc, existing_new_plate)
-                    continue
+            new_plates: List[SourcePlateDoc] = []
+            for doc in docs_to_insert:
+                plate_barcode = str(doc[FIELD_PLATE_BARCODE])
 
-                # then attempt an update from plates that exist in mongo
-                existing_mongo_plate = source_plates_collection.find_one(filter={FIELD_BARCODE: plate_barcode})
-                if existing_mongo_plate is not None:
-                    update_doc_from_source_plate(doc, existing_mongo_plate)
+                # attempt an update from plates that exist in mongo or were added for other samples in this batch
+                existing_plate = plates.get(plate_barcode)
+                if existing_plate is not None:
+                    update_doc_from_source_plate(doc, existing_plate)
                     continue
 
                 # then add a new plate
-                new_plate = create_source_plate_doc(str(plate_barcode), str(doc[FIELD_MONGO_LAB_ID]))
+                new_plate = create_source_plate_doc(plate_barcode, str(doc[FIELD_MONGO_LAB_ID]))
                 new_plates.append(new_plate)
+                plates[plate_barcode] = new_plate
                 update_doc_from_source_plate(doc, new_plate, True)
 
             if (new_plates_count := len(new_plates)) > 0:
@@ -662,7 +911,10 @@ class CentreFile:
         try:
             prefix = self.centre_config[CENTRE_KEY_PREFIX]
             count = len(docs_to_insert)
-            cog_uk_ids = generate_baracoda_barcodes(self.config, prefix, count)
+            if self.config.COG_UK_ID_POOL:
+                cog_uk_ids = reserve_cog_uk_ids(self.config, self.get_db(), prefix, count)
+            else:
+                cog_uk_ids = generate_baracoda_barcodes(self.config, prefix, count)
 
             for i, row in enumerate(docs_to_insert):
                 row[FIELD_MONGO_COG_UK_ID] = cog_uk_ids[i]
@@ -693,9 +945,10 @@ class CentreFile:
             # https://pymongo.readthedocs.io/en/stable/faq.html#writes-and-ids
             result = samples_collection.insert_many(documents=docs_to_insert, ordered=False)
 
-            self.docs_inserted = len(result.inserted_ids)
+            # the file is inserted a chunk at a time so keep a running total for the import record
+            self.docs_inserted += len(result.inserted_ids)
 
-            logger.info(f"{self.docs_inserted} documents inserted into mongo")
+            logger.info(f"{len(result.inserted_ids)} documents inserted into mongo")
 
             # inserted_ids is in the same order as docs_to_insert, even if the query has ordered=False parameter
             return list(result.inserted_ids)
@@ -718,24 +971,13 @@ class CentreFile:
                 )
                 logger.info(filtered_errors[0])
 
-            self.docs_inserted = e.details["nInserted"]
+            self.docs_inserted += e.details["nInserted"]
 
-            logger.info(f"{self.docs_inserted} documents inserted into mongo")
+            logger.info(f"{e.details['nInserted']} documents inserted into mongo")
 
             self.add_duplication_errors(e)
 
-            def get_errored_ids(error: Dict[str, Dict[str, str]]) -> str:
-                """Get the object IDs from mongo of documents that failed to write.
-
-                Arguments:
-                    error (Dict[str, Dict[str, str]]): mongo error details
-
-                Returns:
-                    str: mongo object ID
-                """
-                return error["op"][FIELD_MONGODB_ID]
-
-            errored_ids = list(map(get_errored_ids, e.details["writeErrors"]))
+            errored_ids = {write_error["op"][FIELD_MONGODB_ID] for write_error in e.details["writeErrors"]}
 
             logger.warning(f"{len(errored_ids)} records were not inserted")
 
@@ -792,16 +1034,18 @@ class CentreFile:
             try:
                 cursor = sql_server_connection.cursor()
 
+                # fetch the states of the plates already in DART up front, rather than one query per plate
+                plate_states = get_dart_plate_states(cursor, (str(doc[FIELD_PLATE_BARCODE]) for doc in docs_to_insert))
+
                 group_iterator: Iterator[Tuple[Any, Any]] = groupby(docs_to_insert, lambda x: x[FIELD_PLATE_BARCODE])
 
                 for plate_barcode, samples in group_iterator:
                     try:
-                        plate_state = add_dart_plate_if_doesnt_exist(
+                        plate_state = plate_states.get(plate_barcode) or add_dart_plate_if_doesnt_exist(
                             cursor, plate_barcode, self.centre_config[CENTRE_KEY_BIOMEK_LABWARE_CLASS]
                         )
                         if plate_state == DART_STATE_PENDING:
-                            for sample in samples:
-                                add_dart_well_properties_if_positive(cursor, sample, plate_barcode)
+                            add_dart_plate_well_properties(cursor, samples, plate_barcode)
                         cursor.commit()
                     except Exception as e:
                         self.logging_collection.add_error(
@@ -839,28 +1083,39 @@ class CentreFile:
         Returns:
             List[ModifiedRow] -- the augmented data
         """
+        return list(self.iter_csv_rows())
+
+    def iter_csv_rows(self) -> Iterator[ModifiedRow]:
+        """Parses and processes the CSV file of the centre, yielding the augmented rows one at a time so that the whole
+        file never needs to be held in memory.
+
+        Yields:
+            ModifiedRow -- the augmented data for each valid row
+        """
         csvfile_path = self.filepath()
 
         logger.info(f"Attempting to parse and process CSV file: {csvfile_path}")
 
         with open(csvfile_path, newline="") as csvfile:
-            csvreader = DictReader(csvfile)
-
             try:
+                # read through the whole file once before yielding any rows so that a malformed file is rejected
+                # without any of its rows having been processed
+                for _ in csv.reader(csvfile):
+                    pass
+                csvfile.seek(0)
+
+                csvreader = DictReader(csvfile)
+
                 self.remove_bom(csvreader)
                 self.correct_headers(csvreader)
 
                 # first check the required file headers are present
                 if self.check_for_required_headers(csvreader):
                     # then parse and format the rows in the file
-                    documents = self.parse_and_format_file_rows(csvreader)
-
-                    return documents
+                    yield from self.iter_parsed_file_rows(csvreader)
             except (csv.Error, UnicodeDecodeError):
                 self.logging_collection.add_error("TYPE 10", "Wrong read from file")
 
-        return []
-
     def remove_bom(self, csvreader: DictReader) -> None:
         """Checks if there's a byte order mark (BOM) and removes it if so.
         We can't assume that the incoming file will or will not have one, have to cope with both.
@@ -993,6 +1248,56 @@ class CentreFile:
 
         return tuple(signature)
 
+    def header_plan(self, headers: Tuple[str, ...]) -> HeaderPlan:
+        """Returns the header plan for the given column layout, building it the first time the layout is seen. All
+        the rows of a file share the same layout, so the plan is only built once per file.
+
+        Arguments:
+            headers {Tuple[str, ...]} - the columns of a row, in file order
+
+        Returns:
+            {HeaderPlan} - the header plan for the columns
+        """
+        if (header_plan := self.header_plans.get(headers)) is None:
+            header_plan = self.header_plans[headers] = self.build_header_plan(headers)
+
+        return header_plan
+
+    def build_header_plan(self, headers: Tuple[str, ...]) -> HeaderPlan:
+        """Works out which of the columns are accepted fields, which are channel fields (matched using the channel
+        regexes) and which are not recognised.
+
+        Arguments:
+            headers {Tuple[str, ...]} - the columns of a row, in file order
+
+        Returns:
+            {HeaderPlan} - the header plan for the columns
+        """
+        # check for each of the accepted fields (except for the CT fields)
+        seen_headers = [header for header in headers if header in self.ACCEPTED_FIELDS]
+        accepted_fields = tuple(seen_headers)
+
+        # and for any of the optional CT channel headers
+        channel_fields = []
+        for channel_field, regex in self.get_channel_headers_mapping().items():
+            pattern = re.compile(regex, re.IGNORECASE)
+
+            for header in headers:
+                # rows with more values than there are headers have the extra values under the None key
+                if header is None or header in seen_headers:
+                    continue
+
+                if pattern.match(header):
+                    seen_headers.append(header)
+                    channel_fields.append((channel_field, header))
+
+        unknown_value_fields = tuple(field for field in self.get_channel_headers_mapping() if field in headers)
+
+        # and anything left over that we do not recognise
+        unexpected_headers = list(set(headers) - set(seen_headers) - IGNORED_HEADERS)
+
+        return HeaderPlan(accepted_fields, tuple(channel_fields), unknown_value_fields, unexpected_headers)
+
     def filtered_row(self, row: CSVRow, line_number: int) -> ModifiedRow:
         """Filter unneeded columns and add `lab_id` if not present and config flag set.
 
@@ -1004,32 +1309,33 @@ class CentreFile:
         """
 
         modified_row: ModifiedRow = {}
-        seen_headers: List[str] = []
+        header_plan = self.header_plan(tuple(row))
 
         if self.config.ADD_LAB_ID:
             self.determine_lab_id(row, line_number, modified_row)
 
-        # next check the row for values for each of the accepted fields (except for the CT fields) and copy them across
-        for key in self.ACCEPTED_FIELDS:
-            if key in row:
-                seen_headers.append(key)
-                modified_row[key] = row[key].strip() if type(row[key]) is str else row[key]
+        # next copy across the values for each of the accepted fields (except for the CT fields)
+        for key in header_plan.accepted_fields:
+            value = row[key]
+            modified_row[key] = value.strip() if type(value) is str else value
 
-        # and check the row for values for any of the optional CT channel headers and copy them across
-        seen_headers, modified_row = self.extract_channel_fields(seen_headers, row, modified_row)
+        # and the values for any of the optional CT channel columns
+        for channel_field, csv_field in header_plan.channel_fields:
+            if value := row[csv_field]:
+                modified_row[channel_field] = value.strip()
 
         # convert None-like fields to None
-        modified_row = self.convert_channel_fields(row, modified_row)
-
-        # now check if we still have any columns left in the file row that we do not recognise
-        unexpected_headers = list(row.keys() - seen_headers - IGNORED_HEADERS)
+        for channel_field in header_plan.unknown_value_fields:
+            if UNKNOWN_VALUE_REGEX.match(str(row[channel_field])):
+                modified_row[channel_field] = None
 
-        if len(unexpected_headers) > 0:
+        # and log any columns in the file row that we do not recognise
+        if len(header_plan.unexpected_headers) > 0:
             self.logging_collection.add_error(
                 "TYPE 13",
                 f"Unexpected headers, line: {line_number}, "
                 f"root_sample_id: {row.get(FIELD_ROOT_SAMPLE_ID)}, "
-                f"extra headers: {unexpected_headers}",
+                f"extra headers: {header_plan.unexpected_headers}",
             )
 
         return modified_row
@@ -1063,43 +1369,6 @@ class CentreFile:
 
         return modified_row
 
-    def extract_channel_fields(
-        self, seen_headers: List[str], csv_row: CSVRow, modified_row: ModifiedRow
-    ) -> Tuple[List[str], ModifiedRow]:
-        """Extract the channel fields by trying to match the header fields using regex.
-
-        Arguments:
-            seen_headers (List[str]): headers already seen in the file
-            csv_row (CSVRow): row from csv.DictReader
-            modified_row (ModifiedRow): row with updated fields
-
-        Returns:
-            Tuple[List[str], ModifiedRow]: updated seen_headers and modified_row
-        """
-        for channel_field, regex in self.get_channel_headers_mapping().items():
-            pattern = re.compile(regex, re.IGNORECASE)
-
-            for csv_field in csv_row:
-                if csv_field in seen_headers:
-                    continue
-
-                if pattern.match(csv_field):
-                    seen_headers.append(csv_field)
-
-                    if csv_row[csv_field]:
-                        modified_row[channel_field] = csv_row[csv_field].strip()
-
-        return seen_headers, modified_row
-
-    def convert_channel_fields(self, csv_row: CSVRow, modified_row: ModifiedRow) -> ModifiedRow:
-        pattern = re.compile(r"^unknown$", re.IGNORECASE)
-
-        for channel_field_header in self.get_channel_headers_mapping():
-            if pattern.match(str(csv_row.get(channel_field_header))):
-                modified_row[channel_field_header] = None
-
-        return modified_row
-
     def parse_and_format_file_rows(self, csvreader: DictReader) -> List[ModifiedRow]:
         """Attempts to parse and format the file rows
            Adds additional derived and calculated fields to the imported rows that will aid querying later. Filters out
@@ -1113,9 +1382,23 @@ class CentreFile:
         Returns:
             List[ModifiedRow] -- list of errors and the augmented data
         """
+        return list(self.iter_parsed_file_rows(csvreader))
+
+    def iter_parsed_file_rows(self, csvreader: DictReader) -> Iterator[ModifiedRow]:
+        """Lazy version of parse_and_format_file_rows: parses, formats and validates the file rows one at a time. The
+        row signatures used to detect duplicated rows are kept for the whole file.
+
+        Arguments:
+            csvreader {DictReader} -- CSV file reader to iterate over
+
+        Yields:
+            ModifiedRow -- the augmented data for each valid row
+        """
         logger.debug("Adding extra fields")
 
-        verified_rows: List[ModifiedRow] = []
+        if self.config.COLUMNAR_VALIDATION:
+            yield from self.iter_parsed_file_rows_columnar(csvreader)
+            return
 
         # Detect duplications and filters them out
         seen_rows: Set[RowSignature] = set()
@@ -1127,7 +1410,7 @@ class CentreFile:
             # only process rows that have at least a minimum level of data
             if self.row_required_fields_present(row, line_number):
                 if parsed_row := self.parse_and_format_row(row, line_number, seen_rows):
-                    verified_rows.append(parsed_row)
+                    yield parsed_row
                 else:
                     # this counter catches rows where field validation failed
                     failed_validation_count += 1
@@ -1137,6 +1420,86 @@ class CentreFile:
 
             line_number += 1
 
+        self.log_parsed_rows_counts(invalid_rows_count, failed_validation_count)
+
+    def iter_parsed_file_rows_columnar(self, csvreader: DictReader) -> Iterator[ModifiedRow]:
+        """Columnar version of iter_parsed_file_rows: the rows are filtered one at a time, but then validated in batches
+        of ROWS_PER_CHUNK rows using the columnar validation. The rows are logged, rejected as duplicates and augmented
+        in the same order, and with the same errors, as when validating them one at a time.
+
+        Arguments:
+            csvreader {DictReader} -- CSV file reader to iterate over
+
+        Yields:
+            ModifiedRow -- the augmented data for each valid row
+        """
+        seen_rows: Set[RowSignature] = set()
+        date_tested_values: Dict[str, datetime] = {}
+        failed_validation_count = 0
+        invalid_rows_count = 0
+
+        for batch in partition(enumerate(csvreader, start=2), self.ROWS_PER_CHUNK):
+            modified_rows: List[ModifiedRow] = []
+            line_numbers: List[int] = []
+
+            for line_number, row in batch:
+                # only process rows that have at least a minimum level of data
+                if self.row_required_fields_present(row, line_number):
+                    modified_rows.append(self.filtered_row(row, line_number))
+                    line_numbers.append(line_number)
+                else:
+                    # this counter catches blank rows and rows with empty fields
+                    invalid_rows_count += 1
+
+            validation = validate_rows(modified_rows, line_numbers)
+
+            for position, (modified_row, line_number) in enumerate(zip(modified_rows, line_numbers)):
+                row_signature = self.create_row_signature(modified_row)
+
+                if self.is_duplicate_row(row_signature, seen_rows, modified_row, line_number):
+                    failed_validation_count += 1
+                elif position in validation.errors:
+                    if error := validation.errors[position]:
+                        self.logging_collection.add_error(*error)
+                    failed_validation_count += 1
+                else:
+                    self.convert_validated_values(modified_row, validation, date_tested_values)
+
+                    if self.add_derived_fields(modified_row, line_number):
+                        # ---- store row signature to allow checking for duplicates in following rows ----
+                        seen_rows.add(row_signature)
+                        yield modified_row
+                    else:
+                        failed_validation_count += 1
+
+        self.log_parsed_rows_counts(invalid_rows_count, failed_validation_count)
+
+    def convert_validated_values(
+        self, row: ModifiedRow, validation: ColumnarValidation, date_tested_values: Dict[str, datetime]
+    ) -> None:
+        """Converts the channel Cq values and date tested of a row which passed the columnar validation, as
+        validate_row does for a single row.
+
+        Arguments:
+            row {ModifiedRow} - modified filtered and formatted version of the row
+            validation {ColumnarValidation} - the validation of the batch the row is in
+            date_tested_values {Dict[str, datetime]} - the date tested values converted so far, by date string
+        """
+        for channel_cq_field in (FIELD_CH1_CQ, FIELD_CH2_CQ, FIELD_CH3_CQ, FIELD_CH4_CQ):
+            if channel_cq_field_val := row.get(channel_cq_field):
+                row[channel_cq_field] = validation.cq_values[cast(str, channel_cq_field_val)]
+
+        if date_tested := cast(str, row.get(FIELD_DATE_TESTED)):
+            if date_tested not in date_tested_values:
+                date_tested_values[date_tested] = self.convert_datetime_string_to_datetime(
+                    **validation.date_tested_parts[date_tested]
+                )
+            row[FIELD_DATE_TESTED] = date_tested_values[date_tested]
+        else:
+            row[FIELD_DATE_TESTED] = None
+
+    @staticmethod
+    def log_parsed_rows_counts(invalid_rows_count: int, failed_validation_count: int) -> None:
         logger.log(
             INFO if invalid_rows_count == 0 else WARN,
             f"Rows with invalid structure/data in this file: {invalid_rows_count}",
@@ -1146,8 +1509,6 @@ class CentreFile:
             f"Rows that failed validation in this file: {failed_validation_count}",
         )
 
-        return verified_rows
-
     def parse_and_format_row(
         self, row: CSVRow, line_number: int, seen_rows: Set[RowSignature]
     ) -> Optional[ModifiedRow]:
@@ -1167,21 +1528,61 @@ class CentreFile:
         # ---- check if this row has already been seen in this file, based on key fields ----
         row_signature = self.create_row_signature(modified_row)
 
+        if self.is_duplicate_row(row_signature, seen_rows, modified_row, line_number):
+            return None
+
+        if not self.validate_row(modified_row, line_number):
+            return None
+
+        if not self.add_derived_fields(modified_row, line_number):
+            return None
+
+        # ---- store row signature to allow checking for duplicates in following rows ----
+        seen_rows.add(row_signature)
+
+        return modified_row
+
+    def is_duplicate_row(
+        self, row_signature: RowSignature, seen_rows: Set[RowSignature], row: ModifiedRow, line_number: int
+    ) -> bool:
+        """Checks whether a row has already been seen in this file, logging it if so.
+
+        Arguments:
+            row_signature {RowSignature} - "signature" of the row
+            seen_rows {Set[RowSignature]} - signatures of the rows seen so far
+            row {ModifiedRow} - modified filtered and formatted version of the row
+            line_number {int} - line number within the file
+
+        Returns:
+            bool - whether the row is a duplicate
+        """
         if row_signature in seen_rows:
             logger.debug(f"Skipping {row_signature}: duplicate")
             self.logging_collection.add_error(
                 "TYPE 5",
-                f"Duplicated, line: {line_number}, root_sample_id: {modified_row[FIELD_ROOT_SAMPLE_ID]}",
+                f"Duplicated, line: {line_number}, root_sample_id: {row[FIELD_ROOT_SAMPLE_ID]}",
             )
-            return None
+            return True
+
+        return False
 
+    def validate_row(self, modified_row: ModifiedRow, line_number: int) -> bool:
+        """Runs validations on the content of a single row, converting the channel Cq values and date tested.
+
+        Arguments:
+            modified_row {ModifiedRow} - modified filtered and formatted version of the row
+            line_number {int} - line number within the file
+
+        Returns:
+            bool - whether the row passed all the validations
+        """
         # ---- convert data types for channel fields ----
         if not self.convert_and_validate_cq_values(modified_row, line_number):
-            return None
+            return False
 
         # ---- perform various validations on row values ----
         if not self.is_valid_root_sample_id(modified_row):
-            return None
+            return False
 
         # Check that the date is a valid format and if so, convert it to a datetime before saving to mongo
         date_format_valid, date_string_dict = self.is_valid_date_format(modified_row, line_number, FIELD_DATE_TESTED)
@@ -1193,24 +1594,26 @@ class CentreFile:
             else:
                 modified_row[FIELD_DATE_TESTED] = None
         else:
-            return None
-
-        if not self.row_result_value_valid(modified_row, line_number):
-            return None
-
-        if not self.row_channel_target_values_valid(modified_row, line_number):
-            return None
+            return False
 
-        if not self.row_channel_result_values_valid(modified_row, line_number):
-            return None
+        return (
+            self.row_result_value_valid(modified_row, line_number)
+            and self.row_channel_target_values_valid(modified_row, line_number)
+            and self.row_channel_result_values_valid(modified_row, line_number)
+            and self.row_channel_cq_values_within_range(modified_row, line_number)
+            and self.row_positive_result_matches_channel_results(modified_row, line_number)
+        )
 
-        if not self.row_channel_cq_values_within_range(modified_row, line_number):
-            return None
+    def add_derived_fields(self, modified_row: ModifiedRow, line_number: int) -> bool:
+        """Adds a few additional, computed or derived fields to a valid row.
 
-        if not self.row_positive_result_matches_channel_results(modified_row, line_number):
-            return None
+        Arguments:
+            modified_row {ModifiedRow} - modified filtered and formatted version of the row
+            line_number {int} - line number within the file
 
-        # ---- add a few additional, computed or derived fields ----
+        Returns:
+            bool - whether the plate barcode could be extracted for the row
+        """
         # add the centre name as source
         modified_row[FIELD_SOURCE] = self.centre_config[CENTRE_KEY_NAME]
 
@@ -1225,7 +1628,7 @@ class CentreFile:
             ) = self.extract_plate_barcode_and_coordinate(modified_row, line_number, barcode_field, barcode_regex)
 
         if not modified_row.get(FIELD_PLATE_BARCODE):
-            return None
+            return False
 
         modified_row[FIELD_LINE_NUMBER] = line_number
         modified_row[FIELD_FILE_NAME] = self.file_name
@@ -1241,10 +1644,7 @@ class CentreFile:
         # add lh sample uuid
         modified_row[FIELD_LH_SAMPLE_UUID] = str(uuid.uuid4())
 
-        # ---- store row signature to allow checking for duplicates in following rows ----
-        seen_rows.add(row_signature)
-
-        return modified_row
+        return True
 
     def convert_and_validate_cq_values(self, row: ModifiedRow, line_number: int) -> bool:
         """Convert and validate each of the four channel fields.
@@ -1321,10 +1721,9 @@ class CentreFile:
 
     @staticmethod
     def is_valid_root_sample_id(row: ModifiedRow) -> bool:
-        pattern = re.compile(r"^empty$", re.IGNORECASE)
         root_sample_id = str(row.get(FIELD_ROOT_SAMPLE_ID)).strip()
 
-        if pattern.match(root_sample_id):
+        if EMPTY_ROOT_SAMPLE_ID_REGEX.match(root_sample_id):
             return False
 
         return True
@@ -1346,10 +1745,7 @@ class CentreFile:
         if not (date_field_val := row.get(date_field)):
             return True, {}
         else:
-            for pattern in (
-                r"^(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})[ ]+(?P<time>[0-2]\d:[0-5]\d:[0-5]\d)([ ]+(?P<timezone_name>UTC)?)?$",  # noqa: E501
-                r"^(?P<day>\d{2})/(?P<month>\d{2})/(?P<year>\d{4})[ ]+(?P<time>[0-2]\d:[0-5]\d)$",
-            ):
+            for pattern in DATE_TESTED_REGEXES:
                 if match := re.match(pattern, str(date_field_val)):
                     return True, match.groupdict()
 
@@ -1,7 +1,10 @@
 import decimal
+import functools
 import re
-from typing import Optional, Pattern, cast
+from fractions import Fraction
+from typing import Any, Dict, List, Optional, Pattern, Sequence, Tuple, cast
 
+import numpy as np
 from bson.decimal128 import Decimal128, create_decimal128_context
 
 from crawler.constants import (
@@ -20,6 +23,20 @@ FILTERED_POSITIVE_VERSION_1 = "v1"  # initial implementation, as per GPL-669
 FILTERED_POSITIVE_VERSION_2 = "v2"  # updated as per GPL-699 and GPL-740
 FILTERED_POSITIVE_VERSION_3 = "v3"  # updated as per DPL-018
 
+# the CT value fields evaluated against the CT value limit, in the order they are evaluated
+CT_VALUE_FIELDS = (FIELD_CH1_CQ, FIELD_CH2_CQ, FIELD_CH3_CQ)
+
+# the layout of the Binary Integer Decimal (BID) encoding of a Decimal128, see IEEE 754-2008
+_BID_SIGN_SHIFT = 63
+_BID_EXPONENT_SHIFT = 49
+_BID_EXPONENT_MASK = 0x3FFF
+_BID_EXPONENT_BIAS = 6176
+_BID_HIGH_COEFFICIENT_MASK = (1 << _BID_EXPONENT_SHIFT) - 1
+# the two bits which, when both set, mark a NaN, an infinity or a coefficient too large to be canonical
+_BID_SPECIAL_SHIFT = 61
+_BID_SPECIAL = 0b11
+_UINT64_MAX = np.iinfo(np.uint64).max
+
 
 class FilteredPositiveIdentifier:
     def __init__(self):
@@ -39,12 +56,7 @@ class FilteredPositiveIdentifier:
         Returns:
             {bool} -- whether the sample is a filtered positive
         """
-        if not self.result_regex.match(str(sample[FIELD_RESULT])):
-            return False
-
-        if self.root_sample_id_control_regex and self.root_sample_id_control_regex.match(
-            str(sample[FIELD_ROOT_SAMPLE_ID])
-        ):
+        if not self.is_positive_result(sample):
             return False
 
         if self.evaluate_ct_values:
@@ -74,6 +86,189 @@ class FilteredPositiveIdentifier:
         else:
             return True
 
+    def is_positive_result(self, sample: SampleDoc) -> bool:
+        """Determines whether a sample has a positive result and is not a control, i.e. whether it is a filtered
+        positive before its CT values are evaluated.
+
+        Arguments:
+            sample {Sample} -- information on a single sample
+
+        Returns:
+            {bool} -- whether the sample has a positive result and is not a control
+        """
+        if not self.result_regex.match(str(sample[FIELD_RESULT])):
+            return False
+
+        if self.root_sample_id_control_regex and self.root_sample_id_control_regex.match(
+            str(sample[FIELD_ROOT_SAMPLE_ID])
+        ):
+            return False
+
+        return True
+
+    def classify_many(self, samples: Sequence[SampleDoc]) -> List[bool]:
+        """Determines whether each of a batch of samples is a filtered positive, giving exactly the same answers as
+        calling is_positive on each sample in turn.
+
+        The CT values are compared against the limit all at once: the Binary Integer Decimal (BID) encoding of each
+        Decimal128 is read into integer arrays of signs, exponents and coefficients, and each coefficient is compared
+        against the limit scaled to its exponent. The comparison is on integers, so it is exact. Samples with a CT value
+        which cannot be compared this way (a NaN, an infinity, a coefficient wider than 64 bits or a value which is not
+        a Decimal128) are left to is_positive.
+
+        Arguments:
+            samples {Sequence[SampleDoc]} -- the samples to classify
+
+        Returns:
+            {List[bool]} -- whether each sample is a filtered positive, in the order of the samples
+        """
+        results = [self.is_positive_result(sample) for sample in samples]
+
+        if not self.evaluate_ct_values:
+            return results
+
+        # the index of the sample each CT value belongs to, and the BID encoding of the value
+        ct_value_rows: List[int] = []
+        ct_value_bids: List[bytes] = []
+        for index, sample in enumerate(samples):
+            if not results[index]:
+                continue
+
+            ct_values = [sample.get(field) for field in CT_VALUE_FIELDS]
+            if all(ct_value is None for ct_value in ct_values):
+                continue
+
+            # is_positive skips empty values, e.g. an empty string, and fails on any other value which is not a
+            # Decimal128, so leave those samples to it
+            ct_values = [ct_value for ct_value in ct_values if ct_value is not None and ct_value]
+            if any(type(ct_value) is not Decimal128 for ct_value in ct_values):
+                results[index] = self.is_positive(sample)
+                continue
+
+            results[index] = False
+            for ct_value in ct_values:
+                ct_value_rows.append(index)
+                ct_value_bids.append(cast(Decimal128, ct_value).bid)
+
+        if not ct_value_rows:
+            return results
+
+        rows = np.array(ct_value_rows)
+        within_limit, comparable = self._ct_values_within_limit(ct_value_bids)
+
+        for index in np.unique(rows[within_limit & comparable]):
+            results[index] = True
+
+        for index in np.unique(rows[~comparable]):
+            results[index] = self.is_positive(samples[index])
+
+        return results
+
+    def aggregation_expression(self) -> Dict[str, Any]:
+        """Compiles the rules of the identifier into a Mongo aggregation expression which evaluates to whether a sample
+        is a filtered positive, so the server can pick out the samples whose filtered positive value would change. The
+        expression must agree with is_positive, which remains the source of truth.
+
+        Returns:
+            {Dict[str, Any]} -- the aggregation expression
+        """
+        conditions: List[Dict[str, Any]] = [_regex_match_expression(FIELD_RESULT, self.result_regex)]
+
+        if self.root_sample_id_control_regex:
+            conditions.append(
+                {"$not": [_regex_match_expression(FIELD_ROOT_SAMPLE_ID, self.root_sample_id_control_regex)]}
+            )
+
+        if self.evaluate_ct_values:
+            ct_value_limit = Decimal128(self.ct_value_limit)
+            # only Decimal128 values are compared, and Mongo orders a NaN below every number, so the lower bound keeps
+            # NaNs out, as their comparisons are false in Python
+            ct_value_within_limit = [
+                {
+                    "$and": [
+                        {"$eq": [{"$type": f"${field}"}, "decimal"]},
+                        {"$gte": [f"${field}", Decimal128("-Infinity")]},
+                        {"$lte": [f"${field}", ct_value_limit]},
+                    ]
+                }
+                for field in CT_VALUE_FIELDS
+            ]
+            no_ct_values = {
+                "$and": [{"$in": [{"$type": f"${field}"}, ["missing", "null"]]} for field in CT_VALUE_FIELDS]
+            }
+
+            conditions.append({"$or": [no_ct_values, *ct_value_within_limit]})
+
+        return {"$and": conditions}
+
+    def _ct_values_within_limit(self, bids: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+        """Compares Decimal128 CT values, given by their BID encodings, against the CT value limit.
+
+        Arguments:
+            bids {List[bytes]} -- the BID encodings of the CT values
+
+        Returns:
+            {Tuple[np.ndarray, np.ndarray]} -- whether each CT value is within the limit, and whether it could be
+            compared at all
+        """
+        # each encoding is a little endian low then high 64 bit word
+        words = np.frombuffer(b"".join(bids), dtype="<u8").reshape(-1, 2)
+        low, high = words[:, 0], words[:, 1]
+
+        # a limit which is not a finite, non-negative number is left to is_positive
+        if not self.ct_value_limit.is_finite() or self.ct_value_limit < 0:
+            return np.zeros(len(low), dtype=bool), np.zeros(len(low), dtype=bool)
+
+        negative = (high >> np.uint64(_BID_SIGN_SHIFT)).astype(bool)
+        comparable = ((high >> np.uint64(_BID_SPECIAL_SHIFT)) & np.uint64(_BID_SPECIAL)) != _BID_SPECIAL
+        # only the coefficients held entirely in the low word are compared
+        comparable &= (high & np.uint64(_BID_HIGH_COEFFICIENT_MASK)) == 0
+
+        exponents = ((high >> np.uint64(_BID_EXPONENT_SHIFT)) & np.uint64(_BID_EXPONENT_MASK)).astype(np.int64)
+        unique_exponents, exponent_indexes = np.unique(exponents, return_inverse=True)
+        thresholds = np.array(
+            [
+                _coefficient_threshold(self.ct_value_limit, int(exponent) - _BID_EXPONENT_BIAS)
+                for exponent in unique_exponents
+            ],
+            dtype=np.uint64,
+        )
+
+        # a value is within the limit when its coefficient * 10^exponent <= limit, i.e. its coefficient is no more
+        # than the limit scaled to its exponent, rounded down
+        within_limit = negative | (low <= thresholds[exponent_indexes.reshape(-1)])
+
+        return within_limit, comparable
+
+
+def _regex_match_expression(field: str, regex: Pattern[str]) -> Dict[str, Any]:
+    """Returns a Mongo aggregation expression which evaluates to whether the regex matches the start of a field.
+
+    Arguments:
+        field {str} -- the name of the field to match
+        regex {Pattern[str]} -- the regex to match, anchored to the start of the field
+
+    Returns:
+        {Dict[str, Any]} -- the aggregation expression
+    """
+    options = "i" if regex.flags & re.IGNORECASE else ""
+
+    return {"$regexMatch": {"input": {"$toString": f"${field}"}, "regex": regex.pattern, "options": options}}
+
+
+@functools.lru_cache(maxsize=None)
+def _coefficient_threshold(ct_value_limit: decimal.Decimal, exponent: int) -> int:
+    """Returns the largest coefficient which, at the given exponent, is within the CT value limit.
+
+    Arguments:
+        ct_value_limit {decimal.Decimal} -- the (finite, non-negative) CT value limit
+        exponent {int} -- the (unbiased) exponent of the values
+
+    Returns:
+        {int} -- the largest coefficient within the limit, capped at the largest 64 bit unsigned integer
+    """
+    return min(int(Fraction(ct_value_limit) / Fraction(10) ** exponent), int(_UINT64_MAX))
+
 
 def current_filtered_positive_identifier() -> FilteredPositiveIdentifier:
     """Returns the current filtered positive identifier.
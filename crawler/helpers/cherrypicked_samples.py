@@ -1,16 +1,19 @@
 import logging
-from typing import Dict, Iterator, List, Optional, Set, Tuple
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import DefaultDict, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-import pandas as pd
 import sqlalchemy
-from pandas import DataFrame, concat
 
-from crawler.constants import FIELD_PLATE_BARCODE, FIELD_ROOT_SAMPLE_ID
+from crawler.constants import CHERRYPICKED_SAMPLES_QUERY_WORKERS, FIELD_PLATE_BARCODE, FIELD_ROOT_SAMPLE_ID
 from crawler.sql_queries import SQL_MLWH_GET_CP_SAMPLES, SQL_MLWH_GET_CP_SAMPLES_BY_DATE
 from crawler.types import Config, SampleDoc
 
 logger = logging.getLogger(__name__)
 
+# a cherrypicked sample is identified by its root sample ID and plate barcode, in that order
+CherrypickedSampleKey = Tuple[str, str]
+
 
 def extract_required_cp_info(samples: List[SampleDoc]) -> Tuple[Set[str], Set[str]]:
     root_sample_ids = set()
@@ -23,6 +26,24 @@ def extract_required_cp_info(samples: List[SampleDoc]) -> Tuple[Set[str], Set[st
     return root_sample_ids, plate_barcodes
 
 
+def extract_plate_barcodes_by_root_sample_id(samples: List[SampleDoc]) -> Dict[str, Set[str]]:
+    """The plate barcodes of the samples for each root sample ID, so a query for a batch of root sample IDs can be
+    limited to the plate barcodes those samples are on.
+
+    Arguments:
+        samples {List[Sample]} -- the samples
+
+    Returns:
+        Dict[str, Set[str]] -- the plate barcodes of the samples with each root sample ID
+    """
+    plate_barcodes_by_root_sample_id: DefaultDict[str, Set[str]] = defaultdict(set)
+
+    for sample in samples:
+        plate_barcodes_by_root_sample_id[str(sample[FIELD_ROOT_SAMPLE_ID])].add(str(sample[FIELD_PLATE_BARCODE]))
+
+    return plate_barcodes_by_root_sample_id
+
+
 def filter_out_cherrypicked_samples(config: Config, samples: List[SampleDoc]) -> List[SampleDoc]:
     """Filters an input list of samples for those that have not been cherrypicked.
 
@@ -34,111 +55,146 @@ def filter_out_cherrypicked_samples(config: Config, samples: List[SampleDoc]) ->
         List[Sample] -- non-cherrypicked samples
     """
     root_sample_ids, plate_barcodes = extract_required_cp_info(samples)
-    cp_samples_df = get_cherrypicked_samples(config, list(root_sample_ids), list(plate_barcodes))
+    cp_sample_keys = get_cherrypicked_sample_keys(
+        config,
+        list(root_sample_ids),
+        list(plate_barcodes),
+        plate_barcodes_by_root_sample_id=extract_plate_barcodes_by_root_sample_id(samples),
+    )
 
-    if cp_samples_df is None:
+    if cp_sample_keys is None:
         raise ConnectionError("Unable to determine cherry-picked samples - potentially error connecting to MySQL")
-    elif not cp_samples_df.empty:
-        cp_samples = cp_samples_df[[FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE]].to_numpy().tolist()
-        return remove_cherrypicked_samples(samples, cp_samples)
+    elif cp_sample_keys:
+        return remove_cherrypicked_samples(samples, cp_sample_keys)
     else:
         return samples
 
 
-def get_cherrypicked_samples(
+def get_cherrypicked_sample_keys(
     config: Config,
     root_sample_ids: List[str],
     plate_barcodes: List[str],
     chunk_size: int = 50000,
-) -> Optional[DataFrame]:
-    """Find which samples have been cherrypicked using MLWH & Events warehouse.
-    Returns dataframe with 4 columns: those needed to uniquely identify the sample resulting
-    dataframe only contains those samples that have been cherrypicked (those that have an entry
-    for the relevant event type in the event warehouse)
+    plate_barcodes_by_root_sample_id: Optional[Dict[str, Set[str]]] = None,
+    workers: int = CHERRYPICKED_SAMPLES_QUERY_WORKERS,
+) -> Optional[Set[CherrypickedSampleKey]]:
+    """Find which samples have been cherrypicked using MLWH & Events warehouse, as the (root sample ID, plate barcode)
+    keys identifying them. The rows are read straight into the set, so finding whether a sample has been
+    cherrypicked is a single lookup.
 
-    Args:
-        root_sample_ids (List[str]): [description]
-        plate_barcodes (List[str]): [description]
-        chunk_size (int, optional): [description]. Defaults to 50000.
+    Arguments:
+        config {Config} -- application config specifying database details
+        root_sample_ids {List[str]} -- the root sample IDs of the samples to check
+        plate_barcodes {List[str]} -- the plate barcodes of the samples to check
+        chunk_size {int} -- the number of root sample IDs to query at once; defaults to 50000
+        plate_barcodes_by_root_sample_id {Optional[Dict[str, Set[str]]]} -- the plate barcodes of the samples for each
+            root sample ID, to only query each batch of root sample IDs for the plate barcodes they are on
+        workers {int} -- the number of queries to run at once
 
     Returns:
-        DataFrame: [description]
+        Optional[Set[CherrypickedSampleKey]] -- the keys of the cherrypicked samples, or None if they could not be
+        queried
     """
     logger.debug("Getting cherry-picked samples from MLWH")
 
-    return build_data_frame_from_database_queries_aggregation(
+    return build_cherrypicked_sample_keys_from_database_queries(
         database_connection_uri(config),
         SQL_MLWH_GET_CP_SAMPLES,
-        params_for_cherrypicked_samples_query(root_sample_ids, plate_barcodes, chunk_size),
+        params_for_cherrypicked_samples_query(
+            root_sample_ids, plate_barcodes, chunk_size, plate_barcodes_by_root_sample_id
+        ),
+        workers,
     )
 
 
-def get_cherrypicked_samples_by_date(
+def get_cherrypicked_sample_keys_by_date(
     config: Config,
     root_sample_ids: List[str],
     plate_barcodes: List[str],
     start_date: str,
     end_date: str,
     chunk_size: int = 50000,
-) -> Optional[DataFrame]:
-    """Find which samples have been cherrypicked between defined dates using MLWH & Events warehouse.
-    Returns dataframe with 4 columns: those needed to uniquely identify the sample resulting
-    dataframe only contains those samples that have been cherrypicked (those that have an entry
-    for the relevant event type in the event warehouse)
+    plate_barcodes_by_root_sample_id: Optional[Dict[str, Set[str]]] = None,
+    workers: int = CHERRYPICKED_SAMPLES_QUERY_WORKERS,
+) -> Optional[Set[CherrypickedSampleKey]]:
+    """Find which samples have been cherrypicked between defined dates using MLWH & Events warehouse, as the
+    (root sample ID, plate barcode) keys identifying them.
 
-    Args:
-        config (Config): application config specifying database details
-        root_sample_ids (List[str]): [description]
-        plate_barcodes (List[str]): [description]
-        start_date (str): lower limit on creation date
-        end_date (str): upper limit on creation date
-        chunk_size (int, optional): [description]. Defaults to 50000.
+    Arguments:
+        config {Config} -- application config specifying database details
+        root_sample_ids {List[str]} -- the root sample IDs of the samples to check
+        plate_barcodes {List[str]} -- the plate barcodes of the samples to check
+        start_date {str} -- lower limit on creation date
+        end_date {str} -- upper limit on creation date
+        chunk_size {int} -- the number of root sample IDs to query at once; defaults to 50000
+        plate_barcodes_by_root_sample_id {Optional[Dict[str, Set[str]]]} -- the plate barcodes of the samples for each
+            root sample ID, to only query each batch of root sample IDs for the plate barcodes they are on
+        workers {int} -- the number of queries to run at once
 
     Returns:
-        DataFrame: [description]
+        Optional[Set[CherrypickedSampleKey]] -- the keys of the cherrypicked samples, or None if they could not be
+        queried
     """
-
     logger.debug("Getting cherry-picked samples from MLWH")
 
-    return build_data_frame_from_database_queries_aggregation(
+    return build_cherrypicked_sample_keys_from_database_queries(
         database_connection_uri(config),
         SQL_MLWH_GET_CP_SAMPLES_BY_DATE,
         params_for_cherrypicked_samples_by_date_query(
-            root_sample_ids, plate_barcodes, start_date, end_date, chunk_size
+            root_sample_ids, plate_barcodes, start_date, end_date, chunk_size, plate_barcodes_by_root_sample_id
         ),
+        workers,
     )
 
 
-def remove_cherrypicked_samples(samples: List[SampleDoc], cherry_picked_samples: List[List[str]]) -> List[SampleDoc]:
+def remove_cherrypicked_samples(
+    samples: List[SampleDoc], cherry_picked_samples: Iterable[Iterable[str]]
+) -> List[SampleDoc]:
     """Remove samples that have been cherry-picked. We need to check on (root sample id, plate barcode) combo rather
     than just root sample id. As multiple samples can exist with the same root sample id, with the potential for one
     being cherry-picked, and one not.
 
     Args:
         samples (List[Sample]): List of samples in the shape of mongo documents
-        cherry_picked_samples (List[List[str]]): 2 dimensional list of cherry-picked samples with root sample id and
-        plate barcodes for each.
+        cherry_picked_samples (Iterable[Iterable[str]]): the root sample id and plate barcode, in that order, of each
+        cherry-picked sample; either the keys from get_cherrypicked_sample_keys or a 2 dimensional list.
 
     Returns:
         List[Sample]: The original list of samples minus the cherry-picked samples.
     """
-    cherry_picked_sets = [{cp_sample[0], cp_sample[1]} for cp_sample in cherry_picked_samples]
-    filtered = filter(
-        lambda sample: {sample[FIELD_ROOT_SAMPLE_ID], sample[FIELD_PLATE_BARCODE]} not in cherry_picked_sets,
-        samples,
-    )
-    return list(filtered)
+    # the pairs are kept in order, so a root sample id never matches a plate barcode with the same value
+    cp_sample_keys = {tuple(cp_sample) for cp_sample in cherry_picked_samples}
+
+    return [
+        sample
+        for sample in samples
+        if (sample[FIELD_ROOT_SAMPLE_ID], sample[FIELD_PLATE_BARCODE]) not in cp_sample_keys
+    ]
 
 
 def params_for_cherrypicked_samples_query(
     root_sample_ids: List[str],
     plate_barcodes: List[str],
     chunk_size: int = 50000,
+    plate_barcodes_by_root_sample_id: Optional[Dict[str, Set[str]]] = None,
 ) -> Iterator[Dict]:
     for x in range(0, len(root_sample_ids), chunk_size):
+        chunk_root_sample_ids = tuple(root_sample_ids[x : (x + chunk_size)])  # noqa: E203
+        chunk_plate_barcodes = plate_barcodes
+
+        if plate_barcodes_by_root_sample_id is not None:
+            # a sample can only have been cherrypicked from a plate it is on
+            relevant_plate_barcodes = set().union(
+                *(plate_barcodes_by_root_sample_id.get(root_sample_id, ()) for root_sample_id in chunk_root_sample_ids)
+            )
+            chunk_plate_barcodes = [barcode for barcode in plate_barcodes if barcode in relevant_plate_barcodes]
+
+            if not chunk_plate_barcodes:
+                continue
+
         yield {
-            "root_sample_ids": tuple(root_sample_ids[x : (x + chunk_size)]),  # noqa: E203
-            "plate_barcodes": plate_barcodes,
+            "root_sample_ids": chunk_root_sample_ids,
+            "plate_barcodes": chunk_plate_barcodes,
         }
 
 
@@ -148,9 +204,12 @@ def params_for_cherrypicked_samples_by_date_query(
     start_date: str,
     end_date: str,
     chunk_size: int = 50000,
+    plate_barcodes_by_root_sample_id: Optional[Dict[str, Set[str]]] = None,
 ) -> Iterator[Dict]:
     # TODO: Use [dictionary union](https://www.python.org/dev/peps/pep-0584/) when upgrading to Python 3.9
-    for params in params_for_cherrypicked_samples_query(root_sample_ids, plate_barcodes, chunk_size):
+    for params in params_for_cherrypicked_samples_query(
+        root_sample_ids, plate_barcodes, chunk_size, plate_barcodes_by_root_sample_id
+    ):
         yield {
             **params,
             **{
@@ -160,36 +219,80 @@ def params_for_cherrypicked_samples_by_date_query(
         }
 
 
-def build_data_frame_from_database_queries_aggregation(
-    database_connection_uri: str, query_template: str, params_iterator: Iterator[Dict]
-) -> Optional[DataFrame]:
-    try:
-        db_connection = None
+def stream_cherrypicked_sample_keys(
+    database_connection_uri: str,
+    query_template: str,
+    params_iterator: Iterator[Dict],
+    workers: int = CHERRYPICKED_SAMPLES_QUERY_WORKERS,
+) -> Iterator[Set[CherrypickedSampleKey]]:
+    """Runs a cherrypicked samples query for each set of parameters, several at once on a pool of connections, and
+    yields the (root sample ID, plate barcode) keys of the rows returned by each query as soon as it completes.
 
-        logger.debug("Getting cherry-picked samples from MLWH")
+    Arguments:
+        database_connection_uri {str} -- the URI of the MLWH database
+        query_template {str} -- the query, returning root sample ID and plate barcode columns
+        params_iterator {Iterator[Dict]} -- the parameters for each query
+        workers {int} -- the number of queries to run at once
 
-        # Create an empty DataFrame to merge into
-        concat_frame = pd.DataFrame()
+    Returns:
+        Iterator[Set[CherrypickedSampleKey]] -- the keys of the cherrypicked samples returned by each query, in the
+        order the queries complete
+    """
+    sql_engine = sqlalchemy.create_engine(database_connection_uri, pool_recycle=3600, pool_size=workers)
 
-        sql_engine = sqlalchemy.create_engine(database_connection_uri, pool_recycle=3600)
+    def query_cherrypicked_sample_keys(params: Dict) -> Set[CherrypickedSampleKey]:
         db_connection = sql_engine.connect()
+        try:
+            rows = db_connection.execution_options(stream_results=True).exec_driver_sql(query_template, params)
 
-        for params in params_iterator:
-            data_frame = pd.read_sql(query_template, db_connection, params=params)
-            # drop_duplicates is needed because the same 'root sample id' could pop up in two different batches,
-            # and then it would retrieve the same rows for that root sample id twice
-            # do reset_index after dropping duplicates to make sure the rows are numbered in a way that makes sense
+            return {(row[FIELD_ROOT_SAMPLE_ID], row[FIELD_PLATE_BARCODE]) for row in rows.mappings()}
+        finally:
+            db_connection.close()
 
-            concat_frame = concat((concat_frame, data_frame)).drop_duplicates().reset_index(drop=True)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(query_cherrypicked_sample_keys, params) for params in params_iterator]
 
-        return concat_frame
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # don't run the queries still waiting if one has failed or the caller has stopped reading the results
+        executor.shutdown(cancel_futures=True)
+        sql_engine.dispose()
+
+
+def build_cherrypicked_sample_keys_from_database_queries(
+    database_connection_uri: str,
+    query_template: str,
+    params_iterator: Iterator[Dict],
+    workers: int = CHERRYPICKED_SAMPLES_QUERY_WORKERS,
+) -> Optional[Set[CherrypickedSampleKey]]:
+    """Runs a cherrypicked samples query for each set of parameters, gathering the (root sample ID, plate barcode)
+    keys of the rows returned into a set.
+
+    Arguments:
+        database_connection_uri {str} -- the URI of the MLWH database
+        query_template {str} -- the query, returning root sample ID and plate barcode columns
+        params_iterator {Iterator[Dict]} -- the parameters for each query
+        workers {int} -- the number of queries to run at once
+
+    Returns:
+        Optional[Set[CherrypickedSampleKey]] -- the keys of the cherrypicked samples, or None if they could not be
+        queried
+    """
+    try:
+        # the same sample can be returned for more than one batch of root sample ids, which the set takes care of
+        cp_sample_keys: Set[CherrypickedSampleKey] = set()
+        for query_cp_sample_keys in stream_cherrypicked_sample_keys(
+            database_connection_uri, query_template, params_iterator, workers
+        ):
+            cp_sample_keys.update(query_cp_sample_keys)
+
+        return cp_sample_keys
     except Exception as e:
         logger.error("Error while connecting to MySQL")
         logger.exception(e)
         return None
-    finally:
-        if db_connection:
-            db_connection.close()
 
 
 def database_connection_uri(config: Config) -> str:
@@ -0,0 +1,174 @@
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+import pymongo
+from pymongo.database import Database
+
+from crawler.constants import (
+    CENTRE_KEY_PREFIX,
+    COLLECTION_COG_UK_IDS,
+    FIELD_COG_UK_ID,
+    FIELD_CREATED_AT,
+    FIELD_MONGODB_ID,
+    FIELD_PREFIX,
+    FIELD_RESERVATION_ID,
+)
+from crawler.db.mongo import get_mongo_collection
+from crawler.helpers.general_helpers import generate_baracoda_barcodes
+from crawler.types import CentreConf, Config
+
+logger = logging.getLogger(__name__)
+
+
+def count_available_cog_uk_ids(database: Database, prefix: str) -> int:
+    """Counts the COG UK IDs in the pool for a prefix which have not been reserved.
+
+    Arguments:
+        database {Database} -- the MongoDB database holding the pool
+        prefix {str} -- the prefix of the centre the IDs are for
+
+    Returns:
+        int -- the number of IDs available
+    """
+    cog_uk_ids_collection = get_mongo_collection(database, COLLECTION_COG_UK_IDS)
+
+    return cog_uk_ids_collection.count_documents({FIELD_PREFIX: prefix, FIELD_RESERVATION_ID: None})
+
+
+def add_cog_uk_ids_to_pool(database: Database, prefix: str, cog_uk_ids: List[str]) -> None:
+    """Adds COG UK IDs generated by Baracoda to the pool for a prefix.
+
+    Arguments:
+        database {Database} -- the MongoDB database holding the pool
+        prefix {str} -- the prefix of the centre the IDs are for
+        cog_uk_ids {List[str]} -- the IDs to add
+    """
+    if not cog_uk_ids:
+        return
+
+    cog_uk_ids_collection = get_mongo_collection(database, COLLECTION_COG_UK_IDS)
+
+    created_at = datetime.now(tz=timezone.utc)
+    cog_uk_ids_collection.insert_many(
+        [
+            {FIELD_PREFIX: prefix, FIELD_COG_UK_ID: cog_uk_id, FIELD_RESERVATION_ID: None, FIELD_CREATED_AT: created_at}
+            for cog_uk_id in cog_uk_ids
+        ],
+        ordered=False,
+    )
+
+
+def reserve_cog_uk_ids_from_pool(database: Database, prefix: str, count: int) -> List[str]:
+    """Reserves up to the given number of COG UK IDs from the pool for a prefix, removing them from the pool.
+
+    Each ID is claimed by setting a reservation ID on it, which only succeeds if it has not already been claimed, so
+    concurrent reservations can never be given the same ID. IDs claimed by another reservation in between finding and
+    claiming them are replaced by finding more, until enough are reserved or the pool runs out.
+
+    Arguments:
+        database {Database} -- the MongoDB database holding the pool
+        prefix {str} -- the prefix of the centre the IDs are for
+        count {int} -- the number of IDs required
+
+    Returns:
+        List[str] -- the reserved IDs in the order they were added to the pool, fewer than requested if it ran out
+    """
+    cog_uk_ids_collection = get_mongo_collection(database, COLLECTION_COG_UK_IDS)
+    reservation_id = str(uuid.uuid4())
+
+    reserved_count = 0
+    while reserved_count < count:
+        available_ids = [
+            doc[FIELD_MONGODB_ID]
+            for doc in cog_uk_ids_collection.find(
+                {FIELD_PREFIX: prefix, FIELD_RESERVATION_ID: None}, projection={FIELD_MONGODB_ID: True}
+            )
+            .sort(FIELD_MONGODB_ID, pymongo.ASCENDING)
+            .limit(count - reserved_count)
+        ]
+        if not available_ids:
+            break
+
+        result = cog_uk_ids_collection.update_many(
+            {FIELD_MONGODB_ID: {"$in": available_ids}, FIELD_RESERVATION_ID: None},
+            {"$set": {FIELD_RESERVATION_ID: reservation_id}},
+        )
+        reserved_count += result.modified_count
+
+    reserved = cog_uk_ids_collection.find({FIELD_RESERVATION_ID: reservation_id}).sort(
+        FIELD_MONGODB_ID, pymongo.ASCENDING
+    )
+    cog_uk_ids = [doc[FIELD_COG_UK_ID] for doc in reserved]
+
+    # the reserved IDs are handed out, so they no longer need to be kept in the pool
+    cog_uk_ids_collection.delete_many({FIELD_RESERVATION_ID: reservation_id})
+
+    return cog_uk_ids
+
+
+def reserve_cog_uk_ids(config: Config, database: Database, prefix: str, count: int) -> List[str]:
+    """Reserves COG UK IDs for samples from the pool for a prefix. If the pool does not hold enough IDs, the rest are
+    requested from Baracoda.
+
+    Arguments:
+        config {Config} -- application config specifying the Baracoda details
+        database {Database} -- the MongoDB database holding the pool
+        prefix {str} -- the prefix of the centre the IDs are for
+        count {int} -- the number of IDs required
+
+    Returns:
+        List[str] -- the reserved IDs
+    """
+    cog_uk_ids = reserve_cog_uk_ids_from_pool(database, prefix, count)
+
+    if (shortfall := count - len(cog_uk_ids)) > 0:
+        logger.warning(f"COG UK ID pool for {prefix} holds too few IDs, requesting {shortfall} from Baracoda")
+        cog_uk_ids += generate_baracoda_barcodes(config, prefix, shortfall)
+
+    return cog_uk_ids
+
+
+def refill_cog_uk_id_pool(config: Config, database: Database, prefix: str) -> int:
+    """Tops up the pool of COG UK IDs for a prefix to the pool size with IDs from Baracoda, if it has fallen below the
+    low water mark.
+
+    Arguments:
+        config {Config} -- application config specifying the pool sizes and Baracoda details
+        database {Database} -- the MongoDB database holding the pool
+        prefix {str} -- the prefix of the centre the IDs are for
+
+    Returns:
+        int -- the number of IDs added to the pool
+    """
+    available_count = count_available_cog_uk_ids(database, prefix)
+    if available_count >= config.COG_UK_ID_POOL_LOW_WATER_MARK:
+        return 0
+
+    added_count = 0
+    while (required_count := config.COG_UK_ID_POOL_SIZE - available_count - added_count) > 0:
+        batch_size = min(required_count, config.COG_UK_ID_POOL_REFILL_BATCH_SIZE)
+        add_cog_uk_ids_to_pool(database, prefix, generate_baracoda_barcodes(config, prefix, batch_size))
+        added_count += batch_size
+
+    logger.info(f"Added {added_count} IDs to the COG UK ID pool for {prefix}")
+
+    return added_count
+
+
+def refill_cog_uk_id_pools(config: Config, database: Database, centres: List[CentreConf]) -> None:
+    """Tops up the pools of COG UK IDs for the prefixes of the centres. A failure to refill the pool for one prefix,
+    e.g. if Baracoda is unavailable, is logged and does not stop the other pools being refilled.
+
+    Arguments:
+        config {Config} -- application config specifying the pool sizes and Baracoda details
+        database {Database} -- the MongoDB database holding the pools
+        centres {List[CentreConf]} -- the centres to refill the pools for
+    """
+    for prefix in sorted({centre[CENTRE_KEY_PREFIX] for centre in centres}):
+        try:
+            refill_cog_uk_id_pool(config, database, prefix)
+        except Exception as e:
+            logger.error(f"Failed refilling the COG UK ID pool for {prefix}")
+            logger.exception(e)
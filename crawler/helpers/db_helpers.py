@@ -1,28 +1,46 @@
 import logging
 from datetime import datetime, timezone
-from typing import Any, List, Mapping, Optional
+from typing import Any, Iterator, List, Mapping, Optional, Sequence, Tuple
 
 import pymongo
 from pymongo.client_session import ClientSession
 from pymongo.collection import Collection
 from pymongo.database import Database
-from pymongo.results import InsertOneResult
+from pymongo.results import InsertOneResult, UpdateResult
 
 from crawler.constants import (
     CENTRE_KEY_NAME,
+    COLLECTION_COG_UK_IDS,
+    COLLECTION_DART_EXPORTS,
+    COLLECTION_FILE_CHECKSUMS,
     COLLECTION_SAMPLES,
     COLLECTION_SOURCE_PLATES,
+    FIELD_BACKUP_DIR,
+    FIELD_BACKUP_FILE_NAME,
     FIELD_BARCODE,
+    FIELD_CHECKSUM,
+    FIELD_COG_UK_ID,
+    FIELD_CREATED_AT,
+    FIELD_DART_EXPORT_NEXT_ATTEMPT_AT,
+    FIELD_FILE_NAME,
     FIELD_LH_SAMPLE_UUID,
     FIELD_LH_SOURCE_PLATE_UUID,
+    FIELD_MONGO_CENTRE_NAME,
     FIELD_MONGO_LAB_ID,
     FIELD_MONGO_RESULT,
     FIELD_MONGO_RNA_ID,
     FIELD_MONGO_ROOT_SAMPLE_ID,
+    FIELD_MONGODB_ID,
     FIELD_PLATE_BARCODE,
+    FIELD_PREFIX,
+    FIELD_RESERVATION_ID,
+    FIELD_STATUS,
 )
-from crawler.db.mongo import get_mongo_collection
-from crawler.types import CentreConf
+from crawler.db.dart import init_dart_connection_pool
+from crawler.db.mongo import close_shared_mongo_clients, get_mongo_collection
+from crawler.db.mysql import init_mlwh_connection_pools
+from crawler.db.pools import close_connection_pools
+from crawler.types import CentreConf, Config
 
 logger = logging.getLogger(__name__)
 
@@ -77,6 +95,36 @@ def ensure_mongo_collections_indexed(database: Database) -> None:
     logger.debug(f"Creating index '{FIELD_LH_SOURCE_PLATE_UUID}' on '{samples_collection.full_name}'")
     samples_collection.create_index(FIELD_LH_SOURCE_PLATE_UUID)
 
+    # Index on the checksums of the backed up centre files, used to identify files that have already been processed
+    file_checksums_collection = get_mongo_collection(database, COLLECTION_FILE_CHECKSUMS)
+
+    logger.debug(f"Creating compound index on '{file_checksums_collection.full_name}'")
+    file_checksums_collection.create_index(
+        [
+            (FIELD_MONGO_CENTRE_NAME, pymongo.ASCENDING),
+            (FIELD_CHECKSUM, pymongo.ASCENDING),
+            (FIELD_BACKUP_DIR, pymongo.ASCENDING),
+        ],
+        unique=True,
+    )
+
+    # Indexes on the pools of COG UK IDs, used to reserve the IDs for samples
+    cog_uk_ids_collection = get_mongo_collection(database, COLLECTION_COG_UK_IDS)
+
+    logger.debug(f"Creating index '{FIELD_COG_UK_ID}' on '{cog_uk_ids_collection.full_name}'")
+    cog_uk_ids_collection.create_index(FIELD_COG_UK_ID, unique=True)
+
+    logger.debug(f"Creating compound index on '{cog_uk_ids_collection.full_name}'")
+    cog_uk_ids_collection.create_index([(FIELD_PREFIX, pymongo.ASCENDING), (FIELD_RESERVATION_ID, pymongo.ASCENDING)])
+
+    # Index on the outbox of plates to export to DART, used to find those due an export attempt
+    dart_exports_collection = get_mongo_collection(database, COLLECTION_DART_EXPORTS)
+
+    logger.debug(f"Creating compound index on '{dart_exports_collection.full_name}'")
+    dart_exports_collection.create_index(
+        [(FIELD_STATUS, pymongo.ASCENDING), (FIELD_DART_EXPORT_NEXT_ATTEMPT_AT, pymongo.ASCENDING)]
+    )
+
 
 def create_mongo_import_record(
     import_collection: Collection,
@@ -110,6 +158,60 @@ def create_mongo_import_record(
     return import_collection.insert_one(document=import_doc)
 
 
+def create_mongo_file_checksum_record(
+    file_checksums_collection: Collection,
+    centre: CentreConf,
+    checksum: str,
+    backup_dir: str,
+    file_name: str,
+    backup_file_name: str,
+) -> UpdateResult:
+    """Records the checksum of a centre file which has been backed up, so that the file is recognised as already
+    processed when it is seen again. Only one record is kept per centre, checksum and backup directory.
+
+    Arguments:
+        file_checksums_collection {Collection}: the collection which stores the checksums of the backed up files
+        centre {CentreConf}: the centre the file belongs to
+        checksum {str}: the md5 checksum of the file
+        backup_dir {str}: the backup directory the file was copied into, i.e. errors or successes
+        file_name {str}: the name of the file
+        backup_file_name {str}: the name of the backup copy of the file
+
+    Returns:
+        UpdateResult: the result of upserting the record
+    """
+    logger.debug(f"Recording checksum {checksum} of file {file_name} backed up in {backup_dir}")
+
+    return file_checksums_collection.update_one(
+        {
+            FIELD_MONGO_CENTRE_NAME: centre[CENTRE_KEY_NAME],
+            FIELD_CHECKSUM: checksum,
+            FIELD_BACKUP_DIR: backup_dir,
+        },
+        {
+            "$set": {FIELD_FILE_NAME: file_name, FIELD_BACKUP_FILE_NAME: backup_file_name},
+            "$setOnInsert": {FIELD_CREATED_AT: datetime.now(tz=timezone.utc)},
+        },
+        upsert=True,
+    )
+
+
+def get_mongo_file_checksum_records(
+    file_checksums_collection: Collection, centre: CentreConf, checksum: str
+) -> Iterator[Mapping[str, Any]]:
+    """Finds the records of the backups of a centre's files with the given checksum.
+
+    Arguments:
+        file_checksums_collection {Collection}: the collection which stores the checksums of the backed up files
+        centre {CentreConf}: the centre the file belongs to
+        checksum {str}: the md5 checksum of the file
+
+    Returns:
+        Iterator[Mapping[str, Any]]: the matching records, one per backup directory
+    """
+    return file_checksums_collection.find({FIELD_MONGO_CENTRE_NAME: centre[CENTRE_KEY_NAME], FIELD_CHECKSUM: checksum})
+
+
 def populate_mongo_collection(collection: Collection, documents: List[Mapping[str, Any]], filter_field: str) -> None:
     """Populates a collection using the given documents. It uses the filter_field to replace any documents that match
     the filter and adds any new documents.
@@ -126,29 +228,74 @@ def populate_mongo_collection(collection: Collection, documents: List[Mapping[st
         )
 
 
+def duplicate_sample_key(sample: Mapping[str, Any]) -> Tuple[Any, Any, Any, Any]:
+    """The fields of a sample covered by the compound unique index on the samples collection, which no two samples can
+    share. A field missing from a sample is None, as the index treats it as null; older samples in mongo do not always
+    have all of the fields.
+
+    Arguments:
+        sample {Mapping[str, Any]} -- the sample
+
+    Returns:
+        Tuple[Any, Any, Any, Any] -- the lab ID, root sample ID, RNA ID and result of the sample
+    """
+    return (
+        sample.get(FIELD_MONGO_LAB_ID),
+        sample.get(FIELD_MONGO_ROOT_SAMPLE_ID),
+        sample.get(FIELD_MONGO_RNA_ID),
+        sample.get(FIELD_MONGO_RESULT),
+    )
+
+
 def samples_filtered_for_duplicates_in_mongo(
-    samples_collection: Collection, samples: List[Mapping[str, Any]], session: Optional[ClientSession] = None
+    samples_collection: Collection, samples: Sequence[Mapping[str, Any]], session: Optional[ClientSession] = None
 ) -> List[Mapping[str, Any]]:
-    dup_query = {
-        "$or": [
-            {
-                FIELD_MONGO_LAB_ID: sample[FIELD_MONGO_LAB_ID],
-                FIELD_MONGO_ROOT_SAMPLE_ID: sample[FIELD_MONGO_ROOT_SAMPLE_ID],
-                FIELD_MONGO_RNA_ID: sample[FIELD_MONGO_RNA_ID],
-                FIELD_MONGO_RESULT: sample[FIELD_MONGO_RESULT],
-            }
-            for sample in samples
-        ]
-    }
+    """Finds the samples which would break the compound unique index on the samples collection if inserted.
+
+    The samples already in mongo are found with a single $in on the root sample ID, the leading field of the index,
+    rather than an $or with a clause per sample, and are matched to the given samples on all the fields of the index.
+
+    Arguments:
+        samples_collection {Collection} -- the samples collection
+        samples {Sequence[Mapping[str, Any]]} -- the samples to check
+        session {Optional[ClientSession]} -- the session to query mongo in, if any
+
+    Returns:
+        List[Mapping[str, Any]] -- the given samples which already exist in mongo, in the order given
+    """
+    sample_keys = [duplicate_sample_key(sample) for sample in samples]
+
+    result = samples_collection.find(
+        {FIELD_MONGO_ROOT_SAMPLE_ID: {"$in": list({sample[FIELD_MONGO_ROOT_SAMPLE_ID] for sample in samples})}},
+        projection={
+            FIELD_MONGODB_ID: False,
+            FIELD_MONGO_LAB_ID: True,
+            FIELD_MONGO_ROOT_SAMPLE_ID: True,
+            FIELD_MONGO_RNA_ID: True,
+            FIELD_MONGO_RESULT: True,
+        },
+        session=session,
+    )
+
+    # samples sharing a root sample ID but not the other fields are found too, and are not duplicates
+    duplicate_keys = {duplicate_sample_key(dup_sample) for dup_sample in result}
+
+    return [sample for sample, key in zip(samples, sample_keys) if key in duplicate_keys]
+
+
+def init_connection_pools(config: Config, workers: Optional[int] = None) -> None:
+    """Initialise the pools of MLWH and DART connections shared by the whole crawler run, so files and messages reuse
+    connections instead of each opening their own. Pools which have already been initialised are left as they are.
+
+    Arguments:
+        config {Config} -- application config specifying database details and the pool sizes
+        workers {Optional[int]} -- the number of centres processed at once, when run with other than WORKERS
+    """
+    init_mlwh_connection_pools(config, workers)
+    init_dart_connection_pool(config, workers)
+
 
-    result = samples_collection.find(dup_query, session=session)
-
-    return [
-        sample
-        for dup_sample in result
-        for sample in samples
-        if sample[FIELD_MONGO_LAB_ID] == dup_sample[FIELD_MONGO_LAB_ID]
-        and sample[FIELD_MONGO_ROOT_SAMPLE_ID] == dup_sample[FIELD_MONGO_ROOT_SAMPLE_ID]
-        and sample[FIELD_MONGO_RNA_ID] == dup_sample[FIELD_MONGO_RNA_ID]
-        and sample[FIELD_MONGO_RESULT] == dup_sample[FIELD_MONGO_RESULT]
-    ]
+def close_connection_pools_and_clients() -> None:
+    """Close the pools of MLWH and DART connections and the shared MongoClients."""
+    close_connection_pools()
+    close_shared_mongo_clients()
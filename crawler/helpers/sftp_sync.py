@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple
+
+import pysftp
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteFile(NamedTuple):
+    """A file listed on the SFTP server, with the attributes used to tell whether it has changed since downloaded."""
+
+    name: str
+    size: int
+    mtime: int
+
+
+def remote_file_from_attributes(attributes: Any) -> RemoteFile:
+    """Creates a remote file from the attributes returned for it by listdir_attr.
+
+    Arguments:
+        attributes {SFTPAttributes} -- the attributes of the file
+
+    Returns:
+        RemoteFile -- the remote file
+    """
+    return RemoteFile(attributes.filename, attributes.st_size or 0, attributes.st_mtime or 0)
+
+
+def read_manifest(manifest_path: str) -> Dict[str, RemoteFile]:
+    """Reads the manifest of the files downloaded to a local directory. A missing or unreadable manifest is treated as
+    empty, so every file is downloaded again.
+
+    Arguments:
+        manifest_path {str} -- the path of the manifest
+
+    Returns:
+        Dict[str, RemoteFile] -- the remote attributes of the files downloaded, by file name
+    """
+    try:
+        with open(manifest_path) as manifest_file:
+            return {name: RemoteFile(name, size, mtime) for name, (size, mtime) in json.load(manifest_file).items()}
+    except FileNotFoundError:
+        return {}
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Ignoring the unreadable SFTP manifest {manifest_path}: {e}")
+        return {}
+
+
+def write_manifest(manifest_path: str, remote_files: Iterable[RemoteFile]) -> None:
+    """Writes the manifest of the files downloaded to a local directory, replacing any previous manifest.
+
+    Arguments:
+        manifest_path {str} -- the path of the manifest
+        remote_files {Iterable[RemoteFile]} -- the files downloaded
+    """
+    temporary_path = f"{manifest_path}.tmp"
+    with open(temporary_path, "w") as manifest_file:
+        json.dump(
+            {remote_file.name: [remote_file.size, remote_file.mtime] for remote_file in remote_files}, manifest_file
+        )
+
+    os.replace(temporary_path, manifest_path)
+
+
+def is_downloaded(remote_file: RemoteFile, manifest: Dict[str, RemoteFile], local_dir: str) -> bool:
+    """Whether a remote file has already been downloaded to a local directory and not changed since, i.e. it is in the
+    manifest with the same size and modification time and the local copy is still there.
+
+    Arguments:
+        remote_file {RemoteFile} -- the file on the SFTP server
+        manifest {Dict[str, RemoteFile]} -- the manifest of the files downloaded
+        local_dir {str} -- the directory the files are downloaded to
+
+    Returns:
+        bool -- whether the local copy of the file can be reused
+    """
+    if manifest.get(remote_file.name) != remote_file:
+        return False
+
+    try:
+        return os.path.getsize(os.path.join(local_dir, remote_file.name)) == remote_file.size
+    except OSError:
+        return False
+
+
+def download_files(
+    sftp: pysftp.Connection, remote_dir: str, local_dir: str, remote_files: List[RemoteFile], workers: int
+) -> List[RemoteFile]:
+    """Downloads files from a directory of the SFTP server concurrently, each worker over its own SFTP channel of the
+    connection. Each file is downloaded to a temporary file which is renamed once complete, so a failed download never
+    leaves a partial file behind. Failures are logged, and the file left to be downloaded on the next run.
+
+    Arguments:
+        sftp {pysftp.Connection} -- the connection to the SFTP server
+        remote_dir {str} -- the directory on the SFTP server to download from
+        local_dir {str} -- the directory to download to
+        remote_files {List[RemoteFile]} -- the files to download
+        workers {int} -- the maximum number of files downloaded at once
+
+    Returns:
+        List[RemoteFile] -- the files downloaded
+    """
+    pending: "queue.SimpleQueue[RemoteFile]" = queue.SimpleQueue()
+    for remote_file in remote_files:
+        pending.put(remote_file)
+
+    downloaded: List[RemoteFile] = []
+    downloaded_lock = threading.Lock()
+    transport = sftp.sftp_client.get_channel().get_transport()
+
+    def download_pending_files() -> None:
+        with transport.open_sftp_client() as sftp_client:
+            while True:
+                try:
+                    remote_file = pending.get_nowait()
+                except queue.Empty:
+                    return
+
+                local_path = os.path.join(local_dir, remote_file.name)
+                temporary_path = f"{local_path}.part"
+                try:
+                    sftp_client.get(f"{remote_dir.rstrip('/')}/{remote_file.name}", temporary_path)
+                    os.replace(temporary_path, local_path)
+                except Exception as e:
+                    logger.error(f"Failed downloading {remote_file.name} from SFTP: {e}")
+                    if os.path.exists(temporary_path):
+                        os.remove(temporary_path)
+                    continue
+
+                with downloaded_lock:
+                    downloaded.append(remote_file)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="sftp-download") as executor:
+        futures = [executor.submit(download_pending_files) for _ in range(min(max(workers, 1), len(remote_files)))]
+
+    for future in futures:
+        # a channel which could not be opened leaves its files to the other workers, or to the next run
+        if (exception := future.exception()) is not None:
+            logger.error(f"Failed opening an SFTP channel: {exception}")
+
+    return downloaded
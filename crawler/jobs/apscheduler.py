@@ -4,6 +4,9 @@ from flask import current_app as app
 from lab_share_lib.config_readers import get_config
 
 from crawler import scheduler
+from crawler.config.centres import get_centres_config
+from crawler.db.mongo import get_mongo_db, get_shared_mongo_client
+from crawler.helpers.cog_uk_id_pool import refill_cog_uk_id_pools
 from crawler.main import run
 
 logger = logging.getLogger(__name__)
@@ -20,4 +23,16 @@ def scheduled_run():
         use_sftp = app.config["USE_SFTP"]
         keep_files = app.config["KEEP_FILES"]
         add_to_dart = app.config["ADD_TO_DART"]
-        run(use_sftp, keep_files, add_to_dart)
+        workers = app.config.get("WORKERS", 1)
+        run(use_sftp, keep_files, add_to_dart, workers=workers)
+
+
+def scheduled_cog_uk_id_pools_refill():
+    """Scheduler's job to top up the pools of COG UK IDs for the centres every 5 minutes, only scheduled when
+    COG_UK_ID_POOL is enabled."""
+    config, _ = get_config()
+
+    logger.info("Starting scheduled_cog_uk_id_pools_refill job.")
+
+    centres = get_centres_config(config)
+    refill_cog_uk_id_pools(config, get_mongo_db(config, get_shared_mongo_client(config)), centres)
@@ -1,22 +1,31 @@
 import logging
 import logging.config
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple, cast
 
 from lab_share_lib.config_readers import get_config
 
 from crawler.config.centres import CENTRE_DATA_SOURCE_SFTP, get_centres_config
 from crawler.constants import CENTRE_KEY_INCLUDE_IN_SCHEDULED_RUNS, CENTRE_KEY_NAME, CENTRE_KEY_PREFIX
-from crawler.db.mongo import create_mongo_client, get_mongo_db
+from crawler.db.mongo import get_mongo_db, get_shared_mongo_client
 from crawler.file_processing import Centre
-from crawler.helpers.db_helpers import ensure_mongo_collections_indexed
+from crawler.helpers.db_helpers import ensure_mongo_collections_indexed, init_connection_pools
 from crawler.priority_samples_process import update_priority_samples
 from crawler.types import Config
+from crawler.utils import centre_logging_context
 
 logger = logging.getLogger(__name__)
 
 
-def run(sftp: bool, keep_files: bool, add_to_dart: bool, settings_module: str = "", centre_prefix: str = "") -> None:
+def run(
+    sftp: bool,
+    keep_files: bool,
+    add_to_dart: bool,
+    settings_module: str = "",
+    centre_prefix: str = "",
+    workers: int = 1,
+) -> None:
     try:
         start = time.time()
         config, settings_module = cast(Tuple[Config, str], get_config(settings_module))
@@ -30,39 +39,65 @@ def run(sftp: bool, keep_files: bool, add_to_dart: bool, settings_module: str =
         # get or create the centres collection and filter down to only those with an SFTP data source
         centres = get_centres_config(config, CENTRE_DATA_SOURCE_SFTP)
 
-        with create_mongo_client(config) as client:
-            db = get_mongo_db(config, client)
-            ensure_mongo_collections_indexed(db)
+        # connections are shared by all the centres and files, and by later runs from the scheduler; the pools are
+        # sized for the workers of this run, which are not always the WORKERS of the config, e.g. from runner.py
+        init_connection_pools(config, workers)
 
-            if centre_prefix:
-                # We are only interested in processing a single centre
-                centres = list(filter(lambda config: config.get(CENTRE_KEY_PREFIX) == centre_prefix, centres))
-            else:
-                # We should only include centres that are to be batch processed
-                centres = list(filter(lambda config: config.get(CENTRE_KEY_INCLUDE_IN_SCHEDULED_RUNS, True), centres))
+        db = get_mongo_db(config, get_shared_mongo_client(config))
+        ensure_mongo_collections_indexed(db)
 
-            centres_instances = [Centre(config, centre_config) for centre_config in centres]
+        if centre_prefix:
+            # We are only interested in processing a single centre
+            centres = list(filter(lambda config: config.get(CENTRE_KEY_PREFIX) == centre_prefix, centres))
+        else:
+            # We should only include centres that are to be batch processed
+            centres = list(filter(lambda config: config.get(CENTRE_KEY_INCLUDE_IN_SCHEDULED_RUNS, True), centres))
 
-            for centre_instance in centres_instances:
-                logger.info("*" * 80)
-                logger.info(f"Processing {centre_instance.centre_config[CENTRE_KEY_NAME]}")
+        centres_instances = [Centre(config, centre_config) for centre_config in centres]
 
-                try:
-                    if sftp:
-                        centre_instance.download_csv_files()
+        if workers > 1 and len(centres_instances) > 1:
+            logger.info(f"Processing {len(centres_instances)} centres using {workers} workers")
 
-                    centre_instance.process_files(add_to_dart)
-                except Exception as e:
-                    logger.error(f"Error in centre '{centre_instance.centre_config[CENTRE_KEY_NAME]}'")
-                    logger.exception(e)
-                finally:
-                    if not keep_files and centre_instance.is_download_dir_walkable:
-                        centre_instance.clean_up()
+            # centres are independent of each other so can be processed concurrently; each task traps its own
+            # errors so one failing centre does not stop the others
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="centre") as executor:
+                for centre_instance in centres_instances:
+                    executor.submit(process_centre, centre_instance, sftp, keep_files, add_to_dart)
+        else:
+            for centre_instance in centres_instances:
+                process_centre(centre_instance, sftp, keep_files, add_to_dart)
 
-                # Prioritisation of samples
-                update_priority_samples(db, config, add_to_dart)
+        # Prioritisation of samples, once all the centres have been processed
+        update_priority_samples(db, config, add_to_dart)
 
         logger.info(f"Import complete in {round(time.time() - start, 2)}s")
         logger.info("=" * 80)
     except Exception as e:
         logger.exception(e)
+
+
+def process_centre(centre_instance: Centre, sftp: bool, keep_files: bool, add_to_dart: bool) -> None:
+    """Download (optionally) and process the files of a single centre. Any exception is logged and trapped so that the
+    remaining centres are still processed.
+
+    Arguments:
+        centre_instance {Centre} -- the centre to process
+        sftp {bool} -- whether to download the centre's files from the SFTP server first
+        keep_files {bool} -- whether to keep the downloaded files once processed
+        add_to_dart {bool} -- whether to add the samples to DART
+    """
+    with centre_logging_context(centre_instance.centre_config.get(CENTRE_KEY_PREFIX, "")):
+        logger.info("*" * 80)
+        logger.info(f"Processing {centre_instance.centre_config[CENTRE_KEY_NAME]}")
+
+        try:
+            if sftp:
+                centre_instance.download_csv_files()
+
+            centre_instance.process_files(add_to_dart)
+        except Exception as e:
+            logger.error(f"Error in centre '{centre_instance.centre_config[CENTRE_KEY_NAME]}'")
+            logger.exception(e)
+        finally:
+            if not keep_files and centre_instance.is_download_dir_walkable:
+                centre_instance.clean_up()
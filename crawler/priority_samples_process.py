@@ -4,9 +4,12 @@
 #
 import logging
 import logging.config
+import threading
+from datetime import datetime
 from itertools import groupby
-from typing import Any, Dict, Final, Iterator, List, Mapping, Tuple
+from typing import Any, Dict, Final, Iterator, List, Mapping, Optional, Set, Tuple
 
+from bson.objectid import ObjectId
 from pymongo.database import Database
 
 from crawler.constants import (
@@ -19,10 +22,17 @@ from crawler.constants import (
     FIELD_PROCESSED,
     FIELD_SAMPLE_ID,
     FIELD_SOURCE,
+    FIELD_UPDATED_AT,
+    PRIORITY_SAMPLES_UPDATE_CHUNK_SIZE,
+)
+from crawler.db.dart import (
+    add_dart_plate_if_doesnt_exist,
+    add_dart_plate_well_properties,
+    create_dart_sql_server_conn,
+    get_dart_plate_states,
 )
-from crawler.db.dart import add_dart_plate_if_doesnt_exist, add_dart_well_properties, create_dart_sql_server_conn
 from crawler.db.mongo import get_mongo_collection
-from crawler.db.mysql import insert_or_update_samples_in_mlwh
+from crawler.db.mysql import insert_or_update_samples_in_mlwh, partition
 from crawler.helpers.logging_helpers import LoggingCollection
 from crawler.types import Config, ModifiedRowValue, SampleDoc
 
@@ -31,7 +41,18 @@ logger = logging.getLogger(__name__)
 logging_collection = LoggingCollection()
 
 
-def update_priority_samples(db: Database, config: Config, add_to_dart: bool) -> None:
+# held while prioritising, so the crawler run and the priority samples worker never prioritise at the same time
+prioritisation_lock = threading.Lock()
+
+
+def update_priority_samples(
+    db: Database,
+    config: Config,
+    add_to_dart: bool,
+    sample_ids: Optional[List[ObjectId]] = None,
+    since: Optional[datetime] = None,
+    reported_unprocessed: Optional[Set[ObjectId]] = None,
+) -> int:
     """
     Update any unprocessed priority samples in MLWH and DART with an up to date
     value for the priority attributes (must_sequence and preferentially_sequence);
@@ -42,56 +63,113 @@ def update_priority_samples(db: Database, config: Config, add_to_dart: bool) ->
         db {Database} -- mongo db instance
         config {Config} -- config for mysql and dart connections
         add_to_dart {bool} -- whether to add the samples to DART
+        sample_ids {Optional[List[ObjectId]]} -- only update the priority samples for these samples; defaults to all
+        since {Optional[datetime]} -- also update the priority samples already processed which were created or updated
+            at or after this time, e.g. to catch up after restoring the MLWH or DART
+        reported_unprocessed {Optional[Set[ObjectId]]} -- the samples already reported as having an unprocessed priority
+            sample, which are not reported again, see validate_prioritisation_process
+
+    Returns:
+        int -- the number of samples found to update
     """
-    logging_collection.reset()
-    logger.info("**********************************")
-    logger.info("Starting Prioritisation of samples")
+    with prioritisation_lock:
+        logging_collection.reset()
+        logger.info("**********************************")
+        logger.info("Starting Prioritisation of samples")
 
-    samples = query_any_unprocessed_samples(db)
+        samples = query_any_unprocessed_samples(db, sample_ids, since)
 
-    # Create all samples in MLWH with samples containing both sample and priority sample info
-    mlwh_success = update_priority_samples_into_mlwh(samples, config)
+        # Create all samples in MLWH with samples containing both sample and priority sample info
+        mlwh_success = update_priority_samples_into_mlwh(samples, config)
 
-    if mlwh_success:
-        if add_to_dart:
-            # Add to the DART database if MLWH update was successful
-            dart_success = insert_plates_and_wells_into_dart(samples, config)
-        if not (add_to_dart) or dart_success:
-            # Update mongo priority samples processed to true if DART successful
-            update_unprocessed_priority_samples_to_processed(db, samples)
+        if mlwh_success:
+            if add_to_dart:
+                # Add to the DART database if MLWH update was successful
+                dart_success = insert_plates_and_wells_into_dart(samples, config)
+            if not (add_to_dart) or dart_success:
+                # Update mongo priority samples processed to true if DART successful
+                update_unprocessed_priority_samples_to_processed(db, samples)
 
-    validate_prioritisation_process(db)
+        validate_prioritisation_process(db, sample_ids, reported_unprocessed)
 
-    print_summary()
+        print_summary()
 
+    return len(samples)
 
-def validate_prioritisation_process(db: Database) -> None:
+
+def priority_samples_to_process_filter(
+    sample_ids: Optional[List[ObjectId]] = None, since: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    The filter matching the priority samples to process: the unprocessed ones and, if given a time,
+    those created or updated since then.
+
+    Arguments:
+        sample_ids {Optional[List[ObjectId]]} -- only match the priority samples for these samples
+        since {Optional[datetime]} -- also match the priority samples created or updated at or after this time
+
+    Returns:
+        Dict[str, Any] -- the filter for the priority_samples collection
+    """
+    priority_samples_filter: Dict[str, Any] = {FIELD_PROCESSED: False}
+
+    if since is not None:
+        priority_samples_filter = {
+            "$or": [
+                priority_samples_filter,
+                {FIELD_UPDATED_AT: {"$gte": since}},
+                # the ID of a document holds the time it was created
+                {FIELD_MONGODB_ID: {"$gte": ObjectId.from_datetime(since)}},
+            ]
+        }
+
+    if sample_ids is not None:
+        priority_samples_filter = {FIELD_SAMPLE_ID: {"$in": sample_ids}, **priority_samples_filter}
+
+    return priority_samples_filter
+
+
+def validate_prioritisation_process(
+    db: Database, sample_ids: Optional[List[ObjectId]] = None, reported_unprocessed: Optional[Set[ObjectId]] = None
+) -> None:
     """
     Having completed the previous steps,
     there should be no remaining unprocessed priority samples left.
 
     Arguments:
         db {Database} -- mongo db instance
+        sample_ids {Optional[List[ObjectId]]} -- only check the priority samples for these samples; defaults to all
+        reported_unprocessed {Optional[Set[ObjectId]]} -- the samples already reported as having an unprocessed priority
+            sample, e.g. by the priority samples worker on a previous poll, which are not reported again; it is updated
+            with the samples reported, and those checked which no longer have an unprocessed priority sample removed
     """
 
-    def extract_sample_id(sample: SampleDoc) -> ModifiedRowValue:
-        return sample[FIELD_SAMPLE_ID]
+    priority_samples_collection = get_mongo_collection(db, COLLECTION_PRIORITY_SAMPLES)
+
+    # only the sample IDs are needed, so the rest of the documents are not fetched
+    priorities_unprocessed = priority_samples_collection.find(
+        priority_samples_to_process_filter(sample_ids), projection={FIELD_MONGODB_ID: False, FIELD_SAMPLE_ID: True}
+    )
+    unprocessed_sample_ids = [priority_sample[FIELD_SAMPLE_ID] for priority_sample in priorities_unprocessed]
 
-    priorities_unprocessed = get_all_unprocessed_priority_samples_records(db)
-    priorities_unprocessed_sample_ids = list(map(extract_sample_id, priorities_unprocessed))
+    if reported_unprocessed is not None:
+        # a sample which has since been processed is reported again if it is ever left unprocessed later
+        checked_sample_ids = set(sample_ids) if sample_ids is not None else set(reported_unprocessed)
+        reported_unprocessed -= checked_sample_ids - set(unprocessed_sample_ids)
+
+    for sample_id in unprocessed_sample_ids:
+        if reported_unprocessed is not None:
+            if sample_id in reported_unprocessed:
+                continue
+
+            reported_unprocessed.add(sample_id)
 
-    for sample_id in priorities_unprocessed_sample_ids:
         logging_collection.add_error(
             "TYPE 32",
             f"There is an unprocessed priority sample with sample_id: {sample_id}",
         )
 
 
-def get_all_unprocessed_priority_samples_records(db: Database) -> List[SampleDoc]:
-    priority_samples_collection = get_mongo_collection(db, COLLECTION_PRIORITY_SAMPLES)
-    return list(priority_samples_collection.find({FIELD_PROCESSED: False}))
-
-
 def print_summary():
     msgs = logging_collection.get_messages_for_import()
     for msg in msgs:
@@ -103,20 +181,25 @@ def print_summary():
         logger.info("Prioritisation of samples completed successfully")
 
 
-def query_any_unprocessed_samples(db: Database) -> List[SampleDoc]:
+def query_any_unprocessed_samples(
+    db: Database, sample_ids: Optional[List[ObjectId]] = None, since: Optional[datetime] = None
+) -> List[SampleDoc]:
     """
     Returns the list of unprocessed priority samples (from priority_samples mongo collection)
     that have at least one related sample (from samples mongo collection).
 
     Arguments:
         db {Database} -- mongo db instance
+        sample_ids {Optional[List[ObjectId]]} -- only return the priority samples for these samples; defaults to all
+        since {Optional[datetime]} -- also return the priority samples already processed which were created or
+            updated at or after this time
     """
     priority_samples_collection = get_mongo_collection(db, COLLECTION_PRIORITY_SAMPLES)
 
     IMPORTANT_UNPROCESSED_SAMPLES_MONGO_QUERY: Final[List[Mapping[str, Any]]] = [
         # All unprocessed priority samples
         {
-            "$match": {FIELD_PROCESSED: False},
+            "$match": priority_samples_to_process_filter(sample_ids, since),
         },
         # Joins priority_samples and samples
         {
@@ -155,8 +238,10 @@ def update_unprocessed_priority_samples_to_processed(db: Database, samples: List
     sample_ids = list(map(extract_sample_id, samples))
 
     priority_samples_collection = get_mongo_collection(db, COLLECTION_PRIORITY_SAMPLES)
-    for sample_id in sample_ids:
-        priority_samples_collection.update_one({FIELD_SAMPLE_ID: sample_id}, {"$set": {FIELD_PROCESSED: True}})
+    for sample_ids_chunk in partition(sample_ids, PRIORITY_SAMPLES_UPDATE_CHUNK_SIZE):
+        priority_samples_collection.update_many(
+            {FIELD_SAMPLE_ID: {"$in": sample_ids_chunk}}, {"$set": {FIELD_PROCESSED: True}}
+        )
 
     logger.info("Mongo update of processed for priority samples successful")
 
@@ -204,18 +289,20 @@ def insert_plates_and_wells_into_dart(docs_to_insert: List[SampleDoc], config: C
         try:
             cursor = sql_server_connection.cursor()
 
+            # fetch the states of the plates already in DART up front, rather than one query per plate
+            plate_states = get_dart_plate_states(cursor, (str(doc[FIELD_PLATE_BARCODE]) for doc in docs_to_insert))
+
             group_iterator: Iterator[Tuple[Any, Any]] = groupby(docs_to_insert, lambda x: x[FIELD_PLATE_BARCODE])
 
             for plate_barcode, samples in group_iterator:
                 try:
                     samples = list(samples)
                     centre_config = centre_config_for_samples(config, samples)
-                    plate_state = add_dart_plate_if_doesnt_exist(
+                    plate_state = plate_states.get(plate_barcode) or add_dart_plate_if_doesnt_exist(
                         cursor, plate_barcode, centre_config[CENTRE_KEY_BIOMEK_LABWARE_CLASS]
                     )
                     if plate_state == DART_STATE_PENDING:
-                        for sample in samples:
-                            add_dart_well_properties(cursor, sample, plate_barcode)
+                        add_dart_plate_well_properties(cursor, samples, plate_barcode, positive_only=False)
                     cursor.commit()
                 except Exception as e:
                     logging_collection.add_error(
@@ -0,0 +1,195 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from bson.objectid import ObjectId
+from pymongo.database import Database
+from pymongo.errors import OperationFailure, PyMongoError
+
+from crawler.constants import COLLECTION_PRIORITY_SAMPLES, FIELD_PROCESSED, FIELD_SAMPLE_ID
+from crawler.db.mongo import get_mongo_collection
+from crawler.priority_samples_process import update_priority_samples
+from crawler.types import Config
+
+logger = logging.getLogger(__name__)
+
+# the changes to the priority_samples collection which can leave a priority sample waiting to be processed
+PRIORITY_SAMPLES_CHANGE_STREAM_PIPELINE: List[Dict[str, Any]] = [
+    {
+        "$match": {
+            "operationType": {"$in": ["insert", "update", "replace"]},
+            f"fullDocument.{FIELD_PROCESSED}": False,
+        }
+    }
+]
+
+# milliseconds to wait for a change before the priority samples seen so far are processed
+PRIORITY_SAMPLES_CHANGE_STREAM_MAX_AWAIT_MS = 1000
+
+# the code of the error watching a collection fails with when the mongo server is not a replica set
+MONGO_ERROR_CODE_CHANGE_STREAM_NOT_SUPPORTED = 40573
+
+
+class PrioritySamplesWorker:
+    """Prioritises priority samples as they arrive, rather than waiting for the end of the next crawler run.
+
+    The worker watches the priority_samples collection with a change stream and processes the priority samples it
+    sees in batches. Each time the stream is opened, any priority samples still unprocessed are caught up with first, so
+    nothing which arrived while the worker was stopped, or before the stream was opened, is missed. If the collection
+    cannot be watched the worker polls it until it can be watched again or, if the mongo server is not a replica set so
+    it can never be watched, from then on. A sample left with an unprocessed priority sample is only reported once,
+    rather than on every poll.
+    """
+
+    def __init__(self, config: Config, db: Database):
+        """Initialiser for the priority samples worker.
+
+        Arguments:
+            config {Config} -- application config specifying the MLWH and DART details and the worker settings
+            db {Database} -- the mongo database holding the priority samples
+        """
+        self._config = config
+        self._db = db
+        self._stop_event = threading.Event()
+        self._can_watch = True
+        self._reported_unprocessed: Set[ObjectId] = set()
+
+    def start(self, since: Optional[datetime] = None) -> threading.Thread:
+        """Runs the worker in a background thread.
+
+        Arguments:
+            since {Optional[datetime]} -- also prioritise the priority samples already processed which were created or
+                updated at or after this time, before watching for new ones
+
+        Returns:
+            threading.Thread -- the thread running the worker
+        """
+        thread = threading.Thread(target=self.run, args=(since,), name="priority-samples-worker", daemon=True)
+        thread.start()
+
+        return thread
+
+    def stop(self) -> None:
+        """Stops the worker once it has finished processing the current batch."""
+        self._stop_event.set()
+
+    def run(self, since: Optional[datetime] = None) -> None:
+        """Runs the worker until it is stopped.
+
+        Arguments:
+            since {Optional[datetime]} -- also prioritise the priority samples already processed which were created or
+                updated at or after this time, before watching for new ones
+        """
+        logger.info("Starting the priority samples worker")
+
+        if since is not None:
+            self.poll(since)
+
+        while not self._stop_event.is_set():
+            if self._can_watch:
+                try:
+                    self.watch()
+                except PyMongoError as e:
+                    if isinstance(e, OperationFailure) and e.code == MONGO_ERROR_CODE_CHANGE_STREAM_NOT_SUPPORTED:
+                        self._can_watch = False
+                        logger.warning(
+                            "Cannot watch the priority samples, polling them every "
+                            f"{self._config.PRIORITY_SAMPLES_WORKER_POLL_INTERVAL} seconds instead: {e}"
+                        )
+                    else:
+                        logger.warning(
+                            f"Failed watching the priority samples, polling them until it can be watched: {e}"
+                        )
+                except Exception as e:
+                    logger.error("Failed prioritising samples")
+                    logger.exception(e)
+
+            if self._stop_event.wait(self._config.PRIORITY_SAMPLES_WORKER_POLL_INTERVAL):
+                break
+
+            self.poll()
+
+        logger.info("Stopped the priority samples worker")
+
+    def watch(self) -> None:
+        """Watches the priority_samples collection, processing the priority samples which arrive until the worker is
+        stopped or the change stream fails.
+        """
+        priority_samples_collection = get_mongo_collection(self._db, COLLECTION_PRIORITY_SAMPLES)
+
+        with priority_samples_collection.watch(
+            PRIORITY_SAMPLES_CHANGE_STREAM_PIPELINE,
+            full_document="updateLookup",
+            max_await_time_ms=PRIORITY_SAMPLES_CHANGE_STREAM_MAX_AWAIT_MS,
+        ) as change_stream:
+            # the stream only sees changes from now on, so catch up with those which arrived before it was opened
+            self.catch_up()
+
+            sample_ids: List[ObjectId] = []
+            while change_stream.alive and not self._stop_event.is_set():
+                change = change_stream.try_next()
+
+                if change is not None:
+                    sample_ids.append(change["fullDocument"][FIELD_SAMPLE_ID])
+
+                    if len(sample_ids) < self._config.PRIORITY_SAMPLES_WORKER_BATCH_SIZE:
+                        continue
+
+                # process the batch once it is full, or once the stream has gone quiet
+                if sample_ids:
+                    self.process(sample_ids)
+                    sample_ids = []
+
+    def poll(self, since: Optional[datetime] = None) -> None:
+        """Processes any priority samples still unprocessed, for when the collection cannot be watched. A failure is
+        logged rather than stopping the worker.
+
+        Arguments:
+            since {Optional[datetime]} -- also process the priority samples already processed which were created or
+                updated at or after this time
+        """
+        try:
+            self.catch_up(since)
+        except Exception as e:
+            logger.error("Failed polling the priority samples")
+            logger.exception(e)
+
+    def catch_up(self, since: Optional[datetime] = None) -> int:
+        """Processes all the priority samples still unprocessed.
+
+        Arguments:
+            since {Optional[datetime]} -- also process the priority samples already processed which were created or
+                updated at or after this time
+
+        Returns:
+            int -- the number of samples prioritised
+        """
+        return update_priority_samples(
+            self._db,
+            self._config,
+            self._config.ADD_TO_DART,
+            since=since,
+            reported_unprocessed=self._reported_unprocessed,
+        )
+
+    def process(self, sample_ids: List[ObjectId]) -> int:
+        """Processes the unprocessed priority samples for the given samples.
+
+        Arguments:
+            sample_ids {List[ObjectId]} -- the IDs of the samples whose priority samples have changed
+
+        Returns:
+            int -- the number of samples prioritised
+        """
+        # a sample can change more than once in a batch
+        unique_sample_ids = list(dict.fromkeys(sample_ids))
+        logger.info(f"Prioritising {len(unique_sample_ids)} samples")
+
+        return update_priority_samples(
+            self._db,
+            self._config,
+            self._config.ADD_TO_DART,
+            sample_ids=unique_sample_ids,
+            reported_unprocessed=self._reported_unprocessed,
+        )
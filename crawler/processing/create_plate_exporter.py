@@ -7,6 +7,7 @@ from pymongo.client_session import ClientSession
 from crawler.constants import (
     CENTRE_KEY_BIOMEK_LABWARE_CLASS,
     CENTRE_KEY_NAME,
+    COLLECTION_DART_EXPORTS,
     COLLECTION_IMPORTS,
     COLLECTION_SAMPLES,
     COLLECTION_SOURCE_PLATES,
@@ -14,6 +15,11 @@ from crawler.constants import (
     FIELD_BARCODE,
     FIELD_COORDINATE,
     FIELD_CREATED_AT,
+    FIELD_DART_EXPORT_ATTEMPTS,
+    FIELD_DART_EXPORT_CENTRE_CONFIG,
+    FIELD_DART_EXPORT_NEXT_ATTEMPT_AT,
+    FIELD_DART_EXPORT_SAMPLE_UUIDS,
+    FIELD_DART_EXPORT_SAMPLES_INSERTED,
     FIELD_LH_SAMPLE_UUID,
     FIELD_LH_SOURCE_PLATE_UUID,
     FIELD_MONGO_COG_UK_ID,
@@ -29,6 +35,8 @@ from crawler.constants import (
     FIELD_PLATE_BARCODE,
     FIELD_PREFERENTIALLY_SEQUENCE,
     FIELD_SOURCE,
+    FIELD_STATUS,
+    FIELD_STATUS_PENDING,
     FIELD_UPDATED_AT,
     RABBITMQ_CREATE_FEEDBACK_ORIGIN_PLATE,
     RABBITMQ_CREATE_FEEDBACK_ORIGIN_ROOT,
@@ -36,10 +44,10 @@ from crawler.constants import (
 )
 from crawler.db.dart import (
     add_dart_plate_if_doesnt_exist,
-    add_dart_well_properties_if_positive,
+    add_dart_plate_well_properties,
     create_dart_sql_server_conn,
 )
-from crawler.db.mongo import create_mongo_client, get_mongo_collection, get_mongo_db
+from crawler.db.mongo import get_mongo_collection, get_mongo_db, get_shared_mongo_client
 from crawler.exceptions import TransientRabbitError
 from crawler.helpers.db_helpers import create_mongo_import_record, samples_filtered_for_duplicates_in_mongo
 from crawler.helpers.general_helpers import create_source_plate_doc
@@ -78,6 +86,9 @@ class CreatePlateExporter:
                 if not samples_result.success:
                     return self._abort_transaction_with_errors(session, samples_result.create_plate_errors)
 
+                if self._config.DART_EXPORT_OUTBOX:
+                    self._record_dart_export_in_mongo_db(session)
+
                 session.commit_transaction()
 
         LOGGER.debug("Finished export of create message to MongoDB.")
@@ -125,8 +136,7 @@ class CreatePlateExporter:
     @property
     def _mongo_db(self):
         if self.__mongo_db is None:
-            client = create_mongo_client(self._config)
-            self.__mongo_db = get_mongo_db(self._config, client)
+            self.__mongo_db = get_mongo_db(self._config, get_shared_mongo_client(self._config))
 
         return self.__mongo_db
 
@@ -195,6 +205,8 @@ class CreatePlateExporter:
         try:
             session_database = get_mongo_db(self._config, session.client)
             samples_collection = get_mongo_collection(session_database, COLLECTION_SAMPLES)
+            # Map the samples once for both the duplicate check and the insert.
+            mongo_sample_docs = self._mongo_sample_docs
 
             # Note: Transactions don't support giving back errors on every document that couldn't be inserted
             #       so we need to check for duplicate keys before doing our insert.
@@ -212,15 +224,13 @@ class CreatePlateExporter:
                     ),
                     sample_uuid=sample[FIELD_LH_SAMPLE_UUID],
                 )
-                for sample in samples_filtered_for_duplicates_in_mongo(
-                    samples_collection, self._mongo_sample_docs, session
-                )
+                for sample in samples_filtered_for_duplicates_in_mongo(samples_collection, mongo_sample_docs, session)
             ]
 
             if len(create_plate_errors) > 0:
                 return ExportResult(success=False, create_plate_errors=create_plate_errors)
 
-            result = samples_collection.insert_many(documents=self._mongo_sample_docs, ordered=False, session=session)
+            result = samples_collection.insert_many(documents=mongo_sample_docs, ordered=False, session=session)
         except Exception as ex:
             LOGGER.critical(f"Error accessing MongoDB during export of samples for message UUID '{message_uuid}': {ex}")
             LOGGER.exception(ex)
@@ -234,6 +244,46 @@ class CreatePlateExporter:
 
         return ExportResult(success=True, create_plate_errors=[])
 
+    def _record_dart_export_in_mongo_db(self, session: ClientSession) -> None:
+        """Add a pending export of the plate in the message to the DART export outbox, for the DART export worker to
+        pick up once the transaction has been committed."""
+        message_uuid = self._message.message_uuid.value
+        plate_barcode = self._message.plate_barcode.value
+
+        try:
+            session_database = get_mongo_db(self._config, session.client)
+            dart_exports_collection = get_mongo_collection(session_database, COLLECTION_DART_EXPORTS)
+
+            timestamp = datetime.now(tz=timezone.utc)
+            dart_exports_collection.insert_one(
+                {
+                    FIELD_PLATE_BARCODE: plate_barcode,
+                    FIELD_MONGO_MESSAGE_UUID: message_uuid,
+                    FIELD_DART_EXPORT_CENTRE_CONFIG: self._message.centre_config,
+                    FIELD_DART_EXPORT_SAMPLE_UUIDS: [
+                        sample.sample_uuid.value for sample in self._message.samples.value
+                    ],
+                    FIELD_DART_EXPORT_SAMPLES_INSERTED: self._samples_inserted,
+                    FIELD_STATUS: FIELD_STATUS_PENDING,
+                    FIELD_DART_EXPORT_ATTEMPTS: 0,
+                    FIELD_DART_EXPORT_NEXT_ATTEMPT_AT: timestamp,
+                    FIELD_CREATED_AT: timestamp,
+                    FIELD_UPDATED_AT: timestamp,
+                },
+                session=session,
+            )
+        except Exception as ex:
+            LOGGER.critical(
+                f"Error accessing MongoDB while adding the DART export for message UUID '{message_uuid}': {ex}"
+            )
+            LOGGER.exception(ex)
+
+            raise TransientRabbitError(
+                f"There was an error updating MongoDB while adding the DART export for message UUID '{message_uuid}'."
+            )
+
+        LOGGER.info(f"DART export of plate with barcode '{plate_barcode}' added to the outbox.")
+
     def _map_sample_to_mongo(self, sample, index):
         return {
             FIELD_MONGO_DATE_TESTED: sample.tested_date.value,
@@ -289,8 +339,7 @@ class CreatePlateExporter:
             )
 
             if plate_state == DART_STATE_PENDING:
-                for sample in self._mongo_sample_docs:
-                    add_dart_well_properties_if_positive(cursor, sample, plate_barcode)
+                add_dart_plate_well_properties(cursor, self._mongo_sample_docs, plate_barcode)
 
             cursor.commit()
 
@@ -58,7 +58,10 @@ class CreatePlateProcessor(BaseProcessor):
 
         # Export to DART and record the import no matter the success or not of prior steps.  Then acknowledge the
         # message as processed since PAM cannot fix issues we had with DART export or recording the import.
-        exporter.export_to_dart()
+        # With the DART export outbox, the export was recorded with the samples and is left to the DART export worker.
+        if not self._config.DART_EXPORT_OUTBOX:
+            exporter.export_to_dart()
+
         exporter.record_import()
 
         LOGGER.info(f"Finished processing of create message with UUID '{create_message.message_uuid.value}'")
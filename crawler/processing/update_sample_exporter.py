@@ -18,7 +18,7 @@ from crawler.constants import (
     RABBITMQ_UPDATE_FEEDBACK_ORIGIN_ROOT,
 )
 from crawler.db.dart import add_dart_well_properties_if_positive, create_dart_sql_server_conn, get_dart_plate_state
-from crawler.db.mongo import create_mongo_client, get_mongo_collection, get_mongo_db
+from crawler.db.mongo import get_mongo_collection, get_mongo_db, get_shared_mongo_client
 from crawler.exceptions import TransientRabbitError
 from crawler.rabbit.messages.parsers.update_sample_message import ErrorType, UpdateSampleError
 
@@ -104,8 +104,7 @@ class UpdateSampleExporter:
     @property
     def _mongo_db(self):
         if self.__mongo_db is None:
-            client = create_mongo_client(self._config)
-            self.__mongo_db = get_mongo_db(self._config, client)
+            self.__mongo_db = get_mongo_db(self._config, get_shared_mongo_client(self._config))
 
         return self.__mongo_db
 
@@ -20,20 +20,26 @@ class FetchedMessage:
     body: bytes
 
 
+def connection_parameters(server_details: RabbitServerDetails) -> ConnectionParameters:
+    credentials = PlainCredentials(server_details.username, server_details.password)
+    connection_params = ConnectionParameters(
+        host=server_details.host,
+        port=server_details.port,
+        virtual_host=server_details.vhost,
+        credentials=credentials,
+    )
+
+    if server_details.uses_ssl:
+        cafile = os.getenv("REQUESTS_CA_BUNDLE")
+        ssl_context = ssl.create_default_context(cafile=cafile)
+        connection_params.ssl_options = SSLOptions(ssl_context)
+
+    return connection_params
+
+
 class BasicGetter:
     def __init__(self, server_details: RabbitServerDetails):
-        credentials = PlainCredentials(server_details.username, server_details.password)
-        self._connection_params = ConnectionParameters(
-            host=server_details.host,
-            port=server_details.port,
-            virtual_host=server_details.vhost,
-            credentials=credentials,
-        )
-
-        if server_details.uses_ssl:
-            cafile = os.getenv("REQUESTS_CA_BUNDLE")
-            ssl_context = ssl.create_default_context(cafile=cafile)
-            self._connection_params.ssl_options = SSLOptions(ssl_context)
+        self._connection_params = connection_parameters(server_details)
 
         self.__connection: Optional[BlockingConnection] = None
         self.__channel: Optional[BlockingChannel] = None
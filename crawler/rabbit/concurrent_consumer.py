@@ -0,0 +1,338 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Deque, Dict, FrozenSet, Hashable, Iterable, Optional, Set, Tuple
+
+from lab_share_lib.config_readers import get_basic_publisher, get_rabbit_server_details, get_redpanda_schema_registry
+from lab_share_lib.processing.base_processor import BaseProcessor
+from lab_share_lib.processing.rabbit_message import RabbitMessage
+from lab_share_lib.rabbit.avro_encoder import AvroEncoder
+from pika import BlockingConnection
+from pika.adapters.blocking_connection import BlockingChannel
+
+from crawler.constants import RABBITMQ_SUBJECT_CREATE_PLATE, RABBITMQ_SUBJECT_UPDATE_SAMPLE
+from crawler.rabbit.basic_getter import connection_parameters
+from crawler.rabbit.messages.parsers.create_plate_message import CreatePlateMessage
+from crawler.rabbit.messages.parsers.update_sample_message import UpdateSampleMessage
+from crawler.types import Config
+
+LOGGER = logging.getLogger(__name__)
+
+# the kinds of key messages are ordered by; messages sharing a key are processed one at a time, in order of delivery
+ORDERING_KEY_PLATE_BARCODE = "plate_barcode"
+ORDERING_KEY_SAMPLE_UUID = "sample_uuid"
+
+# seconds to wait for messages before checking whether the consumer has been stopped
+CONSUMER_POLL_INTERVAL = 1
+
+
+def message_ordering_keys(subject: str, body: Dict[str, Any]) -> Set[Tuple[str, str]]:
+    """Returns the keys a message must be processed in order with. A create plate message is keyed by its plate
+    barcode and the UUIDs of its samples, and an update sample message by the UUID of its sample, so an update is only
+    processed once the plate creating its sample has been.
+
+    Arguments:
+        subject {str} -- the subject of the message
+        body {Dict[str, Any]} -- the decoded message
+
+    Returns:
+        Set[Tuple[str, str]] -- the ordering keys of the message, empty if they cannot be read from it
+    """
+    try:
+        if subject == RABBITMQ_SUBJECT_CREATE_PLATE:
+            create_message = CreatePlateMessage(body)
+
+            return {(ORDERING_KEY_PLATE_BARCODE, create_message.plate_barcode.value)} | {
+                (ORDERING_KEY_SAMPLE_UUID, sample.sample_uuid.value) for sample in create_message.samples.value
+            }
+
+        if subject == RABBITMQ_SUBJECT_UPDATE_SAMPLE:
+            return {(ORDERING_KEY_SAMPLE_UUID, UpdateSampleMessage(body).sample_uuid.value)}
+    except (KeyError, AttributeError, TypeError):
+        # a malformed message fails validation whatever else is processed alongside it
+        LOGGER.warning(f"Unable to read the ordering keys of a message with subject '{subject}'")
+
+    return set()
+
+
+class _OrderedTask:
+    def __init__(self, keys: FrozenSet[Hashable], task: Callable[[], None]):
+        self.keys = keys
+        self.task = task
+        # the number of keys for which an earlier task has still to finish
+        self.waiting_on = 0
+
+
+class KeyOrderedExecutor:
+    """Runs tasks on a pool of threads. Tasks which share a key are run one at a time, in the order they were
+    submitted, while those which do not run concurrently.
+    """
+
+    def __init__(self, max_workers: int):
+        """Initialiser for the executor.
+
+        Arguments:
+            max_workers {int} -- the maximum number of tasks to run at once
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rabbit-worker")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._queues: Dict[Hashable, Deque[_OrderedTask]] = {}
+        self._unfinished = 0
+        self._stopped = False
+
+    def submit(self, keys: Iterable[Hashable], task: Callable[[], None]) -> None:
+        """Submits a task, to run once every earlier task sharing any of its keys has finished.
+
+        Arguments:
+            keys {Iterable[Hashable]} -- the keys of the task
+            task {Callable[[], None]} -- the task to run
+        """
+        ordered_task = _OrderedTask(frozenset(keys), task)
+
+        with self._lock:
+            for key in ordered_task.keys:
+                queue = self._queues.setdefault(key, deque())
+                if queue:
+                    ordered_task.waiting_on += 1
+
+                queue.append(ordered_task)
+
+            self._unfinished += 1
+
+        if ordered_task.waiting_on == 0:
+            self._executor.submit(self._run, ordered_task)
+
+    def stop(self) -> None:
+        """Stops running tasks which have not already started; those running are left to finish."""
+        with self._lock:
+            self._stopped = True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the submitted tasks to finish, or to be skipped once the executor has been stopped.
+
+        Arguments:
+            timeout {Optional[float]} -- the maximum number of seconds to wait, or None to wait indefinitely
+
+        Returns:
+            bool -- whether there are no unfinished tasks
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def shutdown(self) -> None:
+        """Stops the executor and waits for the tasks running to finish."""
+        self.stop()
+        self._executor.shutdown(wait=True)
+
+    def _run(self, ordered_task: _OrderedTask) -> None:
+        try:
+            if not self._stopped:
+                ordered_task.task()
+        except Exception as e:
+            LOGGER.exception(e)
+        finally:
+            ready_tasks = []
+            with self._lock:
+                for key in ordered_task.keys:
+                    queue = self._queues[key]
+                    queue.popleft()
+
+                    if queue:
+                        queue[0].waiting_on -= 1
+                        if queue[0].waiting_on == 0:
+                            ready_tasks.append(queue[0])
+                    else:
+                        del self._queues[key]
+
+                self._unfinished -= 1
+                self._idle.notify_all()
+
+            for ready_task in ready_tasks:
+                self._executor.submit(self._run, ready_task)
+
+
+class ConcurrentConsumer:
+    """Consumes the CRUD queue, processing several messages at once rather than one at a time.
+
+    Up to RABBITMQ_PREFETCH_COUNT messages are delivered before any is acknowledged, and they are processed by a pool of
+    RABBITMQ_CONSUMER_WORKERS threads. Messages for the same plate barcode or sample UUID are processed one at a time,
+    in order of delivery, so an update to a sample is only processed after the plate creating it. Each message is
+    acknowledged or sent to dead letters as its processor returns, as with the lab share lib consumer. A processor
+    raising an exception, e.g. a TransientRabbitError, restarts the consumer once the messages being processed have
+    finished, and the messages not yet acknowledged are redelivered.
+    """
+
+    def __init__(self, config: Config):
+        """Initialiser for the concurrent consumer.
+
+        Arguments:
+            config {Config} -- application config specifying the RabbitMQ details, processors and consumer settings
+        """
+        self._config = config
+        self._stop_event = threading.Event()
+        self._restart_requested = False
+        self._thread: Optional[threading.Thread] = None
+        self._schema_registry = get_redpanda_schema_registry(config)
+        # each worker thread builds its own processors, so their publishers and encoders are not shared between threads
+        self._thread_processors = threading.local()
+
+    @property
+    def is_healthy(self) -> bool:
+        """Whether the consumer is running, either consuming or waiting to reconnect."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> threading.Thread:
+        """Runs the consumer in a background thread.
+
+        Returns:
+            threading.Thread -- the thread running the consumer
+        """
+        self._thread = threading.Thread(target=self.run, name="rabbit-concurrent-consumer", daemon=True)
+        self._thread.start()
+
+        return self._thread
+
+    def stop(self) -> None:
+        """Stops the consumer once the messages being processed have finished."""
+        self._stop_event.set()
+
+    def run(self) -> None:
+        """Consumes messages until the consumer is stopped, reconnecting whenever the connection is lost."""
+        LOGGER.info(
+            f"Starting the concurrent consumer of queue '{self._config.RABBITMQ_CRUD_QUEUE}' with "
+            f"{self._config.RABBITMQ_CONSUMER_WORKERS} workers"
+        )
+
+        while not self._stop_event.is_set():
+            try:
+                self.consume()
+            except Exception as e:
+                LOGGER.error("The concurrent consumer stopped consuming")
+                LOGGER.exception(e)
+
+            if self._stop_event.wait(self._config.RABBITMQ_CONSUMER_RECONNECT_DELAY):
+                break
+
+        LOGGER.info("Stopped the concurrent consumer")
+
+    def consume(self) -> None:
+        """Connects to RabbitMQ and consumes messages until the consumer is stopped or restarted. The messages being
+        processed are left to finish and be acknowledged before the connection is closed.
+        """
+        server_details = get_rabbit_server_details(
+            self._config, self._config.RABBITMQ_USERNAME, self._config.RABBITMQ_PASSWORD
+        )
+        executor = KeyOrderedExecutor(self._config.RABBITMQ_CONSUMER_WORKERS)
+        connection = BlockingConnection(connection_parameters(server_details))
+        self._restart_requested = False
+
+        try:
+            channel = connection.channel()
+            channel.basic_qos(prefetch_count=self._config.RABBITMQ_PREFETCH_COUNT)
+            channel.basic_consume(
+                self._config.RABBITMQ_CRUD_QUEUE,
+                on_message_callback=partial(self._on_message, connection, executor),
+            )
+
+            while not self._stop_event.is_set() and not self._restart_requested:
+                connection.process_data_events(time_limit=CONSUMER_POLL_INTERVAL)
+
+            # no more messages are started, and those being processed are acknowledged as they finish
+            executor.stop()
+            while not executor.wait(CONSUMER_POLL_INTERVAL):
+                connection.process_data_events(time_limit=0)
+
+            connection.process_data_events(time_limit=0)
+        finally:
+            executor.shutdown()
+            if connection.is_open:
+                # any message not acknowledged is redelivered
+                connection.close()
+
+    def _on_message(
+        self,
+        connection: BlockingConnection,
+        executor: KeyOrderedExecutor,
+        channel: BlockingChannel,
+        method: Any,
+        properties: Any,
+        body: bytes,
+    ) -> None:
+        delivery_tag = method.delivery_tag
+        message = RabbitMessage(properties.headers, body)
+
+        try:
+            message.decode(AvroEncoder(self._schema_registry, message.subject))
+        except Exception as ex:
+            LOGGER.error(f"Unrecoverable error while decoding RabbitMQ message: {type(ex)} {str(ex)}")
+            channel.basic_nack(delivery_tag, requeue=False)  # Send the message to dead letters.
+            return
+
+        if not message.contains_single_message:
+            LOGGER.error("RabbitMQ message received containing multiple AVRO encoded messages.")
+            channel.basic_nack(delivery_tag, requeue=False)  # Send the message to dead letters.
+            return
+
+        if message.subject not in self._config.PROCESSORS:
+            LOGGER.error(
+                f"Received message has subject '{message.subject}' but there is no implemented processor for this "
+                "subject."
+            )
+            channel.basic_nack(delivery_tag, requeue=False)  # Send the message to dead letters.
+            return
+
+        executor.submit(
+            message_ordering_keys(message.subject, message.message),
+            partial(self._process, connection, executor, channel, delivery_tag, message),
+        )
+
+    def _process(
+        self,
+        connection: BlockingConnection,
+        executor: KeyOrderedExecutor,
+        channel: BlockingChannel,
+        delivery_tag: int,
+        message: RabbitMessage,
+    ) -> None:
+        try:
+            should_ack = self._processor(message.subject).process(message)
+        except Exception as ex:
+            LOGGER.error(f"Restarting the consumer after an error processing a message: {type(ex)} {str(ex)}")
+            # stop before the next message with the same keys can start, so it is redelivered after this one
+            executor.stop()
+            connection.add_callback_threadsafe(self._request_restart)
+            return
+
+        # the channel can only be used from the thread consuming it
+        connection.add_callback_threadsafe(partial(self._settle, channel, delivery_tag, should_ack))
+
+    def _processor(self, subject: str) -> BaseProcessor:
+        processors = getattr(self._thread_processors, "processors", None)
+        if processors is None:
+            basic_publisher = get_basic_publisher(
+                self._config, self._config.RABBITMQ_USERNAME, self._config.RABBITMQ_PASSWORD
+            )
+            processors = {
+                processor_subject: processor_class(self._schema_registry, basic_publisher, self._config)
+                for processor_subject, processor_class in self._config.PROCESSORS.items()
+            }
+            self._thread_processors.processors = processors
+
+        return processors[subject]
+
+    def _request_restart(self) -> None:
+        self._restart_requested = True
+
+    @staticmethod
+    def _settle(channel: BlockingChannel, delivery_tag: int, should_ack: bool) -> None:
+        if not channel.is_open:
+            # the message is redelivered once the consumer reconnects
+            return
+
+        if should_ack:
+            channel.basic_ack(delivery_tag)
+        else:
+            channel.basic_nack(delivery_tag, requeue=False)  # Send the message to dead letters.
@@ -96,6 +96,99 @@ preferentially_sequence=VALUES(preferentially_sequence),
 is_current=VALUES(is_current);
 """
 
+# The columns written by SQL_MLWH_MULTIPLE_INSERT, in the order of the values in the multi-row queries below
+MLWH_MULTI_ROW_INSERT_COLUMNS = (
+    "mongodb_id",
+    "root_sample_id",
+    "cog_uk_id",
+    "rna_id",
+    "plate_barcode",
+    "coordinate",
+    "result",
+    "date_tested",
+    "source",
+    "lab_id",
+    "ch1_target",
+    "ch1_result",
+    "ch1_cq",
+    "ch2_target",
+    "ch2_result",
+    "ch2_cq",
+    "ch3_target",
+    "ch3_result",
+    "ch3_cq",
+    "ch4_target",
+    "ch4_result",
+    "ch4_cq",
+    "filtered_positive",
+    "filtered_positive_version",
+    "filtered_positive_timestamp",
+    "lh_sample_uuid",
+    "lh_source_plate_uuid",
+    "must_sequence",
+    "preferentially_sequence",
+    "created_at",
+    "updated_at",
+    "is_current",
+)
+
+# The columns updated by SQL_MLWH_MULTIPLE_INSERT when the sample is already in the MLWH
+MLWH_MULTI_ROW_UPDATE_COLUMNS = (
+    "plate_barcode",
+    "coordinate",
+    "date_tested",
+    "source",
+    "lab_id",
+    "updated_at",
+    "lh_sample_uuid",
+    "lh_source_plate_uuid",
+    "must_sequence",
+    "preferentially_sequence",
+    "is_current",
+)
+
+SQL_MLWH_MULTI_ROW_ON_DUPLICATE_KEY_UPDATE = "ON DUPLICATE KEY UPDATE " + ", ".join(
+    f"{column}=VALUES({column})" for column in MLWH_MULTI_ROW_UPDATE_COLUMNS
+)
+
+# The same as SQL_MLWH_MULTIPLE_INSERT, but inserting many rows in one statement: the %s is replaced with a
+# parenthesised list of placeholders for each row, e.g. (%s,%s,...),(%s,%s,...)
+SQL_MLWH_MULTI_ROW_INSERT = (
+    f"INSERT INTO lighthouse_sample ({', '.join(MLWH_MULTI_ROW_INSERT_COLUMNS)})"
+    f" VALUES %s"
+    f" {SQL_MLWH_MULTI_ROW_ON_DUPLICATE_KEY_UPDATE}"
+)
+
+SQL_MLWH_GET_MAX_ALLOWED_PACKET = "SELECT @@max_allowed_packet"
+
+# Queries to load the samples into a temporary staging table, then merge them into lighthouse_sample in two set based
+# statements. The staging_id keeps the order the samples were loaded in, so later duplicates win as they do above.
+SQL_MLWH_CREATE_STAGING_TABLE = (
+    f"CREATE TEMPORARY TABLE lighthouse_sample_staging (staging_id INT AUTO_INCREMENT PRIMARY KEY)"
+    f" SELECT {', '.join(MLWH_MULTI_ROW_INSERT_COLUMNS)} FROM lighthouse_sample LIMIT 0"
+)
+
+SQL_MLWH_MULTI_ROW_INSERT_STAGING = (
+    f"INSERT INTO lighthouse_sample_staging ({', '.join(MLWH_MULTI_ROW_INSERT_COLUMNS)}) VALUES %s"
+)
+
+SQL_MLWH_MARK_STAGED_SAMPLES_NOT_MOST_RECENT = (
+    f"UPDATE lighthouse_sample"
+    f" INNER JOIN (SELECT DISTINCT { MLWH_RNA_ID } FROM lighthouse_sample_staging) AS staged"
+    f" ON lighthouse_sample.{ MLWH_RNA_ID } = staged.{ MLWH_RNA_ID }"
+    f" SET"
+    f" lighthouse_sample.{ MLWH_IS_CURRENT } = false,"
+    f" lighthouse_sample.{ MLWH_UPDATED_AT } = %s"
+)
+
+SQL_MLWH_MERGE_STAGING_TABLE = (
+    f"INSERT INTO lighthouse_sample ({', '.join(MLWH_MULTI_ROW_INSERT_COLUMNS)})"
+    f" SELECT {', '.join(MLWH_MULTI_ROW_INSERT_COLUMNS)} FROM lighthouse_sample_staging ORDER BY staging_id"
+    f" {SQL_MLWH_MULTI_ROW_ON_DUPLICATE_KEY_UPDATE}"
+)
+
+SQL_MLWH_DROP_STAGING_TABLE = "DROP TEMPORARY TABLE IF EXISTS lighthouse_sample_staging"
+
 SQL_MLWH_MULTIPLE_FILTERED_POSITIVE_UPDATE = """\
 UPDATE lighthouse_sample
 SET
@@ -116,6 +209,15 @@ updated_at= %%s
 WHERE mongodb_id IN (%s)
 """
 
+SQL_MLWH_MULTIPLE_FILTERED_POSITIVE_VERSION_UPDATE_BATCH = """\
+UPDATE lighthouse_sample
+SET
+filtered_positive_version = %%s,
+filtered_positive_timestamp = %%s,
+updated_at= %%s
+WHERE mongodb_id IN (%s)
+"""
+
 # DART SQL queries
 SQL_DART_GET_PLATE_PROPERTY = """\
 SET NOCOUNT ON
@@ -135,6 +237,15 @@ SQL_DART_GET_PLATE_BARCODES = """\
 SELECT DISTINCT [Labware LIMS BARCODE] FROM dbo.view_plate_maps WHERE [Labware state] = ?
 """
 
+# the states of the plates with the given barcodes, from the same view as SQL_DART_GET_PLATE_BARCODES; format with a
+# placeholder for each barcode
+SQL_DART_GET_PLATE_STATES = """\
+SELECT DISTINCT [Labware LIMS BARCODE], [Labware state] FROM dbo.view_plate_maps
+WHERE [Labware LIMS BARCODE] IN ({placeholders}) AND [Labware state] IS NOT NULL
+"""
+
+SQL_DART_HEALTH_CHECK = "SELECT 1"
+
 SQL_DART_SET_WELL_PROPERTY = "{CALL dbo.plDART_PlateUpdateWell (?,?,?,?)}"
 
 SQL_DART_ADD_PLATE = "{CALL dbo.plDART_PlateCreate (?,?,?)}"
@@ -1,9 +1,10 @@
 from datetime import datetime
 from types import ModuleType
-from typing import Any, Dict, List, Optional, Tuple, TypedDict, Union
+from typing import Any, Dict, List, Optional, Tuple, Type, TypedDict, Union
 
 from bson.decimal128 import Decimal128
 from bson.objectid import ObjectId
+from lab_share_lib.processing.base_processor import BaseProcessor
 from typing_extensions import NotRequired
 
 # Type aliases
@@ -45,6 +46,7 @@ class Config(ModuleType):
 
     # General
     ADD_LAB_ID: bool
+    COLUMNAR_VALIDATION: bool
     DIR_DOWNLOADED_DATA: str
 
     # Cherrypicker Test Data
@@ -57,14 +59,26 @@ class Config(ModuleType):
     USE_SFTP: bool
     KEEP_FILES: bool
     ADD_TO_DART: bool
+    WORKERS: int
+    FILTER_EXISTING_SAMPLES: bool
+
+    # priority samples
+    PRIORITY_SAMPLES_WORKER: bool
+    PRIORITY_SAMPLES_WORKER_BATCH_SIZE: int
+    PRIORITY_SAMPLES_WORKER_POLL_INTERVAL: int
 
     # Baracoda
     BARACODA_BASE_URL: str
     BARACODA_RETRY_ATTEMPTS: int
+    COG_UK_ID_POOL: bool
+    COG_UK_ID_POOL_SIZE: int
+    COG_UK_ID_POOL_LOW_WATER_MARK: int
+    COG_UK_ID_POOL_REFILL_BATCH_SIZE: int
 
     # Mongo
     MONGO_DB: str
     MONGO_URI: str
+    MONGO_MAX_POOL_SIZE: int
 
     # MLWH
     MLWH_DB_HOST: str
@@ -73,6 +87,7 @@ class Config(ModuleType):
     MLWH_DB_RO_PASSWORD: str
     MLWH_DB_RW_USER: str
     MLWH_DB_RW_PASSWORD: str
+    MLWH_USE_STAGING_TABLE: bool
     MLWH_DB_DBNAME: str
     EVENTS_WH_DB: str
 
@@ -83,6 +98,15 @@ class Config(ModuleType):
     DART_DB_RW_PASSWORD: str
     DART_DB_DBNAME: str
     DART_DB_DRIVER: str
+    DART_EXPORT_OUTBOX: bool
+    DART_EXPORT_WORKER_BATCH_SIZE: int
+    DART_EXPORT_WORKER_POLL_INTERVAL: int
+    DART_EXPORT_MAX_ATTEMPTS: int
+    DART_EXPORT_RETRY_DELAY: int
+
+    # MLWH and DART connection pools
+    DB_POOL_MAX_SIZE: int
+    DB_POOL_TIMEOUT: int
 
     # RabbitMQ
     RABBITMQ_HOST: str
@@ -102,6 +126,12 @@ class Config(ModuleType):
     RABBITMQ_PUBLISH_RETRY_DELAY: int
     RABBITMQ_PUBLISH_RETRIES: int
 
+    RABBITMQ_CONCURRENT_CONSUMER: bool
+    RABBITMQ_CONSUMER_WORKERS: int
+    RABBITMQ_PREFETCH_COUNT: int
+    RABBITMQ_CONSUMER_RECONNECT_DELAY: int
+    PROCESSORS: Dict[str, Type[BaseProcessor]]
+
     # RedPanda
     REDPANDA_BASE_URI: str
 
@@ -110,6 +140,7 @@ class Config(ModuleType):
     SFTP_PORT: int
     SFTP_READ_USERNAME: str
     SFTP_READ_PASSWORD: str
+    SFTP_DOWNLOAD_WORKERS: int
 
     # APScheduler
     SCHEDULER_RUN: bool
@@ -1,12 +1,17 @@
 import os
 import pprint
 import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
 from logging import Filter, Handler, Logger
-from typing import Iterable
+from typing import Iterable, Iterator
 
 from slack import WebClient
 from slack.errors import SlackApiError
 
+# the prefix of the centre currently being processed, set per thread (or task) when centres are processed concurrently
+_centre_prefix: ContextVar[str] = ContextVar("centre_prefix", default="")
+
 
 class SlackHandler(Handler):
     def __init__(self, token, channel_id):
@@ -73,3 +78,31 @@ class PackagePathFilter(Filter):
                 break
 
         return True
+
+
+@contextmanager
+def centre_logging_context(centre_prefix: str) -> Iterator[None]:
+    """Context manager which tags all log records emitted within it with the given centre prefix (see
+    CentreContextFilter). Useful to tell the centres apart when they are processed concurrently.
+
+    Arguments:
+        centre_prefix {str} -- the prefix of the centre being processed
+    """
+    token = _centre_prefix.set(centre_prefix)
+    try:
+        yield
+    finally:
+        _centre_prefix.reset(token)
+
+
+class CentreContextFilter(Filter):
+    """Subclass of logging Filter class which provides the `centre_context` log record helper: the prefix of the centre
+    being processed in square brackets, followed by a space; or an empty string when not processing a centre.
+    """
+
+    def filter(self, record):
+        centre_prefix = _centre_prefix.get()
+
+        record.centre_context = f"[{centre_prefix}] " if centre_prefix else ""
+
+        return True
@@ -19,19 +19,18 @@ from crawler.constants import (
     FIELD_MONGO_LAB_ID,
     FIELD_MONGODB_ID,
     FIELD_PLATE_BARCODE,
-    FIELD_ROOT_SAMPLE_ID,
     FIELD_UPDATED_AT,
     MONGO_DATETIME_FORMAT,
 )
 from crawler.db.mongo import create_mongo_client, get_mongo_collection, get_mongo_db
-from crawler.db.mysql import create_mysql_connection, run_mysql_executemany_query
+from crawler.db.mysql import create_mysql_connection, run_mysql_multi_row_upsert
 from crawler.helpers.cherrypicked_samples import (
+    extract_plate_barcodes_by_root_sample_id,
     extract_required_cp_info,
-    get_cherrypicked_samples,
+    get_cherrypicked_sample_keys,
     remove_cherrypicked_samples,
 )
 from crawler.helpers.general_helpers import map_mongo_sample_to_mysql, set_is_current_on_mysql_samples
-from crawler.sql_queries import SQL_MLWH_MULTIPLE_INSERT
 from crawler.types import Config, SampleDoc, SourcePlateDoc
 from migrations.helpers.shared_helper import valid_datetime_string
 from migrations.helpers.update_filtered_positives_helper import update_dart_fields
@@ -99,21 +98,23 @@ def migrate_all_dbs(config: Config, s_start_datetime: str = "", s_end_datetime:
             logger.debug(f"{len(plate_barcodes)} unique plate barcodes")
 
             # 2. of these, find which have been cherry-picked and remove them from the list
-            cp_samples_df = get_cherrypicked_samples(config, list(root_sample_ids), list(plate_barcodes))
+            cp_sample_keys = get_cherrypicked_sample_keys(
+                config,
+                list(root_sample_ids),
+                list(plate_barcodes),
+                plate_barcodes_by_root_sample_id=extract_plate_barcodes_by_root_sample_id(samples),
+            )
 
-            if cp_samples_df is None:  # we need to check if it is None explicitly
+            if cp_sample_keys is None:  # we need to check if it is None explicitly
                 raise ConnectionError(
                     "Unable to determine cherry-picked sample - potentially error connecting to MySQL"
                 )
 
             # get the samples between those dates minus the cherry-picked ones
-            if cp_samples_df is not None and not cp_samples_df.empty:
-                # we need a list of cherry-picked samples with their respective plate barcodes
-                cp_samples = cp_samples_df[[FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE]].to_numpy().tolist()
-
-                logger.debug(f"{len(cp_samples)} cherry-picked samples in this timeframe")
+            if cp_sample_keys:
+                logger.debug(f"{len(cp_sample_keys)} cherry-picked samples in this timeframe")
 
-                samples = remove_cherrypicked_samples(samples, cp_samples)
+                samples = remove_cherrypicked_samples(samples, cp_sample_keys)
             else:
                 logger.debug("No cherry-picked samples in this timeframe")
 
@@ -144,7 +145,7 @@ def migrate_all_dbs(config: Config, s_start_datetime: str = "", s_end_datetime:
                 # 5. update the MLWH (should be an idempotent operation)
 
                 # TODO: Check here would migration dbs be ok?
-                run_mysql_executemany_query(mlwh_conn, SQL_MLWH_MULTIPLE_INSERT, mysql_samples)
+                run_mysql_multi_row_upsert(mlwh_conn, mysql_samples)
 
             # 6. add all the plates with non-cherrypicked samples (determined in step 2) to DART, as well as any
             #       positive samples in these plates
@@ -3,9 +3,8 @@ from datetime import datetime
 
 from crawler.constants import COLLECTION_SAMPLES, FIELD_CREATED_AT, MONGO_DATETIME_FORMAT
 from crawler.db.mongo import create_mongo_client, get_mongo_collection, get_mongo_db
-from crawler.db.mysql import create_mysql_connection, run_mysql_executemany_query
+from crawler.db.mysql import create_mysql_connection, run_mysql_multi_row_upsert
 from crawler.helpers.general_helpers import map_mongo_sample_to_mysql, set_is_current_on_mysql_samples
-from crawler.sql_queries import SQL_MLWH_MULTIPLE_INSERT
 from crawler.types import Config
 from migrations.helpers.shared_helper import print_exception, valid_datetime_string
 
@@ -59,7 +58,7 @@ def update_mlwh_with_legacy_samples(config: Config, s_start_datetime: str = "",
             # create connection to the MLWH database
             with closing(create_mysql_connection(config, False)) as mlwh_conn:
                 # execute sql query to insert/update timestamps into MLWH
-                run_mysql_executemany_query(mlwh_conn, SQL_MLWH_MULTIPLE_INSERT, mysql_samples)
+                run_mysql_multi_row_upsert(mlwh_conn, mysql_samples)
         else:
             print("No documents found for this timestamp range, nothing to insert or update in MLWH")
 
@@ -5,19 +5,26 @@ import sys
 import traceback
 from contextlib import closing
 from csv import DictReader
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any, Dict, Iterator, List, Optional, cast
 
+from bson.objectid import ObjectId
 from mysql.connector.connection_cext import MySQLConnectionAbstract
 from mysql.connector.types import RowItemType
 from pymongo.collection import Collection
+from pymongo.database import Database
 
 from crawler.constants import (
+    COLLECTION_MIGRATION_CHECKPOINTS,
+    FIELD_CHECKPOINT_LAST_ID,
+    FIELD_CHECKPOINT_PARAMETERS,
     FIELD_MONGO_SOURCE_PLATE_BARCODE,
     FIELD_MONGODB_ID,
     FIELD_PLATE_BARCODE,
+    FIELD_UPDATED_AT,
     MONGO_DATETIME_FORMAT,
 )
+from crawler.db.mongo import get_mongo_collection
 from crawler.db.mysql import create_mysql_connection
 from crawler.types import Config, SampleDoc
 
@@ -159,3 +166,56 @@ def extract_mongodb_ids(samples: List[SampleDoc]) -> List[str]:
     """Get the MongoDB IDs for a list of documents."""
 
     return [str(sample[FIELD_MONGODB_ID]) for sample in samples]
+
+
+def get_migration_checkpoint(db: Database, migration: str, parameters: Dict[str, Any]) -> Optional[ObjectId]:
+    """Get the checkpoint left by an interrupted run of a migration, so the migration can resume from it. A checkpoint
+    left by a run with different parameters is ignored, as the run would have been working through different documents.
+
+    Arguments:
+        db {Database} -- the mongo database holding the checkpoints
+        migration {str} -- the name of the migration
+        parameters {Dict[str, Any]} -- the parameters of the current run
+
+    Returns:
+        Optional[ObjectId] -- the ID of the last document the interrupted run finished with, or None to start from the
+        beginning
+    """
+    checkpoints_collection = get_mongo_collection(db, COLLECTION_MIGRATION_CHECKPOINTS)
+    checkpoint = checkpoints_collection.find_one({FIELD_MONGODB_ID: migration})
+
+    if checkpoint is None or checkpoint.get(FIELD_CHECKPOINT_PARAMETERS) != parameters:
+        return None
+
+    return cast(ObjectId, checkpoint[FIELD_CHECKPOINT_LAST_ID])
+
+
+def save_migration_checkpoint(db: Database, migration: str, parameters: Dict[str, Any], last_id: ObjectId) -> None:
+    """Record how far a migration has got, so an interrupted run can resume from there.
+
+    Arguments:
+        db {Database} -- the mongo database holding the checkpoints
+        migration {str} -- the name of the migration
+        parameters {Dict[str, Any]} -- the parameters of the current run
+        last_id {ObjectId} -- the ID of the last document the migration has finished with
+    """
+    checkpoints_collection = get_mongo_collection(db, COLLECTION_MIGRATION_CHECKPOINTS)
+    checkpoints_collection.replace_one(
+        {FIELD_MONGODB_ID: migration},
+        {
+            FIELD_CHECKPOINT_PARAMETERS: parameters,
+            FIELD_CHECKPOINT_LAST_ID: last_id,
+            FIELD_UPDATED_AT: datetime.now(tz=timezone.utc),
+        },
+        upsert=True,
+    )
+
+
+def clear_migration_checkpoint(db: Database, migration: str) -> None:
+    """Remove the checkpoint of a migration, so its next run starts from the beginning.
+
+    Arguments:
+        db {Database} -- the mongo database holding the checkpoints
+        migration {str} -- the name of the migration
+    """
+    get_mongo_collection(db, COLLECTION_MIGRATION_CHECKPOINTS).delete_one({FIELD_MONGODB_ID: migration})
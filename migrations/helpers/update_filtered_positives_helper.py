@@ -1,9 +1,13 @@
 import logging
 from contextlib import closing
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Counter, DefaultDict, Dict, Iterator, List, Optional, Tuple
 
-from more_itertools import groupby_transform
+from bson.objectid import ObjectId
+from more_itertools import chunked, groupby_transform
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+from pymongo.operations import UpdateOne
 
 from crawler.config.centres import get_centres_config
 from crawler.constants import (
@@ -12,31 +16,76 @@ from crawler.constants import (
     CENTRE_KEY_NAME,
     COLLECTION_SAMPLES,
     DART_STATE_PENDING,
+    FIELD_CH1_CQ,
+    FIELD_CH2_CQ,
+    FIELD_CH3_CQ,
     FIELD_COORDINATE,
     FIELD_FILTERED_POSITIVE,
     FIELD_FILTERED_POSITIVE_TIMESTAMP,
     FIELD_FILTERED_POSITIVE_VERSION,
+    FIELD_LH_SAMPLE_UUID,
+    FIELD_MONGO_LAB_ID,
     FIELD_MONGODB_ID,
+    FIELD_MUST_SEQUENCE,
     FIELD_PLATE_BARCODE,
     FIELD_RESULT,
+    FIELD_RNA_ID,
     FIELD_ROOT_SAMPLE_ID,
     FIELD_SOURCE,
+    FILTERED_POSITIVES_MIGRATION_BATCH_SIZE,
     RESULT_VALUE_POSITIVE,
 )
 from crawler.db.dart import add_dart_plate_if_doesnt_exist, create_dart_sql_server_conn, set_dart_well_properties
 from crawler.db.mongo import create_mongo_client, get_mongo_collection, get_mongo_db
-from crawler.db.mysql import create_mysql_connection, run_mysql_executemany_query
+from crawler.db.mysql import (
+    create_mysql_connection,
+    run_mysql_execute_formatted_query,
+    run_mysql_executemany_query,
+)
 from crawler.filtered_positive_identifier import FilteredPositiveIdentifier
 from crawler.helpers.general_helpers import (
     get_dart_well_index,
     map_mongo_doc_to_dart_well_props,
     map_mongo_to_sql_common,
 )
-from crawler.sql_queries import SQL_DART_GET_PLATE_BARCODES, SQL_MLWH_MULTIPLE_FILTERED_POSITIVE_UPDATE
+from crawler.sql_queries import (
+    SQL_DART_GET_PLATE_BARCODES,
+    SQL_MLWH_MULTIPLE_FILTERED_POSITIVE_UPDATE,
+    SQL_MLWH_MULTIPLE_FILTERED_POSITIVE_VERSION_UPDATE_BATCH,
+)
 from crawler.types import CentreConf, Config, SampleDoc
 
 logger = logging.getLogger(__name__)
 
+# the kinds of change counted, for each centre, when diffing filtered positive values
+FILTERED_POSITIVE_CHANGE_SAMPLES = "samples"
+FILTERED_POSITIVE_CHANGE_TO_POSITIVE = "to_positive"
+FILTERED_POSITIVE_CHANGE_TO_NEGATIVE = "to_negative"
+FILTERED_POSITIVE_CHANGE_VERSION_ONLY = "version_only"
+
+# the fields of a sample needed to determine whether it is a filtered positive, to skip cherrypicked samples and to
+# update the sample in the MLWH and DART
+FILTERED_POSITIVE_SAMPLE_PROJECTION: Dict[str, int] = {
+    field: 1
+    for field in (
+        FIELD_MONGODB_ID,
+        FIELD_RESULT,
+        FIELD_ROOT_SAMPLE_ID,
+        FIELD_RNA_ID,
+        FIELD_MONGO_LAB_ID,
+        FIELD_PLATE_BARCODE,
+        FIELD_COORDINATE,
+        FIELD_SOURCE,
+        FIELD_CH1_CQ,
+        FIELD_CH2_CQ,
+        FIELD_CH3_CQ,
+        FIELD_FILTERED_POSITIVE,
+        FIELD_FILTERED_POSITIVE_VERSION,
+        FIELD_LH_SAMPLE_UUID,
+        FIELD_MUST_SEQUENCE,
+    )
+}
+
 
 def pending_plate_barcodes_from_dart(config: Config) -> List[str]:
     """Fetch the barcodes of all plates from DART that are in the 'pending' state
@@ -67,29 +116,69 @@ def pending_plate_barcodes_from_dart(config: Config) -> List[str]:
     return plate_barcodes
 
 
-def positive_result_samples_from_mongo(config: Config, plate_barcodes: Optional[List[str]] = None) -> List[SampleDoc]:
-    """Fetch positive samples from Mongo contained within specified plates.
+def positive_result_sample_batches_from_mongo(
+    samples_collection: Collection,
+    plate_barcodes: Optional[List[str]] = None,
+    after_id: Optional[ObjectId] = None,
+    batch_size: int = FILTERED_POSITIVES_MIGRATION_BATCH_SIZE,
+    changed_by: Optional[FilteredPositiveIdentifier] = None,
+) -> Iterator[List[SampleDoc]]:
+    """Stream positive samples from Mongo in batches, in order of their ID, so only one batch of samples is held in
+    memory at once. Only the fields needed to determine and update the filtered positive values are fetched.
 
     Arguments:
-        config {Config} -- application config specifying database details
+        samples_collection {Collection} -- the mongo samples collection
         plate_barcodes {Optional[List[str]]} -- barcodes of plates whose samples we are concerned with
+        after_id {Optional[ObjectId]} -- only fetch the samples after this one, to resume an interrupted run
+        batch_size {int} -- the number of samples in each batch
+        changed_by {Optional[FilteredPositiveIdentifier]} -- only fetch the samples whose filtered positive value or
+        version the server determines would be changed by this identifier
 
     Returns:
-        List[Dict[str, str]] -- List of positive samples contained within specified plates
+        Iterator[List[SampleDoc]] -- batches of positive samples contained within specified plates
     """
-    with create_mongo_client(config) as client:
-        mongo_db = get_mongo_db(config, client)
-        samples_collection = get_mongo_collection(mongo_db, COLLECTION_SAMPLES)
+    query: Dict[str, Any] = {FIELD_RESULT: RESULT_VALUE_POSITIVE}
+
+    if plate_barcodes is not None:
+        query[FIELD_PLATE_BARCODE] = {"$in": plate_barcodes}
+
+    if after_id is not None:
+        query[FIELD_MONGODB_ID] = {"$gt": after_id}
+
+    if changed_by is not None:
+        query["$expr"] = filtered_positive_changed_expression(changed_by)
+
+    cursor = samples_collection.find(
+        query, FILTERED_POSITIVE_SAMPLE_PROJECTION, sort=[(FIELD_MONGODB_ID, ASCENDING)], batch_size=batch_size
+    )
+
+    try:
+        yield from chunked(cursor, batch_size)
+    finally:
+        cursor.close()
+
 
-        pipeline = [{"$match": {FIELD_RESULT: {"$eq": RESULT_VALUE_POSITIVE}}}]
+def filtered_positive_changed_expression(filtered_positive_identifier: FilteredPositiveIdentifier) -> Dict[str, Any]:
+    """Returns a Mongo aggregation expression which evaluates to whether the filtered positive value or version of a
+    sample would be changed by the identifier, matching the samples changed_filtered_positive_samples would return.
 
-        if plate_barcodes is not None:
-            pipeline.append({"$match": {FIELD_PLATE_BARCODE: {"$in": plate_barcodes}}})  # type: ignore
+    Arguments:
+        filtered_positive_identifier {FilteredPositiveIdentifier} -- the identifier whose rules to evaluate
 
-        # this should take everything from the cursor find into RAM memory
-        # (assuming you have enough memory)
-        # should we project to an object that has fewer fields?
-        return list(samples_collection.aggregate(pipeline))
+    Returns:
+        Dict[str, Any] -- the aggregation expression
+    """
+    return {
+        "$or": [
+            {
+                "$ne": [
+                    {"$ifNull": [f"${FIELD_FILTERED_POSITIVE}", None]},
+                    filtered_positive_identifier.aggregation_expression(),
+                ]
+            },
+            {"$ne": [{"$ifNull": [f"${FIELD_FILTERED_POSITIVE_VERSION}", None]}, filtered_positive_identifier.version]},
+        ]
+    }
 
 
 def update_filtered_positive_fields(
@@ -112,8 +201,8 @@ def update_filtered_positive_fields(
 
     version = filtered_positive_identifier.version
 
-    for sample in samples:
-        sample[FIELD_FILTERED_POSITIVE] = filtered_positive_identifier.is_positive(sample)
+    for sample, filtered_positive in zip(samples, filtered_positive_identifier.classify_many(samples)):
+        sample[FIELD_FILTERED_POSITIVE] = filtered_positive
         sample[FIELD_FILTERED_POSITIVE_VERSION] = version
         sample[FIELD_FILTERED_POSITIVE_TIMESTAMP] = update_timestamp
 
@@ -180,6 +269,152 @@ def update_mongo_filtered_positive_fields(
         return True
 
 
+def changed_filtered_positive_samples(
+    filtered_positive_identifier: FilteredPositiveIdentifier, samples: List[SampleDoc], update_timestamp: datetime
+) -> List[SampleDoc]:
+    """Determines the filtered positive value of each of the passed-in sample documents, updating the filtered positive
+    fields of those whose value or version changes - this method does not save the updates to the mongo database.
+
+    Arguments:
+        filtered_positive_identifier {FilteredPositiveIdentifier} -- the identifier through which to pass samples to,
+        to determine whether they are filtered positive
+        samples {List[SampleDoc]} -- the list of samples for which to re-determine filtered positive values
+        update_timestamp {datetime} -- the timestamp at which the update was performed
+
+    Returns:
+        List[SampleDoc] -- the samples whose filtered positive fields changed
+    """
+    flipped_samples, version_only_samples = diff_filtered_positive_samples(
+        filtered_positive_identifier, samples, update_timestamp
+    )
+
+    return flipped_samples + version_only_samples
+
+
+def diff_filtered_positive_samples(
+    filtered_positive_identifier: FilteredPositiveIdentifier, samples: List[SampleDoc], update_timestamp: datetime
+) -> Tuple[List[SampleDoc], List[SampleDoc]]:
+    """Compares the filtered positive value each sample has under the identifier with the value recorded against it by
+    the version it was last identified with, updating the filtered positive fields of the samples which change - this
+    method does not save the updates to the mongo database.
+
+    Arguments:
+        filtered_positive_identifier {FilteredPositiveIdentifier} -- the identifier through which to pass samples to,
+        to determine whether they are filtered positive
+        samples {List[SampleDoc]} -- the list of samples for which to re-determine filtered positive values
+        update_timestamp {datetime} -- the timestamp at which the update was performed
+
+    Returns:
+        Tuple[List[SampleDoc], List[SampleDoc]] -- the samples whose filtered positive value flips, or has never been
+        set, and the samples whose value stays the same but was determined by a different version
+    """
+    version = filtered_positive_identifier.version
+
+    flipped_samples = []
+    version_only_samples = []
+    for sample, filtered_positive in zip(samples, filtered_positive_identifier.classify_many(samples)):
+        if sample.get(FIELD_FILTERED_POSITIVE) is not filtered_positive:
+            flipped_samples.append(sample)
+        elif sample.get(FIELD_FILTERED_POSITIVE_VERSION) != version:
+            version_only_samples.append(sample)
+        else:
+            continue
+
+        sample[FIELD_FILTERED_POSITIVE] = filtered_positive
+        sample[FIELD_FILTERED_POSITIVE_VERSION] = version
+        sample[FIELD_FILTERED_POSITIVE_TIMESTAMP] = update_timestamp
+
+    return flipped_samples, version_only_samples
+
+
+def count_filtered_positive_changes_by_centre(
+    changes_by_centre: DefaultDict[str, Counter],
+    samples: List[SampleDoc],
+    flipped_samples: List[SampleDoc],
+    version_only_samples: List[SampleDoc],
+) -> None:
+    """Adds the changes to the filtered positive values of a batch of samples to the counts for each centre.
+
+    Arguments:
+        changes_by_centre {DefaultDict[str, Counter]} -- the counts of changes so far, by centre name
+        samples {List[SampleDoc]} -- the samples whose filtered positive values were re-determined
+        flipped_samples {List[SampleDoc]} -- the samples whose filtered positive value flips
+        version_only_samples {List[SampleDoc]} -- the samples whose filtered positive version alone changes
+    """
+    for sample in samples:
+        changes_by_centre[str(sample.get(FIELD_SOURCE))][FILTERED_POSITIVE_CHANGE_SAMPLES] += 1
+
+    for sample in flipped_samples:
+        change = (
+            FILTERED_POSITIVE_CHANGE_TO_POSITIVE
+            if sample[FIELD_FILTERED_POSITIVE]
+            else FILTERED_POSITIVE_CHANGE_TO_NEGATIVE
+        )
+        changes_by_centre[str(sample.get(FIELD_SOURCE))][change] += 1
+
+    for sample in version_only_samples:
+        changes_by_centre[str(sample.get(FIELD_SOURCE))][FILTERED_POSITIVE_CHANGE_VERSION_ONLY] += 1
+
+
+def bulk_update_mongo_filtered_positive_fields(samples_collection: Collection, samples: List[SampleDoc]) -> int:
+    """Writes the filtered positive fields of the samples to the Mongo database in a single bulk write.
+
+    Arguments:
+        samples_collection {Collection} -- the mongo samples collection
+        samples {List[SampleDoc]} -- the samples whose filtered positive fields should be updated
+
+    Returns:
+        int -- the number of samples updated
+    """
+    if not samples:
+        return 0
+
+    result = samples_collection.bulk_write(
+        [
+            UpdateOne(
+                {FIELD_MONGODB_ID: sample[FIELD_MONGODB_ID]},
+                {
+                    "$set": {
+                        FIELD_FILTERED_POSITIVE: sample[FIELD_FILTERED_POSITIVE],
+                        FIELD_FILTERED_POSITIVE_VERSION: sample[FIELD_FILTERED_POSITIVE_VERSION],
+                        FIELD_FILTERED_POSITIVE_TIMESTAMP: sample[FIELD_FILTERED_POSITIVE_TIMESTAMP],
+                    }
+                },
+            )
+            for sample in samples
+        ],
+        ordered=False,
+    )
+
+    return result.modified_count
+
+
+def update_mongo_filtered_positive_version(
+    samples_collection: Collection, samples: List[SampleDoc], version: str, update_timestamp: datetime
+) -> int:
+    """Writes the filtered positive version and timestamp of samples whose filtered positive value has not changed to
+    the Mongo database, in a single set based update.
+
+    Arguments:
+        samples_collection {Collection} -- the mongo samples collection
+        samples {List[SampleDoc]} -- the samples whose filtered positive version should be updated
+        version {str} -- the filtered positive identifier version used
+        update_timestamp {datetime} -- the timestamp at which the update was performed
+
+    Returns:
+        int -- the number of samples updated
+    """
+    if not samples:
+        return 0
+
+    result = samples_collection.update_many(
+        {FIELD_MONGODB_ID: {"$in": [sample[FIELD_MONGODB_ID] for sample in samples]}},
+        {"$set": {FIELD_FILTERED_POSITIVE_VERSION: version, FIELD_FILTERED_POSITIVE_TIMESTAMP: update_timestamp}},
+    )
+
+    return result.modified_count
+
+
 def update_mlwh_filtered_positive_fields(config: Config, samples: List[SampleDoc]) -> bool:
     """Bulk updates sample filtered positive fields in the MLWH database
 
@@ -199,6 +434,34 @@ def update_mlwh_filtered_positive_fields(config: Config, samples: List[SampleDoc
             return False
 
 
+def update_mlwh_filtered_positive_version(
+    config: Config, samples: List[SampleDoc], version: str, update_timestamp: datetime
+) -> bool:
+    """Updates the filtered positive version and timestamp of samples whose filtered positive value has not changed in
+    the MLWH database, with set based updates.
+
+    Arguments:
+        config {Config} -- application config specifying database details
+        samples {List[SampleDoc]} -- the samples whose filtered positive version should be updated
+        version {str} -- the filtered positive identifier version used
+        update_timestamp {datetime} -- the timestamp at which the update was performed
+
+    Returns:
+        bool -- whether the updates completed successfully
+    """
+    with closing(create_mysql_connection(config, False)) as mysql_conn:
+        if mysql_conn is not None and mysql_conn.is_connected():
+            run_mysql_execute_formatted_query(
+                mysql_conn,
+                SQL_MLWH_MULTIPLE_FILTERED_POSITIVE_VERSION_UPDATE_BATCH,
+                [str(sample[FIELD_MONGODB_ID]) for sample in samples],
+                [version, update_timestamp, update_timestamp],
+            )
+            return True
+        else:
+            return False
+
+
 def update_dart_fields(config: Config, samples: List[SampleDoc]) -> bool:
     """Updates DART plates and wells following updates to the filtered positive fields
 
@@ -226,18 +489,14 @@ def update_dart_fields(config: Config, samples: List[SampleDoc]) -> bool:
         ):
             try:
                 labware_class = labclass_by_centre_name[(str)(samples_in_plate[0][FIELD_SOURCE])]
-                plate_state = add_dart_plate_if_doesnt_exist(
-                    cursor, plate_barcode, labware_class  # type:ignore
-                )
+                plate_state = add_dart_plate_if_doesnt_exist(cursor, plate_barcode, labware_class)  # type: ignore
                 if plate_state == DART_STATE_PENDING:
                     for sample in samples_in_plate:
                         if sample[FIELD_RESULT] == RESULT_VALUE_POSITIVE:
                             well_index = get_dart_well_index((str)(sample.get(FIELD_COORDINATE, None)))
                             if well_index is not None:
                                 well_props = map_mongo_doc_to_dart_well_props(sample)
-                                set_dart_well_properties(
-                                    cursor, plate_barcode, well_props, well_index  # type:ignore
-                                )
+                                set_dart_well_properties(cursor, plate_barcode, well_props, well_index)  # type: ignore
                             else:
                                 raise ValueError(
                                     "Unable to determine DART well index for sample "
@@ -1,8 +1,6 @@
 import logging
 from datetime import datetime
-from typing import Any, Dict, List
-
-from pandas import DataFrame
+from typing import Any, Dict, List, Set
 
 from crawler.constants import (
     COLLECTION_SAMPLES,
@@ -20,6 +18,7 @@ from crawler.filtered_positive_identifier import (
     FILTERED_POSITIVE_VERSION_1,
     FILTERED_POSITIVE_VERSION_2,
 )
+from crawler.helpers.cherrypicked_samples import CherrypickedSampleKey
 from crawler.helpers.general_helpers import map_mongo_to_sql_common
 from crawler.sql_queries import SQL_MLWH_MULTIPLE_FILTERED_POSITIVE_UPDATE_BATCH
 from crawler.types import Config, SampleDoc
@@ -76,7 +75,9 @@ def filtered_positive_fields_set(config: Config, start_datetime: datetime, end_d
 
 
 def split_mongo_samples_by_version(
-    samples: List[SampleDoc], cp_samples_df_v0: DataFrame, cp_samples_df_v1: DataFrame
+    samples: List[SampleDoc],
+    cp_sample_keys_v0: Set[CherrypickedSampleKey],
+    cp_sample_keys_v1: Set[CherrypickedSampleKey],
 ) -> Dict[str, List[SampleDoc]]:
     """Split the Mongo samples dataframe based on the v0 cherrypicked samples. Samples
        which have been v0 cherrypicked need to have the v0 filtered positive rules
@@ -84,29 +85,22 @@ def split_mongo_samples_by_version(
 
     Args:
         samples {List[Sample]} -- List of samples from Mongo
-        cp_samples_df_v0 {DataFrame} -- DataFrame of v0 cherrypicked samples
-        cp_samples_df_v1: {DataFrame} -- DataFrame of v1 cherrypicked samples
+        cp_sample_keys_v0 {Set[CherrypickedSampleKey]} -- root sample id and plate barcode of v0 cherrypicked samples
+        cp_sample_keys_v1: {Set[CherrypickedSampleKey]} -- root sample id and plate barcode of v1 cherrypicked samples
 
     Returns:
         samples_by_version {Dict[List[Sample]]} -- Samples split by version
     """
-    v0_cp_samples = []
-    if not cp_samples_df_v0.empty:
-        v0_cp_samples = cp_samples_df_v0[[FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE]].to_numpy().tolist()  # noqa: E501
-
-    v1_cp_samples = []
-    if not cp_samples_df_v1.empty:
-        v1_cp_samples = cp_samples_df_v1[[FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE]].to_numpy().tolist()  # noqa: E501
-
     v0_samples = []
     v1_samples = []
     v2_samples = []
 
     counter = 0
     for sample in samples:
-        if [sample[FIELD_ROOT_SAMPLE_ID], sample[FIELD_PLATE_BARCODE]] in v0_cp_samples:
+        sample_key = (sample[FIELD_ROOT_SAMPLE_ID], sample[FIELD_PLATE_BARCODE])
+        if sample_key in cp_sample_keys_v0:
             v0_samples.append(sample)
-        elif [sample[FIELD_ROOT_SAMPLE_ID], sample[FIELD_PLATE_BARCODE]] in v1_cp_samples:
+        elif sample_key in cp_sample_keys_v1:
             v1_samples.append(sample)
         else:
             v2_samples.append(sample)
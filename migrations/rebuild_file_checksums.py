@@ -0,0 +1,34 @@
+"""
+Seeds the index of the checksums of processed centre files from the existing backup folders of each SFTP centre.
+
+The crawler uses this index to determine whether a file has already been processed, instead of listing the backup
+folders. The index is kept up to date by the crawler as files are backed up, and seeded by the crawler for a centre
+with no files indexed, so this only needs to be run to repair the index. Running it again does not create duplicate
+records.
+"""
+
+import logging
+import logging.config
+
+from crawler.config.centres import CENTRE_DATA_SOURCE_SFTP, get_centres_config
+from crawler.constants import CENTRE_KEY_BACKUPS_FOLDER, COLLECTION_FILE_CHECKSUMS
+from crawler.db.mongo import create_mongo_client, get_mongo_collection, get_mongo_db
+from crawler.file_processing import index_backed_up_file_checksums
+from crawler.helpers.db_helpers import ensure_mongo_collections_indexed
+from crawler.types import Config
+
+LOGGER = logging.getLogger(__name__)
+
+
+def run(config: Config) -> None:
+    with create_mongo_client(config) as client:
+        db = get_mongo_db(config, client)
+        ensure_mongo_collections_indexed(db)
+
+        file_checksums_collection = get_mongo_collection(db, COLLECTION_FILE_CHECKSUMS)
+
+        for centre_config in get_centres_config(config, CENTRE_DATA_SOURCE_SFTP):
+            if CENTRE_KEY_BACKUPS_FOLDER not in centre_config:
+                continue
+
+            index_backed_up_file_checksums(file_checksums_collection, centre_config)
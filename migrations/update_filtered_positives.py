@@ -1,31 +1,73 @@
 import logging
 import logging.config
+from collections import defaultdict
 from datetime import datetime, timezone
-from typing import Tuple, cast
+from typing import Counter, DefaultDict, List, Optional, Tuple, cast
 
+from bson.objectid import ObjectId
 from lab_share_lib.config_readers import get_config
+from pymongo.collection import Collection
+from pymongo.database import Database
 
+from crawler.constants import COLLECTION_SAMPLES, FIELD_MONGODB_ID
+from crawler.db.mongo import create_mongo_client, get_mongo_collection, get_mongo_db
 from crawler.filtered_positive_identifier import current_filtered_positive_identifier
 from crawler.helpers.cherrypicked_samples import filter_out_cherrypicked_samples
-from crawler.types import Config
+from crawler.types import Config, SampleDoc
+from migrations.helpers.shared_helper import (
+    clear_migration_checkpoint,
+    get_migration_checkpoint,
+    save_migration_checkpoint,
+)
 from migrations.helpers.update_filtered_positives_helper import (
+    FILTERED_POSITIVE_CHANGE_SAMPLES,
+    FILTERED_POSITIVE_CHANGE_TO_NEGATIVE,
+    FILTERED_POSITIVE_CHANGE_TO_POSITIVE,
+    FILTERED_POSITIVE_CHANGE_VERSION_ONLY,
+    bulk_update_mongo_filtered_positive_fields,
+    changed_filtered_positive_samples,
+    count_filtered_positive_changes_by_centre,
+    diff_filtered_positive_samples,
     pending_plate_barcodes_from_dart,
-    positive_result_samples_from_mongo,
+    positive_result_sample_batches_from_mongo,
     update_dart_fields,
-    update_filtered_positive_fields,
     update_mlwh_filtered_positive_fields,
-    update_mongo_filtered_positive_fields,
+    update_mlwh_filtered_positive_version,
+    update_mongo_filtered_positive_version,
 )
 
 logger = logging.getLogger(__name__)
 
+MIGRATION_NAME = "update_filtered_positives"
+
+# the counts of the samples processed by a run
+PROGRESS_POSITIVE_SAMPLES = "positive_samples"
+PROGRESS_NON_CP_POSITIVE_SAMPLES = "non_cp_positive_samples"
+PROGRESS_UPDATED_SAMPLES = "updated_samples"
 
-def run(settings_module: str = "", omit_dart: bool = False) -> None:
-    """Updates filtered positive values for all positive samples in pending plates
+
+def run(
+    settings_module: str = "",
+    omit_dart: bool = False,
+    restart: bool = False,
+    diff: bool = False,
+    dry_run: bool = False,
+    server_side: bool = False,
+) -> None:
+    """Updates filtered positive values for all positive samples in pending plates. The samples are streamed from Mongo
+    in batches, and only those whose filtered positive value or version changes are updated. The last sample of each
+    batch is checkpointed once the batch is written, so an interrupted run resumes from where it stopped.
 
     Arguments:
         settings_module {str} -- settings module from which to generate the app config
         omit_dart {bool} -- whether to omit DART queries/updates from the process
+        restart {bool} -- whether to ignore the checkpoint of an interrupted run and start from the first sample
+        diff {bool} -- whether to only push the filtered positive value to the MLWH and DART for samples whose value
+        flips, updating just the version and timestamp of the other samples with set based updates
+        dry_run {bool} -- whether to only report, by centre, the changes the update would make, without writing
+        anything
+        server_side {bool} -- whether to have Mongo evaluate the filtered positive rules, so only the samples which
+        change are fetched
     """
     config, settings_module = cast(Tuple[Config, str], get_config(settings_module))
     logging.config.dictConfig(config.LOGGING)
@@ -35,71 +77,42 @@ def run(settings_module: str = "", omit_dart: bool = False) -> None:
     logger.info(f"Time start: {datetime.now()}")
 
     num_pending_plates = 0
-    num_pos_samples = 0
-    num_non_cp_pos_samples = 0
-    mongo_updated = False
-    mlwh_updated = False
-    dart_updated = False
+    progress: Counter[str] = Counter()
+    changes_by_centre: DefaultDict[str, Counter[str]] = defaultdict(Counter)
+    completed = False
     try:
-        samples = []
+        plate_barcodes: Optional[List[str]] = None
         if omit_dart:
-            # Get positive result samples from Mongo
             logger.warning("Omitting DART from this update")
-            samples = positive_result_samples_from_mongo(config)
         else:
             # Get barcodes of pending plates in DART
             logger.info("Selecting pending plates from DART...")
-            pending_plate_barcodes = pending_plate_barcodes_from_dart(config)
+            plate_barcodes = pending_plate_barcodes_from_dart(config)
 
-            if num_pending_plates := len(pending_plate_barcodes):
+            if num_pending_plates := len(plate_barcodes):
                 logger.info(f"{num_pending_plates} pending plates found in DART")
-
-                # Get positive result samples from Mongo in these pending plates
-                logger.info("Selecting postive samples in pending plates from Mongo...")
-                samples = positive_result_samples_from_mongo(config, pending_plate_barcodes)
             else:
                 logger.warning("No pending plates found in DART")
 
-        if num_pos_samples := len(samples):
-            logger.info(f"{num_pos_samples} matching positive samples found in Mongo")
-
-            # Filter out cherrypicked samples
-            logger.info("Filtering out cherrypicked samples...")
-            non_cp_pos_pending_samples = filter_out_cherrypicked_samples(config, samples)
-
-            if num_non_cp_pos_samples := len(non_cp_pos_pending_samples):
-                logger.info(f"{num_non_cp_pos_samples} non-cherrypicked matching positive samples found")
-                filtered_positive_identifier = current_filtered_positive_identifier()
-                version = filtered_positive_identifier.version
-                update_timestamp = datetime.now(tz=timezone.utc)
-                logger.info("Updating filtered positives...")
-                update_filtered_positive_fields(
-                    filtered_positive_identifier,
-                    non_cp_pos_pending_samples,
-                    version,
-                    update_timestamp,
-                )
-                logger.info("Updated filtered positives")
+        if omit_dart or num_pending_plates:
+            if dry_run:
+                logger.warning("Dry run: reporting the changes without updating any database")
 
-                logger.info("Updating Mongo...")
-                mongo_updated = update_mongo_filtered_positive_fields(
-                    config, non_cp_pos_pending_samples, version, update_timestamp
+            with create_mongo_client(config) as client:
+                update_filtered_positives_in_batches(
+                    config,
+                    get_mongo_db(config, client),
+                    plate_barcodes,
+                    progress,
+                    changes_by_centre,
+                    omit_dart=omit_dart,
+                    restart=restart,
+                    diff=diff,
+                    dry_run=dry_run,
+                    server_side=server_side,
                 )
-                logger.info("Finished updating Mongo")
 
-                if mongo_updated:
-                    logger.info("Updating MLWH...")
-                    mlwh_updated = update_mlwh_filtered_positive_fields(config, non_cp_pos_pending_samples)
-                    logger.info("Finished updating MLWH")
-
-                    if not omit_dart and mlwh_updated:
-                        logger.info("Updating DART...")
-                        dart_updated = update_dart_fields(config, non_cp_pos_pending_samples)
-                        logger.info("Finished updating DART")
-            else:
-                logger.warning("No non-cherrypicked matching positive samples found, not updating any database")
-        else:
-            logger.warning("No matching positive samples found in Mongo, not updating any database")
+            completed = True
 
     except Exception as e:
         logger.error("---------- Process aborted: ----------")
@@ -107,17 +120,178 @@ def run(settings_module: str = "", omit_dart: bool = False) -> None:
         logger.exception(e)
     finally:
         dart_message = "DART omitted: True" if omit_dart else f"Found {num_pending_plates} pending plates in DART"
+        updated_message = "would be updated by this dry run" if dry_run else "changed and were updated"
         logger.info(
             f"""
         ---------- Processing status of filtered positive rule changes: ----------
         -- {dart_message}
-        -- Found {num_pos_samples} matching samples in Mongo
-        -- Of which {num_non_cp_pos_samples} have not been cherrypicked
-        -- Mongo updated: {mongo_updated}
-        -- MLWH updated: {mlwh_updated}
-        -- DART updated: {dart_updated}
+        -- Found {progress[PROGRESS_POSITIVE_SAMPLES]} matching samples in Mongo
+        -- Of which {progress[PROGRESS_NON_CP_POSITIVE_SAMPLES]} have not been cherrypicked
+        -- Of which {progress[PROGRESS_UPDATED_SAMPLES]} {updated_message}
+        -- Completed: {completed}
         """
         )
 
+        if diff or dry_run:
+            log_filtered_positive_changes_by_centre(changes_by_centre)
+
     logger.info(f"Time finished: {datetime.now()}")
     logger.info("=" * 80)
+
+
+def update_filtered_positives_in_batches(
+    config: Config,
+    mongo_db: Database,
+    plate_barcodes: Optional[List[str]],
+    progress: Counter[str],
+    changes_by_centre: DefaultDict[str, Counter[str]],
+    omit_dart: bool = False,
+    restart: bool = False,
+    diff: bool = False,
+    dry_run: bool = False,
+    server_side: bool = False,
+) -> None:
+    """Works through the positive samples in batches, updating the filtered positive values of each batch and
+    checkpointing it before moving on to the next. A dry run evaluates every batch, without writing or checkpointing.
+
+    Arguments:
+        config {Config} -- application config specifying database details
+        mongo_db {Database} -- the mongo database holding the samples and the checkpoint
+        plate_barcodes {Optional[List[str]]} -- barcodes of the plates whose samples to update, or None for all samples
+        progress {Counter[str]} -- the counts of the samples processed so far, added to as each batch is processed
+        changes_by_centre {DefaultDict[str, Counter[str]]} -- the counts of the changes by centre, added to as each
+        batch is diffed
+        omit_dart {bool} -- whether to omit DART updates
+        restart {bool} -- whether to ignore the checkpoint of an interrupted run and start from the first sample
+        diff {bool} -- whether to write the samples whose value flips separately from those whose version alone
+        changes
+        dry_run {bool} -- whether to only count the changes, without writing anything
+        server_side {bool} -- whether to only fetch the samples which Mongo determines will change, each of which is
+        still re-determined by the identifier before it is written
+    """
+    filtered_positive_identifier = current_filtered_positive_identifier()
+    version = filtered_positive_identifier.version
+    update_timestamp = datetime.now(tz=timezone.utc)
+    samples_collection = get_mongo_collection(mongo_db, COLLECTION_SAMPLES)
+    # a checkpoint is only resumed from by a run working through the same samples with the same rules
+    checkpoint_parameters = {"version": version, "omit_dart": omit_dart}
+
+    after_id = None
+    if not dry_run:
+        if restart:
+            clear_migration_checkpoint(mongo_db, MIGRATION_NAME)
+
+        if (after_id := get_migration_checkpoint(mongo_db, MIGRATION_NAME, checkpoint_parameters)) is not None:
+            logger.info(f"Resuming from the checkpoint after sample {after_id}")
+
+    # Get positive result samples from Mongo, in these pending plates unless omitting DART
+    logger.info("Selecting positive samples from Mongo in batches...")
+    changed_by = filtered_positive_identifier if server_side else None
+    for samples in positive_result_sample_batches_from_mongo(
+        samples_collection, plate_barcodes, after_id, changed_by=changed_by
+    ):
+        progress[PROGRESS_POSITIVE_SAMPLES] += len(samples)
+
+        # Filter out cherrypicked samples
+        non_cp_pos_samples = filter_out_cherrypicked_samples(config, samples)
+        progress[PROGRESS_NON_CP_POSITIVE_SAMPLES] += len(non_cp_pos_samples)
+
+        if diff or dry_run:
+            flipped_samples, version_only_samples = diff_filtered_positive_samples(
+                filtered_positive_identifier, non_cp_pos_samples, update_timestamp
+            )
+            count_filtered_positive_changes_by_centre(
+                changes_by_centre, non_cp_pos_samples, flipped_samples, version_only_samples
+            )
+
+            if not dry_run:
+                write_filtered_positive_changes(config, samples_collection, flipped_samples, omit_dart)
+                write_filtered_positive_version_changes(
+                    config, samples_collection, version_only_samples, version, update_timestamp
+                )
+
+            progress[PROGRESS_UPDATED_SAMPLES] += len(flipped_samples) + len(version_only_samples)
+        else:
+            changed_samples = changed_filtered_positive_samples(
+                filtered_positive_identifier, non_cp_pos_samples, update_timestamp
+            )
+            write_filtered_positive_changes(config, samples_collection, changed_samples, omit_dart)
+            progress[PROGRESS_UPDATED_SAMPLES] += len(changed_samples)
+
+        if not dry_run:
+            last_id = cast(ObjectId, samples[-1][FIELD_MONGODB_ID])
+            save_migration_checkpoint(mongo_db, MIGRATION_NAME, checkpoint_parameters, last_id)
+
+        logger.info(
+            f"{progress[PROGRESS_POSITIVE_SAMPLES]} positive samples processed, "
+            f"{progress[PROGRESS_UPDATED_SAMPLES]} updated"
+        )
+
+    if not dry_run:
+        clear_migration_checkpoint(mongo_db, MIGRATION_NAME)
+
+
+def write_filtered_positive_changes(
+    config: Config, samples_collection: Collection, samples: List[SampleDoc], omit_dart: bool
+) -> None:
+    """Writes the changed filtered positive fields of samples to the MLWH and DART before Mongo. A batch which fails
+    part way through is left unchanged in Mongo, so it is picked up again when the run is resumed.
+
+    Arguments:
+        config {Config} -- application config specifying database details
+        samples_collection {Collection} -- the mongo samples collection
+        samples {List[SampleDoc]} -- the samples whose filtered positive fields changed
+        omit_dart {bool} -- whether to omit DART updates
+    """
+    if not samples:
+        return
+
+    if not update_mlwh_filtered_positive_fields(config, samples):
+        raise ValueError("Unable to update the filtered positive fields in the MLWH")
+
+    if not omit_dart and not update_dart_fields(config, samples):
+        raise ValueError("Unable to update the filtered positive fields in DART")
+
+    bulk_update_mongo_filtered_positive_fields(samples_collection, samples)
+
+
+def write_filtered_positive_version_changes(
+    config: Config, samples_collection: Collection, samples: List[SampleDoc], version: str, update_timestamp: datetime
+) -> None:
+    """Writes the new filtered positive version and timestamp of samples whose filtered positive value did not change,
+    with set based updates of the MLWH before Mongo. DART does not record the version, so is left alone.
+
+    Arguments:
+        config {Config} -- application config specifying database details
+        samples_collection {Collection} -- the mongo samples collection
+        samples {List[SampleDoc]} -- the samples whose filtered positive version alone changed
+        version {str} -- the filtered positive identifier version used
+        update_timestamp {datetime} -- the timestamp at which the update was performed
+    """
+    if not samples:
+        return
+
+    if not update_mlwh_filtered_positive_version(config, samples, version, update_timestamp):
+        raise ValueError("Unable to update the filtered positive version in the MLWH")
+
+    update_mongo_filtered_positive_version(samples_collection, samples, version, update_timestamp)
+
+
+def log_filtered_positive_changes_by_centre(changes_by_centre: DefaultDict[str, Counter[str]]) -> None:
+    """Logs a report of the changes to the filtered positive values of the samples of each centre.
+
+    Arguments:
+        changes_by_centre {DefaultDict[str, Counter[str]]} -- the counts of the changes, by centre name
+    """
+    logger.info("---------- Filtered positive changes by centre: ----------")
+
+    for centre, changes in sorted(changes_by_centre.items()):
+        logger.info(
+            f"-- {centre}: {changes[FILTERED_POSITIVE_CHANGE_SAMPLES]} samples, "
+            f"{changes[FILTERED_POSITIVE_CHANGE_TO_POSITIVE]} becoming filtered positive, "
+            f"{changes[FILTERED_POSITIVE_CHANGE_TO_NEGATIVE]} no longer filtered positive, "
+            f"{changes[FILTERED_POSITIVE_CHANGE_VERSION_ONLY]} changing version only"
+        )
+
+    if not changes_by_centre:
+        logger.info("-- No samples")
@@ -2,7 +2,7 @@ import logging
 import logging.config
 import time
 from datetime import datetime
-from typing import Tuple, cast
+from typing import Dict, Set, Tuple, cast
 
 from lab_share_lib.config_readers import get_config
 
@@ -18,7 +18,12 @@ from crawler.filtered_positive_identifier import (
     FILTERED_POSITIVE_VERSION_2,
     filtered_positive_identifier_by_version,
 )
-from crawler.helpers.cherrypicked_samples import extract_required_cp_info, get_cherrypicked_samples_by_date
+from crawler.helpers.cherrypicked_samples import (
+    CherrypickedSampleKey,
+    extract_plate_barcodes_by_root_sample_id,
+    extract_required_cp_info,
+    get_cherrypicked_sample_keys_by_date,
+)
 from crawler.types import Config
 from migrations.helpers.shared_helper import valid_datetime_string
 from migrations.helpers.update_filtered_positives_helper import (
@@ -105,33 +110,36 @@ def run(settings_module: str = "", s_start_datetime: str = "", s_end_datetime: s
             logger.info(f"{legacy_samples_num} samples found from Mongo")
 
             root_sample_ids, plate_barcodes = extract_required_cp_info(samples)
+            plate_barcodes_by_root_sample_id = extract_plate_barcodes_by_root_sample_id(samples)
 
             logger.info("Querying for v0 cherrypicked samples from MLWH")
             # Get v0 cherrypicked samples
-            v0_cp_samples_df = get_cherrypicked_samples_by_date(
+            v0_cp_sample_keys = cherrypicked_sample_keys_by_date(
                 config,
-                list(root_sample_ids),
-                list(plate_barcodes),
+                root_sample_ids,
+                plate_barcodes,
+                plate_barcodes_by_root_sample_id,
                 "1970-01-01 00:00:01",
                 V0_V1_CUTOFF_TIMESTAMP,
             )
 
-            logger.debug(f"Found {len(v0_cp_samples_df.index)} v0 cherrypicked samples")  # type: ignore
+            logger.debug(f"Found {len(v0_cp_sample_keys)} v0 cherrypicked samples")
 
             logger.info("Querying for cherrypicked samples from MLWH")
             # Get v1 cherrypicked samples
-            v1_cp_samples_df = get_cherrypicked_samples_by_date(
+            v1_cp_sample_keys = cherrypicked_sample_keys_by_date(
                 config,
-                list(root_sample_ids),
-                list(plate_barcodes),
+                root_sample_ids,
+                plate_barcodes,
+                plate_barcodes_by_root_sample_id,
                 V0_V1_CUTOFF_TIMESTAMP,
                 V1_V2_CUTOFF_TIMESTAMP,
             )
 
-            logger.debug(f"Found {len(v1_cp_samples_df.index)} v1 cherrypicked samples")  # type: ignore
+            logger.debug(f"Found {len(v1_cp_sample_keys)} v1 cherrypicked samples")
 
             logger.info("Splitting samples by version...")
-            samples_by_version = split_mongo_samples_by_version(samples, v0_cp_samples_df, v1_cp_samples_df)
+            samples_by_version = split_mongo_samples_by_version(samples, v0_cp_sample_keys, v1_cp_sample_keys)
 
             update_timestamp = datetime.now()
 
@@ -253,5 +261,28 @@ run before - do you still wish to proceed? (yes/no):"
         return True
 
 
+def cherrypicked_sample_keys_by_date(
+    config: Config,
+    root_sample_ids: Set[str],
+    plate_barcodes: Set[str],
+    plate_barcodes_by_root_sample_id: Dict[str, Set[str]],
+    start_date: str,
+    end_date: str,
+) -> Set[CherrypickedSampleKey]:
+    cp_sample_keys = get_cherrypicked_sample_keys_by_date(
+        config,
+        list(root_sample_ids),
+        list(plate_barcodes),
+        start_date,
+        end_date,
+        plate_barcodes_by_root_sample_id=plate_barcodes_by_root_sample_id,
+    )
+
+    if cp_sample_keys is None:  # we need to check if it is None explicitly
+        raise ConnectionError("Unable to determine cherry-picked samples - potentially error connecting to MySQL")
+
+    return cp_sample_keys
+
+
 def get_input(text):
     return input(text)
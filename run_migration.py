@@ -10,6 +10,7 @@ from migrations import (
     back_populate_source_plate_and_sample_uuids,
     back_populate_uuids_date_range,
     back_populate_uuids_plate_barcodes,
+    rebuild_file_checksums,
     reconnect_mlwh_with_mongo,
     update_dart,
     update_filtered_positives,
@@ -50,6 +51,7 @@ logging.config.dictConfig(config.LOGGING)
 # python run_migration.py update_mlwh_with_legacy_samples 200115_1200 200216_0900
 # python run_migration.py update_mlwh_and_dart_with_legacy_samples 200115_1200 200216_0900
 # python run_migration.py update_filtered_positives
+# python run_migration.py rebuild_file_checksums
 ##
 
 print("Migration names:")
@@ -60,6 +62,7 @@ print("* update_legacy_filtered_positives")
 print("* back_populate_uuids_date_range")
 print("* back_populate_uuids_plate_barcodes")
 print("* back_populate_source_plate_and_sample_uuids")
+print("* rebuild_file_checksums")
 print("* reconnect_mlwh_with_mongo (ONLY RUN THIS MIGRATION IN TESTING ENVIRONMENTS)")
 
 
@@ -93,8 +96,14 @@ def migration_update_mlwh_and_dart_with_legacy_samples():
 
 def migration_update_filtered_positives():
     print("Running update_filtered_positives migration")
-    omit_dart = sys.argv[2] == "omit_dart" if 2 < len(sys.argv) else False
-    update_filtered_positives.run(omit_dart=omit_dart)
+    omit_dart = "omit_dart" in sys.argv[2:]
+    restart = "restart" in sys.argv[2:]
+    diff = "diff" in sys.argv[2:]
+    dry_run = "dry_run" in sys.argv[2:]
+    server_side = "server_side" in sys.argv[2:]
+    update_filtered_positives.run(
+        omit_dart=omit_dart, restart=restart, diff=diff, dry_run=dry_run, server_side=server_side
+    )
 
 
 def migration_reconnect_mlwh_with_mongo():
@@ -166,6 +175,11 @@ def migration_update_legacy_filtered_positives():
     update_legacy_filtered_positives.run(s_start_datetime=s_start_datetime, s_end_datetime=s_end_datetime)
 
 
+def migration_rebuild_file_checksums():
+    print("Running rebuild_file_checksums migration")
+    rebuild_file_checksums.run(config)
+
+
 def migration_by_name(migration_name):
     switcher = {
         "update_mlwh_with_legacy_samples": migration_update_mlwh_with_legacy_samples,
@@ -176,6 +190,7 @@ def migration_by_name(migration_name):
         "back_populate_uuids_plate_barcodes": migration_back_populate_uuids_plate_barcodes,
         "back_populate_source_plate_and_sample_uuids": migration_back_populate_source_plate_and_sample_uuids,
         "reconnect_mlwh_with_mongo": migration_reconnect_mlwh_with_mongo,
+        "rebuild_file_checksums": migration_rebuild_file_checksums,
     }
     # Get the function from switcher dictionary
     func = switcher.get(migration_name, lambda: print("Invalid migration name, aborting"))
@@ -0,0 +1,34 @@
+import argparse
+from datetime import datetime
+from typing import Tuple, cast
+
+from lab_share_lib.config_readers import get_config
+
+from crawler.db.mongo import get_mongo_db, get_shared_mongo_client
+from crawler.helpers.db_helpers import close_connection_pools_and_clients, init_connection_pools
+from crawler.priority_samples_worker import PrioritySamplesWorker
+from crawler.types import Config
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Watch the priority samples in MongoDB and update the MLWH and DART as they arrive"
+    )
+
+    parser.add_argument(
+        "--since",
+        dest="since",
+        type=datetime.fromisoformat,
+        help="first reprocess the priority samples created or updated since this ISO 8601 time, e.g. 2021-03-01T12:00",
+    )
+
+    args = parser.parse_args()
+
+    config, _ = cast(Tuple[Config, str], get_config(""))
+    init_connection_pools(config)
+
+    try:
+        PrioritySamplesWorker(config, get_mongo_db(config, get_shared_mongo_client(config))).run(since=args.since)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_connection_pools_and_clients()
@@ -6,6 +6,7 @@ from lab_share_lib.config_readers import get_config
 from crawler import main
 from crawler.config.centres import get_centres_config
 from crawler.constants import CENTRE_KEY_PREFIX
+from crawler.helpers.db_helpers import close_connection_pools_and_clients
 from crawler.types import Config
 
 
@@ -45,11 +46,26 @@ if __name__ == "__main__":
         choices=centre_prefix_choices(),
         help="process only this centre's plate map files",
     )
+    parser.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        help="number of centres to process concurrently, defaults to processing them one after another",
+    )
 
     parser.set_defaults(sftp=False)
     parser.set_defaults(keep_files=False)
     parser.set_defaults(add_to_dart=False)
+    parser.set_defaults(workers=1)
 
     args = parser.parse_args()
 
-    main.run(sftp=args.sftp, keep_files=args.keep_files, add_to_dart=args.add_to_dart, centre_prefix=args.centre_prefix)
+    main.run(
+        sftp=args.sftp,
+        keep_files=args.keep_files,
+        add_to_dart=args.add_to_dart,
+        centre_prefix=args.centre_prefix,
+        workers=args.workers,
+    )
+
+    close_connection_pools_and_clients()
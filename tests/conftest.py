@@ -31,7 +31,7 @@ from crawler.constants import (
 from crawler.db.mongo import create_mongo_client, get_mongo_collection, get_mongo_db
 from crawler.db.mysql import create_mysql_connection
 from crawler.file_processing import Centre, CentreFile
-from crawler.helpers.db_helpers import ensure_mongo_collections_indexed
+from crawler.helpers.db_helpers import close_connection_pools_and_clients, ensure_mongo_collections_indexed
 from crawler.helpers.general_helpers import get_sftp_connection
 from tests.testing_objects import (
     EVENT_WH_DATA,
@@ -58,6 +58,14 @@ class MockedError(Exception):
     pass
 
 
+@pytest.fixture(autouse=True)
+def connection_pools():
+    """Close the connection pools after each test, so connections pooled by one test (which may be mocks) are not
+    handed out in the next."""
+    yield
+    close_connection_pools_and_clients()
+
+
 @pytest.fixture
 def app():
     app = create_app("crawler.config.test")
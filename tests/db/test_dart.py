@@ -1,4 +1,6 @@
-from unittest.mock import patch
+import threading
+from typing import List
+from unittest.mock import MagicMock, patch
 
 import pyodbc
 import pytest
@@ -8,24 +10,34 @@ from crawler.constants import (
     DART_STATE_NO_PLATE,
     DART_STATE_NO_PROP,
     DART_STATE_PENDING,
+    FIELD_COORDINATE,
     FIELD_RESULT,
+    FIELD_ROOT_SAMPLE_ID,
     RESULT_VALUE_POSITIVE,
 )
 from crawler.db.dart import (
     add_dart_plate_if_doesnt_exist,
+    add_dart_plate_well_properties,
     create_dart_sql_server_conn,
     get_dart_plate_state,
+    get_dart_plate_states,
+    init_dart_connection_pool,
+    is_dart_sql_server_conn_healthy,
     set_dart_plate_state_pending,
     set_dart_well_properties,
+    set_dart_well_properties_in_bulk,
     add_dart_well_properties_if_positive,
 )
 from crawler.exceptions import DartStateError
 from crawler.sql_queries import (
     SQL_DART_ADD_PLATE,
     SQL_DART_GET_PLATE_PROPERTY,
+    SQL_DART_GET_PLATE_STATES,
+    SQL_DART_HEALTH_CHECK,
     SQL_DART_SET_PLATE_PROPERTY,
     SQL_DART_SET_WELL_PROPERTY,
 )
+from crawler.types import SampleDoc
 
 from tests.conftest import generate_new_object_for_string
 
@@ -60,6 +72,77 @@ def test_create_dart_sql_server_conn_expection(config):
         assert create_dart_sql_server_conn(config) is None
 
 
+def test_create_dart_sql_server_conn_uses_the_pool_once_initialised(config):
+    with patch("pyodbc.connect") as mock_connect:
+        init_dart_connection_pool(config)
+
+        for _ in range(2):
+            sql_server_conn = create_dart_sql_server_conn(config)
+            assert sql_server_conn is not None
+            sql_server_conn.close()
+
+    mock_connect.assert_called_once()
+    mock_connect.return_value.rollback.assert_called()
+    mock_connect.return_value.close.assert_not_called()
+
+
+def test_create_dart_sql_server_conn_pool_returns_none_when_it_cannot_connect(config):
+    with patch("pyodbc.connect", side_effect=pyodbc.Error()):
+        init_dart_connection_pool(config)
+
+        assert create_dart_sql_server_conn(config) is None
+
+
+def test_create_dart_sql_server_conn_does_not_starve_the_consumer_while_a_centre_holds_a_connection(config):
+    with patch.multiple(
+        config,
+        WORKERS=1,
+        RABBITMQ_CONCURRENT_CONSUMER=True,
+        RABBITMQ_CONSUMER_WORKERS=4,
+        DART_EXPORT_OUTBOX=False,
+        PRIORITY_SAMPLES_WORKER=False,
+        DB_POOL_MAX_SIZE=4,
+        DB_POOL_TIMEOUT=0.5,
+    ):
+        with patch("pyodbc.connect", side_effect=lambda *args, **kwargs: MagicMock()):
+            init_dart_connection_pool(config)
+
+            # a centre holds a connection for a long insert...
+            centre_conn = create_dart_sql_server_conn(config)
+            assert centre_conn is not None
+
+            # ...while every worker of the consumer exports the plate of a message at once
+            all_connected = threading.Barrier(config.RABBITMQ_CONSUMER_WORKERS, timeout=5)
+            message_conns = []
+
+            def export_message():
+                sql_server_conn = create_dart_sql_server_conn(config)
+                message_conns.append(sql_server_conn)
+                all_connected.wait()
+                if sql_server_conn is not None:
+                    sql_server_conn.close()
+
+            threads = [threading.Thread(target=export_message) for _ in range(config.RABBITMQ_CONSUMER_WORKERS)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=5)
+
+            centre_conn.close()
+
+    assert len(message_conns) == config.RABBITMQ_CONSUMER_WORKERS
+    assert None not in message_conns
+
+
+def test_is_dart_sql_server_conn_healthy(config):
+    with patch("pyodbc.connect") as mock_conn:
+        assert is_dart_sql_server_conn_healthy(mock_conn) is True
+        mock_conn.cursor().execute.assert_called_with(SQL_DART_HEALTH_CHECK)
+
+        mock_conn.cursor().execute.side_effect = pyodbc.Error()
+        assert is_dart_sql_server_conn_healthy(mock_conn) is False
+
+
 def test_get_dart_plate_state(config):
     with patch("pyodbc.connect") as mock_conn:
         test_plate_barcode = "AB123"
@@ -83,11 +166,90 @@ def test_set_dart_well_properties(config):
         test_well_props = {"prop1": "value1", "test prop": "test value"}
         test_well_index = 12
         set_dart_well_properties(mock_conn.cursor(), test_plate_barcode, test_well_props, test_well_index)
-        for prop_name, prop_value in test_well_props.items():
-            mock_conn.cursor().execute.assert_any_call(
-                SQL_DART_SET_WELL_PROPERTY,
-                (test_plate_barcode, prop_name, prop_value, test_well_index),
-            )
+
+        # sets all the properties in one round trip
+        assert mock_conn.cursor().fast_executemany is True
+        mock_conn.cursor().executemany.assert_called_once_with(
+            SQL_DART_SET_WELL_PROPERTY,
+            [
+                (test_plate_barcode, prop_name, prop_value, test_well_index)
+                for prop_name, prop_value in test_well_props.items()
+            ],
+        )
+
+
+def test_set_dart_well_properties_in_bulk_does_nothing_without_properties(config):
+    with patch("pyodbc.connect") as mock_conn:
+        set_dart_well_properties_in_bulk(mock_conn.cursor(), [])
+
+        mock_conn.cursor().executemany.assert_not_called()
+
+
+def test_get_dart_plate_states(config):
+    with patch("pyodbc.connect") as mock_conn:
+        cursor = mock_conn.cursor()
+        cursor.execute.return_value.fetchall.return_value = [("AB123", DART_STATE_PENDING), ("AB456", "pickable")]
+
+        plate_states = get_dart_plate_states(cursor, ["AB123", "AB456", "AB123", "AB789"])
+
+        assert plate_states == {"AB123": DART_STATE_PENDING, "AB456": "pickable"}
+        cursor.execute.assert_called_once_with(
+            SQL_DART_GET_PLATE_STATES.format(placeholders="?,?,?"), "AB123", "AB456", "AB789"
+        )
+
+
+def test_get_dart_plate_states_queries_in_chunks(config):
+    with patch("pyodbc.connect") as mock_conn:
+        cursor = mock_conn.cursor()
+        cursor.execute.return_value.fetchall.return_value = []
+
+        with patch("crawler.db.dart.DART_PLATE_STATES_CHUNK_SIZE", 2):
+            assert get_dart_plate_states(cursor, ["AB1", "AB2", "AB3"]) == {}
+
+        assert [call.args[1:] for call in cursor.execute.call_args_list] == [("AB1", "AB2"), ("AB3",)]
+
+
+def test_get_dart_plate_states_without_plates(config):
+    with patch("pyodbc.connect") as mock_conn:
+        assert get_dart_plate_states(mock_conn.cursor(), []) == {}
+
+        mock_conn.cursor().execute.assert_not_called()
+
+
+@pytest.mark.parametrize("positive_only, expected_samples", [[True, 1], [False, 2]])
+def test_add_dart_plate_well_properties(config, positive_only, expected_samples):
+    samples: List[SampleDoc] = [
+        {FIELD_ROOT_SAMPLE_ID: "RSID-1", FIELD_COORDINATE: "A01", FIELD_RESULT: RESULT_VALUE_POSITIVE},
+        {FIELD_ROOT_SAMPLE_ID: "RSID-2", FIELD_COORDINATE: "B01", FIELD_RESULT: "Negative"},
+    ]
+    well_props = {"prop1": "value1", "prop2": "value2"}
+
+    with patch("pyodbc.connect") as mock_conn:
+        with patch("crawler.db.dart.map_mongo_doc_to_dart_well_props", return_value=well_props):
+            add_dart_plate_well_properties(mock_conn.cursor(), samples, "AB123", positive_only=positive_only)
+
+        # sets the properties of all the wells in one round trip
+        mock_conn.cursor().executemany.assert_called_once_with(
+            SQL_DART_SET_WELL_PROPERTY,
+            [
+                ("AB123", "prop1", "value1", 1),
+                ("AB123", "prop2", "value2", 1),
+                ("AB123", "prop1", "value1", 13),
+                ("AB123", "prop2", "value2", 13),
+            ][: expected_samples * 2],
+        )
+
+
+def test_add_dart_plate_well_properties_none_well_index(config):
+    samples: List[SampleDoc] = [
+        {FIELD_ROOT_SAMPLE_ID: "RSID-1", FIELD_COORDINATE: "Z99", FIELD_RESULT: RESULT_VALUE_POSITIVE}
+    ]
+
+    with patch("pyodbc.connect") as mock_conn:
+        with pytest.raises(ValueError):
+            add_dart_plate_well_properties(mock_conn.cursor(), samples, "AB123")
+
+        mock_conn.cursor().executemany.assert_not_called()
 
 
 def test_add_dart_plate_if_doesnt_exist_throws_without_state_property(config):
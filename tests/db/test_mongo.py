@@ -1,15 +1,39 @@
+from unittest.mock import patch
+
 import pytest
 from pymongo import MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
 
-from crawler.db.mongo import collection_exists, create_index, create_mongo_client, get_mongo_collection, get_mongo_db
+from crawler.db.mongo import (
+    close_shared_mongo_clients,
+    collection_exists,
+    create_index,
+    create_mongo_client,
+    get_mongo_collection,
+    get_mongo_db,
+    get_shared_mongo_client,
+)
 
 
 def test_create_mongo_client(config):
     assert type(create_mongo_client(config)) == MongoClient
 
 
+def test_get_shared_mongo_client_creates_the_client_once(config):
+    with patch("crawler.db.mongo.MongoClient") as mock_client:
+        client = get_shared_mongo_client(config)
+
+        assert get_shared_mongo_client(config) is client
+
+        close_shared_mongo_clients()
+        get_shared_mongo_client(config)
+
+    assert mock_client.call_count == 2
+    mock_client.assert_called_with(config.MONGO_URI, maxPoolSize=config.MONGO_MAX_POOL_SIZE)
+    mock_client.return_value.close.assert_called_once()
+
+
 def test_get_mongo_db(mongo_client):
     config, mongo_client = mongo_client
 
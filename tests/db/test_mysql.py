@@ -1,5 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
+from typing import Any, Dict, List
 from unittest.mock import MagicMock, patch
 
 import mysql.connector as mysql
@@ -7,18 +8,34 @@ import pytest
 from mysql.connector.connection_cext import MySQLConnectionAbstract
 from sqlalchemy.engine.base import Engine
 
-from crawler.constants import MLWH_IS_CURRENT
+from crawler.constants import MLWH_IS_CURRENT, MLWH_RNA_ID
 from crawler.db.mysql import (
+    MAX_ALLOWED_PACKET_USAGE,
     create_mysql_connection,
     create_mysql_connection_engine,
+    estimated_row_size,
+    init_mlwh_connection_pools,
     insert_or_update_samples_in_mlwh,
     partition,
+    partition_by_size,
     reset_is_current_flags,
     run_mysql_execute_formatted_query,
     run_mysql_executemany_query,
+    run_mysql_multi_row_upsert,
 )
 from crawler.helpers.logging_helpers import LoggingCollection
-from crawler.sql_queries import SQL_MLWH_MULTIPLE_FILTERED_POSITIVE_UPDATE_BATCH, SQL_MLWH_MULTIPLE_INSERT
+from crawler.sql_queries import (
+    MLWH_MULTI_ROW_INSERT_COLUMNS,
+    SQL_MLWH_CREATE_STAGING_TABLE,
+    SQL_MLWH_DROP_STAGING_TABLE,
+    SQL_MLWH_GET_MAX_ALLOWED_PACKET,
+    SQL_MLWH_MARK_STAGED_SAMPLES_NOT_MOST_RECENT,
+    SQL_MLWH_MERGE_STAGING_TABLE,
+    SQL_MLWH_MULTI_ROW_INSERT,
+    SQL_MLWH_MULTI_ROW_INSERT_STAGING,
+    SQL_MLWH_MULTIPLE_FILTERED_POSITIVE_UPDATE_BATCH,
+    SQL_MLWH_MULTIPLE_INSERT,
+)
 from tests.conftest import MockedError
 from tests.testing_objects import MLWH_SAMPLE_COMPLETE
 
@@ -104,6 +121,92 @@ def test_run_mysql_executemany_query_execute_error(config):
         assert conn.close.called is True
 
 
+def mock_multi_row_upsert_connection(max_allowed_packet):
+    conn = MockMySQLConnection()
+    conn.commit.reset_mock()
+    conn.rollback.reset_mock()
+
+    cursor = conn.cursor.return_value
+    cursor.reset_mock()
+    cursor.execute = MagicMock()
+    cursor.fetchone = MagicMock(return_value=(max_allowed_packet,))
+    cursor.rowcount = 1
+
+    return conn, cursor
+
+
+def executed_queries(cursor):
+    return [call.args[0] for call in cursor.execute.call_args_list]
+
+
+def test_run_mysql_multi_row_upsert_writes_batches_sized_to_the_max_allowed_packet(config):
+    samples: List[Dict[str, Any]] = [{**MLWH_SAMPLE_COMPLETE, MLWH_RNA_ID: f"rna_{i}"} for i in range(5)]
+    row_size = estimated_row_size(tuple(samples[0][column] for column in MLWH_MULTI_ROW_INSERT_COLUMNS))
+    # room for two rows in each statement
+    conn, cursor = mock_multi_row_upsert_connection(int((row_size * 2 + 1) / MAX_ALLOWED_PACKET_USAGE))
+
+    run_mysql_multi_row_upsert(mysql_conn=conn, values=samples)
+
+    queries = executed_queries(cursor)
+    assert queries[0] == SQL_MLWH_GET_MAX_ALLOWED_PACKET
+
+    inserts = [call for call in cursor.execute.call_args_list if call.args[0].startswith("INSERT")]
+    assert [len(call.args[1]) for call in inserts] == [2 * len(MLWH_MULTI_ROW_INSERT_COLUMNS)] * 2 + [
+        len(MLWH_MULTI_ROW_INSERT_COLUMNS)
+    ]
+    assert inserts[0].args[0] == SQL_MLWH_MULTI_ROW_INSERT % ",".join(
+        ["(" + ",".join(["%s"] * len(MLWH_MULTI_ROW_INSERT_COLUMNS)) + ")"] * 2
+    )
+
+    # the is_current flags are reset for the RNA IDs of each batch before it is written, then the batch is committed
+    resets = [call.args[1][1:] for call in cursor.execute.call_args_list if call.args[0].startswith("UPDATE")]
+    assert resets == [["rna_0", "rna_1"], ["rna_2", "rna_3"], ["rna_4"]]
+    assert [query.split()[0] for query in queries[1:]] == ["UPDATE", "INSERT"] * 3
+    assert conn.commit.call_count == 3
+    assert cursor.close.called is True
+
+
+def test_run_mysql_multi_row_upsert_through_staging_table(config):
+    samples: List[Dict[str, Any]] = [{**MLWH_SAMPLE_COMPLETE, MLWH_RNA_ID: f"rna_{i}"} for i in range(3)]
+    conn, cursor = mock_multi_row_upsert_connection(16 * 1024 * 1024)
+
+    run_mysql_multi_row_upsert(mysql_conn=conn, values=samples, use_staging_table=True)
+
+    assert executed_queries(cursor) == [
+        SQL_MLWH_GET_MAX_ALLOWED_PACKET,
+        SQL_MLWH_DROP_STAGING_TABLE,
+        SQL_MLWH_CREATE_STAGING_TABLE,
+        SQL_MLWH_MULTI_ROW_INSERT_STAGING
+        % ",".join(["(" + ",".join(["%s"] * len(MLWH_MULTI_ROW_INSERT_COLUMNS)) + ")"] * 3),
+        SQL_MLWH_MARK_STAGED_SAMPLES_NOT_MOST_RECENT,
+        SQL_MLWH_MERGE_STAGING_TABLE,
+        SQL_MLWH_DROP_STAGING_TABLE,
+    ]
+    assert conn.commit.call_count == 1
+
+
+def test_run_mysql_multi_row_upsert_execute_error(config):
+    conn, cursor = mock_multi_row_upsert_connection(16 * 1024 * 1024)
+    cursor.execute.side_effect = [None, MockedError("Boom!")]
+    samples: List[Dict[str, Any]] = [MLWH_SAMPLE_COMPLETE]
+
+    with pytest.raises(MockedError):
+        run_mysql_multi_row_upsert(mysql_conn=conn, values=samples)
+
+    assert conn.commit.called is False
+    assert conn.rollback.called is True
+    assert cursor.close.called is True
+
+
+def test_partition_by_size():
+    rows = [("a",), ("bb",), ("ccc",), ("dddddddddd",), ("e",)]
+
+    # each row takes up its length plus 7 bytes
+    assert list(partition_by_size(rows, 18)) == [[("a",), ("bb",)], [("ccc",)], [("dddddddddd",)], [("e",)]]
+    assert list(partition_by_size(rows, 1000)) == [rows]
+    assert list(partition_by_size([], 18)) == []
+
+
 def test_run_mysql_execute_formatted_query_success(config):
     conn = MockMySQLConnection()
 
@@ -292,7 +395,8 @@ def test_insert_samples_in_mlwh_inserts_one_complete_sample_correctly(config, ml
     )
 
 
-def test_update_samples_in_mlwh_sets_is_current_correctly(config, mlwh_rw_db, logging_messages):
+@pytest.mark.parametrize("use_staging_table", [False, True])
+def test_update_samples_in_mlwh_sets_is_current_correctly(config, mlwh_rw_db, logging_messages, use_staging_table):
     _, cursor = mlwh_rw_db
 
     # Run two insert_or_updates back to back for the same document
@@ -303,10 +407,39 @@ def test_update_samples_in_mlwh_sets_is_current_correctly(config, mlwh_rw_db, lo
     with patch("crawler.db.mysql.map_mongo_sample_to_mysql"):
         with patch("crawler.db.mysql.set_is_current_on_mysql_samples") as make_mysql_samples:
             make_mysql_samples.return_value = [MLWH_SAMPLE_COMPLETE]
-            insert_or_update_samples_in_mlwh([{"pseudo": "sample"}], config, LoggingCollection(), logging_messages)
-            insert_or_update_samples_in_mlwh([{"pseudo": "sample"}], config, LoggingCollection(), logging_messages)
+            with patch.object(config, "MLWH_USE_STAGING_TABLE", use_staging_table):
+                insert_or_update_samples_in_mlwh([{"pseudo": "sample"}], config, LoggingCollection(), logging_messages)
+                insert_or_update_samples_in_mlwh([{"pseudo": "sample"}], config, LoggingCollection(), logging_messages)
 
     cursor.execute(f"SELECT {MLWH_IS_CURRENT} FROM lighthouse_sample;")
     rows = [row for row in cursor.fetchall()]
     assert len(rows) == 1
     assert rows[0][0] == 1
+
+
+def test_create_mysql_connection_uses_the_pools_once_initialised(config):
+    with patch("mysql.connector.connect") as mock_connect:
+        init_mlwh_connection_pools(config)
+
+        readonly_conn = create_mysql_connection(config)
+        readonly_conn.close()
+        create_mysql_connection(config, readonly=True).close()
+        create_mysql_connection(config, readonly=False).close()
+
+    # one connection for each of the readonly and read/write pools, the readonly one being reused
+    assert mock_connect.call_count == 2
+    assert mock_connect.call_args_list[0].kwargs["username"] == config.MLWH_DB_RO_USER
+    assert mock_connect.call_args_list[1].kwargs["username"] == config.MLWH_DB_RW_USER
+    mock_connect.return_value.close.assert_not_called()
+
+
+def test_create_mysql_connection_replaces_a_pooled_connection_which_has_gone_away(config):
+    with patch("mysql.connector.connect") as mock_connect:
+        init_mlwh_connection_pools(config)
+        create_mysql_connection(config).close()
+
+        mock_connect.return_value.is_connected.return_value = False
+        create_mysql_connection(config)
+
+    assert mock_connect.call_count == 2
+    mock_connect.return_value.close.assert_called_once()
@@ -0,0 +1,211 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from crawler.db.pools import (
+    ConnectionPool,
+    PooledConnection,
+    close_connection_pools,
+    connection_pool_size,
+    get_connection_pool,
+    register_connection_pool,
+)
+
+
+@pytest.fixture
+def connect():
+    return MagicMock(side_effect=lambda: MagicMock())
+
+
+@pytest.fixture
+def is_healthy():
+    return MagicMock(return_value=True)
+
+
+@pytest.fixture
+def pool(connect, is_healthy):
+    return ConnectionPool("test", connect, is_healthy, max_size=2, timeout=0.1)
+
+
+def test_acquire_creates_a_connection_when_none_are_idle(pool, connect):
+    connection = MagicMock()
+    connect.side_effect = None
+    connect.return_value = connection
+
+    pooled = pool.acquire()
+
+    assert isinstance(pooled, PooledConnection)
+    connect.assert_called_once()
+
+    # the pooled connection behaves as the underlying connection
+    assert pooled.cursor() is connection.cursor.return_value
+
+
+def test_acquire_reuses_a_released_connection(pool, connect):
+    pooled = pool.acquire()
+    connection = pooled._connection
+    pooled.close()
+
+    assert pool.acquire()._connection is connection
+    connect.assert_called_once()
+    connection.rollback.assert_called_once()
+    connection.close.assert_not_called()
+
+
+def test_closing_a_pooled_connection_twice_only_releases_it_once(pool):
+    pooled = pool.acquire()
+    connection = pooled._connection
+
+    pooled.close()
+    pooled.close()
+
+    connection.rollback.assert_called_once()
+
+    with pytest.raises(AttributeError):
+        pooled.cursor()
+
+
+def test_acquire_replaces_an_unhealthy_connection(pool, connect, is_healthy):
+    pooled = pool.acquire()
+    unhealthy_connection = pooled._connection
+    pooled.close()
+
+    is_healthy.return_value = False
+    replacement = pool.acquire()
+
+    assert replacement._connection is not unhealthy_connection
+    unhealthy_connection.close.assert_called_once()
+    assert connect.call_count == 2
+
+
+def test_acquire_replaces_a_connection_when_the_health_check_fails(pool, connect, is_healthy):
+    pool.acquire().close()
+
+    is_healthy.side_effect = Exception("Gone away")
+
+    assert pool.acquire() is not None
+    assert connect.call_count == 2
+
+
+def test_acquire_returns_none_when_a_connection_cannot_be_made(pool, connect):
+    connect.side_effect = None
+    connect.return_value = None
+
+    assert pool.acquire() is None
+    assert pool.acquire() is None
+    # the failed attempts do not use up the pool
+    assert pool._slots.acquire(blocking=False)
+    assert pool._slots.acquire(blocking=False)
+
+
+def test_acquire_does_not_use_up_the_pool_when_connecting_raises(pool, connect):
+    connect.side_effect = Exception("Boom!")
+
+    for _ in range(3):
+        with pytest.raises(Exception):
+            pool.acquire()
+
+    connect.side_effect = lambda: MagicMock()
+    assert pool.acquire() is not None
+
+
+def test_acquire_times_out_when_the_pool_is_in_use(pool):
+    first = pool.acquire()
+    pool.acquire()
+
+    assert pool.acquire() is None
+
+    first.close()
+    assert pool.acquire() is not None
+
+
+def test_acquire_waits_for_a_connection_to_be_released(connect, is_healthy):
+    pool = ConnectionPool("test", connect, is_healthy, max_size=1, timeout=5)
+    pooled = pool.acquire()
+    assert pooled is not None
+
+    threading.Timer(0.1, pooled.close).start()
+
+    assert pool.acquire() is not None
+    connect.assert_called_once()
+
+
+def test_release_discards_a_connection_which_cannot_be_rolled_back(pool, connect):
+    pooled = pool.acquire()
+    connection = pooled._connection
+    connection.rollback.side_effect = Exception("Boom!")
+    pooled.close()
+
+    assert pool.acquire()._connection is not connection
+    connection.close.assert_called_once()
+
+
+def test_close_closes_idle_connections_and_connections_released_afterwards(pool):
+    idle = pool.acquire()
+    in_use = pool.acquire()
+    idle_connection, in_use_connection = idle._connection, in_use._connection
+    idle.close()
+
+    pool.close()
+    idle_connection.close.assert_called_once()
+    in_use_connection.close.assert_not_called()
+
+    in_use.close()
+    in_use_connection.close.assert_called_once()
+
+
+def test_register_connection_pool_only_creates_the_pool_once(pool):
+    create_pool = MagicMock(return_value=pool)
+
+    assert register_connection_pool("test", create_pool) is pool
+    assert register_connection_pool("test", create_pool) is pool
+    create_pool.assert_called_once()
+
+    assert get_connection_pool("test") is pool
+
+
+def test_close_connection_pools(pool):
+    register_connection_pool("test", lambda: pool)
+    pooled = pool.acquire()
+    idle_connection = pooled._connection
+    pooled.close()
+
+    close_connection_pools()
+
+    assert get_connection_pool("test") is None
+    idle_connection.close.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "concurrent_consumer, dart_export_outbox, priority_samples_worker, expected_size",
+    [
+        [False, False, False, 4],
+        [True, False, False, 6],
+        [True, True, False, 7],
+        [True, True, True, 8],
+    ],
+)
+def test_connection_pool_size_covers_the_threads_drawing_on_the_pools(
+    config, concurrent_consumer, dart_export_outbox, priority_samples_worker, expected_size
+):
+    with patch.multiple(
+        config,
+        WORKERS=2,
+        RABBITMQ_CONCURRENT_CONSUMER=concurrent_consumer,
+        RABBITMQ_CONSUMER_WORKERS=4,
+        DART_EXPORT_OUTBOX=dart_export_outbox,
+        PRIORITY_SAMPLES_WORKER=priority_samples_worker,
+        DB_POOL_MAX_SIZE=4,
+    ):
+        assert connection_pool_size(config) == expected_size
+
+
+def test_connection_pool_size_can_be_raised(config):
+    with patch.multiple(config, WORKERS=1, RABBITMQ_CONCURRENT_CONSUMER=False, DB_POOL_MAX_SIZE=10):
+        assert connection_pool_size(config) == 10
+
+
+def test_connection_pool_size_covers_the_workers_of_the_run(config):
+    with patch.multiple(config, WORKERS=1, RABBITMQ_CONCURRENT_CONSUMER=False, DB_POOL_MAX_SIZE=4):
+        assert connection_pool_size(config, workers=8) == 9
@@ -3,6 +3,7 @@ import uuid
 from csv import DictReader
 from datetime import datetime, timezone
 from decimal import Decimal
+from hashlib import file_digest
 from io import StringIO
 from typing import List, cast, Dict
 from unittest.mock import MagicMock, patch
@@ -20,6 +21,7 @@ from crawler.constants import (
     CENTRE_KEY_BIOMEK_LABWARE_CLASS,
     CENTRE_KEY_PREFIX,
     CENTRE_KEY_SFTP_ROOT_READ,
+    COLLECTION_FILE_CHECKSUMS,
     COLLECTION_IMPORTS,
     COLLECTION_SAMPLES,
     COLLECTION_SOURCE_PLATES,
@@ -51,6 +53,7 @@ from crawler.constants import (
     FIELD_LINE_NUMBER,
     FIELD_MONGO_COG_UK_ID,
     FIELD_MONGO_LAB_ID,
+    FIELD_MONGODB_ID,
     FIELD_MUST_SEQUENCE,
     FIELD_PLATE_BARCODE,
     FIELD_PREFERENTIALLY_SEQUENCE,
@@ -96,6 +99,8 @@ from crawler.constants import (
 )
 from crawler.db.mongo import get_mongo_collection
 from crawler.file_processing import ERRORS_DIR, SUCCESSES_DIR, Centre, CentreFile
+from crawler.helpers.cog_uk_id_pool import add_cog_uk_ids_to_pool, count_available_cog_uk_ids
+from crawler.helpers.db_helpers import create_mongo_file_checksum_record
 from crawler.helpers.general_helpers import get_sftp_connection
 from crawler.types import Config, ModifiedRow, SampleDoc
 from tests.conftest import MockedError, generate_new_object_for_string
@@ -111,6 +116,10 @@ def centre_file_with_mocked_filtered_positive_identifier(config, file_name):
     return centre_file
 
 
+def count_docs(docs, *args):
+    return len(docs)
+
+
 # ----- tests for class Centre -----
 
 
@@ -162,7 +171,7 @@ def test_process_files_dont_add_to_dart_flag_not_set(
 def test_process_files_dont_add_to_dart_mlwh_failed(
     mongo_database, config, testing_files_for_process, testing_centres, pyodbc_conn
 ):
-    with patch("crawler.db.mysql.run_mysql_executemany_query", side_effect=MockedError("Boom!")):
+    with patch("crawler.db.mysql.run_mysql_multi_row_upsert", side_effect=MockedError("Boom!")):
         _, mongo_database = mongo_database
 
         centre_config = config.CENTRES[0]
@@ -370,56 +379,125 @@ def test_can_identify_consolidated_file(config, filename, expected_value):
 
 
 # tests for checksums
-def create_checksum_files_for(filepath, filename, checksums, timestamp):
-    list_files = []
+def create_checksum_records_for(db, centre_config, backup_dir, filename, checksums, timestamp):
+    file_checksums_collection = get_mongo_collection(db, COLLECTION_FILE_CHECKSUMS)
     for checksum in checksums:
-        full_filename = f"{filepath}/{timestamp}_{filename}_{checksum}"
-        file = open(full_filename, "w")
-        file.write("Your text goes here")
-        file.close()
-        list_files.append(full_filename)
-    return list_files
+        create_mongo_file_checksum_record(
+            file_checksums_collection,
+            centre_config,
+            checksum,
+            backup_dir,
+            filename,
+            f"{timestamp}_{filename}_{checksum}",
+        )
 
 
-def test_checksum_not_match(config, tmpdir):
-    with patch.dict(config.CENTRES[0], {CENTRE_KEY_BACKUPS_FOLDER: tmpdir.realpath()}):
-        tmpdir.mkdir(SUCCESSES_DIR)
+def test_checksum_not_match(config, mongo_database):
+    _, db = mongo_database
+    create_checksum_records_for(
+        db,
+        config.CENTRES[0],
+        SUCCESSES_DIR,
+        "AP_sanger_report_200503_2338.csv",
+        ["adfsadf", "asdf"],
+        "200601_1414",
+    )
 
-        list_files = create_checksum_files_for(
-            f"{config.CENTRES[0][CENTRE_KEY_BACKUPS_FOLDER]}/successes/",
-            "AP_sanger_report_200503_2338.csv",
-            ["adfsadf", "asdf"],
-            "200601_1414",
-        )
+    centre = Centre(config, config.CENTRES[0])
+    centre_file = CentreFile("AP_sanger_report_200503_2338.csv", centre)
 
-        try:
-            centre = Centre(config, config.CENTRES[0])
-            centre_file = CentreFile("AP_sanger_report_200503_2338.csv", centre)
+    assert centre_file.checksum_match(SUCCESSES_DIR) is False
 
-            assert centre_file.checksum_match(SUCCESSES_DIR) is False
-        finally:
-            for tmpfile_for_list in list_files:
-                os.remove(tmpfile_for_list)
 
+def test_checksum_match(config, mongo_database):
+    _, db = mongo_database
+    create_checksum_records_for(
+        db,
+        config.CENTRES[0],
+        SUCCESSES_DIR,
+        "AP_sanger_report_200503_2338.csv",
+        ["adfsadf", "d204bd7747d9ad505eee901830448578"],
+        "200601_1414",
+    )
 
-def test_checksum_match(config, tmpdir):
-    with patch.dict(config.CENTRES[0], {CENTRE_KEY_BACKUPS_FOLDER: tmpdir.realpath()}):
-        tmpdir.mkdir(SUCCESSES_DIR)
+    centre = Centre(config, config.CENTRES[0])
+    centre_file = CentreFile("AP_sanger_report_200503_2338.csv", centre)
 
-        list_files = create_checksum_files_for(
-            f"{config.CENTRES[0][CENTRE_KEY_BACKUPS_FOLDER]}/successes/",
-            "AP_sanger_report_200503_2338.csv",
-            ["adfsadf", "d204bd7747d9ad505eee901830448578"],
-            "200601_1414",
-        )
+    assert centre_file.checksum_match(SUCCESSES_DIR) is True
+    assert centre_file.checksum_match(ERRORS_DIR) is False
 
-        try:
-            centre = Centre(config, config.CENTRES[0])
-            centre_file = CentreFile("AP_sanger_report_200503_2338.csv", centre)
-            assert centre_file.checksum_match(SUCCESSES_DIR) is True
-        finally:
-            for tmpfile_for_list in list_files:
-                os.remove(tmpfile_for_list)
+
+def test_checksum_match_ignores_other_centres(config, mongo_database):
+    _, db = mongo_database
+    create_checksum_records_for(
+        db,
+        config.CENTRES[1],
+        SUCCESSES_DIR,
+        "AP_sanger_report_200503_2338.csv",
+        ["d204bd7747d9ad505eee901830448578"],
+        "200601_1414",
+    )
+
+    centre = Centre(config, config.CENTRES[0])
+    centre_file = CentreFile("AP_sanger_report_200503_2338.csv", centre)
+
+    assert centre_file.checksum_match(SUCCESSES_DIR) is False
+
+
+def test_checksum_match_seeds_the_index_from_the_backup_folders_when_the_centre_has_no_files_indexed(
+    config, mongo_database, tmpdir
+):
+    _, db = mongo_database
+    centre_config = config.CENTRES[0].copy()
+    centre_config[CENTRE_KEY_BACKUPS_FOLDER] = tmpdir.realpath()
+    centre = Centre(config, centre_config)
+    tmpdir.join(SUCCESSES_DIR, "200601_1414_AP_sanger_report_200503_2338.csv_d204bd7747d9ad505eee901830448578").write(
+        ""
+    )
+    tmpdir.join(ERRORS_DIR, "200601_1414_AP_sanger_report_200518_2132.csv_abc123").write("")
+
+    centre_file = CentreFile("AP_sanger_report_200503_2338.csv", centre)
+
+    assert centre_file.checksum_match(SUCCESSES_DIR) is True
+    assert centre_file.checksum_match(ERRORS_DIR) is False
+    assert get_mongo_collection(db, COLLECTION_FILE_CHECKSUMS).count_documents({}) == 2
+
+    # the backup folders are only indexed once for the centre
+    with patch("crawler.file_processing.index_backed_up_file_checksums") as index_backed_up_file_checksums:
+        get_mongo_collection(db, COLLECTION_FILE_CHECKSUMS).delete_many({})
+        assert CentreFile("AP_sanger_report_200503_2338.csv", centre).checksum_match(SUCCESSES_DIR) is False
+
+    index_backed_up_file_checksums.assert_not_called()
+
+
+def test_checksum_match_does_not_seed_the_index_when_the_centre_has_files_indexed(config, mongo_database, tmpdir):
+    _, db = mongo_database
+    centre_config = config.CENTRES[0].copy()
+    centre_config[CENTRE_KEY_BACKUPS_FOLDER] = tmpdir.realpath()
+    centre = Centre(config, centre_config)
+    create_checksum_records_for(
+        db, centre_config, ERRORS_DIR, "AP_sanger_report_200518_2132.csv", ["abc123"], "200601_1414"
+    )
+    tmpdir.join(SUCCESSES_DIR, "200601_1414_AP_sanger_report_200503_2338.csv_d204bd7747d9ad505eee901830448578").write(
+        ""
+    )
+
+    centre_file = CentreFile("AP_sanger_report_200503_2338.csv", centre)
+
+    assert centre_file.checksum_match(SUCCESSES_DIR) is False
+
+
+def test_checksum_reads_the_file_once(config, mongo_database):
+    centre = Centre(config, config.CENTRES[0])
+    centre_file = CentreFile("AP_sanger_report_200503_2338.csv", centre)
+
+    with patch("crawler.file_processing.file_digest", wraps=file_digest) as digest:
+        assert centre_file.checksum() == "d204bd7747d9ad505eee901830448578"
+        assert centre_file.checksum_match(SUCCESSES_DIR) is False
+        assert centre_file.checksum_match(ERRORS_DIR) is False
+        assert centre_file.timestamped_filename().endswith("_d204bd7747d9ad505eee901830448578")
+
+    digest.assert_called_once()
 
 
 # tests for validating row structure
@@ -624,64 +702,108 @@ def test_filtered_row_with_extra_unrecognised_columns(config):
         assert centre_file.logging_collection.get_count_of_all_errors_and_criticals() == 0
 
 
-def test_extract_channel_fields(centre_file: CentreFile) -> None:
-    with StringIO() as csv_weird_channels:
-        csv_weird_channels.write(
-            f"{FIELD_ROOT_SAMPLE_ID},{FIELD_RNA_ID},{FIELD_RESULT},{FIELD_DATE_TESTED},{FIELD_LAB_ID},"
-            "CH 1 - Target,CH 1 - Result,CH 1 - Cq,CH2_Target,CH2_Result,CH2_Cq,CH3-Target,CH3-Result,CH3-Cq,\n"
-        )
-        csv_weird_channels.write(
-            "1,RNA_0043,Positive,today,AP,ORF1ab,Positive,21.433,ORF2ab,Negative,22.433,ORF3ab,Positive,23.433,\n"
-        )
-        csv_weird_channels.seek(0)
+def test_build_header_plan(centre_file: CentreFile) -> None:
+    headers = (
+        FIELD_ROOT_SAMPLE_ID,
+        FIELD_RNA_ID,
+        FIELD_RESULT,
+        FIELD_DATE_TESTED,
+        FIELD_LAB_ID,
+        "CH 1 - Target",
+        "CH 1 - Result",
+        "CH 1 - Cq",
+        "CH2_Target",
+        "CH2_Result",
+        "CH2_Cq",
+        "CH3-Target",
+        "CH3-Result",
+        "CH3-Cq",
+        "PickResult",
+        "extra_col",
+    )
 
-        csv_to_test_reader = DictReader(csv_weird_channels)
+    header_plan = centre_file.build_header_plan(headers)
 
-        modified_row: ModifiedRow = {
-            FIELD_ROOT_SAMPLE_ID: "1",
-            FIELD_RNA_ID: "RNA_0043",
-            FIELD_RESULT: "Positive",
-            FIELD_DATE_TESTED: "today",
-            FIELD_LAB_ID: "AP",
-        }
+    assert header_plan.accepted_fields == (
+        FIELD_ROOT_SAMPLE_ID,
+        FIELD_RNA_ID,
+        FIELD_RESULT,
+        FIELD_DATE_TESTED,
+        FIELD_LAB_ID,
+    )
+    assert header_plan.channel_fields == (
+        (FIELD_CH1_TARGET, "CH 1 - Target"),
+        (FIELD_CH1_RESULT, "CH 1 - Result"),
+        (FIELD_CH1_CQ, "CH 1 - Cq"),
+        (FIELD_CH2_TARGET, "CH2_Target"),
+        (FIELD_CH2_RESULT, "CH2_Result"),
+        (FIELD_CH2_CQ, "CH2_Cq"),
+        (FIELD_CH3_TARGET, "CH3-Target"),
+        (FIELD_CH3_RESULT, "CH3-Result"),
+        (FIELD_CH3_CQ, "CH3-Cq"),
+    )
+    assert header_plan.unknown_value_fields == (FIELD_CH3_TARGET, FIELD_CH3_RESULT, FIELD_CH3_CQ)
+    assert header_plan.unexpected_headers == ["extra_col"]
+
+
+def test_header_plan_is_built_once_per_column_layout(centre_file: CentreFile) -> None:
+    with StringIO() as fake_csv:
+        fake_csv.write(f"{FIELD_ROOT_SAMPLE_ID},{FIELD_RNA_ID},{FIELD_RESULT},{FIELD_DATE_TESTED},{FIELD_LAB_ID}\n")
+        fake_csv.write("1,RNA_0043,Positive,today,AP\n")
+        fake_csv.write("2,RNA_0044,Negative,today,AP\n")
+        fake_csv.seek(0)
+
+        csv_to_test_reader = DictReader(fake_csv)
 
-        expected_modified_row = {
+        with patch.object(centre_file, "build_header_plan", wraps=centre_file.build_header_plan) as build_header_plan:
+            for line_number, row in enumerate(csv_to_test_reader, start=2):
+                centre_file.filtered_row(row, line_number)
+
+        build_header_plan.assert_called_once()
+
+
+def test_filtered_row_with_unknown_channel_values(config):
+    centre = Centre(config, config.CENTRES[0])
+    centre_file = CentreFile("some_file.csv", centre)
+
+    with StringIO() as fake_csv:
+        fake_csv.write(f"{FIELD_ROOT_SAMPLE_ID},{FIELD_RNA_ID},{FIELD_CH1_TARGET},{FIELD_CH1_RESULT},{FIELD_CH1_CQ}\n")
+        fake_csv.write("1,RNA_0043,ORF1ab,Unknown,\n")
+        fake_csv.seek(0)
+
+        csv_to_test_reader = DictReader(fake_csv)
+
+        expected_row = {
             FIELD_ROOT_SAMPLE_ID: "1",
             FIELD_RNA_ID: "RNA_0043",
-            FIELD_RESULT: "Positive",
-            FIELD_DATE_TESTED: "today",
-            FIELD_LAB_ID: "AP",
             FIELD_CH1_TARGET: "ORF1ab",
-            FIELD_CH1_RESULT: "Positive",
-            FIELD_CH1_CQ: "21.433",
-            FIELD_CH2_TARGET: "ORF2ab",
-            FIELD_CH2_RESULT: "Negative",
-            FIELD_CH2_CQ: "22.433",
-            FIELD_CH3_TARGET: "ORF3ab",
-            FIELD_CH3_RESULT: "Positive",
-            FIELD_CH3_CQ: "23.433",
+            FIELD_CH1_RESULT: None,
         }
 
-        seen_headers = [FIELD_ROOT_SAMPLE_ID, FIELD_RNA_ID, FIELD_RESULT, FIELD_DATE_TESTED, FIELD_LAB_ID]
-
-        expected_seen_headers = seen_headers + [
-            "CH 1 - Target",
-            "CH 1 - Result",
-            "CH 1 - Cq",
-            "CH2_Target",
-            "CH2_Result",
-            "CH2_Cq",
-            "CH3-Target",
-            "CH3-Result",
-            "CH3-Cq",
-        ]
+        assert centre_file.filtered_row(next(csv_to_test_reader), 2) == expected_row
 
-        seen_headers_to_test, modified_row_to_test = centre_file.extract_channel_fields(
-            seen_headers, next(csv_to_test_reader), modified_row
-        )
 
-        assert seen_headers_to_test == expected_seen_headers
-        assert modified_row_to_test == expected_modified_row
+def test_filtered_row_with_more_values_than_headers(config):
+    centre = Centre(config, config.CENTRES[0])
+    centre_file = CentreFile("some_file.csv", centre)
+
+    with StringIO() as fake_csv:
+        fake_csv.write(f"{FIELD_ROOT_SAMPLE_ID},{FIELD_RNA_ID}\n")
+        fake_csv.write("1,RNA_0043\n")
+        fake_csv.write("2,RNA_0044,extra_value\n")
+        fake_csv.seek(0)
+
+        csv_to_test_reader = DictReader(fake_csv)
+
+        assert centre_file.filtered_row(next(csv_to_test_reader), 2) == {
+            FIELD_ROOT_SAMPLE_ID: "1",
+            FIELD_RNA_ID: "RNA_0043",
+        }
+        assert centre_file.filtered_row(next(csv_to_test_reader), 3) == {
+            FIELD_ROOT_SAMPLE_ID: "2",
+            FIELD_RNA_ID: "RNA_0044",
+        }
+        assert centre_file.logging_collection.aggregator_types["TYPE 13"].count_errors == 1
 
 
 def test_filtered_row_with_blank_lab_id(config):
@@ -1409,7 +1531,8 @@ def test_check_for_required_headers_with_missing_lab_id_and_lab_id_true(config):
         config.ADD_LAB_ID = False
 
 
-def test_backup_good_file(config, tmpdir):
+def test_backup_good_file(config, tmpdir, mongo_database):
+    _, db = mongo_database
     with patch.dict(config.CENTRES[0], {CENTRE_KEY_BACKUPS_FOLDER: tmpdir.realpath()}):
         # create temporary success and errors folders for the files to end up in
         success_folder = tmpdir.mkdir(SUCCESSES_DIR)
@@ -1435,8 +1558,14 @@ def test_backup_good_file(config, tmpdir):
         filename_with_timestamp = os.path.basename(success_folder.listdir()[0])
         assert filename in filename_with_timestamp
 
+        # the checksum of the backup is recorded so the file is recognised if seen again
+        assert centre_file.backup_dirs_matching_checksum() == {SUCCESSES_DIR}
+        record = get_mongo_collection(db, COLLECTION_FILE_CHECKSUMS).find_one()
+        assert record is not None
+        assert record["backup_file_name"] == filename_with_timestamp
+
 
-def test_backup_bad_file(config, tmpdir):
+def test_backup_bad_file(config, tmpdir, mongo_database):
     with patch.dict(config.CENTRES[0], {CENTRE_KEY_BACKUPS_FOLDER: tmpdir.realpath()}):
         # create temporary success and errors folders for the files to end up in
         success_folder = tmpdir.mkdir(SUCCESSES_DIR)
@@ -1463,6 +1592,8 @@ def test_backup_bad_file(config, tmpdir):
         filename_with_timestamp = os.path.basename(errors_folder.listdir()[0])
         assert filename in filename_with_timestamp
 
+        assert centre_file.backup_dirs_matching_checksum() == {ERRORS_DIR}
+
 
 # tests for parsing file name date
 def test_file_name_date_parses_right(config):
@@ -1734,7 +1865,7 @@ def test_insert_samples_from_docs_into_mlwh_returns_false_not_connected(config,
 
 def test_insert_samples_from_docs_into_mlwh_returns_failure_executing(config, mlwh_connection):
     with patch("crawler.db.mysql.create_mysql_connection"):
-        with patch("crawler.db.mysql.run_mysql_executemany_query", side_effect=MockedError("Boom!")):
+        with patch("crawler.db.mysql.run_mysql_multi_row_upsert", side_effect=MockedError("Boom!")):
             centre = Centre(config, config.CENTRES[0])
             centre_file = CentreFile("some file", centre)
 
@@ -1834,9 +1965,9 @@ def test_insert_plates_and_wells_from_docs_into_dart_non_pending_plate_does_not_
         with patch("crawler.file_processing.add_dart_plate_if_doesnt_exist", return_value="not pending"):
             centre_file.insert_plates_and_wells_from_docs_into_dart(docs_to_insert)
 
-            # does not call any stored procedure
+            # does not set any well properties
             assert centre_file.logging_collection.aggregator_types["TYPE 22"].count_errors == 0
-            mock_conn().cursor().execute.assert_not_called()
+            mock_conn().cursor().executemany.assert_not_called()
             mock_conn().close.assert_called_once()
 
 
@@ -1917,7 +2048,7 @@ def test_insert_plates_and_wells_from_docs_into_dart_multiple_new_plates(config)
                 with patch("crawler.db.dart.map_mongo_doc_to_dart_well_props") as mock_map:
                     test_well_props = {"prop1": "value1", "test prop": "test value"}
                     mock_map.return_value = test_well_props
-                    with patch("crawler.db.dart.set_dart_well_properties") as mock_set_well_props:
+                    with patch("crawler.db.dart.set_dart_well_properties_in_bulk") as mock_set_well_props:
                         result = centre_file.insert_plates_and_wells_from_docs_into_dart(docs_to_insert)
 
                         assert centre_file.logging_collection.get_count_of_all_errors_and_criticals() == 0
@@ -1934,16 +2065,21 @@ def test_insert_plates_and_wells_from_docs_into_dart_multiple_new_plates(config)
                         # well helper method call checks
                         assert mock_get_well_index.call_count == 2
                         assert mock_map.call_count == 2
-                        assert mock_set_well_props.call_count == 2
                         for doc in docs_to_insert[:2]:
                             mock_get_well_index.assert_any_call(doc[FIELD_COORDINATE])
                             mock_map.assert_any_call(doc)
+
+                        # sets the well properties in one call per plate
+                        assert mock_set_well_props.call_count == 3
+                        for doc in docs_to_insert[:2]:
                             mock_set_well_props.assert_any_call(
                                 mock_conn().cursor(),
-                                doc[FIELD_PLATE_BARCODE],
-                                test_well_props,
-                                test_well_index,
+                                [
+                                    (doc[FIELD_PLATE_BARCODE], "prop1", "value1", test_well_index),
+                                    (doc[FIELD_PLATE_BARCODE], "test prop", "test value", test_well_index),
+                                ],
                             )
+                        mock_set_well_props.assert_any_call(mock_conn().cursor(), [])
 
                         # commits changes
                         mock_conn().cursor().rollback.assert_not_called()
@@ -2010,7 +2146,7 @@ def test_insert_plates_and_wells_from_docs_into_dart_single_new_plate_multiple_w
                 with patch("crawler.db.dart.map_mongo_doc_to_dart_well_props") as mock_map:
                     test_well_props = {"prop1": "value1", "test prop": "test value"}
                     mock_map.return_value = test_well_props
-                    with patch("crawler.db.dart.set_dart_well_properties") as mock_set_well_props:
+                    with patch("crawler.db.dart.set_dart_well_properties_in_bulk") as mock_set_well_props:
                         centre_file.insert_plates_and_wells_from_docs_into_dart(docs_to_insert)
 
                         assert centre_file.logging_collection.get_count_of_all_errors_and_criticals() == 0
@@ -2030,10 +2166,14 @@ def test_insert_plates_and_wells_from_docs_into_dart_single_new_plate_multiple_w
                             mock_get_well_index.assert_any_call(doc[FIELD_COORDINATE])
                             mock_map.assert_any_call(doc)
 
-                        # calls to set well properties as expected
-                        assert mock_set_well_props.call_count == 2
-                        mock_set_well_props.assert_any_call(
-                            mock_conn().cursor(), plate_barcode, test_well_props, test_well_index
+                        # sets the properties of all the wells in one call
+                        mock_set_well_props.assert_called_once_with(
+                            mock_conn().cursor(),
+                            [
+                                (plate_barcode, prop_name, prop_value, test_well_index)
+                                for _ in docs_to_insert[:2]
+                                for prop_name, prop_value in test_well_props.items()
+                            ],
                         )
 
                         # commits changes
@@ -2042,6 +2182,46 @@ def test_insert_plates_and_wells_from_docs_into_dart_single_new_plate_multiple_w
                         mock_conn().close.assert_called_once()
 
 
+def test_insert_plates_and_wells_from_docs_into_dart_uses_prefetched_plate_states(config):
+    centre = Centre(config, config.CENTRES[0])
+    centre_file = CentreFile("some file", centre)
+    docs_to_insert: List[ModifiedRow] = [
+        {
+            FIELD_ROOT_SAMPLE_ID: f"ABC0000000{index}",
+            FIELD_RNA_ID: f"{plate_barcode}_A01",
+            FIELD_PLATE_BARCODE: plate_barcode,
+            FIELD_COORDINATE: "A01",
+            FIELD_LAB_ID: "AP",
+            FIELD_RESULT: RESULT_VALUE_POSITIVE,
+        }
+        for index, plate_barcode in enumerate(["TC-rna-00000029", "TC-rna-00000030", "TC-rna-00000031"])
+    ]
+
+    with patch("crawler.file_processing.create_dart_sql_server_conn") as mock_conn:
+        with patch(
+            "crawler.file_processing.get_dart_plate_states",
+            return_value={"TC-rna-00000029": DART_STATE_PENDING, "TC-rna-00000030": "pickable"},
+        ) as mock_get_plate_states:
+            with patch(
+                "crawler.file_processing.add_dart_plate_if_doesnt_exist", return_value=DART_STATE_PENDING
+            ) as mock_add_plate:
+                with patch("crawler.file_processing.add_dart_plate_well_properties") as mock_add_wells:
+                    assert centre_file.insert_plates_and_wells_from_docs_into_dart(docs_to_insert) is True
+
+    # fetches the states of all the plates in one go
+    mock_get_plate_states.assert_called_once()
+    assert list(mock_get_plate_states.call_args.args[1]) == [doc[FIELD_PLATE_BARCODE] for doc in docs_to_insert]
+
+    # only adds the plate which is not in DART yet
+    mock_add_plate.assert_called_once_with(
+        mock_conn().cursor(), "TC-rna-00000031", centre_file.centre_config[CENTRE_KEY_BIOMEK_LABWARE_CLASS]
+    )
+
+    # adds the wells of the pending plates
+    assert [call.args[2] for call in mock_add_wells.call_args_list] == ["TC-rna-00000029", "TC-rna-00000031"]
+    assert mock_conn().cursor().commit.call_count == 3
+
+
 def test_docs_to_insert_updated_with_source_plate_uuids_handles_mongo_collection_error(config):
     centre = Centre(config, config.CENTRES[0])
     centre_file = CentreFile("some file", centre)
@@ -2112,6 +2292,42 @@ def test_docs_to_insert_updated_with_source_plate_uuids_uses_existing_plates(con
     assert centre_file.logging_collection.get_count_of_all_errors_and_criticals() == 0
 
 
+def test_docs_to_insert_updated_with_source_plate_uuids_finds_existing_plates_in_one_query(config, mongo_database):
+    _, mongo_database = mongo_database
+    source_plates_collection = get_mongo_collection(mongo_database, COLLECTION_SOURCE_PLATES)
+    source_plates_collection.insert_many(
+        [
+            {FIELD_BARCODE: "123", FIELD_LAB_ID: "AP", FIELD_LH_SOURCE_PLATE_UUID: str(uuid.uuid4())},
+            {FIELD_BARCODE: "456", FIELD_LAB_ID: "MK", FIELD_LH_SOURCE_PLATE_UUID: str(uuid.uuid4())},
+        ]
+    )
+
+    docs_to_insert: List[ModifiedRow] = [
+        {FIELD_PLATE_BARCODE: "123", FIELD_LAB_ID: "AP"},
+        {FIELD_PLATE_BARCODE: "456", FIELD_LAB_ID: "MK"},
+        {FIELD_PLATE_BARCODE: "789", FIELD_LAB_ID: "CB"},
+        {FIELD_PLATE_BARCODE: "789", FIELD_LAB_ID: "CB"},
+        {FIELD_PLATE_BARCODE: "123", FIELD_LAB_ID: "AP"},
+    ]
+    centre = Centre(config, config.CENTRES[0])
+    centre_file = CentreFile("some file", centre)
+
+    with patch("crawler.file_processing.get_mongo_collection", return_value=source_plates_collection):
+        with patch.object(source_plates_collection, "find", wraps=source_plates_collection.find) as mock_find:
+            with patch.object(source_plates_collection, "find_one") as mock_find_one:
+                updated_docs = centre_file.docs_to_insert_updated_with_source_plate_uuids(docs_to_insert)
+
+    mock_find.assert_called_once()
+    assert sorted(mock_find.call_args.args[0][FIELD_BARCODE]["$in"]) == ["123", "456", "789"]
+    mock_find_one.assert_not_called()
+
+    assert len(updated_docs) == 5
+    assert source_plates_collection.count_documents({}) == 3
+    assert updated_docs[0][FIELD_LH_SOURCE_PLATE_UUID] == updated_docs[4][FIELD_LH_SOURCE_PLATE_UUID]
+    assert updated_docs[2][FIELD_LH_SOURCE_PLATE_UUID] == updated_docs[3][FIELD_LH_SOURCE_PLATE_UUID]
+    assert centre_file.logging_collection.get_count_of_all_errors_and_criticals() == 0
+
+
 @pytest.mark.parametrize(
     "filename, expected_type25_errors_count",
     [
@@ -2225,6 +2441,150 @@ def test_docs_to_insert_updated_with_source_plate_handles_duplicate_existing_bar
     assert centre_file.logging_collection.aggregator_types["TYPE 25"].count_errors == 1
 
 
+def test_process_samples_pushes_rows_through_in_chunks(config):
+    centre = Centre(config, config.CENTRES[0])
+    centre_file = CentreFile("some_file.csv", centre)
+    docs = [{FIELD_ROOT_SAMPLE_ID: str(i)} for i in range(5)]
+
+    with patch.object(CentreFile, "ROWS_PER_CHUNK", 2):
+        with patch.object(centre_file, "iter_csv_rows", return_value=iter(docs)):
+            with patch.object(centre_file, "process_samples_chunk", side_effect=count_docs) as mock_chunk:
+                with patch.object(centre_file, "backup_file") as mock_backup_file:
+                    with patch.object(centre_file, "create_import_record_for_file") as mock_create_import_record:
+                        centre_file.process_samples(False)
+
+    assert [call.args[0] for call in mock_chunk.call_args_list] == [docs[0:2], docs[2:4], docs[4:5]]
+    mock_backup_file.assert_called_once()
+    mock_create_import_record.assert_called_once()
+
+
+def test_process_samples_chunk_only_inserts_docs_inserted_into_mongo_into_mlwh_and_dart(config):
+    centre = Centre(config, config.CENTRES[0])
+    centre_file = CentreFile("some_file.csv", centre)
+    docs: List[ModifiedRow] = [{FIELD_MONGODB_ID: i} for i in range(3)]
+
+    with patch.object(centre_file, "docs_to_insert_updated_with_source_plate_uuids", side_effect=lambda x: x):
+        with patch.object(centre_file, "docs_to_insert_updated_with_cog_uk_ids", side_effect=lambda x: x):
+            with patch.object(centre_file, "insert_samples_from_docs_into_mongo_db", return_value=[0, 2]):
+                with patch.object(centre_file, "insert_samples_from_docs_into_mlwh", return_value=True) as mock_mlwh:
+                    with patch.object(centre_file, "insert_plates_and_wells_from_docs_into_dart") as mock_dart:
+                        assert centre_file.process_samples_chunk(docs, True) == 3
+
+    mock_mlwh.assert_called_once_with([docs[0], docs[2]])
+    mock_dart.assert_called_once_with([docs[0], docs[2]])
+
+
+def test_process_samples_detects_duplicates_across_chunks(config, freezer):
+    centre_file = centre_file_with_mocked_filtered_positive_identifier(config, "some_file.csv")
+
+    with StringIO() as fake_csv:
+        fake_csv.write("Root Sample ID,RNA ID,Result,Lab ID,Date Tested\n")
+        fake_csv.write("1,RNA_0043_H09,Positive,Val,\n")
+        fake_csv.write("2,RNA_0043_H10,Positive,Val,\n")
+        fake_csv.write("1,RNA_0043_H09,Positive,Val,\n")
+        fake_csv.seek(0)
+
+        with patch.object(CentreFile, "ROWS_PER_CHUNK", 1):
+            with patch("crawler.file_processing.open", return_value=fake_csv):
+                with patch.object(centre_file, "process_samples_chunk", side_effect=count_docs) as mock_chunk:
+                    with patch.object(centre_file, "backup_file"):
+                        with patch.object(centre_file, "create_import_record_for_file"):
+                            centre_file.process_samples(False)
+
+    assert mock_chunk.call_count == 2
+    assert centre_file.logging_collection.aggregator_types["TYPE 5"].count_errors == 1
+
+
+def duplicate_test_samples(dates_tested):
+    return [
+        {
+            FIELD_ROOT_SAMPLE_ID: f"RSID-{i}",
+            FIELD_RNA_ID: f"RNA_0043_H{i:02}",
+            FIELD_PLATE_BARCODE: "RNA_0043",
+            FIELD_RESULT: "Positive",
+            FIELD_MONGO_LAB_ID: "Val",
+            FIELD_DATE_TESTED: date_tested,
+            FIELD_LINE_NUMBER: i + 2,
+        }
+        for i, date_tested in enumerate(dates_tested)
+    ]
+
+
+def test_insert_samples_from_docs_into_mongo_db_classifies_duplicates_in_batches(config, mongo_database):
+    _, mongo_database = mongo_database
+    samples_collection = mongo_database[COLLECTION_SAMPLES]
+    samples_collection.insert_many(duplicate_test_samples(["2020-04-23", "2020-04-23", "2020-04-23"]))
+
+    centre_file = CentreFile("some_file.csv", Centre(config, config.CENTRES[0]))
+    docs = duplicate_test_samples(["2020-04-23", "2020-04-24", "2020-04-23", "2020-04-23"])
+
+    spied_collection = MagicMock(wraps=samples_collection)
+
+    with patch.object(CentreFile, "DUPLICATES_PER_QUERY", 2):
+        with patch("crawler.file_processing.get_mongo_collection", return_value=spied_collection):
+            inserted_ids = centre_file.insert_samples_from_docs_into_mongo_db(docs)
+
+    assert inserted_ids == [docs[3][FIELD_MONGODB_ID]]
+    assert centre_file.docs_inserted == 1
+    # one query per batch of two duplicates, rather than one per duplicate
+    assert spied_collection.find.call_count == 2
+
+    aggregator_types = centre_file.logging_collection.aggregator_types
+    assert aggregator_types["TYPE 6"].count_errors == 2
+    assert aggregator_types["TYPE 7"].count_errors == 1
+    assert "(2020-04-23 != 2020-04-24)" in aggregator_types["TYPE 7"].get_message()
+
+
+@pytest.mark.parametrize("filter_existing_samples", [False, True])
+def test_process_samples_chunk_logs_the_same_duplicates_with_or_without_filtering_existing_samples(
+    config, mongo_database, filter_existing_samples
+):
+    _, mongo_database = mongo_database
+    mongo_database[COLLECTION_SAMPLES].insert_many(duplicate_test_samples(["2020-04-23", "2020-04-23", "2020-04-23"]))
+
+    centre_file = CentreFile("some_file.csv", Centre(config, config.CENTRES[0]))
+    docs = duplicate_test_samples(["2020-04-23", "2020-04-24", "2020-04-23", "2020-04-23"])
+
+    with patch.object(config, "FILTER_EXISTING_SAMPLES", filter_existing_samples):
+        with patch.object(centre_file, "docs_to_insert_updated_with_source_plate_uuids", side_effect=lambda x: x):
+            with patch.object(centre_file, "docs_to_insert_updated_with_cog_uk_ids", side_effect=lambda x: x) as cog:
+                with patch.object(centre_file, "insert_samples_from_docs_into_mlwh", return_value=True) as mock_mlwh:
+                    with patch.object(centre_file, "insert_plates_and_wells_from_docs_into_dart"):
+                        centre_file.process_samples_chunk(docs, True)
+
+    # only the new sample is sent on, and with the filter no COG UK ID is assigned to those already in mongo
+    mock_mlwh.assert_called_once_with([docs[3]])
+    assert len(cog.call_args.args[0]) == (1 if filter_existing_samples else 4)
+    assert centre_file.docs_inserted == 1
+
+    aggregator_types = centre_file.logging_collection.aggregator_types
+    assert aggregator_types["TYPE 6"].count_errors == 2
+    assert aggregator_types["TYPE 7"].count_errors == 1
+
+
+def test_dates_tested_of_samples_in_mongo_with_samples_missing_fields(config, mongo_database):
+    _, mongo_database = mongo_database
+    samples = duplicate_test_samples(["2020-04-23"])
+    # an older sample on the same plate without a lab ID or RNA ID
+    legacy_sample = {FIELD_ROOT_SAMPLE_ID: "RSID-LEGACY", FIELD_PLATE_BARCODE: "RNA_0043", FIELD_RESULT: "Positive"}
+    mongo_database[COLLECTION_SAMPLES].insert_many([*samples, legacy_sample])
+
+    centre_file = CentreFile("some_file.csv", Centre(config, config.CENTRES[0]))
+
+    assert centre_file.dates_tested_of_samples_in_mongo(FIELD_PLATE_BARCODE, ["RNA_0043"]) == {
+        ("Val", "RSID-0", "RNA_0043_H00", "Positive"): "2020-04-23",
+        (None, "RSID-LEGACY", None, "Positive"): None,
+    }
+
+
+def test_docs_to_insert_filtered_for_samples_in_mongo_keeps_all_the_docs_when_mongo_fails(config):
+    centre_file = CentreFile("some_file.csv", Centre(config, config.CENTRES[0]))
+    docs = duplicate_test_samples(["2020-04-23"])
+
+    with patch("crawler.file_processing.get_mongo_collection", side_effect=Exception("Boom!")):
+        assert centre_file.docs_to_insert_filtered_for_samples_in_mongo(docs) == docs
+
+
 def test_docs_to_insert_updated_with_cog_uk_ids_adds_cog_uk_ids(config, baracoda):
     original_docs: List[ModifiedRow] = [
         {"_id": ObjectId("5f562d9931d9959b92544728")},
@@ -2262,6 +2622,27 @@ def test_docs_to_insert_updated_with_cog_uk_ids_logs_baracoda_error_and_returns_
     logger.exception.assert_called_once()
 
 
+def test_docs_to_insert_updated_with_cog_uk_ids_reserves_cog_uk_ids_from_the_pool(config, mongo_database):
+    _, mongo_database = mongo_database
+    original_docs: List[ModifiedRow] = [
+        {"_id": ObjectId("5f562d9931d9959b92544728")},
+        {"_id": ObjectId("5f562d9931d9959b92544729")},
+    ]
+
+    centre = Centre(config, config.CENTRES[0])
+    prefix = centre.centre_config[CENTRE_KEY_PREFIX]
+    add_cog_uk_ids_to_pool(mongo_database, prefix, [f"{prefix}-1", f"{prefix}-2", f"{prefix}-3"])
+    centre_file = CentreFile("some file", centre)
+
+    with patch.object(config, "COG_UK_ID_POOL", True):
+        with patch("crawler.file_processing.generate_baracoda_barcodes") as generate_barcodes:
+            actual = centre_file.docs_to_insert_updated_with_cog_uk_ids(original_docs)
+
+    generate_barcodes.assert_not_called()
+    assert [doc[FIELD_MONGO_COG_UK_ID] for doc in actual] == [f"{prefix}-1", f"{prefix}-2"]
+    assert count_available_cog_uk_ids(mongo_database, prefix) == 1
+
+
 # Test is_current set to true for latest results only
 def test_is_current_correctly_set(config, mlwh_connection):
     centre = Centre(config, config.CENTRES[0])
@@ -2376,6 +2757,56 @@ def test_center_can_download_only_recent_files(config, tmpdir, downloadable_file
         ]
 
 
+def test_center_does_not_download_again_the_files_kept_and_unchanged(config, tmpdir):
+    centre = Centre(config, config.CENTRES[0])
+    centre.centre_config["sftp_root_read"] = "sftp"
+    download_dir = tmpdir.mkdir("downloads")
+    recent_time = datetime.now().timestamp()
+    listing = [
+        MagicMock(filename=f"AP_sanger_report_200423_221{i}.csv", st_mode=33188, st_size=5, st_mtime=recent_time)
+        for i in range(3)
+    ]
+
+    def get(remote_path, local_path):
+        with open(local_path, "w") as local_file:
+            local_file.write("12345")
+
+    with patch("crawler.file_processing.get_sftp_connection") as get_sftp_connection:
+        sftp = get_sftp_connection.return_value.__enter__.return_value
+        sftp.listdir_attr.return_value = listing[:2]
+        transport = sftp.sftp_client.get_channel.return_value.get_transport.return_value
+        sftp_client = transport.open_sftp_client.return_value.__enter__.return_value
+        sftp_client.get.side_effect = get
+
+        with patch("crawler.file_processing.Centre.get_download_dir", return_value=download_dir.realpath()):
+            centre.download_csv_files()
+            assert sftp_client.get.call_count == 2
+
+            # one file changed on the server and one new
+            listing[1].st_size = 6
+            sftp.listdir_attr.return_value = listing
+            sftp_client.get.reset_mock()
+
+            centre.download_csv_files()
+
+            sftp.listdir_attr.assert_called_with("/sftp")
+            assert sorted(call.args[0] for call in sftp_client.get.call_args_list) == [
+                "/sftp/AP_sanger_report_200423_2211.csv",
+                "/sftp/AP_sanger_report_200423_2212.csv",
+            ]
+            assert sorted(os.path.basename(file_path) for file_path in download_dir.listdir()) == [
+                "AP_sanger_report_200423_2210.csv",
+                "AP_sanger_report_200423_2211.csv",
+                "AP_sanger_report_200423_2212.csv",
+            ]
+
+            assert os.path.exists(centre.get_download_manifest_path())
+            centre.clean_up()
+
+            assert not os.path.exists(download_dir)
+            assert not os.path.exists(centre.get_download_manifest_path())
+
+
 @pytest.mark.parametrize(
     "filename, mode, expected_value",
     [
@@ -1,13 +1,12 @@
+import threading
 import uuid
 from datetime import datetime, timedelta
-from unittest.mock import MagicMock, Mock, PropertyMock, patch
+from typing import List
+from unittest.mock import MagicMock, patch
 
-import numpy as np
-import pandas as pd
 import pytest
 
 from crawler.constants import (
-    FIELD_COORDINATE,
     FIELD_CREATED_AT,
     FIELD_MONGO_LAB_ID,
     FIELD_MONGODB_ID,
@@ -20,12 +19,15 @@ from crawler.constants import (
     V1_V2_CUTOFF_TIMESTAMP,
 )
 from crawler.helpers.cherrypicked_samples import (
+    extract_plate_barcodes_by_root_sample_id,
     extract_required_cp_info,
     filter_out_cherrypicked_samples,
-    get_cherrypicked_samples,
-    get_cherrypicked_samples_by_date,
+    get_cherrypicked_sample_keys,
+    get_cherrypicked_sample_keys_by_date,
     remove_cherrypicked_samples,
+    stream_cherrypicked_sample_keys,
 )
+from crawler.types import SampleDoc
 from tests.conftest import MockedError
 
 
@@ -106,142 +108,157 @@ def test_remove_cherrypicked_samples():
     assert mock_cherry_picked_sample[0] not in [sample[FIELD_ROOT_SAMPLE_ID] for sample in samples]
 
 
-# ----- get_cherrypicked_samples tests -----
+def test_remove_cherrypicked_samples_with_sample_keys():
+    test_samples = generate_example_samples(range(0, 6), datetime.now())
+    cp_sample_keys = {(sample[FIELD_ROOT_SAMPLE_ID], sample[FIELD_PLATE_BARCODE]) for sample in test_samples[1:3]}
 
+    assert remove_cherrypicked_samples(test_samples, cp_sample_keys) == test_samples[:1] + test_samples[3:]
 
-def test_get_cherrypicked_samples_no_beckman(config):
-    """
-    Test Scenario
-    - Mocking database responses
-    - Only the Sentinel query returns matches (No Beckman)
-    - No chunking: a single query is made in which all matches are returned
-    - No duplication of returned matches
-    """
-    expected = [
-        # Cherrypicking query response
-        pd.DataFrame(["MCM001", "MCM003", "MCM005"], columns=[FIELD_ROOT_SAMPLE_ID], index=[0, 1, 2]),
+
+def test_remove_cherrypicked_samples_does_not_match_swapped_values():
+    samples: List[SampleDoc] = [
+        {FIELD_ROOT_SAMPLE_ID: "ABC", FIELD_PLATE_BARCODE: "DEF"},
+        {FIELD_ROOT_SAMPLE_ID: "DEF", FIELD_PLATE_BARCODE: "ABC"},
     ]
-    samples = ["MCM001", "MCM002", "MCM003", "MCM004", "MCM005"]
-    plate_barcodes = ["123", "456"]
 
-    with patch("sqlalchemy.create_engine", return_value=Mock()):
-        with patch("pandas.read_sql", side_effect=expected):
-            returned_samples = get_cherrypicked_samples(config, samples, plate_barcodes)
-            assert returned_samples.at[0, FIELD_ROOT_SAMPLE_ID] == "MCM001"  # type: ignore
-            assert returned_samples.at[1, FIELD_ROOT_SAMPLE_ID] == "MCM003"  # type: ignore
-            assert returned_samples.at[2, FIELD_ROOT_SAMPLE_ID] == "MCM005"  # type: ignore
+    assert remove_cherrypicked_samples(samples, [["DEF", "ABC"]]) == samples[:1]
 
 
-def test_get_cherrypicked_samples_chunking_no_beckman(config):
-    """
-    Test Scenario
-    - Mocking database responses
-    - Only the Sentinel queries return matches (No Beckman)
-    - Chunking: multiple queries are made, with all matches contained in the sum of these queries
-    - No duplication of returned matches
-    """
-    # Note: This represents the results of three different (Sentinel, Beckman) sets of
-    # database queries, each Sentinel query getting indexed from 0. Do not change the
-    # indices here unless you have modified the behaviour of the query.
+# ----- get_cherrypicked_sample_keys tests -----
+
+
+def test_get_cherrypicked_sample_keys_chunks_and_removes_duplicates(config):
     query_results = [
-        pd.DataFrame(["MCM001"], columns=[FIELD_ROOT_SAMPLE_ID], index=[0]),  # Cherrypicking query response
-        pd.DataFrame(["MCM003"], columns=[FIELD_ROOT_SAMPLE_ID], index=[0]),  # Cherrypicking query response
-        pd.DataFrame(["MCM005"], columns=[FIELD_ROOT_SAMPLE_ID], index=[0]),  # Cherrypicking query response
+        [{FIELD_ROOT_SAMPLE_ID: "MCM001", FIELD_PLATE_BARCODE: "123"}],
+        [
+            {FIELD_ROOT_SAMPLE_ID: "MCM001", FIELD_PLATE_BARCODE: "123"},
+            {FIELD_ROOT_SAMPLE_ID: "MCM003", FIELD_PLATE_BARCODE: "456"},
+        ],
+        [],
     ]
-    expected = pd.DataFrame(["MCM001", "MCM003", "MCM005"], columns=[FIELD_ROOT_SAMPLE_ID], index=[0, 1, 2])
-
     samples = ["MCM001", "MCM002", "MCM003", "MCM004", "MCM005"]
     plate_barcodes = ["123", "456"]
 
-    with patch("sqlalchemy.create_engine", return_value=Mock()):
-        with patch("pandas.read_sql", side_effect=query_results):
-            returned_samples = get_cherrypicked_samples(config, samples, plate_barcodes, 2)
-            pd.testing.assert_frame_equal(expected, returned_samples)
+    with patch("crawler.helpers.cherrypicked_samples.sqlalchemy.create_engine") as mock_sql_engine:
+        db_connection = mock_sql_engine.return_value.connect.return_value
+        streaming_connection = db_connection.execution_options.return_value
+        streaming_connection.exec_driver_sql.return_value.mappings.side_effect = query_results
+
+        cp_sample_keys = get_cherrypicked_sample_keys(config, samples, plate_barcodes, 2)
+
+    assert cp_sample_keys == {("MCM001", "123"), ("MCM003", "456")}
+    # the queries run concurrently, so can be made in any order
+    assert sorted(call.args[1]["root_sample_ids"] for call in streaming_connection.exec_driver_sql.call_args_list) == [
+        ("MCM001", "MCM002"),
+        ("MCM003", "MCM004"),
+        ("MCM005",),
+    ]
+    assert db_connection.close.call_count == 3
+    mock_sql_engine.return_value.dispose.assert_called_once()
 
 
-def test_get_cherrypicked_samples_repeat_tests_no_beckman(config, mlwh_sentinel_cherrypicked, event_wh_data):
-    """
-    Test Scenario
-    - Actual database responses
-    - Only the Sentinel queries return matches (No Beckman)
-    - Chunking: multiple queries are made, with all matches contained in the sum of these queries
-    - Duplication of returned matches across different chunks: duplicates should be filtered out
-    """
+def test_get_cherrypicked_sample_keys_only_queries_the_relevant_plate_barcodes(config):
+    plate_barcodes_by_root_sample_id = {"MCM001": {"123"}, "MCM002": {"456"}, "MCM003": {"789"}}
 
-    # the following come from MLWH_SAMPLE_STOCK_RESOURCE in test data
-    root_sample_ids = ["root_1", "root_2", "root_3", "root_1"]
-    plate_barcodes = ["pb_1", "pb_2", "pb_3"]
+    with patch("crawler.helpers.cherrypicked_samples.stream_cherrypicked_sample_keys", return_value=[]) as stream:
+        get_cherrypicked_sample_keys(
+            config,
+            ["MCM001", "MCM002", "MCM003"],
+            ["123", "456", "789", "999"],
+            2,
+            plate_barcodes_by_root_sample_id=plate_barcodes_by_root_sample_id,
+        )
 
-    # root_1 will match 2 samples, but only one of those will match an event (on Sanger Sample Id)
-    # therefore we only get 1 of the samples called 'root_1' back (the one on plate 'pb_1')
-    # this also checks we don't get a duplicate row for root_1 / pb_1, despite it cropped up in 2
-    # different 'chunks'
-    expected_rows = [
-        ["root_1", "pb_1", "positive", "A1"],
-        ["root_2", "pb_2", "positive", "A1"],
-        ["root_3", "pb_3", "positive", "A1"],
+    params = list(stream.call_args.args[2])
+    assert params == [
+        {"root_sample_ids": ("MCM001", "MCM002"), "plate_barcodes": ["123", "456"]},
+        {"root_sample_ids": ("MCM003",), "plate_barcodes": ["789"]},
     ]
-    expected_columns = [FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE, "Result_lower", FIELD_COORDINATE]
-    expected = pd.DataFrame(np.array(expected_rows), columns=expected_columns, index=[0, 1, 2])
 
-    chunk_size = 2
-    returned_samples = get_cherrypicked_samples(config, root_sample_ids, plate_barcodes, chunk_size)
-    pd.testing.assert_frame_equal(expected, returned_samples)
 
+def test_get_cherrypicked_sample_keys_runs_the_queries_concurrently(config):
+    # each query waits for the others, so the lookup only completes if all of them are running at once
+    barrier = threading.Barrier(3, timeout=5)
+
+    def query(*args):
+        barrier.wait()
+        return MagicMock(mappings=MagicMock(return_value=[]))
+
+    with patch("crawler.helpers.cherrypicked_samples.sqlalchemy.create_engine") as mock_sql_engine:
+        streaming_connection = mock_sql_engine.return_value.connect.return_value.execution_options.return_value
+        streaming_connection.exec_driver_sql.side_effect = query
+
+        cp_sample_keys = get_cherrypicked_sample_keys(config, ["MCM001", "MCM002", "MCM003"], ["123"], 1, workers=3)
+
+    assert cp_sample_keys == set()
+    assert mock_sql_engine.call_args.kwargs["pool_size"] == 3
 
-def test_get_cherrypicked_samples_no_sentinel(config):
-    """
-    Test Scenario
-    - Mocking database responses
-    - Only the Beckman query returns matches (No Sentinel)
-    - No chunking: a single query is made in which all matches are returned
-    - No duplication of returned matches
-    """
 
-    expected = [
-        # Cherrypicking query response
-        pd.DataFrame(["MCM001", "MCM003", "MCM005"], columns=[FIELD_ROOT_SAMPLE_ID], index=[0, 1, 2]),
+def test_stream_cherrypicked_sample_keys_yields_the_keys_of_each_query_as_it_completes():
+    second_query_done = threading.Event()
+
+    def query(sql, params):
+        # the second query completes first
+        if params["root_sample_ids"] == ("MCM001",):
+            second_query_done.wait(timeout=5)
+        else:
+            second_query_done.set()
+
+        return MagicMock(
+            mappings=MagicMock(
+                return_value=[{FIELD_ROOT_SAMPLE_ID: params["root_sample_ids"][0], FIELD_PLATE_BARCODE: "123"}]
+            )
+        )
+
+    params = [{"root_sample_ids": ("MCM001",)}, {"root_sample_ids": ("MCM002",)}]
+
+    with patch("crawler.helpers.cherrypicked_samples.sqlalchemy.create_engine") as mock_sql_engine:
+        streaming_connection = mock_sql_engine.return_value.connect.return_value.execution_options.return_value
+        streaming_connection.exec_driver_sql.side_effect = query
+
+        results = list(stream_cherrypicked_sample_keys("mysql+pymysql://", "SELECT", iter(params), workers=2))
+
+    assert results == [{("MCM002", "123")}, {("MCM001", "123")}]
+
+
+def test_extract_plate_barcodes_by_root_sample_id():
+    samples: List[SampleDoc] = [
+        {FIELD_ROOT_SAMPLE_ID: "MCM001", FIELD_PLATE_BARCODE: "123"},
+        {FIELD_ROOT_SAMPLE_ID: "MCM001", FIELD_PLATE_BARCODE: "456"},
+        {FIELD_ROOT_SAMPLE_ID: "MCM002", FIELD_PLATE_BARCODE: "123"},
     ]
-    samples = ["MCM001", "MCM002", "MCM003", "MCM004", "MCM005"]
-    plate_barcodes = ["123", "456"]
 
-    with patch("sqlalchemy.create_engine", return_value=Mock()):
-        with patch("pandas.read_sql", side_effect=expected):
-            returned_samples = get_cherrypicked_samples(config, samples, plate_barcodes)
-            assert returned_samples.at[0, FIELD_ROOT_SAMPLE_ID] == "MCM001"  # type: ignore
-            assert returned_samples.at[1, FIELD_ROOT_SAMPLE_ID] == "MCM003"  # type: ignore
-            assert returned_samples.at[2, FIELD_ROOT_SAMPLE_ID] == "MCM005"  # type: ignore
+    assert extract_plate_barcodes_by_root_sample_id(samples) == {"MCM001": {"123", "456"}, "MCM002": {"123"}}
 
 
-def test_get_cherrypicked_samples_chunking_no_sentinel(config):
+def test_get_cherrypicked_sample_keys_not_raises_with_error_connecting(config):
+    with patch("crawler.helpers.cherrypicked_samples.sqlalchemy.create_engine") as mock_sql_engine:
+        mock_sql_engine().connect.side_effect = ValueError("Boom!")
+
+        assert get_cherrypicked_sample_keys(config, ["MCM001"], ["123"]) is None
+
+
+def test_get_cherrypicked_sample_keys_repeat_tests_no_beckman(config, mlwh_sentinel_cherrypicked, event_wh_data):
     """
     Test Scenario
-    - Mocking database responses
-    - Only the Beckman queries return matches (No Sentinel)
+    - Actual database responses
+    - Only the Sentinel queries return matches (No Beckman)
     - Chunking: multiple queries are made, with all matches contained in the sum of these queries
-    - No duplication of returned matches
+    - Duplication of returned matches across different chunks: duplicates should be filtered out
     """
 
-    # Note: This represents the results of three different (Sentinel, Beckman) sets of
-    # database queries, each Beckman query getting indexed from 0. Do not change the
-    # indices here unless you have modified the behaviour of the query.
-    query_results = [
-        pd.DataFrame(["MCM001"], columns=[FIELD_ROOT_SAMPLE_ID], index=[0]),  # Cherypicking query response
-        pd.DataFrame(["MCM003"], columns=[FIELD_ROOT_SAMPLE_ID], index=[0]),  # Cherypicking query response
-        pd.DataFrame(["MCM005"], columns=[FIELD_ROOT_SAMPLE_ID], index=[0]),  # Cherypicking query response
-    ]
-    expected = pd.DataFrame(["MCM001", "MCM003", "MCM005"], columns=[FIELD_ROOT_SAMPLE_ID], index=[0, 1, 2])
+    # the following come from MLWH_SAMPLE_STOCK_RESOURCE in test data
+    root_sample_ids = ["root_1", "root_2", "root_3", "root_1"]
+    plate_barcodes = ["pb_1", "pb_2", "pb_3"]
 
-    samples = ["MCM001", "MCM002", "MCM003", "MCM004", "MCM005"]
-    plate_barcodes = ["123", "456"]
+    # root_1 will match 2 samples, but only one of those will match an event (on Sanger Sample Id)
+    # therefore we only get 1 of the samples called 'root_1' back (the one on plate 'pb_1')
+    cp_sample_keys = get_cherrypicked_sample_keys(config, root_sample_ids, plate_barcodes, 2)
 
-    with patch("sqlalchemy.create_engine", return_value=Mock()):
-        with patch("pandas.read_sql", side_effect=query_results):
-            returned_samples = get_cherrypicked_samples(config, samples, plate_barcodes, 2)
-            pd.testing.assert_frame_equal(expected, returned_samples)
+    assert cp_sample_keys == {("root_1", "pb_1"), ("root_2", "pb_2"), ("root_3", "pb_3")}
 
 
-def test_get_cherrypicked_samples_repeat_tests_no_sentinel(config, mlwh_beckman_cherrypicked, event_wh_data):
+def test_get_cherrypicked_sample_keys_repeat_tests_no_sentinel(config, mlwh_beckman_cherrypicked, event_wh_data):
     """
     Test Scenario
     - Actual database responses
@@ -256,111 +273,14 @@ def test_get_cherrypicked_samples_repeat_tests_no_sentinel(config, mlwh_beckman_
 
     # root_5 will match 2 samples, but only one of those will match an event (on sample uuid)
     # therefore we only get 1 of the samples called 'root_5' back (the one on plate 'pb_4')
-    # this also checks we don't get a duplicate row for root_5 / pb_4, despite it cropped up in 2
-    # different 'chunks'
-    expected_rows = [["root_5", "pb_4", "positive", "A1"], ["root_6", "pb_5", "positive", "A1"]]
-    expected_columns = [FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE, "Result_lower", FIELD_COORDINATE]
-    expected = pd.DataFrame(np.array(expected_rows), columns=expected_columns, index=[0, 1])
-
-    chunk_size = 2
-    returned_samples = get_cherrypicked_samples(config, root_sample_ids, plate_barcodes, chunk_size)
-    pd.testing.assert_frame_equal(expected, returned_samples)
-
-
-def test_get_cherrypicked_samples_sentinel_and_beckman(config):
-    """
-    Test Scenario
-    - Mocking database responses
-    - Both Sentinel and Beckman queries return matches
-    - No chunking: a single query is made (per workflow) in which all matches are returned
-    - Duplication of returned matches across different workflows: duplicates should be filtered out
-    """
-
-    expected = [
-        # Cherrypicking query response
-        pd.DataFrame(
-            [
-                "MCM001",  # Sentinel
-                "MCM006",  # Sentinel
-                "MCM001",  # Beckman
-                "MCM003",  # Beckman
-                "MCM005",  # Beckman
-            ],
-            columns=[FIELD_ROOT_SAMPLE_ID],
-            index=[0, 1, 2, 3, 4],
-        ),
-    ]
-    samples = ["MCM001", "MCM002", "MCM003", "MCM004", "MCM005", "MCM006"]
-    plate_barcodes = ["123", "456"]
+    cp_sample_keys = get_cherrypicked_sample_keys(config, root_sample_ids, plate_barcodes, 2)
 
-    with patch("sqlalchemy.create_engine", return_value=Mock()):
-        with patch("pandas.read_sql", side_effect=expected):
-            returned_samples = get_cherrypicked_samples(config, samples, plate_barcodes)
-            assert returned_samples is not None
-            assert returned_samples.at[0, FIELD_ROOT_SAMPLE_ID] == "MCM001"
-            assert returned_samples.at[1, FIELD_ROOT_SAMPLE_ID] == "MCM006"
-            assert returned_samples.at[2, FIELD_ROOT_SAMPLE_ID] == "MCM003"
-            assert returned_samples.at[3, FIELD_ROOT_SAMPLE_ID] == "MCM005"
+    assert cp_sample_keys == {("root_5", "pb_4"), ("root_6", "pb_5")}
 
 
-def test_get_cherrypicked_samples_chunking_sentinel_and_beckman(config):
-    """
-    Test Scenario
-    - Mocking database responses
-    - Both Sentinel and Beckman queries return matches
-    - Chunking: multiple queries are made (per workflow), with all matches contained in the sum
-    - Duplication of returned matches across different workflows: duplicates should be filtered out
-    """
-
-    # Note: This represents the results of three different (Sentinel, Beckman) sets of
-    # database queries, each query getting indexed from 0. Do not change the
-    # indices here unless you have modified the behaviour of the query.
-
-    query_results = [
-        pd.DataFrame(
-            [
-                "MCM001",
-                "MCM001",
-                "MCM002",
-            ],  # Sentinel, Beckman, Beckman
-            columns=[FIELD_ROOT_SAMPLE_ID],
-            index=[0, 1, 2],
-        ),
-        pd.DataFrame(
-            [
-                "MCM003",
-                "MCM003",
-                "MCM004",
-            ],  # Sentinel, Beckman, Beckman
-            columns=[FIELD_ROOT_SAMPLE_ID],
-            index=[0, 1, 2],
-        ),
-        pd.DataFrame(
-            [
-                "MCM005",
-                "MCM005",
-                "MCM006",
-            ],  # Sentinel, Beckman, Beckman
-            columns=[FIELD_ROOT_SAMPLE_ID],
-            index=[0, 1, 2],
-        ),
-    ]
-    expected = pd.DataFrame(
-        ["MCM001", "MCM002", "MCM003", "MCM004", "MCM005", "MCM006"],
-        columns=[FIELD_ROOT_SAMPLE_ID],
-        index=[0, 1, 2, 3, 4, 5],
-    )
-
-    samples = ["MCM001", "MCM002", "MCM003", "MCM004", "MCM005", "MCM006"]
-    plate_barcodes = ["123", "456"]
-
-    with patch("sqlalchemy.create_engine", return_value=Mock()):
-        with patch("pandas.read_sql", side_effect=query_results):
-            returned_samples = get_cherrypicked_samples(config, samples, plate_barcodes, 2)
-            pd.testing.assert_frame_equal(expected, returned_samples)
-
-
-def test_get_cherrypicked_samples_repeat_tests_sentinel_and_beckman(config, mlwh_cherrypicked_samples, event_wh_data):
+def test_get_cherrypicked_sample_keys_repeat_tests_sentinel_and_beckman(
+    config, mlwh_cherrypicked_samples, event_wh_data
+):
     """
     Test Scenario
     - Actual database responses
@@ -380,65 +300,51 @@ def test_get_cherrypicked_samples_repeat_tests_sentinel_and_beckman(config, mlwh
     # root_4 will match 2 samples, but not match either a Sentinel or Beckman event
     # root_5 will match 2 samples, but only one of those will match a Beckman event (on pb_4)
     # root_6 will match a single sample with a matching Beckman event (on pb_5)
-    # We also chunk to further test different scenarios
-    expected_rows = [
-        ["root_1", "pb_1", "positive", "A1"],
-        ["root_3", "pb_3", "positive", "A1"],
-        ["root_5", "pb_4", "positive", "A1"],
-        ["root_6", "pb_5", "positive", "A1"],
-    ]
-    expected_columns = [FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE, "Result_lower", FIELD_COORDINATE]
-    expected = pd.DataFrame(np.array(expected_rows), columns=expected_columns, index=[0, 1, 2, 3])
+    cp_sample_keys = get_cherrypicked_sample_keys(config, root_sample_ids, plate_barcodes, 2)
 
-    chunk_size = 2
-    returned_samples = get_cherrypicked_samples(config, root_sample_ids, plate_barcodes, chunk_size)
-    pd.testing.assert_frame_equal(expected, returned_samples)
+    assert cp_sample_keys == {("root_1", "pb_1"), ("root_3", "pb_3"), ("root_5", "pb_4"), ("root_6", "pb_5")}
 
 
-# ----- get_cherrypicked_samples_by_date tests -----
+# ----- get_cherrypicked_sample_keys_by_date tests -----
 
 
-def test_get_cherrypicked_samples_by_date_not_raises_with_error_creating_engine(config):
-    with patch(
-        "crawler.helpers.cherrypicked_samples.sqlalchemy.create_engine",
-        side_effect=ValueError("Boom!"),
-    ):
-        assert get_cherrypicked_samples_by_date(config, [], [], "1970-01-01 00:00:01", V0_V1_CUTOFF_TIMESTAMP) is None
-
-
-def test_get_cherrypicked_samples_by_date_not_raises_with_error_connecting(config):
+def test_get_cherrypicked_sample_keys_by_date_passes_the_dates(config):
     with patch("crawler.helpers.cherrypicked_samples.sqlalchemy.create_engine") as mock_sql_engine:
-        mock_sql_engine().connect.side_effect = ValueError("Boom!")
+        db_connection = mock_sql_engine.return_value.connect.return_value.execution_options.return_value
+        db_connection.exec_driver_sql.return_value.mappings.return_value = [
+            {FIELD_ROOT_SAMPLE_ID: "MCM001", FIELD_PLATE_BARCODE: "123"}
+        ]
 
-        assert get_cherrypicked_samples_by_date(config, [], [], "1970-01-01 00:00:01", V0_V1_CUTOFF_TIMESTAMP) is None
+        cp_sample_keys = get_cherrypicked_sample_keys_by_date(
+            config, ["MCM001"], ["123"], "1970-01-01 00:00:01", V0_V1_CUTOFF_TIMESTAMP
+        )
+
+    assert cp_sample_keys == {("MCM001", "123")}
+    params = db_connection.exec_driver_sql.call_args.args[1]
+    assert params["start_date"] == "1970-01-01 00:00:01"
+    assert params["end_date"] == V0_V1_CUTOFF_TIMESTAMP
 
 
-def test_get_cherrypicked_samples_by_date_v0_returns_expected(config, event_wh_data, mlwh_sentinel_cherrypicked):
+def test_get_cherrypicked_sample_keys_by_date_v0_returns_expected(config, event_wh_data, mlwh_sentinel_cherrypicked):
     root_sample_ids = ["root_1", "root_2", "root_3", "root_4"]
     plate_barcodes = ["pb_1", "pb_2", "pb_3", "pb_4"]
 
-    expected_rows = [["root_2", "pb_2"]]
-    expected_columns = [FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE]
-    expected = pd.DataFrame(np.array(expected_rows), columns=expected_columns, index=[0])
-
-    returned_samples = get_cherrypicked_samples_by_date(
+    cp_sample_keys = get_cherrypicked_sample_keys_by_date(
         config, root_sample_ids, plate_barcodes, "1970-01-01 00:00:01", V0_V1_CUTOFF_TIMESTAMP
     )
-    pd.testing.assert_frame_equal(expected, returned_samples)
 
+    assert cp_sample_keys == {("root_2", "pb_2")}
 
-def test_get_cherrypicked_samples_by_date_v1_returns_expected(config, event_wh_data, mlwh_sentinel_cherrypicked):
+
+def test_get_cherrypicked_sample_keys_by_date_v1_returns_expected(config, event_wh_data, mlwh_sentinel_cherrypicked):
     root_sample_ids = ["root_1", "root_2", "root_3", "root_4"]
     plate_barcodes = ["pb_1", "pb_2", "pb_3", "pb_4"]
 
-    expected_rows = [["root_1", "pb_1"], ["root_3", "pb_3"]]
-    expected_columns = [FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE]
-    expected = pd.DataFrame(np.array(expected_rows), columns=expected_columns, index=[0, 1])
-
-    returned_samples = get_cherrypicked_samples_by_date(
+    cp_sample_keys = get_cherrypicked_sample_keys_by_date(
         config, root_sample_ids, plate_barcodes, V0_V1_CUTOFF_TIMESTAMP, V1_V2_CUTOFF_TIMESTAMP
     )
-    pd.testing.assert_frame_equal(expected, returned_samples)
+
+    assert cp_sample_keys == {("root_1", "pb_1"), ("root_3", "pb_3")}
 
 
 # ----- test filter_out_cherrypicked_samples method -----
@@ -451,29 +357,25 @@ def test_filter_out_cherrypicked_samples_throws_for_error_extracting_required_cp
 
 
 def test_filter_out_cherrypicked_samples_throws_for_error_getting_cherrypicked_samples(config, testing_samples):
-    with patch("crawler.helpers.cherrypicked_samples.get_cherrypicked_samples", side_effect=MockedError("Boom!")):
+    with patch("crawler.helpers.cherrypicked_samples.get_cherrypicked_sample_keys", side_effect=MockedError("Boom!")):
         with pytest.raises(MockedError):
             filter_out_cherrypicked_samples(config, testing_samples)
 
 
 def test_filter_out_cherrypicked_samples_returns_input_samples_with_none_cp_samples_df(config, testing_samples):
-    with patch("crawler.helpers.cherrypicked_samples.get_cherrypicked_samples", return_value=None):
+    with patch("crawler.helpers.cherrypicked_samples.get_cherrypicked_sample_keys", return_value=None):
         with pytest.raises(ConnectionError):
             filter_out_cherrypicked_samples(config, testing_samples)
 
 
 def test_filter_out_cherrypicked_samples_returns_input_samples_with_empty_cp_samples_df(config, testing_samples):
-    cp_samples_df = MagicMock()
-    type(cp_samples_df).empty = PropertyMock(return_value=True)
-    with patch("crawler.helpers.cherrypicked_samples.get_cherrypicked_samples", return_value=cp_samples_df):
+    with patch("crawler.helpers.cherrypicked_samples.get_cherrypicked_sample_keys", return_value=set()):
         result = filter_out_cherrypicked_samples(config, testing_samples)
         assert result == testing_samples
 
 
 def test_filter_out_cherrypicked_samples_throws_for_error_removing_cp_samples(config, testing_samples):
-    cp_samples_df = MagicMock()
-    type(cp_samples_df).empty = PropertyMock(return_value=False)
-    with patch("crawler.helpers.cherrypicked_samples.get_cherrypicked_samples", return_value=cp_samples_df):
+    with patch("crawler.helpers.cherrypicked_samples.get_cherrypicked_sample_keys", return_value={("MCM001", "123")}):
         with patch(
             "crawler.helpers.cherrypicked_samples.remove_cherrypicked_samples", side_effect=MockedError("Boom!")
         ):
@@ -482,9 +384,7 @@ def test_filter_out_cherrypicked_samples_throws_for_error_removing_cp_samples(co
 
 
 def test_filter_out_cherrypicked_samples_returns_non_cp_samples(config, testing_samples):
-    cp_samples_df = MagicMock()
-    type(cp_samples_df).empty = PropertyMock(return_value=False)
-    with patch("crawler.helpers.cherrypicked_samples.get_cherrypicked_samples", return_value=cp_samples_df):
+    with patch("crawler.helpers.cherrypicked_samples.get_cherrypicked_sample_keys", return_value={("MCM001", "123")}):
         with patch("crawler.helpers.cherrypicked_samples.remove_cherrypicked_samples", return_value=testing_samples):
             result = filter_out_cherrypicked_samples(config, [])
             assert result == testing_samples
@@ -0,0 +1,160 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from crawler.constants import (
+    CENTRE_KEY_PREFIX,
+    COLLECTION_COG_UK_IDS,
+    FIELD_COG_UK_ID,
+    FIELD_PREFIX,
+    FIELD_RESERVATION_ID,
+)
+from crawler.db.mongo import get_mongo_collection
+from crawler.exceptions import BaracodaError
+from crawler.helpers.cog_uk_id_pool import (
+    add_cog_uk_ids_to_pool,
+    count_available_cog_uk_ids,
+    refill_cog_uk_id_pool,
+    refill_cog_uk_id_pools,
+    reserve_cog_uk_ids,
+    reserve_cog_uk_ids_from_pool,
+)
+
+PREFIX = "TEST"
+
+barcode_index = itertools.count()
+
+
+def generate_barcodes(config, prefix, count):
+    return [f"{prefix}-{next(barcode_index)}" for _ in range(count)]
+
+
+@pytest.fixture
+def cog_uk_ids_collection(mongo_database):
+    _, mongo_database = mongo_database
+
+    return get_mongo_collection(mongo_database, COLLECTION_COG_UK_IDS)
+
+
+def test_add_cog_uk_ids_to_pool(mongo_database, cog_uk_ids_collection):
+    _, mongo_database = mongo_database
+
+    add_cog_uk_ids_to_pool(mongo_database, PREFIX, ["TEST-1", "TEST-2"])
+    add_cog_uk_ids_to_pool(mongo_database, "OTHER", ["OTHER-1"])
+    add_cog_uk_ids_to_pool(mongo_database, PREFIX, [])
+
+    assert count_available_cog_uk_ids(mongo_database, PREFIX) == 2
+    assert count_available_cog_uk_ids(mongo_database, "OTHER") == 1
+    assert cog_uk_ids_collection.find_one({FIELD_COG_UK_ID: "TEST-1"})[FIELD_RESERVATION_ID] is None
+
+
+def test_reserve_cog_uk_ids_from_pool_removes_the_ids_from_the_pool(mongo_database, cog_uk_ids_collection):
+    _, mongo_database = mongo_database
+    add_cog_uk_ids_to_pool(mongo_database, PREFIX, [f"TEST-{i}" for i in range(5)])
+    add_cog_uk_ids_to_pool(mongo_database, "OTHER", ["OTHER-1"])
+
+    assert reserve_cog_uk_ids_from_pool(mongo_database, PREFIX, 3) == ["TEST-0", "TEST-1", "TEST-2"]
+    assert reserve_cog_uk_ids_from_pool(mongo_database, PREFIX, 3) == ["TEST-3", "TEST-4"]
+    assert reserve_cog_uk_ids_from_pool(mongo_database, PREFIX, 3) == []
+
+    assert cog_uk_ids_collection.count_documents({FIELD_PREFIX: PREFIX}) == 0
+    assert count_available_cog_uk_ids(mongo_database, "OTHER") == 1
+
+
+def test_reserve_cog_uk_ids_from_pool_skips_ids_reserved_by_another_reservation(mongo_database, cog_uk_ids_collection):
+    _, mongo_database = mongo_database
+    add_cog_uk_ids_to_pool(mongo_database, PREFIX, [f"TEST-{i}" for i in range(5)])
+
+    update_many = cog_uk_ids_collection.update_many
+    stolen_ids: List[str] = []
+
+    def reserve_concurrently(*args, **kwargs):
+        # another reservation claims the first two of the IDs found, in between them being found and claimed
+        if mock_update_many.call_count == 1:
+            stolen_ids.extend(reserve_cog_uk_ids_from_pool(mongo_database, PREFIX, 2))
+
+        return update_many(*args, **kwargs)
+
+    with patch("crawler.helpers.cog_uk_id_pool.get_mongo_collection", return_value=cog_uk_ids_collection):
+        with patch.object(cog_uk_ids_collection, "update_many", side_effect=reserve_concurrently) as mock_update_many:
+            reserved_ids = reserve_cog_uk_ids_from_pool(mongo_database, PREFIX, 3)
+
+    assert stolen_ids == ["TEST-0", "TEST-1"]
+    assert reserved_ids == ["TEST-2", "TEST-3", "TEST-4"]
+
+
+def test_reserve_cog_uk_ids_from_pool_never_gives_concurrent_reservations_the_same_id(mongo_database):
+    _, mongo_database = mongo_database
+    add_cog_uk_ids_to_pool(mongo_database, PREFIX, [f"TEST-{i}" for i in range(100)])
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        reservations = list(executor.map(lambda _: reserve_cog_uk_ids_from_pool(mongo_database, PREFIX, 10), range(12)))
+
+    reserved_ids = [cog_uk_id for reservation in reservations for cog_uk_id in reservation]
+    assert len(reserved_ids) == 100
+    assert len(set(reserved_ids)) == 100
+
+
+def test_reserve_cog_uk_ids_uses_the_pool(config, mongo_database):
+    _, mongo_database = mongo_database
+    add_cog_uk_ids_to_pool(mongo_database, PREFIX, ["TEST-1", "TEST-2"])
+
+    with patch("crawler.helpers.cog_uk_id_pool.generate_baracoda_barcodes") as generate_barcodes:
+        assert reserve_cog_uk_ids(config, mongo_database, PREFIX, 2) == ["TEST-1", "TEST-2"]
+
+    generate_barcodes.assert_not_called()
+
+
+def test_reserve_cog_uk_ids_requests_the_shortfall_from_baracoda(config, mongo_database):
+    _, mongo_database = mongo_database
+    add_cog_uk_ids_to_pool(mongo_database, PREFIX, ["TEST-1"])
+
+    with patch(
+        "crawler.helpers.cog_uk_id_pool.generate_baracoda_barcodes", return_value=["TEST-2", "TEST-3"]
+    ) as generate_barcodes:
+        assert reserve_cog_uk_ids(config, mongo_database, PREFIX, 3) == ["TEST-1", "TEST-2", "TEST-3"]
+
+    generate_barcodes.assert_called_once_with(config, PREFIX, 2)
+
+
+@pytest.mark.parametrize(
+    "available_count, expected_batch_sizes", [[0, [4, 4, 2]], [3, [4, 3]], [4, [4, 2]], [5, []], [8, []]]
+)
+def test_refill_cog_uk_id_pool_tops_up_below_the_low_water_mark(
+    config, mongo_database, available_count, expected_batch_sizes
+):
+    _, mongo_database = mongo_database
+    add_cog_uk_ids_to_pool(mongo_database, PREFIX, [f"POOL-{i}" for i in range(available_count)])
+
+    # the test config has a pool size of 10, a low water mark of 5 and refills in batches of 4
+    with patch(
+        "crawler.helpers.cog_uk_id_pool.generate_baracoda_barcodes", side_effect=generate_barcodes
+    ) as mock_generate_barcodes:
+        added_count = refill_cog_uk_id_pool(config, mongo_database, PREFIX)
+
+    assert [call.args[2] for call in mock_generate_barcodes.call_args_list] == expected_batch_sizes
+    assert added_count == sum(expected_batch_sizes)
+
+    assert count_available_cog_uk_ids(mongo_database, PREFIX) == available_count + added_count
+
+
+def test_refill_cog_uk_id_pools_continues_after_a_failure(config, mongo_database):
+    _, mongo_database = mongo_database
+    centres = [{CENTRE_KEY_PREFIX: "BAD"}, {CENTRE_KEY_PREFIX: PREFIX}, {CENTRE_KEY_PREFIX: PREFIX}]
+
+    def generate_barcodes_or_fail(config, prefix, count):
+        if prefix == "BAD":
+            raise BaracodaError("Boom!")
+
+        return generate_barcodes(config, prefix, count)
+
+    with patch("crawler.helpers.cog_uk_id_pool.generate_baracoda_barcodes", side_effect=generate_barcodes_or_fail):
+        with patch("crawler.helpers.cog_uk_id_pool.logger") as logger:
+            refill_cog_uk_id_pools(config, mongo_database, centres)  # type: ignore
+
+    logger.exception.assert_called_once()
+    assert count_available_cog_uk_ids(mongo_database, "BAD") == 0
+    assert count_available_cog_uk_ids(mongo_database, PREFIX) == config.COG_UK_ID_POOL_SIZE
@@ -6,9 +6,12 @@ import pytest
 from crawler.constants import (
     CENTRE_KEY_NAME,
     COLLECTION_CENTRES,
+    COLLECTION_DART_EXPORTS,
+    COLLECTION_FILE_CHECKSUMS,
     COLLECTION_SAMPLES,
     COLLECTION_SOURCE_PLATES,
     FIELD_BARCODE,
+    FIELD_DART_EXPORT_NEXT_ATTEMPT_AT,
     FIELD_LH_SAMPLE_UUID,
     FIELD_LH_SOURCE_PLATE_UUID,
     FIELD_MONGO_LAB_ID,
@@ -17,10 +20,13 @@ from crawler.constants import (
     FIELD_MONGO_ROOT_SAMPLE_ID,
     FIELD_MONGODB_ID,
     FIELD_PLATE_BARCODE,
+    FIELD_STATUS,
 )
 from crawler.helpers.db_helpers import (
+    create_mongo_file_checksum_record,
     create_mongo_import_record,
     ensure_mongo_collections_indexed,
+    get_mongo_file_checksum_records,
     populate_mongo_collection,
     samples_filtered_for_duplicates_in_mongo,
 )
@@ -60,6 +66,15 @@ def test_ensure_mongo_collections_indexed_adds_correct_indexes_to_samples(mongo_
     ]
 
 
+def test_ensure_mongo_collections_indexed_adds_correct_indexes_to_dart_exports(mongo_database):
+    _, mongo_database = mongo_database
+
+    ensure_mongo_collections_indexed(mongo_database)
+
+    dart_exports_indexes = mongo_database[COLLECTION_DART_EXPORTS].index_information()
+    assert list(dart_exports_indexes.keys()) == ["_id_", f"{FIELD_STATUS}_1_{FIELD_DART_EXPORT_NEXT_ATTEMPT_AT}_1"]
+
+
 def test_create_mongo_import_record(freezer, mongo_database):
     config, mongo_database = mongo_database
     import_collection = mongo_database["imports"]
@@ -83,6 +98,34 @@ def test_create_mongo_import_record(freezer, mongo_database):
         assert import_doc["errors"] == error_collection.get_messages_for_import()
 
 
+def test_create_mongo_file_checksum_record_keeps_one_record_per_backup_dir(mongo_database):
+    config, mongo_database = mongo_database
+    file_checksums_collection = mongo_database[COLLECTION_FILE_CHECKSUMS]
+    centre = config.CENTRES[0]
+
+    create_mongo_file_checksum_record(
+        file_checksums_collection, centre, "abc", "errors", "a.csv", "200601_1414_a.csv_abc"
+    )
+    create_mongo_file_checksum_record(
+        file_checksums_collection, centre, "abc", "errors", "b.csv", "200602_1414_b.csv_abc"
+    )
+    create_mongo_file_checksum_record(
+        file_checksums_collection, centre, "abc", "successes", "a.csv", "200603_1414_a.csv_abc"
+    )
+
+    assert file_checksums_collection.count_documents({}) == 2
+
+    records = {
+        record["backup_dir"]: record
+        for record in get_mongo_file_checksum_records(file_checksums_collection, centre, "abc")
+    }
+
+    assert records["errors"]["file_name"] == "b.csv"
+    assert records["errors"]["backup_file_name"] == "200602_1414_b.csv_abc"
+    assert records["successes"]["file_name"] == "a.csv"
+    assert list(get_mongo_file_checksum_records(file_checksums_collection, config.CENTRES[1], "abc")) == []
+
+
 def test_populate_mongo_collection_inserts_documents(mongo_database):
     _, mongo_database = mongo_database
     centres_collection = mongo_database[COLLECTION_CENTRES]
@@ -133,3 +176,38 @@ def test_samples_filtered_for_duplicates_in_mongo(samples_collection_accessor):
     duplicates = samples_filtered_for_duplicates_in_mongo(samples_collection_accessor, MONGO_SAMPLES)
 
     assert duplicates == MONGO_SAMPLES[0:4]
+
+
+@pytest.mark.parametrize("samples_collection_accessor", [MONGO_SAMPLES[2:4]], indirect=True)
+def test_samples_filtered_for_duplicates_in_mongo_keeps_the_order_of_the_samples(samples_collection_accessor):
+    samples = list(reversed(MONGO_SAMPLES))
+
+    duplicates = samples_filtered_for_duplicates_in_mongo(samples_collection_accessor, samples)
+
+    assert duplicates == [MONGO_SAMPLES[3], MONGO_SAMPLES[2]]
+
+
+@pytest.mark.parametrize("samples_collection_accessor", [MONGO_SAMPLES[0:1]], indirect=True)
+def test_samples_filtered_for_duplicates_in_mongo_matches_all_the_fields_of_the_unique_index(
+    samples_collection_accessor,
+):
+    # each sample shares the root sample ID of the one in mongo, but differs in one of the other fields
+    samples = [
+        {**MONGO_SAMPLES[0], field: "OTHER"} for field in (FIELD_MONGO_LAB_ID, FIELD_MONGO_RNA_ID, FIELD_MONGO_RESULT)
+    ]
+
+    assert samples_filtered_for_duplicates_in_mongo(samples_collection_accessor, samples) == []
+
+
+@pytest.mark.parametrize(
+    "samples_collection_accessor",
+    [[{FIELD_MONGO_ROOT_SAMPLE_ID: "RSID0", FIELD_MONGO_RESULT: "RESULT0"}]],
+    indirect=True,
+)
+def test_samples_filtered_for_duplicates_in_mongo_with_samples_in_mongo_missing_fields(samples_collection_accessor):
+    # an older sample in mongo sharing the root sample ID, without a lab ID or RNA ID, is not a duplicate
+    assert samples_filtered_for_duplicates_in_mongo(samples_collection_accessor, MONGO_SAMPLES[0:1]) == []
+
+
+def test_samples_filtered_for_duplicates_in_mongo_with_no_samples(samples_collection_accessor):
+    assert samples_filtered_for_duplicates_in_mongo(samples_collection_accessor, []) == []
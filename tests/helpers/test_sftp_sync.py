@@ -0,0 +1,121 @@
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from crawler.helpers.sftp_sync import (
+    RemoteFile,
+    download_files,
+    is_downloaded,
+    read_manifest,
+    remote_file_from_attributes,
+    write_manifest,
+)
+
+REMOTE_FILES = [RemoteFile(f"AP_sanger_report_200423_221{i}.csv", 5, 1587679200 + i) for i in range(4)]
+
+
+@pytest.fixture
+def sftp():
+    sftp = MagicMock()
+    transport = sftp.sftp_client.get_channel.return_value.get_transport.return_value
+    sftp_client = transport.open_sftp_client.return_value.__enter__.return_value
+
+    def get(remote_path, local_path):
+        with open(local_path, "w") as local_file:
+            local_file.write(os.path.basename(remote_path)[:5])
+
+    sftp_client.get.side_effect = get
+
+    return sftp
+
+
+def test_remote_file_from_attributes():
+    attributes = MagicMock(filename="AP_sanger_report_200423_2214.csv", st_size=123, st_mtime=1587679200)
+
+    assert remote_file_from_attributes(attributes) == RemoteFile("AP_sanger_report_200423_2214.csv", 123, 1587679200)
+
+
+def test_write_manifest_can_be_read(tmpdir):
+    manifest_path = os.path.join(tmpdir, "manifest.json")
+
+    write_manifest(manifest_path, REMOTE_FILES)
+
+    assert read_manifest(manifest_path) == {remote_file.name: remote_file for remote_file in REMOTE_FILES}
+    assert not os.path.exists(f"{manifest_path}.tmp")
+
+
+@pytest.mark.parametrize("contents", [None, "", "not json", '{"file.csv": 5}'])
+def test_read_manifest_is_empty_when_missing_or_unreadable(tmpdir, contents):
+    manifest_path = os.path.join(tmpdir, "manifest.json")
+    if contents is not None:
+        with open(manifest_path, "w") as manifest_file:
+            manifest_file.write(contents)
+
+    assert read_manifest(manifest_path) == {}
+
+
+def test_is_downloaded(tmpdir):
+    remote_file = REMOTE_FILES[0]
+    manifest = {remote_file.name: remote_file}
+
+    # not downloaded yet
+    assert not is_downloaded(remote_file, manifest, tmpdir)
+
+    with open(os.path.join(tmpdir, remote_file.name), "w") as local_file:
+        local_file.write("12345")
+
+    assert is_downloaded(remote_file, manifest, tmpdir)
+    # changed on the server since downloaded
+    assert not is_downloaded(remote_file._replace(mtime=remote_file.mtime + 1), manifest, tmpdir)
+    assert not is_downloaded(remote_file._replace(size=6), manifest, tmpdir)
+    # not in the manifest
+    assert not is_downloaded(remote_file, {}, tmpdir)
+
+
+def test_download_files_downloads_every_file(tmpdir, sftp):
+    downloaded = download_files(sftp, "/sftp/", tmpdir, REMOTE_FILES, 3)
+
+    assert sorted(downloaded) == REMOTE_FILES
+    assert sorted(os.listdir(tmpdir)) == [remote_file.name for remote_file in REMOTE_FILES]
+
+    transport = sftp.sftp_client.get_channel.return_value.get_transport.return_value
+    assert transport.open_sftp_client.call_count == 3
+    sftp_client = transport.open_sftp_client.return_value.__enter__.return_value
+    assert sorted(call.args[0] for call in sftp_client.get.call_args_list) == [
+        f"/sftp/{remote_file.name}" for remote_file in REMOTE_FILES
+    ]
+
+
+def test_download_files_opens_no_more_channels_than_files(tmpdir, sftp):
+    download_files(sftp, "/sftp", tmpdir, REMOTE_FILES[:1], 4)
+
+    transport = sftp.sftp_client.get_channel.return_value.get_transport.return_value
+    transport.open_sftp_client.assert_called_once()
+
+
+def test_download_files_leaves_no_partial_file_when_a_download_fails(tmpdir, sftp):
+    sftp_client = sftp.sftp_client.get_channel.return_value.get_transport.return_value.open_sftp_client.return_value
+    get = sftp_client.__enter__.return_value.get.side_effect
+
+    def get_failing_second_file(remote_path, local_path):
+        get(remote_path, local_path)
+        if remote_path.endswith(REMOTE_FILES[1].name):
+            raise OSError("Boom!")
+
+    sftp_client.__enter__.return_value.get.side_effect = get_failing_second_file
+
+    downloaded = download_files(sftp, "/sftp", tmpdir, REMOTE_FILES, 1)
+
+    assert downloaded == [REMOTE_FILES[0], *REMOTE_FILES[2:]]
+    assert sorted(os.listdir(tmpdir)) == [remote_file.name for remote_file in downloaded]
+
+
+def test_download_files_leaves_the_files_of_a_channel_which_cannot_be_opened_to_the_others(tmpdir, sftp):
+    transport = sftp.sftp_client.get_channel.return_value.get_transport.return_value
+    sftp_client = transport.open_sftp_client.return_value
+    transport.open_sftp_client.side_effect = [OSError("Boom!"), sftp_client]
+
+    downloaded = download_files(sftp, "/sftp", tmpdir, REMOTE_FILES, 2)
+
+    assert sorted(downloaded) == REMOTE_FILES
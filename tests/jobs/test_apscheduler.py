@@ -0,0 +1,39 @@
+from unittest.mock import ANY, MagicMock, patch
+
+import pytest
+
+from crawler import schedule_cog_uk_id_pools_refill
+from crawler.constants import SCHEDULER_JOB_ID_REFILL_COG_UK_ID_POOLS
+from crawler.jobs.apscheduler import scheduled_cog_uk_id_pools_refill
+
+
+def test_scheduled_cog_uk_id_pools_refill(config):
+    with patch("crawler.jobs.apscheduler.get_config", return_value=(config, None)):
+        with patch("crawler.jobs.apscheduler.get_centres_config", return_value=config.CENTRES):
+            with patch("crawler.jobs.apscheduler.refill_cog_uk_id_pools") as refill_pools:
+                scheduled_cog_uk_id_pools_refill()
+
+    refill_pools.assert_called_once_with(config, ANY, config.CENTRES)
+
+
+@pytest.mark.parametrize(
+    "scheduler_run, cog_uk_id_pool, scheduled",
+    [[True, True, True], [True, False, False], [False, True, False]],
+)
+def test_schedule_cog_uk_id_pools_refill(config, scheduler_run, cog_uk_id_pool, scheduled):
+    app = MagicMock(config={"SCHEDULER_RUN": scheduler_run})
+
+    with patch.object(config, "COG_UK_ID_POOL", cog_uk_id_pool):
+        with patch("crawler.scheduler") as scheduler:
+            schedule_cog_uk_id_pools_refill(app, config)
+
+    if scheduled:
+        scheduler.add_job.assert_called_once_with(
+            id=SCHEDULER_JOB_ID_REFILL_COG_UK_ID_POOLS,
+            func="crawler.jobs.apscheduler:scheduled_cog_uk_id_pools_refill",
+            trigger="interval",
+            minutes=5,
+            replace_existing=True,
+        )
+    else:
+        scheduler.add_job.assert_not_called()
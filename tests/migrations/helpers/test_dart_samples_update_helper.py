@@ -2,7 +2,6 @@ import uuid
 from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
 
-import pandas as pd
 import pytest
 
 from crawler.constants import (
@@ -332,15 +331,11 @@ def test_migrate_all_dbs_with_cherry_picked_samples_mocked(
 
     assert mongo_db.samples.count_documents({}) == 8
 
-    cherry_picked_sample = {
-        FIELD_ROOT_SAMPLE_ID: [test_samples[0][FIELD_ROOT_SAMPLE_ID]],
-        FIELD_PLATE_BARCODE: [test_samples[0][FIELD_PLATE_BARCODE]],
-    }
-
-    cherry_picked_df = pd.DataFrame.from_dict(cherry_picked_sample)
+    cherry_picked_sample_keys = {(test_samples[0][FIELD_ROOT_SAMPLE_ID], test_samples[0][FIELD_PLATE_BARCODE])}
 
     with patch(
-        "migrations.helpers.dart_samples_update_helper.get_cherrypicked_samples", side_effect=[cherry_picked_df]
+        "migrations.helpers.dart_samples_update_helper.get_cherrypicked_sample_keys",
+        side_effect=[cherry_picked_sample_keys],
     ):
         with patch(
             "migrations.helpers.dart_samples_update_helper.remove_cherrypicked_samples"
@@ -349,9 +344,7 @@ def test_migrate_all_dbs_with_cherry_picked_samples_mocked(
 
             samples = get_samples(mongo_db.samples, start_datetime, end_datetime)
 
-            mock_remove_cherrypicked_samples.assert_called_once_with(
-                samples, [[cherry_picked_sample[FIELD_ROOT_SAMPLE_ID][0], cherry_picked_sample[FIELD_PLATE_BARCODE][0]]]
-            )
+            mock_remove_cherrypicked_samples.assert_called_once_with(samples, cherry_picked_sample_keys)
 
 
 def test_migrate_all_dbs_remove_cherrypicked_samples(config, mongo_database, mock_update_dart):
@@ -1,4 +1,12 @@
-from migrations.helpers.shared_helper import extract_barcodes, valid_datetime_string
+from bson.objectid import ObjectId
+
+from migrations.helpers.shared_helper import (
+    clear_migration_checkpoint,
+    extract_barcodes,
+    get_migration_checkpoint,
+    save_migration_checkpoint,
+    valid_datetime_string,
+)
 
 # ----- valid_datetime_string tests -----
 
@@ -18,3 +26,37 @@ def test_extract_barcodes_read_barcodes():
     filepath = "./tests/data/populate_old_plates_2.csv"
 
     assert extract_barcodes(filepath) == ["123", "456"]
+
+
+# ----- migration checkpoint tests -----
+
+
+def test_get_migration_checkpoint_returns_the_last_saved_id(mongo_database):
+    _, db = mongo_database
+    parameters = {"version": "v2"}
+    last_id = ObjectId()
+
+    assert get_migration_checkpoint(db, "migration", parameters) is None
+
+    save_migration_checkpoint(db, "migration", parameters, ObjectId())
+    save_migration_checkpoint(db, "migration", parameters, last_id)
+
+    assert get_migration_checkpoint(db, "migration", parameters) == last_id
+    assert get_migration_checkpoint(db, "other migration", parameters) is None
+
+
+def test_get_migration_checkpoint_ignores_a_checkpoint_with_different_parameters(mongo_database):
+    _, db = mongo_database
+    save_migration_checkpoint(db, "migration", {"version": "v2"}, ObjectId())
+
+    assert get_migration_checkpoint(db, "migration", {"version": "v3"}) is None
+
+
+def test_clear_migration_checkpoint(mongo_database):
+    _, db = mongo_database
+    parameters = {"version": "v2"}
+    save_migration_checkpoint(db, "migration", parameters, ObjectId())
+
+    clear_migration_checkpoint(db, "migration")
+
+    assert get_migration_checkpoint(db, "migration", parameters) is None
@@ -1,13 +1,17 @@
+from collections import defaultdict
 from datetime import datetime
-from typing import List
+from typing import Counter, DefaultDict, List
 from unittest.mock import MagicMock, patch
 
 import pytest
+from bson.decimal128 import Decimal128
+from bson.objectid import ObjectId
 
 from crawler.constants import (
     CENTRE_KEY_BIOMEK_LABWARE_CLASS,
     CENTRE_KEY_NAME,
     DART_STATE_PENDING,
+    FIELD_CH1_CQ,
     FIELD_COORDINATE,
     FIELD_FILTERED_POSITIVE,
     FIELD_FILTERED_POSITIVE_TIMESTAMP,
@@ -30,16 +34,28 @@ from crawler.constants import (
     MLWH_ROOT_SAMPLE_ID,
     RESULT_VALUE_POSITIVE,
 )
-from crawler.sql_queries import SQL_DART_GET_PLATE_BARCODES
+from crawler.filtered_positive_identifier import FILTERED_POSITIVE_VERSION_2, FilteredPositiveIdentifierV3
+from crawler.sql_queries import SQL_DART_GET_PLATE_BARCODES, SQL_MLWH_MULTIPLE_FILTERED_POSITIVE_VERSION_UPDATE_BATCH
 from crawler.types import SampleDoc
 from migrations.helpers.update_filtered_positives_helper import (
+    FILTERED_POSITIVE_CHANGE_SAMPLES,
+    FILTERED_POSITIVE_CHANGE_TO_NEGATIVE,
+    FILTERED_POSITIVE_CHANGE_TO_POSITIVE,
+    FILTERED_POSITIVE_CHANGE_VERSION_ONLY,
+    FILTERED_POSITIVE_SAMPLE_PROJECTION,
     biomek_labclass_by_centre_name,
+    bulk_update_mongo_filtered_positive_fields,
+    changed_filtered_positive_samples,
+    count_filtered_positive_changes_by_centre,
+    diff_filtered_positive_samples,
     pending_plate_barcodes_from_dart,
-    positive_result_samples_from_mongo,
+    positive_result_sample_batches_from_mongo,
     update_dart_fields,
     update_filtered_positive_fields,
     update_mlwh_filtered_positive_fields,
+    update_mlwh_filtered_positive_version,
     update_mongo_filtered_positive_fields,
+    update_mongo_filtered_positive_version,
 )
 from tests.conftest import MockedError
 
@@ -52,12 +68,6 @@ def mock_dart_conn():
         yield mock_connect
 
 
-@pytest.fixture
-def mock_mongo_client():
-    with patch("migrations.helpers.update_filtered_positives_helper.create_mongo_client") as mock_client:
-        yield mock_client
-
-
 @pytest.fixture
 def mock_mongo_collection():
     with patch("migrations.helpers.update_filtered_positives_helper.get_mongo_collection") as mock_collection:
@@ -99,45 +109,93 @@ def test_pending_plate_barcodes_from_dart_returns_expected_plate_barcodes(config
     assert result == ["ABC123", "123ABC", "abcdef"]
 
 
-# ----- test positive_result_samples_from_mongo method -----
+# ----- test positive_result_sample_batches_from_mongo method -----
 
 
-def test_positive_result_samples_from_mongo_throws_for_errors_creating_client(config, mock_mongo_client):
-    mock_mongo_client.side_effect = MockedError("Boom!")
+def test_positive_result_sample_batches_from_mongo_throws_for_error_finding_samples():
+    samples_collection = MagicMock()
+    samples_collection.find.side_effect = MockedError("Boom!")
     with pytest.raises(MockedError):
-        positive_result_samples_from_mongo(config, [])
+        list(positive_result_sample_batches_from_mongo(samples_collection, []))
 
 
-def test_positive_result_samples_from_mongo_throws_for_error_creating_db(config):
-    with patch("migrations.helpers.update_filtered_positives_helper.get_mongo_db") as mongo_db:
-        mongo_db.side_effect = NotImplementedError("Boom!")
-        with pytest.raises(NotImplementedError):
-            positive_result_samples_from_mongo(config, [])
+def test_positive_result_sample_batches_from_mongo_returns_expected_samples(
+    samples_collection_accessor, testing_samples
+):
+    plate_barcodes = ["123"]
+    # only the first sample is positive, with matching plate barcode
+    expected_sample_ids = [testing_samples[0][FIELD_MONGODB_ID]]
 
+    result = list(positive_result_sample_batches_from_mongo(samples_collection_accessor, plate_barcodes))
 
-def test_positive_result_samples_from_mongo_throws_for_error_getting_collection(config, mock_mongo_collection):
-    mock_mongo_collection.side_effect = ValueError("Boom!")
-    with pytest.raises(ValueError):
-        positive_result_samples_from_mongo(config, [])
+    assert [[sample[FIELD_MONGODB_ID] for sample in batch] for batch in result] == [expected_sample_ids]
 
 
-def test_positive_result_samples_from_mongo_throws_for_error_finding_samples(config, mock_mongo_collection):
-    mock_mongo_collection().aggregate.side_effect = MockedError("Boom!")
-    with pytest.raises(MockedError):
-        positive_result_samples_from_mongo(config, [])
+def test_positive_result_sample_batches_from_mongo_returns_expected_samples_no_plate_barcodes(
+    samples_collection_accessor, testing_samples
+):
+    # only the first and last samples are positive
+    expected_sample_ids = [testing_samples[0][FIELD_MONGODB_ID], testing_samples[-1][FIELD_MONGODB_ID]]
 
+    result = list(positive_result_sample_batches_from_mongo(samples_collection_accessor, batch_size=1))
 
-def test_positive_result_samples_from_mongo_returns_expected_samples(config, testing_samples):
-    plate_barcodes = ["123"]
-    expected_samples = testing_samples[:1]  # only the first sample is positive, with matching plate barcode
-    result = positive_result_samples_from_mongo(config, plate_barcodes)
-    assert result == expected_samples
+    assert [[sample[FIELD_MONGODB_ID] for sample in batch] for batch in result] == [
+        [expected_sample_ids[0]],
+        [expected_sample_ids[1]],
+    ]
 
 
-def test_positive_result_samples_from_mongo_returns_expected_samples_no_plate_barcodes(config, testing_samples):
-    expected_samples = [testing_samples[0], testing_samples[-1]]  # only the first and last samples are positive
-    result = positive_result_samples_from_mongo(config)
-    assert result == expected_samples
+def test_positive_result_sample_batches_from_mongo_resumes_after_the_given_sample(
+    samples_collection_accessor, testing_samples
+):
+    result = list(
+        positive_result_sample_batches_from_mongo(
+            samples_collection_accessor, after_id=testing_samples[0][FIELD_MONGODB_ID]
+        )
+    )
+
+    assert [[sample[FIELD_MONGODB_ID] for sample in batch] for batch in result] == [
+        [testing_samples[-1][FIELD_MONGODB_ID]]
+    ]
+
+
+def test_positive_result_sample_batches_from_mongo_only_fetches_the_fields_needed(
+    samples_collection_accessor, testing_samples
+):
+    (batch,) = positive_result_sample_batches_from_mongo(samples_collection_accessor, ["123"])
+
+    assert set(batch[0]).issubset(FILTERED_POSITIVE_SAMPLE_PROJECTION)
+    assert batch[0][FIELD_ROOT_SAMPLE_ID] == testing_samples[0][FIELD_ROOT_SAMPLE_ID]
+
+
+def test_positive_result_sample_batches_from_mongo_only_fetches_samples_changed_by_the_identifier(
+    samples_collection_accessor,
+):
+    identifier = FilteredPositiveIdentifierV3()
+    version = identifier.version
+    samples: List[SampleDoc] = [
+        {FIELD_FILTERED_POSITIVE: True, FIELD_FILTERED_POSITIVE_VERSION: version},
+        {FIELD_FILTERED_POSITIVE: False, FIELD_FILTERED_POSITIVE_VERSION: version},
+        {FIELD_FILTERED_POSITIVE: True, FIELD_FILTERED_POSITIVE_VERSION: FILTERED_POSITIVE_VERSION_2},
+        {},
+        {FIELD_FILTERED_POSITIVE: True, FIELD_FILTERED_POSITIVE_VERSION: version, FIELD_CH1_CQ: Decimal128("31")},
+    ]
+    for index, sample in enumerate(samples):
+        sample.update(
+            {
+                FIELD_RESULT: RESULT_VALUE_POSITIVE,
+                FIELD_ROOT_SAMPLE_ID: f"MCM00{index}",
+                FIELD_PLATE_BARCODE: "123",
+                FIELD_CH1_CQ: sample.get(FIELD_CH1_CQ, Decimal128("24.5")),
+            }
+        )
+    samples_collection_accessor.insert_many(samples)
+
+    (batch,) = positive_result_sample_batches_from_mongo(samples_collection_accessor, changed_by=identifier)
+
+    # the fetched samples are those changed_filtered_positive_samples would change
+    assert [sample[FIELD_ROOT_SAMPLE_ID] for sample in batch] == ["MCM001", "MCM002", "MCM003", "MCM004"]
+    assert changed_filtered_positive_samples(identifier, batch, datetime.now()) == batch
 
 
 # ----- test update_filtered_positive_fields method -----
@@ -148,7 +206,7 @@ def test_update_filtered_positive_fields_assigns_expected_filtered_positive_fiel
     timestamp = datetime.now()
     version = "v2.3"
     mock_positive_identifier = MagicMock()
-    mock_positive_identifier.is_positive.return_value = True
+    mock_positive_identifier.classify_many.side_effect = lambda samples: [True] * len(samples)
     mock_positive_identifier.version = version
 
     update_filtered_positive_fields(mock_positive_identifier, samples, version, timestamp)
@@ -203,6 +261,151 @@ def test_update_mongo_filtered_positive_fields_updates_expected_samples(
         assert sample[FIELD_FILTERED_POSITIVE_TIMESTAMP] is not None
 
 
+# ----- test changed_filtered_positive_samples method -----
+
+
+def test_changed_filtered_positive_samples_only_returns_the_samples_which_changed():
+    version = "v2.3"
+    timestamp = datetime.now()
+    unchanged_sample: SampleDoc = {FIELD_FILTERED_POSITIVE: True, FIELD_FILTERED_POSITIVE_VERSION: version}
+    changed_value_sample: SampleDoc = {FIELD_FILTERED_POSITIVE: False, FIELD_FILTERED_POSITIVE_VERSION: version}
+    changed_version_sample: SampleDoc = {FIELD_FILTERED_POSITIVE: True, FIELD_FILTERED_POSITIVE_VERSION: "v2.2"}
+    new_sample: SampleDoc = {}
+    mock_positive_identifier = MagicMock()
+    mock_positive_identifier.classify_many.side_effect = lambda samples: [True] * len(samples)
+    mock_positive_identifier.version = version
+
+    result = changed_filtered_positive_samples(
+        mock_positive_identifier,
+        [unchanged_sample, changed_value_sample, changed_version_sample, new_sample],
+        timestamp,
+    )
+
+    assert result == [changed_value_sample, new_sample, changed_version_sample]
+    for sample in result:
+        assert sample[FIELD_FILTERED_POSITIVE] is True
+        assert sample[FIELD_FILTERED_POSITIVE_VERSION] == version
+        assert sample[FIELD_FILTERED_POSITIVE_TIMESTAMP] == timestamp
+
+    assert FIELD_FILTERED_POSITIVE_TIMESTAMP not in unchanged_sample
+
+
+# ----- test diff_filtered_positive_samples method -----
+
+
+def test_diff_filtered_positive_samples_separates_flipped_samples_from_version_only_changes():
+    version = "v2.3"
+    timestamp = datetime.now()
+    unchanged_sample: SampleDoc = {FIELD_FILTERED_POSITIVE: True, FIELD_FILTERED_POSITIVE_VERSION: version}
+    flipped_sample: SampleDoc = {FIELD_FILTERED_POSITIVE: False, FIELD_FILTERED_POSITIVE_VERSION: "v2.2"}
+    version_only_sample: SampleDoc = {FIELD_FILTERED_POSITIVE: True, FIELD_FILTERED_POSITIVE_VERSION: "v2.2"}
+    new_sample: SampleDoc = {}
+    mock_positive_identifier = MagicMock()
+    mock_positive_identifier.classify_many.side_effect = lambda samples: [True] * len(samples)
+    mock_positive_identifier.version = version
+
+    flipped_samples, version_only_samples = diff_filtered_positive_samples(
+        mock_positive_identifier, [unchanged_sample, flipped_sample, version_only_sample, new_sample], timestamp
+    )
+
+    assert flipped_samples == [flipped_sample, new_sample]
+    assert version_only_samples == [version_only_sample]
+    for sample in flipped_samples + version_only_samples:
+        assert sample[FIELD_FILTERED_POSITIVE] is True
+        assert sample[FIELD_FILTERED_POSITIVE_VERSION] == version
+        assert sample[FIELD_FILTERED_POSITIVE_TIMESTAMP] == timestamp
+
+    assert FIELD_FILTERED_POSITIVE_TIMESTAMP not in unchanged_sample
+
+
+# ----- test count_filtered_positive_changes_by_centre method -----
+
+
+def test_count_filtered_positive_changes_by_centre():
+    to_positive: SampleDoc = {FIELD_SOURCE: "Alderley", FIELD_FILTERED_POSITIVE: True}
+    to_negative: SampleDoc = {FIELD_SOURCE: "Alderley", FIELD_FILTERED_POSITIVE: False}
+    version_only: SampleDoc = {FIELD_SOURCE: "Alderley", FIELD_FILTERED_POSITIVE: True}
+    unchanged: SampleDoc = {FIELD_SOURCE: "Milton Keynes", FIELD_FILTERED_POSITIVE: True}
+    changes_by_centre: DefaultDict[str, Counter] = defaultdict(Counter)
+
+    count_filtered_positive_changes_by_centre(
+        changes_by_centre,
+        [to_positive, to_negative, version_only, unchanged],
+        [to_positive, to_negative],
+        [version_only],
+    )
+    count_filtered_positive_changes_by_centre(changes_by_centre, [to_positive], [to_positive], [])
+
+    assert changes_by_centre == {
+        "Alderley": {
+            FILTERED_POSITIVE_CHANGE_SAMPLES: 4,
+            FILTERED_POSITIVE_CHANGE_TO_POSITIVE: 2,
+            FILTERED_POSITIVE_CHANGE_TO_NEGATIVE: 1,
+            FILTERED_POSITIVE_CHANGE_VERSION_ONLY: 1,
+        },
+        "Milton Keynes": {FILTERED_POSITIVE_CHANGE_SAMPLES: 1},
+    }
+
+
+# ----- test bulk_update_mongo_filtered_positive_fields method -----
+
+
+def test_bulk_update_mongo_filtered_positive_fields_does_nothing_with_no_samples():
+    samples_collection = MagicMock()
+
+    assert bulk_update_mongo_filtered_positive_fields(samples_collection, []) == 0
+    samples_collection.bulk_write.assert_not_called()
+
+
+def test_bulk_update_mongo_filtered_positive_fields_updates_expected_samples(
+    samples_collection_accessor, testing_samples
+):
+    version = "v2.3"
+    timestamp = datetime.now()
+    updated_samples = testing_samples[:2]
+    updated_samples[0][FIELD_FILTERED_POSITIVE] = True
+    updated_samples[1][FIELD_FILTERED_POSITIVE] = False
+    for sample in updated_samples:
+        sample[FIELD_FILTERED_POSITIVE_VERSION] = version
+        sample[FIELD_FILTERED_POSITIVE_TIMESTAMP] = timestamp
+
+    result = bulk_update_mongo_filtered_positive_fields(samples_collection_accessor, updated_samples)
+
+    assert result == 2
+    assert samples_collection_accessor.count_documents({FIELD_FILTERED_POSITIVE_VERSION: version}) == 2
+    sample = samples_collection_accessor.find_one({FIELD_MONGODB_ID: updated_samples[0][FIELD_MONGODB_ID]})
+    assert sample[FIELD_FILTERED_POSITIVE] is True
+    assert sample[FIELD_FILTERED_POSITIVE_TIMESTAMP] is not None
+    sample = samples_collection_accessor.find_one({FIELD_MONGODB_ID: updated_samples[1][FIELD_MONGODB_ID]})
+    assert sample[FIELD_FILTERED_POSITIVE] is False
+
+
+# ----- test update_mongo_filtered_positive_version method -----
+
+
+def test_update_mongo_filtered_positive_version_does_nothing_with_no_samples():
+    samples_collection = MagicMock()
+
+    assert update_mongo_filtered_positive_version(samples_collection, [], "v2.3", datetime.now()) == 0
+    samples_collection.update_many.assert_not_called()
+
+
+def test_update_mongo_filtered_positive_version_updates_only_the_version_and_timestamp(
+    samples_collection_accessor, testing_samples
+):
+    version = "v2.3"
+    timestamp = datetime.now()
+    updated_samples = testing_samples[:2]
+
+    result = update_mongo_filtered_positive_version(samples_collection_accessor, updated_samples, version, timestamp)
+
+    assert result == 2
+    for sample in samples_collection_accessor.find({FIELD_FILTERED_POSITIVE_VERSION: version}):
+        assert sample[FIELD_MONGODB_ID] in [updated_sample[FIELD_MONGODB_ID] for updated_sample in updated_samples]
+        assert sample[FIELD_FILTERED_POSITIVE_TIMESTAMP] is not None
+        assert FIELD_FILTERED_POSITIVE not in sample
+
+
 # ----- test update_mlwh_filtered_positive_fields method -----
 
 
@@ -314,6 +517,36 @@ def test_update_mlwh_filtered_positive_fields_calls_to_update_samples(config, ml
     assert filtered_negative_sample[2] == update_timestamp
 
 
+# ----- test update_mlwh_filtered_positive_version method -----
+
+
+def test_update_mlwh_filtered_positive_version_return_false_with_no_connection(config):
+    with patch("migrations.helpers.update_filtered_positives_helper.create_mysql_connection") as mock_connection:
+        mock_connection().is_connected.return_value = False
+        result = update_mlwh_filtered_positive_version(config, [], "v2.3", datetime.now())
+        assert result is False
+
+
+def test_update_mlwh_filtered_positive_version_updates_the_samples_in_a_set_based_query(config):
+    timestamp = datetime.now()
+    sample_ids = [ObjectId(), ObjectId()]
+    samples: List[SampleDoc] = [{FIELD_MONGODB_ID: sample_id} for sample_id in sample_ids]
+
+    with patch("migrations.helpers.update_filtered_positives_helper.create_mysql_connection") as mock_connection:
+        with patch(
+            "migrations.helpers.update_filtered_positives_helper.run_mysql_execute_formatted_query"
+        ) as mock_execute_query:
+            result = update_mlwh_filtered_positive_version(config, samples, "v2.3", timestamp)
+
+    assert result is True
+    mock_execute_query.assert_called_once_with(
+        mock_connection(),
+        SQL_MLWH_MULTIPLE_FILTERED_POSITIVE_VERSION_UPDATE_BATCH,
+        [str(sample_id) for sample_id in sample_ids],
+        ["v2.3", timestamp, timestamp],
+    )
+
+
 # ----- test biomek_labclass_by_centre_name method -----
 
 
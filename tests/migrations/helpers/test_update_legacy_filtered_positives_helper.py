@@ -1,11 +1,9 @@
 from datetime import datetime
 from unittest.mock import patch
 
-import numpy as np
-import pandas as pd
 import pytest
 
-from crawler.constants import FIELD_PLATE_BARCODE, FIELD_ROOT_SAMPLE_ID, MONGO_DATETIME_FORMAT
+from crawler.constants import MONGO_DATETIME_FORMAT
 from crawler.filtered_positive_identifier import (
     FILTERED_POSITIVE_VERSION_0,
     FILTERED_POSITIVE_VERSION_1,
@@ -61,17 +59,8 @@ def test_filtered_positive_fields_set_returns_false_with_no_fields_set(
 # ----- split_mongo_samples_by_version tests -----
 
 
-def test_split_mongo_samples_by_version_empty_dataframes(mongo_samples_without_filtered_positive_fields):
-    cp_samples_df_v0 = pd.DataFrame(np.array([]))
-    cp_samples_df_v1 = pd.DataFrame(np.array([]))
-
-    # sanity check
-    assert cp_samples_df_v0.empty
-    assert cp_samples_df_v1.empty
-
-    samples_by_version = split_mongo_samples_by_version(
-        mongo_samples_without_filtered_positive_fields, cp_samples_df_v0, cp_samples_df_v1
-    )
+def test_split_mongo_samples_by_version_no_cherrypicked_samples(mongo_samples_without_filtered_positive_fields):
+    samples_by_version = split_mongo_samples_by_version(mongo_samples_without_filtered_positive_fields, set(), set())
 
     for version, samples in samples_by_version.items():
         if version == FILTERED_POSITIVE_VERSION_0 or version == FILTERED_POSITIVE_VERSION_1:
@@ -83,13 +72,8 @@ def test_split_mongo_samples_by_version_empty_dataframes(mongo_samples_without_f
 
 
 def test_split_mongo_samples_by_version(mongo_samples_without_filtered_positive_fields):
-    rows = [["MCM005", "456"], ["MCM006", "456"]]
-    columns = [FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE]
-    v0_cherrypicked_samples = pd.DataFrame(np.array(rows), columns=columns, index=[0, 1])
-
-    rows = [["MCM007", "456"]]
-    columns = [FIELD_ROOT_SAMPLE_ID, FIELD_PLATE_BARCODE]
-    v1_cherrypicked_samples = pd.DataFrame(np.array(rows), columns=columns, index=[0])
+    v0_cherrypicked_samples = {("MCM005", "456"), ("MCM006", "456")}
+    v1_cherrypicked_samples = {("MCM007", "456")}
 
     v0_unmigrated_samples = mongo_samples_without_filtered_positive_fields[1:3]
     v1_unmigrated_samples = mongo_samples_without_filtered_positive_fields[-1:]
@@ -0,0 +1,40 @@
+from unittest.mock import patch
+
+from crawler.constants import CENTRE_KEY_BACKUPS_FOLDER, COLLECTION_FILE_CHECKSUMS
+from crawler.db.mongo import get_mongo_collection
+from crawler.file_processing import ERRORS_DIR, SUCCESSES_DIR, Centre, CentreFile
+from migrations import rebuild_file_checksums as subject
+
+
+def test_rebuild_file_checksums_records_backed_up_files(config, mongo_database, tmpdir):
+    _, db = mongo_database
+    centre_config = config.CENTRES[0].copy()
+    centre_config[CENTRE_KEY_BACKUPS_FOLDER] = tmpdir.realpath()
+
+    tmpdir.mkdir(ERRORS_DIR).join("200601_1414_AP_sanger_report_200518_2132.csv_abc123").write("")
+    successes_folder = tmpdir.mkdir(SUCCESSES_DIR)
+    successes_folder.join("200601_1414_AP_sanger_report_200503_2338.csv_d204bd7747d9ad505eee901830448578").write("")
+    successes_folder.join("not_a_backup.txt").write("")
+
+    with patch.object(subject, "get_centres_config", return_value=[centre_config]):
+        subject.run(config)
+        # running again does not duplicate the records
+        subject.run(config)
+
+    file_checksums_collection = get_mongo_collection(db, COLLECTION_FILE_CHECKSUMS)
+    assert file_checksums_collection.count_documents({}) == 2
+    assert file_checksums_collection.count_documents({"backup_dir": ERRORS_DIR, "checksum": "abc123"}) == 1
+
+    centre_file = CentreFile("AP_sanger_report_200503_2338.csv", Centre(config, centre_config))
+    assert centre_file.checksum_match(SUCCESSES_DIR) is True
+
+
+def test_rebuild_file_checksums_skips_missing_backup_folders(config, mongo_database, tmpdir):
+    _, db = mongo_database
+    centre_config = config.CENTRES[0].copy()
+    centre_config[CENTRE_KEY_BACKUPS_FOLDER] = tmpdir.realpath()
+
+    with patch.object(subject, "get_centres_config", return_value=[centre_config]):
+        subject.run(config)
+
+    assert get_mongo_collection(db, COLLECTION_FILE_CHECKSUMS).count_documents({}) == 0
@@ -1,19 +1,34 @@
 from datetime import datetime, timezone
-from unittest.mock import MagicMock, PropertyMock, patch
+from unittest.mock import ANY, MagicMock, PropertyMock, patch
 
 import pytest
+from bson.objectid import ObjectId
 from lab_share_lib.config_readers import get_config
 
+from crawler.constants import (
+    COLLECTION_MIGRATION_CHECKPOINTS,
+    FIELD_FILTERED_POSITIVE,
+    FIELD_MONGODB_ID,
+    FIELD_SOURCE,
+)
+from crawler.db.mongo import get_mongo_collection
 from migrations import update_filtered_positives
+from migrations.helpers.shared_helper import get_migration_checkpoint, save_migration_checkpoint
 
 # ----- test fixture helpers -----
 
 
+@pytest.fixture(autouse=True)
+def checkpoints_collection(mongo_database):
+    _, db = mongo_database
+    yield get_mongo_collection(db, COLLECTION_MIGRATION_CHECKPOINTS)
+
+
 @pytest.fixture
 def mock_helper_imports():
     with patch("migrations.update_filtered_positives.pending_plate_barcodes_from_dart") as mock_get_plate_barcodes:
         with patch(
-            "migrations.update_filtered_positives.positive_result_samples_from_mongo"
+            "migrations.update_filtered_positives.positive_result_sample_batches_from_mongo"
         ) as mock_get_positive_samples:
             yield mock_get_plate_barcodes, mock_get_positive_samples
 
@@ -26,18 +41,31 @@ def mock_filter_out_cherrypicked_samples():
 
 @pytest.fixture
 def mock_update_positives():
-    with patch("migrations.update_filtered_positives.update_filtered_positive_fields") as mock_udpate:
+    with patch("migrations.update_filtered_positives.changed_filtered_positive_samples") as mock_udpate:
         yield mock_udpate
 
 
 @pytest.fixture
 def mock_helper_database_updates():
-    with patch("migrations.update_filtered_positives.update_mongo_filtered_positive_fields") as mock_update_mongo:
+    with patch("migrations.update_filtered_positives.bulk_update_mongo_filtered_positive_fields") as mock_update_mongo:
         with patch("migrations.update_filtered_positives.update_mlwh_filtered_positive_fields") as mock_update_mlwh:
             with patch("migrations.update_filtered_positives.update_dart_fields") as mock_update_dart:
                 yield mock_update_mongo, mock_update_mlwh, mock_update_dart
 
 
+@pytest.fixture
+def mock_identifier_version():
+    version = "v2.3"
+    mock_pos_id = MagicMock()
+    type(mock_pos_id).version = PropertyMock(return_value=version)
+    with patch("migrations.update_filtered_positives.current_filtered_positive_identifier", return_value=mock_pos_id):
+        yield version
+
+
+def positive_samples(*plate_barcodes):
+    return [{FIELD_MONGODB_ID: ObjectId(), "plate_barcode": plate_barcode} for plate_barcode in plate_barcodes]
+
+
 # ----- test migration -----
 
 
@@ -62,7 +90,7 @@ def test_update_filtered_positives_catches_error_fetching_pending_plate_barcodes
 def test_update_filtered_positives_aborts_with_no_pending_plate_barcodes(
     mock_helper_imports, mock_helper_database_updates
 ):
-    mock_get_plate_barcodes, _ = mock_helper_imports
+    mock_get_plate_barcodes, mock_get_positive_samples = mock_helper_imports
     mock_update_mongo, mock_update_mlwh, mock_update_dart = mock_helper_database_updates
 
     # mock to return no pending plate barcodes
@@ -71,7 +99,8 @@ def test_update_filtered_positives_aborts_with_no_pending_plate_barcodes(
     # call the migration
     update_filtered_positives.run("crawler.config.integration")
 
-    # ensure that no databases are updated
+    # ensure that no samples are fetched and no databases are updated
+    mock_get_positive_samples.assert_not_called()
     mock_update_mongo.assert_not_called()
     mock_update_mlwh.assert_not_called()
     mock_update_dart.assert_not_called()
@@ -109,7 +138,8 @@ def test_update_filtered_positives_aborts_with_no_positive_samples_fetched_from_
     # call the migration
     update_filtered_positives.run("crawler.config.integration")
 
-    # ensure that no databases are updated
+    # ensure that the samples of the pending plates are fetched, but no databases are updated
+    mock_get_positive_samples.assert_called_once_with(ANY, ["barcode with no matching sample"], None, changed_by=None)
     mock_update_mongo.assert_not_called()
     mock_update_mlwh.assert_not_called()
     mock_update_dart.assert_not_called()
@@ -118,7 +148,7 @@ def test_update_filtered_positives_aborts_with_no_positive_samples_fetched_from_
 def test_update_filtered_positives_omitting_dart_catches_error_pending_positive_samples(
     mock_helper_imports, mock_helper_database_updates
 ):
-    _, mock_get_positive_samples = mock_helper_imports
+    mock_get_plate_barcodes, mock_get_positive_samples = mock_helper_imports
     mock_update_mongo, mock_update_mlwh, mock_update_dart = mock_helper_database_updates
 
     # mock getting positive samples to throw
@@ -127,7 +157,8 @@ def test_update_filtered_positives_omitting_dart_catches_error_pending_positive_
     # call the migration
     update_filtered_positives.run("crawler.config.integration", True)
 
-    # ensure that no databases are updated
+    # ensure that DART is not queried and no databases are updated
+    mock_get_plate_barcodes.assert_not_called()
     mock_update_mongo.assert_not_called()
     mock_update_mlwh.assert_not_called()
     mock_update_dart.assert_not_called()
@@ -145,7 +176,8 @@ def test_update_filtered_positives_omitting_dart_aborts_with_no_positive_samples
     # call the migration
     update_filtered_positives.run("crawler.config.integration", True)
 
-    # ensure that no databases are updated
+    # ensure that all the positive samples are fetched, but no databases are updated
+    mock_get_positive_samples.assert_called_once_with(ANY, None, None, changed_by=None)
     mock_update_mongo.assert_not_called()
     mock_update_mlwh.assert_not_called()
     mock_update_dart.assert_not_called()
@@ -159,7 +191,7 @@ def test_update_filtered_positives_catches_error_removing_cherrypicked_samples(
 
     # mock removing cherrypicked samples to throw
     mock_get_plate_barcodes.return_value = ["123", "456"]
-    mock_get_positive_samples.return_value = [{"plate_barcode": "123"}, {"plate_barcode": "456"}]
+    mock_get_positive_samples.return_value = [positive_samples("123", "456")]
     mock_filter_out_cherrypicked_samples.side_effect = NotImplementedError("Boom!")
 
     # call the migration
@@ -171,16 +203,17 @@ def test_update_filtered_positives_catches_error_removing_cherrypicked_samples(
     mock_update_dart.assert_not_called()
 
 
-def test_update_filtered_positives_aborts_with_no_non_cherrypicked_samples(
-    mock_helper_imports, mock_filter_out_cherrypicked_samples, mock_helper_database_updates
+def test_update_filtered_positives_aborts_with_no_changed_samples(
+    mock_helper_imports, mock_filter_out_cherrypicked_samples, mock_update_positives, mock_helper_database_updates
 ):
     mock_get_plate_barcodes, mock_get_positive_samples = mock_helper_imports
     mock_update_mongo, mock_update_mlwh, mock_update_dart = mock_helper_database_updates
 
-    # mock removing cherrypicked samples to throw
+    # mock none of the non-cherrypicked samples changing
     mock_get_plate_barcodes.return_value = ["123", "456"]
-    mock_get_positive_samples.return_value = [{"plate_barcode": "123"}, {"plate_barcode": "456"}]
+    mock_get_positive_samples.return_value = [positive_samples("123", "456")]
     mock_filter_out_cherrypicked_samples.return_value = []
+    mock_update_positives.return_value = []
 
     # call the migration
     update_filtered_positives.run("crawler.config.integration")
@@ -199,7 +232,7 @@ def test_update_filtered_positives_catches_error_determining_filtered_positive_r
 
     # mock determining the filtered positive fields to throw
     mock_get_plate_barcodes.return_value = ["123", "456"]
-    mock_get_positive_samples.return_value = [{"plate_barcode": "123"}, {"plate_barcode": "456"}]
+    mock_get_positive_samples.return_value = [positive_samples("123", "456")]
     mock_filter_out_cherrypicked_samples.return_value = [{"plate_barcode": "123"}]
     mock_update_positives.side_effect = NotImplementedError("Boom!")
 
@@ -212,49 +245,7 @@ def test_update_filtered_positives_catches_error_determining_filtered_positive_r
     mock_update_dart.assert_not_called()
 
 
-def test_update_filtered_positives_catches_error_updating_samples_in_mongo(
-    mock_helper_imports, mock_filter_out_cherrypicked_samples, mock_update_positives, mock_helper_database_updates
-):
-    mock_get_plate_barcodes, mock_get_positive_samples = mock_helper_imports
-    mock_update_mongo, mock_update_mlwh, mock_update_dart = mock_helper_database_updates
-
-    # mock updating the samples in mongo to throw
-    mock_get_plate_barcodes.return_value = ["123", "456"]
-    mock_get_positive_samples.return_value = [{"plate_barcode": "123"}, {"plate_barcode": "456"}]
-    mock_filter_out_cherrypicked_samples.return_value = [{"plate_barcode": "123"}]
-    mock_update_mongo.side_effect = NotImplementedError("Boom!")
-
-    # call the migration
-    update_filtered_positives.run("crawler.config.integration")
-
-    # ensure expected database calls
-    mock_update_mongo.assert_called_once()
-    mock_update_mlwh.assert_not_called()
-    mock_update_dart.assert_not_called()
-
-
-def test_update_filtered_positives_aborts_failing_updating_samples_in_mongo(
-    mock_helper_imports, mock_filter_out_cherrypicked_samples, mock_update_positives, mock_helper_database_updates
-):
-    mock_get_plate_barcodes, mock_get_positive_samples = mock_helper_imports
-    mock_update_mongo, mock_update_mlwh, mock_update_dart = mock_helper_database_updates
-
-    # mock updating the samples in mongo to fail
-    mock_get_plate_barcodes.return_value = ["123", "456"]
-    mock_get_positive_samples.return_value = [{"plate_barcode": "123"}, {"plate_barcode": "456"}]
-    mock_filter_out_cherrypicked_samples.return_value = [{"plate_barcode": "123"}]
-    mock_update_mongo.return_value = False
-
-    # call the migration
-    update_filtered_positives.run("crawler.config.integration")
-
-    # ensure expected database calls
-    mock_update_mongo.assert_called_once()
-    mock_update_mlwh.assert_not_called()
-    mock_update_dart.assert_not_called()
-
-
-def test_update_filtered_positives_catched_error_updating_samples_in_mlwh(
+def test_update_filtered_positives_catches_error_updating_samples_in_mlwh(
     mock_helper_imports, mock_filter_out_cherrypicked_samples, mock_update_positives, mock_helper_database_updates
 ):
     mock_get_plate_barcodes, mock_get_positive_samples = mock_helper_imports
@@ -262,18 +253,17 @@ def test_update_filtered_positives_catched_error_updating_samples_in_mlwh(
 
     # mock updating the samples in mlwh to throw
     mock_get_plate_barcodes.return_value = ["123", "456"]
-    mock_get_positive_samples.return_value = [{"plate_barcode": "123"}, {"plate_barcode": "456"}]
-    mock_filter_out_cherrypicked_samples.return_value = [{"plate_barcode": "123"}]
-    mock_update_mongo.return_value = True
+    mock_get_positive_samples.return_value = [positive_samples("123", "456")]
+    mock_update_positives.return_value = [{"plate_barcode": "123"}]
     mock_update_mlwh.side_effect = NotImplementedError("Boom!")
 
     # call the migration
     update_filtered_positives.run("crawler.config.integration")
 
     # ensure expected database calls
-    mock_update_mongo.assert_called_once()
     mock_update_mlwh.assert_called_once()
     mock_update_dart.assert_not_called()
+    mock_update_mongo.assert_not_called()
 
 
 def test_update_filtered_positives_aborts_failing_updating_samples_in_mlwh(
@@ -284,18 +274,17 @@ def test_update_filtered_positives_aborts_failing_updating_samples_in_mlwh(
 
     # mock updating the samples in mlwh to fail
     mock_get_plate_barcodes.return_value = ["123", "456"]
-    mock_get_positive_samples.return_value = [{"plate_barcode": "123"}, {"plate_barcode": "456"}]
-    mock_filter_out_cherrypicked_samples.return_value = [{"plate_barcode": "123"}]
-    mock_update_mongo.return_value = True
+    mock_get_positive_samples.return_value = [positive_samples("123", "456")]
+    mock_update_positives.return_value = [{"plate_barcode": "123"}]
     mock_update_mlwh.return_value = False
 
     # call the migration
     update_filtered_positives.run("crawler.config.integration")
 
     # ensure expected database calls
-    mock_update_mongo.assert_called_once()
     mock_update_mlwh.assert_called_once()
     mock_update_dart.assert_not_called()
+    mock_update_mongo.assert_not_called()
 
 
 def test_update_filtered_positives_catches_error_updating_samples_in_dart(
@@ -306,9 +295,8 @@ def test_update_filtered_positives_catches_error_updating_samples_in_dart(
 
     # mock updating the samples in dart to throw
     mock_get_plate_barcodes.return_value = ["123", "456"]
-    mock_get_positive_samples.return_value = [{"plate_barcode": "123"}, {"plate_barcode": "456"}]
-    mock_filter_out_cherrypicked_samples.return_value = [{"plate_barcode": "123"}]
-    mock_update_mongo.return_value = True
+    mock_get_positive_samples.return_value = [positive_samples("123", "456")]
+    mock_update_positives.return_value = [{"plate_barcode": "123"}]
     mock_update_mlwh.return_value = True
     mock_update_dart.side_effect = NotImplementedError("Boom!")
 
@@ -316,12 +304,12 @@ def test_update_filtered_positives_catches_error_updating_samples_in_dart(
     update_filtered_positives.run("crawler.config.integration")
 
     # ensure expected database calls
-    mock_update_mongo.assert_called_once()
     mock_update_mlwh.assert_called_once()
     mock_update_dart.assert_called_once()
+    mock_update_mongo.assert_not_called()
 
 
-def test_update_filtered_positives_catches_aborts_failing_updating_samples_in_dart(
+def test_update_filtered_positives_aborts_failing_updating_samples_in_dart(
     mock_helper_imports, mock_filter_out_cherrypicked_samples, mock_update_positives, mock_helper_database_updates
 ):
     mock_get_plate_barcodes, mock_get_positive_samples = mock_helper_imports
@@ -329,9 +317,8 @@ def test_update_filtered_positives_catches_aborts_failing_updating_samples_in_da
 
     # mock updating the samples in dart to fail
     mock_get_plate_barcodes.return_value = ["123", "456"]
-    mock_get_positive_samples.return_value = [{"plate_barcode": "123"}, {"plate_barcode": "456"}]
-    mock_filter_out_cherrypicked_samples.return_value = [{"plate_barcode": "123"}]
-    mock_update_mongo.return_value = True
+    mock_get_positive_samples.return_value = [positive_samples("123", "456")]
+    mock_update_positives.return_value = [{"plate_barcode": "123"}]
     mock_update_mlwh.return_value = True
     mock_update_dart.return_value = False
 
@@ -339,76 +326,221 @@ def test_update_filtered_positives_catches_aborts_failing_updating_samples_in_da
     update_filtered_positives.run("crawler.config.integration")
 
     # ensure expected database calls
-    mock_update_mongo.assert_called_once()
     mock_update_mlwh.assert_called_once()
     mock_update_dart.assert_called_once()
+    mock_update_mongo.assert_not_called()
 
 
 def test_update_filtered_positives_outputs_success(
-    mock_helper_imports, mock_filter_out_cherrypicked_samples, mock_update_positives, mock_helper_database_updates
+    mock_helper_imports,
+    mock_filter_out_cherrypicked_samples,
+    mock_update_positives,
+    mock_helper_database_updates,
+    mock_identifier_version,
+    checkpoints_collection,
 ):
     mock_get_plate_barcodes, mock_get_positive_samples = mock_helper_imports
     mock_update_mongo, mock_update_mlwh, mock_update_dart = mock_helper_database_updates
 
-    # mock a successful update
+    # mock a successful update of two batches
     mock_get_plate_barcodes.return_value = ["123", "456"]
-    mock_get_positive_samples.return_value = [{"plate_barcode": "123"}, {"plate_barcode": "456"}]
-    non_cp_samples = [{"plate_barcode": "123"}]
-    mock_filter_out_cherrypicked_samples.return_value = non_cp_samples
-    mock_update_mongo.return_value = True
+    batches = [positive_samples("123", "123"), positive_samples("456")]
+    mock_get_positive_samples.return_value = batches
+    mock_filter_out_cherrypicked_samples.side_effect = lambda config, samples: samples[:1]
+    mock_update_positives.side_effect = lambda identifier, samples, timestamp: samples
     mock_update_mlwh.return_value = True
     mock_update_dart.return_value = True
 
-    version = "v2.3"
-    mock_pos_id = MagicMock()
-    type(mock_pos_id).version = PropertyMock(return_value=version)
-    with patch("migrations.update_filtered_positives.current_filtered_positive_identifier", return_value=mock_pos_id):
-        with patch("migrations.update_filtered_positives.datetime") as mock_datetime:
-            timestamp = datetime.now(tz=timezone.utc)
-            mock_datetime.now.return_value = timestamp
+    with patch("migrations.update_filtered_positives.datetime") as mock_datetime:
+        timestamp = datetime.now(tz=timezone.utc)
+        mock_datetime.now.return_value = timestamp
+
+        # call the migration
+        update_filtered_positives.run("crawler.config.integration")
 
-            # call the migration
-            update_filtered_positives.run("crawler.config.integration")
+    # ensure expected database calls, once per batch
+    config, _ = get_config("crawler.config.integration")
+    changed_samples = [batches[0][:1], batches[1]]
+    assert [call.args[2] for call in mock_update_positives.call_args_list] == [timestamp, timestamp]
+    assert [call.args for call in mock_update_mlwh.call_args_list] == [(config, samples) for samples in changed_samples]
+    assert [call.args for call in mock_update_dart.call_args_list] == [(config, samples) for samples in changed_samples]
+    assert [call.args[1] for call in mock_update_mongo.call_args_list] == changed_samples
 
-            # ensure expected database calls
-            config, _ = get_config("crawler.config.integration")
-            mock_update_mongo.assert_called_once()
-            mock_update_mongo.assert_called_with(config, non_cp_samples, version, timestamp)
-            mock_update_mlwh.assert_called_once()
-            mock_update_mlwh.assert_called_with(config, non_cp_samples)
-            mock_update_dart.assert_called_once()
-            mock_update_dart.assert_called_with(config, non_cp_samples)
+    # the run completed, so the next run starts from the beginning
+    assert checkpoints_collection.count_documents({}) == 0
 
 
 def test_update_filtered_positives_omitting_dart_outputs_success(
-    mock_helper_imports, mock_filter_out_cherrypicked_samples, mock_update_positives, mock_helper_database_updates
+    mock_helper_imports,
+    mock_filter_out_cherrypicked_samples,
+    mock_update_positives,
+    mock_helper_database_updates,
+    mock_identifier_version,
 ):
     _, mock_get_positive_samples = mock_helper_imports
     mock_update_mongo, mock_update_mlwh, mock_update_dart = mock_helper_database_updates
 
     # mock a successful update
-    mock_get_positive_samples.return_value = [{"plate_barcode": "123"}, {"plate_barcode": "456"}]
-    non_cp_samples = [{"plate_barcode": "123"}]
-    mock_filter_out_cherrypicked_samples.return_value = non_cp_samples
-    mock_update_mongo.return_value = True
+    mock_get_positive_samples.return_value = [positive_samples("123", "456")]
+    changed_samples = [{"plate_barcode": "123"}]
+    mock_update_positives.return_value = changed_samples
+    mock_update_mlwh.return_value = True
+
+    # call the migration
+    update_filtered_positives.run("crawler.config.integration", True)
+
+    # ensure expected database calls
+    config, _ = get_config("crawler.config.integration")
+    mock_update_mlwh.assert_called_once_with(config, changed_samples)
+    mock_update_dart.assert_not_called()
+    mock_update_mongo.assert_called_once_with(ANY, changed_samples)
+
+
+def test_update_filtered_positives_resumes_after_the_last_batch_completed(
+    mock_helper_imports,
+    mock_filter_out_cherrypicked_samples,
+    mock_update_positives,
+    mock_helper_database_updates,
+    mock_identifier_version,
+    mongo_database,
+):
+    _, db = mongo_database
+    mock_get_plate_barcodes, mock_get_positive_samples = mock_helper_imports
+    mock_update_mongo, mock_update_mlwh, mock_update_dart = mock_helper_database_updates
+
+    # mock updating DART failing for the second batch
+    mock_get_plate_barcodes.return_value = ["123", "456"]
+    batches = [positive_samples("123", "123"), positive_samples("456")]
+    mock_get_positive_samples.return_value = batches
+    mock_update_positives.side_effect = lambda identifier, samples, timestamp: samples
     mock_update_mlwh.return_value = True
+    mock_update_dart.side_effect = [True, False]
+
+    update_filtered_positives.run("crawler.config.integration")
+
+    # only the first batch is written to mongo, and checkpointed
+    mock_update_mongo.assert_called_once()
+    checkpoint_parameters = {"version": mock_identifier_version, "omit_dart": False}
+    last_id = batches[0][-1][FIELD_MONGODB_ID]
+    assert get_migration_checkpoint(db, update_filtered_positives.MIGRATION_NAME, checkpoint_parameters) == last_id
+
+    # the next run resumes after the first batch
+    mock_get_positive_samples.return_value = batches[1:]
+    mock_update_dart.side_effect = None
     mock_update_dart.return_value = True
 
-    version = "v2.3"
-    mock_pos_id = MagicMock()
-    type(mock_pos_id).version = PropertyMock(return_value=version)
+    update_filtered_positives.run("crawler.config.integration")
+
+    mock_get_positive_samples.assert_called_with(ANY, ["123", "456"], last_id, changed_by=None)
+    assert get_migration_checkpoint(db, update_filtered_positives.MIGRATION_NAME, checkpoint_parameters) is None
+
+
+def test_update_filtered_positives_restarts_ignoring_the_checkpoint(
+    mock_helper_imports, mock_helper_database_updates, mock_identifier_version, mongo_database
+):
+    _, db = mongo_database
+    _, mock_get_positive_samples = mock_helper_imports
+    mock_get_positive_samples.return_value = []
+    checkpoint_parameters = {"version": mock_identifier_version, "omit_dart": True}
+    save_migration_checkpoint(db, update_filtered_positives.MIGRATION_NAME, checkpoint_parameters, ObjectId())
+
+    update_filtered_positives.run("crawler.config.integration", omit_dart=True, restart=True)
+
+    mock_get_positive_samples.assert_called_once_with(ANY, None, None, changed_by=None)
+
+
+def test_update_filtered_positives_server_side_only_fetches_the_samples_mongo_determines_will_change(
+    mock_helper_imports, mock_helper_database_updates
+):
+    _, mock_get_positive_samples = mock_helper_imports
+    mock_get_positive_samples.return_value = []
+    mock_pos_id = MagicMock(version="v2.3")
+
     with patch("migrations.update_filtered_positives.current_filtered_positive_identifier", return_value=mock_pos_id):
+        update_filtered_positives.run("crawler.config.integration", omit_dart=True, server_side=True)
+
+    mock_get_positive_samples.assert_called_once_with(ANY, None, None, changed_by=mock_pos_id)
+
+
+@pytest.fixture
+def mock_diff_database_updates():
+    with patch("migrations.update_filtered_positives.update_mongo_filtered_positive_version") as mock_update_mongo:
+        with patch("migrations.update_filtered_positives.update_mlwh_filtered_positive_version") as mock_update_mlwh:
+            yield mock_update_mongo, mock_update_mlwh
+
+
+def test_update_filtered_positives_diff_only_pushes_flipped_samples_to_the_mlwh_and_dart(
+    mock_helper_imports,
+    mock_filter_out_cherrypicked_samples,
+    mock_helper_database_updates,
+    mock_diff_database_updates,
+    mock_identifier_version,
+):
+    mock_get_plate_barcodes, mock_get_positive_samples = mock_helper_imports
+    mock_update_mongo, mock_update_mlwh, mock_update_dart = mock_helper_database_updates
+    mock_update_mongo_version, mock_update_mlwh_version = mock_diff_database_updates
+
+    mock_get_plate_barcodes.return_value = ["123"]
+    flipped_samples = [{FIELD_SOURCE: "Alderley", FIELD_FILTERED_POSITIVE: True}]
+    version_only_samples = [{FIELD_SOURCE: "Alderley", FIELD_FILTERED_POSITIVE: False}]
+    mock_get_positive_samples.return_value = [positive_samples("123", "123", "123")]
+    mock_filter_out_cherrypicked_samples.side_effect = lambda config, samples: samples
+    mock_update_mlwh.return_value = True
+    mock_update_dart.return_value = True
+    mock_update_mlwh_version.return_value = True
+
+    with patch(
+        "migrations.update_filtered_positives.diff_filtered_positive_samples",
+        return_value=(flipped_samples, version_only_samples),
+    ):
         with patch("migrations.update_filtered_positives.datetime") as mock_datetime:
             timestamp = datetime.now(tz=timezone.utc)
             mock_datetime.now.return_value = timestamp
 
-            # call the migration
-            update_filtered_positives.run("crawler.config.integration", True)
+            update_filtered_positives.run("crawler.config.integration", diff=True)
+
+    # the samples whose value flips are pushed everywhere
+    config, _ = get_config("crawler.config.integration")
+    mock_update_mlwh.assert_called_once_with(config, flipped_samples)
+    mock_update_dart.assert_called_once_with(config, flipped_samples)
+    mock_update_mongo.assert_called_once_with(ANY, flipped_samples)
+
+    # the others only have their version and timestamp updated, and are not pushed to DART
+    mock_update_mlwh_version.assert_called_once_with(config, version_only_samples, mock_identifier_version, timestamp)
+    mock_update_mongo_version.assert_called_once_with(ANY, version_only_samples, mock_identifier_version, timestamp)
 
-            # ensure expected database calls
-            config, _ = get_config("crawler.config.integration")
-            mock_update_mongo.assert_called_once()
-            mock_update_mongo.assert_called_with(config, non_cp_samples, version, timestamp)
-            mock_update_mlwh.assert_called_once()
-            mock_update_mlwh.assert_called_with(config, non_cp_samples)
-            mock_update_dart.assert_not_called()
+
+def test_update_filtered_positives_dry_run_reports_the_changes_by_centre_without_writing(
+    mock_helper_imports,
+    mock_filter_out_cherrypicked_samples,
+    mock_helper_database_updates,
+    mock_diff_database_updates,
+    checkpoints_collection,
+):
+    _, mock_get_positive_samples = mock_helper_imports
+    samples = positive_samples("123", "456")
+    samples[0].update({FIELD_SOURCE: "Alderley", FIELD_FILTERED_POSITIVE: False})
+    samples[1].update({FIELD_SOURCE: "Milton Keynes", FIELD_FILTERED_POSITIVE: True})
+    mock_get_positive_samples.return_value = [samples]
+    mock_filter_out_cherrypicked_samples.side_effect = lambda config, samples: samples
+
+    mock_pos_id = MagicMock(version="v2.3")
+    mock_pos_id.classify_many.side_effect = lambda samples: [True] * len(samples)
+    with patch("migrations.update_filtered_positives.current_filtered_positive_identifier", return_value=mock_pos_id):
+        with patch("migrations.update_filtered_positives.logger") as mock_logger:
+            update_filtered_positives.run("crawler.config.integration", omit_dart=True, dry_run=True)
+
+    # nothing is written
+    for mock_update in mock_helper_database_updates + mock_diff_database_updates:
+        mock_update.assert_not_called()
+    assert checkpoints_collection.count_documents({}) == 0
+
+    logged = [call.args[0] for call in mock_logger.info.call_args_list]
+    assert (
+        "-- Alderley: 1 samples, 1 becoming filtered positive, 0 no longer filtered positive, 0 changing version only"
+        in logged
+    )
+    assert (
+        "-- Milton Keynes: 1 samples, 0 becoming filtered positive, 0 no longer filtered positive, "
+        "1 changing version only" in logged
+    )
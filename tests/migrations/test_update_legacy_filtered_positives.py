@@ -1,9 +1,9 @@
 from datetime import datetime
 from unittest.mock import patch
 
-import pandas as pd
 import pytest
 
+from crawler.constants import FIELD_PLATE_BARCODE, FIELD_ROOT_SAMPLE_ID
 from crawler.filtered_positive_identifier import (
     FILTERED_POSITIVE_VERSION_0,
     FILTERED_POSITIVE_VERSION_1,
@@ -54,9 +54,9 @@ def mock_query_helper_functions():
         "migrations.update_legacy_filtered_positives.mongo_samples_by_date"
     ) as mock_mongo_samples_by_date:  # noqa: E501
         with patch(
-            "migrations.update_legacy_filtered_positives.get_cherrypicked_samples_by_date"
-        ) as mock_get_cherrypicked_samples_by_date:
-            yield mock_mongo_samples_by_date, mock_get_cherrypicked_samples_by_date
+            "migrations.update_legacy_filtered_positives.get_cherrypicked_sample_keys_by_date"
+        ) as mock_get_cherrypicked_sample_keys_by_date:
+            yield mock_mongo_samples_by_date, mock_get_cherrypicked_sample_keys_by_date
 
 
 @pytest.fixture
@@ -193,19 +193,19 @@ def test_update_legacy_filtered_positives_catches_error_connecting_to_mongo(
     mock_update_mlwh.assert_not_called()
 
 
-def test_get_cherrypicked_samples_by_date_error_raises_exception(
+def test_get_cherrypicked_sample_keys_by_date_error_raises_exception(
     mock_filtered_positive_fields_set,
     mock_helper_database_updates,
     mock_query_helper_functions,
     mock_extract_required_cp_info,
 ):
     mock_update_mongo, mock_update_mlwh = mock_helper_database_updates
-    mock_mongo_samples_by_date, mock_get_cherrypicked_samples_by_date = mock_query_helper_functions
+    mock_mongo_samples_by_date, mock_get_cherrypicked_sample_keys_by_date = mock_query_helper_functions
 
     mock_filtered_positive_fields_set.return_value = False
-    mock_mongo_samples_by_date.return_value = [{"plate_barcode": "1"}]
+    mock_mongo_samples_by_date.return_value = [{FIELD_ROOT_SAMPLE_ID: "id_1", FIELD_PLATE_BARCODE: "1"}]
     mock_extract_required_cp_info.return_value = [["id_1"], ["plate_barcode_1"]]
-    mock_get_cherrypicked_samples_by_date.side_effect = MockedError("Boom!")
+    mock_get_cherrypicked_sample_keys_by_date.side_effect = MockedError("Boom!")
 
     with pytest.raises(MockedError):
         update_legacy_filtered_positives.run("crawler.config.integration", start_date_input, end_date_input)
@@ -214,21 +214,21 @@ def test_get_cherrypicked_samples_by_date_error_raises_exception(
     mock_update_mlwh.assert_not_called()
 
 
-def test_get_cherrypicked_samples_by_date_connection_error_raises_exception(
+def test_get_cherrypicked_sample_keys_by_date_connection_error_raises_exception(
     mock_filtered_positive_fields_set,
     mock_helper_database_updates,
     mock_query_helper_functions,
     mock_extract_required_cp_info,
 ):
     mock_update_mongo, mock_update_mlwh = mock_helper_database_updates
-    mock_mongo_samples_by_date, mock_get_cherrypicked_samples_by_date = mock_query_helper_functions
+    mock_mongo_samples_by_date, mock_get_cherrypicked_sample_keys_by_date = mock_query_helper_functions
 
     mock_filtered_positive_fields_set.return_value = False
-    mock_mongo_samples_by_date.return_value = [{"plate_barcode": "1"}]
+    mock_mongo_samples_by_date.return_value = [{FIELD_ROOT_SAMPLE_ID: "id_1", FIELD_PLATE_BARCODE: "1"}]
     mock_extract_required_cp_info.return_value = [["id_1"], ["plate_barcode_1"]]
-    mock_get_cherrypicked_samples_by_date.return_value = None
+    mock_get_cherrypicked_sample_keys_by_date.return_value = None
 
-    with pytest.raises(AttributeError):
+    with pytest.raises(ConnectionError):
         update_legacy_filtered_positives.run("crawler.config.integration", start_date_input, end_date_input)
 
     mock_update_mongo.assert_not_called()
@@ -242,10 +242,10 @@ def test_extract_required_cp_info_error_raises_exception(
     mock_extract_required_cp_info,
 ):
     mock_update_mongo, mock_update_mlwh = mock_helper_database_updates
-    mock_mongo_samples_by_date, mock_get_cherrypicked_samples_by_date = mock_query_helper_functions
+    mock_mongo_samples_by_date, mock_get_cherrypicked_sample_keys_by_date = mock_query_helper_functions
 
     mock_filtered_positive_fields_set.return_value = False
-    mock_mongo_samples_by_date.return_value = [{"plate_barcode": "1"}]
+    mock_mongo_samples_by_date.return_value = [{FIELD_ROOT_SAMPLE_ID: "id_1", FIELD_PLATE_BARCODE: "1"}]
     mock_extract_required_cp_info.side_effect = MockedError("Boom!")
 
     with pytest.raises(MockedError):
@@ -263,12 +263,12 @@ def test_split_mongo_samples_by_version_error_raises_exception(
     mock_split_mongo_samples_by_version,
 ):
     mock_update_mongo, mock_update_mlwh = mock_helper_database_updates
-    mock_mongo_samples_by_date, mock_get_cherrypicked_samples_by_date = mock_query_helper_functions
+    mock_mongo_samples_by_date, mock_get_cherrypicked_sample_keys_by_date = mock_query_helper_functions
 
     mock_filtered_positive_fields_set.return_value = False
-    mock_mongo_samples_by_date.return_value = [{"plate_barcode": "1"}]
+    mock_mongo_samples_by_date.return_value = [{FIELD_ROOT_SAMPLE_ID: "id_1", FIELD_PLATE_BARCODE: "1"}]
     mock_extract_required_cp_info.return_value = [["id_1"], ["plate_barcode_1"]]
-    mock_get_cherrypicked_samples_by_date.return_value = pd.DataFrame({"id": ["s1", "s2"]})
+    mock_get_cherrypicked_sample_keys_by_date.return_value = {("s1", "pb_1"), ("s2", "pb_1")}
 
     mock_split_mongo_samples_by_version.side_effect = MockedError("Boom!")
 
@@ -292,12 +292,12 @@ def test_filtered_positive_identifier_by_version_error_raises_exception(
     v2_samples = [{"plate_barcode": "2"}]
 
     mock_update_mongo, mock_update_mlwh = mock_helper_database_updates
-    mock_mongo_samples_by_date, mock_get_cherrypicked_samples_by_date = mock_query_helper_functions
+    mock_mongo_samples_by_date, mock_get_cherrypicked_sample_keys_by_date = mock_query_helper_functions
 
     mock_filtered_positive_fields_set.return_value = False
-    mock_mongo_samples_by_date.return_value = [{"plate_barcode": "1"}]
+    mock_mongo_samples_by_date.return_value = [{FIELD_ROOT_SAMPLE_ID: "id_1", FIELD_PLATE_BARCODE: "1"}]
     mock_extract_required_cp_info.return_value = [["id_1"], ["plate_barcode_1"]]
-    mock_get_cherrypicked_samples_by_date.return_value = pd.DataFrame({"id": ["s1", "s2"]})
+    mock_get_cherrypicked_sample_keys_by_date.return_value = {("s1", "pb_1"), ("s2", "pb_1")}
 
     mock_split_mongo_samples_by_version.return_value = {
         FILTERED_POSITIVE_VERSION_0: v0_samples,
@@ -328,12 +328,12 @@ def test_update_filtered_positive_fields_error_raises_exception(
     v2_samples = [{"plate_barcode": "2"}]
 
     mock_update_mongo, mock_update_mlwh = mock_helper_database_updates
-    mock_mongo_samples_by_date, mock_get_cherrypicked_samples_by_date = mock_query_helper_functions
+    mock_mongo_samples_by_date, mock_get_cherrypicked_sample_keys_by_date = mock_query_helper_functions
 
     mock_filtered_positive_fields_set.return_value = False
-    mock_mongo_samples_by_date.return_value = [{"plate_barcode": "1"}]
+    mock_mongo_samples_by_date.return_value = [{FIELD_ROOT_SAMPLE_ID: "id_1", FIELD_PLATE_BARCODE: "1"}]
     mock_extract_required_cp_info.return_value = [["id_1"], ["plate_barcode_1"]]
-    mock_get_cherrypicked_samples_by_date.return_value = pd.DataFrame({"id": ["s1", "s2"]})
+    mock_get_cherrypicked_sample_keys_by_date.return_value = {("s1", "pb_1"), ("s2", "pb_1")}
 
     mock_split_mongo_samples_by_version.return_value = {
         FILTERED_POSITIVE_VERSION_0: v0_samples,
@@ -368,13 +368,13 @@ def test_update_legacy_filtered_positives_outputs_success(
     v2_samples = [{"plate_barcode": "2"}]
 
     mock_update_mongo, mock_update_mlwh = mock_helper_database_updates
-    mock_mongo_samples_by_date, mock_get_cherrypicked_samples_by_date = mock_query_helper_functions
+    mock_mongo_samples_by_date, mock_get_cherrypicked_sample_keys_by_date = mock_query_helper_functions
     mock_split_mongo_samples_by_version = mock_split_mongo_samples_by_version
 
     mock_filtered_positive_fields_set.return_value = False
-    mock_mongo_samples_by_date.return_value = [{"plate_barcode": "1"}]
+    mock_mongo_samples_by_date.return_value = [{FIELD_ROOT_SAMPLE_ID: "id_1", FIELD_PLATE_BARCODE: "1"}]
     mock_extract_required_cp_info.return_value = [["id_1"], ["plate_barcode_1"]]
-    mock_get_cherrypicked_samples_by_date.return_value = pd.DataFrame({"id": ["s1", "s2"]})
+    mock_get_cherrypicked_sample_keys_by_date.return_value = {("s1", "pb_1"), ("s2", "pb_1")}
 
     mock_split_mongo_samples_by_version.return_value = {
         FILTERED_POSITIVE_VERSION_0: v0_samples,
@@ -427,14 +427,14 @@ def test_update_legacy_filtered_positives_successful_if_user_chooses_to_continue
     v2_samples = [{"plate_barcode": "2"}]
 
     mock_update_mongo, mock_update_mlwh = mock_helper_database_updates
-    mock_mongo_samples_by_date, mock_get_cherrypicked_samples_by_date = mock_query_helper_functions
+    mock_mongo_samples_by_date, mock_get_cherrypicked_sample_keys_by_date = mock_query_helper_functions
     mock_split_mongo_samples_by_version = mock_split_mongo_samples_by_version
 
     mock_filtered_positive_fields_set.return_value = True
     mock_user_input.return_value = "yes"
-    mock_mongo_samples_by_date.return_value = [{"plate_barcode": "1"}]
+    mock_mongo_samples_by_date.return_value = [{FIELD_ROOT_SAMPLE_ID: "id_1", FIELD_PLATE_BARCODE: "1"}]
     mock_extract_required_cp_info.return_value = [["id_1"], ["plate_barcode_1"]]
-    mock_get_cherrypicked_samples_by_date.return_value = pd.DataFrame({"id": ["s1", "s2"]})
+    mock_get_cherrypicked_sample_keys_by_date.return_value = {("s1", "pb_1"), ("s2", "pb_1")}
     mock_split_mongo_samples_by_version.return_value = {
         FILTERED_POSITIVE_VERSION_0: v0_samples,
         FILTERED_POSITIVE_VERSION_1: v1_samples,
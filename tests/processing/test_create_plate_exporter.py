@@ -7,11 +7,16 @@ from pymongo.collection import Collection
 from pymongo.errors import BulkWriteError
 
 from crawler.constants import (
+    COLLECTION_DART_EXPORTS,
     DART_STATE_NO_PLATE,
     DART_STATE_NO_PROP,
     DART_STATE_PENDING,
     DART_STATE_PICKABLE,
     FIELD_COORDINATE,
+    FIELD_DART_EXPORT_ATTEMPTS,
+    FIELD_DART_EXPORT_CENTRE_CONFIG,
+    FIELD_DART_EXPORT_SAMPLE_UUIDS,
+    FIELD_DART_EXPORT_SAMPLES_INSERTED,
     FIELD_LH_SAMPLE_UUID,
     FIELD_LH_SOURCE_PLATE_UUID,
     FIELD_MONGO_LAB_ID,
@@ -21,8 +26,11 @@ from crawler.constants import (
     FIELD_MONGO_ROOT_SAMPLE_ID,
     FIELD_MONGO_SAMPLE_INDEX,
     FIELD_SOURCE,
+    FIELD_STATUS,
+    FIELD_STATUS_PENDING,
     RABBITMQ_CREATE_FEEDBACK_ORIGIN_PLATE,
 )
+from crawler.constants import FIELD_PLATE_BARCODE as FIELD_MONGO_PLATE_BARCODE
 from crawler.exceptions import TransientRabbitError
 from crawler.processing.create_plate_exporter import CreatePlateExporter
 from crawler.rabbit.messages.parsers.create_plate_message import (
@@ -227,6 +235,53 @@ def test_export_to_mongo_logs_error_correctly_on_samples_exception(
     logger.exception.assert_called_once_with(timeout_error)
 
 
+def test_export_to_mongo_adds_no_dart_export_without_the_outbox(subject, mongo_database):
+    _, mongo_database = mongo_database
+
+    subject.export_to_mongo()
+
+    assert mongo_database[COLLECTION_DART_EXPORTS].count_documents({}) == 0
+
+
+def test_export_to_mongo_adds_a_dart_export_to_the_outbox(subject, config, mongo_database, create_plate_message):
+    _, mongo_database = mongo_database
+
+    with patch.object(config, "DART_EXPORT_OUTBOX", True):
+        subject.export_to_mongo()
+
+    dart_export = mongo_database[COLLECTION_DART_EXPORTS].find_one({})
+    assert dart_export[FIELD_MONGO_PLATE_BARCODE] == "PLATE-001"
+    assert dart_export[FIELD_MONGO_MESSAGE_UUID] == "CREATE_PLATE_UUID"
+    assert dart_export[FIELD_DART_EXPORT_CENTRE_CONFIG] == create_plate_message.centre_config
+    assert dart_export[FIELD_DART_EXPORT_SAMPLE_UUIDS] == ["UUID_001", "UUID_002", "UUID_003"]
+    assert dart_export[FIELD_DART_EXPORT_SAMPLES_INSERTED] == 3
+    assert dart_export[FIELD_STATUS] == FIELD_STATUS_PENDING
+    assert dart_export[FIELD_DART_EXPORT_ATTEMPTS] == 0
+
+
+def test_export_to_mongo_logs_error_correctly_on_dart_export_exception(
+    subject, config, logger, samples_collection_accessor, source_plates_collection_accessor
+):
+    timeout_error = TimeoutError()
+
+    with patch.object(config, "DART_EXPORT_OUTBOX", True):
+        with patch.object(Collection, "insert_one", side_effect=[ANY, timeout_error]):
+            with pytest.raises(TransientRabbitError) as ex_info:
+                subject.export_to_mongo()
+
+    assert ex_info.value.message == (
+        "There was an error updating MongoDB while adding the DART export for message UUID 'CREATE_PLATE_UUID'."
+    )
+
+    logger.critical.assert_called_once()
+    assert "CREATE_PLATE_UUID" in logger.critical.call_args.args[0]
+    logger.exception.assert_called_once_with(timeout_error)
+
+    # The source plate and samples are reverted with the DART export
+    assert samples_collection_accessor.count_documents({}) == 0
+    assert source_plates_collection_accessor.count_documents({}) == 0
+
+
 @pytest.mark.parametrize("samples_collection_accessor", [[MONGO_SAMPLES[1]]], indirect=True)
 def test_export_to_mongo_reverts_the_transaction_when_duplicate_samples_inserted(
     subject, samples_collection_accessor, source_plates_collection_accessor
@@ -325,10 +380,11 @@ def test_export_to_dart_submits_plate(subject, pyodbc_conn):
 def test_export_to_dart_submits_all_samples_when_plate_pending(subject, pyodbc_conn):
     with patch("crawler.processing.create_plate_exporter.add_dart_plate_if_doesnt_exist") as add_plate_method:
         add_plate_method.return_value = DART_STATE_PENDING
-        with patch("crawler.processing.create_plate_exporter.add_dart_well_properties_if_positive") as add_method:
+        with patch("crawler.processing.create_plate_exporter.add_dart_plate_well_properties") as add_method:
             subject.export_to_dart()
 
-    assert add_method.call_count == 3
+    add_method.assert_called_once()
+    assert len(add_method.call_args.args[1]) == 3
 
 
 def test_export_to_dart_commits_to_the_database(subject):
@@ -352,7 +408,7 @@ def test_export_to_dart_creates_no_message_errors(subject, pyodbc_conn, logger):
 def test_export_to_dart_does_not_submit_any_samples_when_plate_not_pending(subject, pyodbc_conn, plate_state):
     with patch("crawler.processing.create_plate_exporter.add_dart_plate_if_doesnt_exist") as add_plate_method:
         add_plate_method.return_value = plate_state
-        with patch("crawler.processing.create_plate_exporter.add_dart_well_properties_if_positive") as add_method:
+        with patch("crawler.processing.create_plate_exporter.add_dart_plate_well_properties") as add_method:
             subject.export_to_dart()
 
     add_method.assert_not_called()
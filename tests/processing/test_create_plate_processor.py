@@ -210,3 +210,18 @@ def test_process_records_the_import_when_errors_after_mongo_export(subject, mock
     assert result is False
     exporter.record_import.assert_called_once()
     exporter.export_to_dart.assert_not_called()
+
+
+def test_process_exports_to_dart_without_the_outbox(subject, mock_exporter):
+    subject.process(MagicMock())
+
+    mock_exporter.return_value.export_to_dart.assert_called_once()
+
+
+def test_process_leaves_the_dart_export_to_the_worker_with_the_outbox(subject, config, mock_exporter):
+    with patch.object(config, "DART_EXPORT_OUTBOX", True):
+        result = subject.process(MagicMock())
+
+    assert result is True
+    mock_exporter.return_value.export_to_dart.assert_not_called()
+    mock_exporter.return_value.record_import.assert_called_once()
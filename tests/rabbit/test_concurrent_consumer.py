@@ -0,0 +1,275 @@
+import copy
+import threading
+from typing import List
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from crawler.constants import RABBITMQ_SUBJECT_CREATE_PLATE, RABBITMQ_SUBJECT_UPDATE_SAMPLE
+from crawler.exceptions import TransientRabbitError
+from crawler.rabbit.concurrent_consumer import (
+    ORDERING_KEY_PLATE_BARCODE,
+    ORDERING_KEY_SAMPLE_UUID,
+    ConcurrentConsumer,
+    KeyOrderedExecutor,
+    message_ordering_keys,
+)
+from tests.testing_objects import CREATE_PLATE_MESSAGE, UPDATE_SAMPLE_MESSAGE
+
+
+class ImmediateConnection:
+    """A connection which runs the callbacks added from other threads straight away."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def add_callback_threadsafe(self, callback):
+        self.callbacks.append(callback)
+        callback()
+
+
+@pytest.fixture(autouse=True)
+def logger():
+    with patch("crawler.rabbit.concurrent_consumer.LOGGER") as logger:
+        yield logger
+
+
+@pytest.fixture
+def consumer(config):
+    with patch("crawler.rabbit.concurrent_consumer.get_redpanda_schema_registry"):
+        with patch("crawler.rabbit.concurrent_consumer.get_basic_publisher"):
+            yield ConcurrentConsumer(config)
+
+
+@pytest.fixture
+def rabbit_message():
+    with patch("crawler.rabbit.concurrent_consumer.RabbitMessage") as rabbit_message:
+        rabbit_message.return_value.subject = RABBITMQ_SUBJECT_UPDATE_SAMPLE
+        rabbit_message.return_value.contains_single_message = True
+        rabbit_message.return_value.message = copy.deepcopy(UPDATE_SAMPLE_MESSAGE)
+        yield rabbit_message.return_value
+
+
+@pytest.fixture
+def processor(config):
+    processor_class = MagicMock()
+    processor_class.return_value.process.return_value = True
+
+    with patch.object(config, "PROCESSORS", {RABBITMQ_SUBJECT_UPDATE_SAMPLE: processor_class}, create=True):
+        yield processor_class.return_value
+
+
+def deliver(consumer, executor, connection=None, delivery_tag=1):
+    channel = MagicMock()
+    method = MagicMock(delivery_tag=delivery_tag)
+    with patch("crawler.rabbit.concurrent_consumer.AvroEncoder"):
+        consumer._on_message(connection or ImmediateConnection(), executor, channel, method, MagicMock(), b"body")
+
+    executor.wait(5)
+
+    return channel
+
+
+# ----- tests for message_ordering_keys() -----
+
+
+def test_message_ordering_keys_of_a_create_plate_message():
+    assert message_ordering_keys(RABBITMQ_SUBJECT_CREATE_PLATE, copy.deepcopy(CREATE_PLATE_MESSAGE)) == {
+        (ORDERING_KEY_PLATE_BARCODE, "PLATE-001"),
+        (ORDERING_KEY_SAMPLE_UUID, "UUID_001"),
+        (ORDERING_KEY_SAMPLE_UUID, "UUID_002"),
+        (ORDERING_KEY_SAMPLE_UUID, "UUID_003"),
+    }
+
+
+def test_message_ordering_keys_of_an_update_sample_message():
+    assert message_ordering_keys(RABBITMQ_SUBJECT_UPDATE_SAMPLE, copy.deepcopy(UPDATE_SAMPLE_MESSAGE)) == {
+        (ORDERING_KEY_SAMPLE_UUID, "UPDATE_SAMPLE_UUID")
+    }
+
+
+def test_message_ordering_keys_of_a_malformed_message_are_empty():
+    assert message_ordering_keys(RABBITMQ_SUBJECT_CREATE_PLATE, {}) == set()
+
+
+# ----- tests for KeyOrderedExecutor -----
+
+
+def test_key_ordered_executor_runs_tasks_sharing_a_key_in_order():
+    executor = KeyOrderedExecutor(4)
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def first():
+        started.set()
+        release.wait(5)
+        order.append("first")
+
+    executor.submit(["plate"], first)
+    started.wait(5)
+    executor.submit(["plate", "sample"], lambda: order.append("second"))
+    executor.submit(["sample"], lambda: order.append("third"))
+    # a task without any of the keys does not wait
+    executor.submit(["other"], lambda: order.append("other"))
+
+    assert not executor.wait(0.1)
+    release.set()
+
+    assert executor.wait(5)
+    assert order == ["other", "first", "second", "third"]
+    executor.shutdown()
+
+
+def test_key_ordered_executor_runs_tasks_with_different_keys_concurrently():
+    executor = KeyOrderedExecutor(3)
+    # each task waits for the others, so only passes if all three run at once
+    barrier = threading.Barrier(3, timeout=5)
+    results = []
+
+    for key in ("a", "b", "c"):
+        executor.submit([key], lambda: results.append(barrier.wait()))
+
+    assert executor.wait(5)
+    assert sorted(results) == [0, 1, 2]
+    executor.shutdown()
+
+
+def test_key_ordered_executor_skips_the_tasks_not_started_once_stopped():
+    executor = KeyOrderedExecutor(2)
+    order = []
+
+    def stop():
+        executor.stop()
+        order.append("stop")
+
+    executor.submit(["plate"], stop)
+    executor.submit(["plate"], lambda: order.append("skipped"))
+
+    assert executor.wait(5)
+    assert order == ["stop"]
+    executor.shutdown()
+
+
+# ----- tests for ConcurrentConsumer -----
+
+
+def test_on_message_acknowledges_the_message_when_processed(consumer, rabbit_message, processor):
+    executor = KeyOrderedExecutor(2)
+
+    channel = deliver(consumer, executor, delivery_tag=7)
+
+    processor.process.assert_called_once_with(rabbit_message)
+    channel.basic_ack.assert_called_once_with(7)
+    channel.basic_nack.assert_not_called()
+
+
+def test_on_message_sends_the_message_to_dead_letters_when_the_processor_returns_false(
+    consumer, rabbit_message, processor
+):
+    processor.process.return_value = False
+    executor = KeyOrderedExecutor(2)
+
+    channel = deliver(consumer, executor, delivery_tag=7)
+
+    channel.basic_ack.assert_not_called()
+    channel.basic_nack.assert_called_once_with(7, requeue=False)
+
+
+def test_on_message_sends_the_message_to_dead_letters_when_it_cannot_be_decoded(consumer, rabbit_message, processor):
+    rabbit_message.decode.side_effect = ValueError("Boom!")
+    executor = KeyOrderedExecutor(2)
+
+    channel = deliver(consumer, executor, delivery_tag=7)
+
+    processor.process.assert_not_called()
+    channel.basic_nack.assert_called_once_with(7, requeue=False)
+
+
+def test_on_message_sends_the_message_to_dead_letters_with_no_processor_for_the_subject(
+    consumer, rabbit_message, processor
+):
+    rabbit_message.subject = "unknown-subject"
+    executor = KeyOrderedExecutor(2)
+
+    channel = deliver(consumer, executor, delivery_tag=7)
+
+    processor.process.assert_not_called()
+    channel.basic_nack.assert_called_once_with(7, requeue=False)
+
+
+def test_on_message_restarts_the_consumer_without_settling_the_message_after_an_error(
+    consumer, rabbit_message, processor
+):
+    processor.process.side_effect = TransientRabbitError("Boom!")
+    executor = KeyOrderedExecutor(2)
+
+    channel = deliver(consumer, executor)
+
+    assert consumer._restart_requested
+    channel.basic_ack.assert_not_called()
+    channel.basic_nack.assert_not_called()
+
+    # the next message is left to be redelivered
+    processor.process.side_effect = None
+    deliver(consumer, executor, delivery_tag=2)
+    assert processor.process.call_count == 1
+
+
+def test_on_message_processes_messages_for_the_same_sample_in_order(consumer, rabbit_message, processor):
+    executor = KeyOrderedExecutor(4)
+    started = threading.Event()
+    release = threading.Event()
+    order: List[int] = []
+
+    def process(message):
+        order.append(len(order))
+        if len(order) == 1:
+            started.set()
+            release.wait(5)
+
+        return True
+
+    processor.process.side_effect = process
+    connection = ImmediateConnection()
+    channel = MagicMock()
+
+    with patch("crawler.rabbit.concurrent_consumer.AvroEncoder"):
+        consumer._on_message(connection, executor, channel, MagicMock(delivery_tag=1), MagicMock(), b"body")
+        started.wait(5)
+        consumer._on_message(connection, executor, channel, MagicMock(delivery_tag=2), MagicMock(), b"body")
+
+    # the second update waits for the first
+    assert not executor.wait(0.1)
+    assert order == [0]
+    release.set()
+
+    assert executor.wait(5)
+    assert [call.args for call in channel.basic_ack.call_args_list] == [(1,), (2,)]
+
+
+def test_consume_sets_the_prefetch_count_and_consumes_the_crud_queue(consumer, config):
+    with patch("crawler.rabbit.concurrent_consumer.get_rabbit_server_details"):
+        with patch("crawler.rabbit.concurrent_consumer.connection_parameters"):
+            with patch("crawler.rabbit.concurrent_consumer.BlockingConnection") as blocking_connection:
+                connection = blocking_connection.return_value
+                connection.process_data_events.side_effect = lambda time_limit: consumer.stop()
+
+                consumer.consume()
+
+    channel = connection.channel.return_value
+    channel.basic_qos.assert_called_once_with(prefetch_count=config.RABBITMQ_PREFETCH_COUNT)
+    assert channel.basic_consume.call_args.args == (config.RABBITMQ_CRUD_QUEUE,)
+    connection.close.assert_called_once()
+
+
+def test_start_runs_the_consumer_in_a_thread(consumer):
+    def stop_when_consuming():
+        consumer.stop()
+
+    with patch.object(consumer, "consume", side_effect=stop_when_consuming):
+        thread = consumer.start()
+        thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert not consumer.is_healthy
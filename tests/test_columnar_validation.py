@@ -0,0 +1,130 @@
+import os
+from glob import glob
+from typing import List
+from unittest.mock import patch
+
+import pytest
+from bson.decimal128 import Decimal128
+
+from crawler.columnar_validation import validate_rows
+from crawler.constants import (
+    CENTRE_KEY_PREFIX,
+    FIELD_CH1_CQ,
+    FIELD_CH1_RESULT,
+    FIELD_CH1_TARGET,
+    FIELD_CH2_CQ,
+    FIELD_CH2_RESULT,
+    FIELD_CREATED_AT,
+    FIELD_DATE_TESTED,
+    FIELD_FILTERED_POSITIVE_TIMESTAMP,
+    FIELD_LH_SAMPLE_UUID,
+    FIELD_RESULT,
+    FIELD_ROOT_SAMPLE_ID,
+    FIELD_UPDATED_AT,
+)
+from crawler.file_processing import Centre, CentreFile
+from crawler.types import ModifiedRow
+
+TEST_FILES = sorted(glob("tests/test_files/**/*.csv", recursive=True))
+
+HEADERS = "Root Sample ID,RNA ID,Result,Date Tested,Lab ID,CH1-Target,CH1-Result,CH1-Cq,CH2-Target,CH2-Result,CH2-Cq"
+
+# rows failing each of the rules in turn, as well as rows failing several of them and duplicates of invalid rows
+ROWS_FAILING_EACH_RULE = f"""{HEADERS}
+RS001,RNA_0043_A01,Positive,2020-11-22 04:36:38 UTC,AP,ORF1ab,Positive,23.12345678,N gene,Negative,
+RS002,RNA_0043_A02,Negative,19/07/2020 21:41,AP,ORF1ab,Negative,,N gene,Negative,
+RS003,RNA_0043_A03,Positive,,AP,ORF1ab,Positive,not a number,N gene,Negative,
+RS004,RNA_0043_A04,Positive,,AP,ORF1ab,Positive,1E+1,N gene,Positive,NaN
+empty,RNA_0043_A05,Positive,,AP,ORF1ab,Positive,12,N gene,Positive,13
+RS006,RNA_0043_A06,Positive,22/11/2020,AP,ORF1ab,Positive,12,N gene,Positive,13
+RS007,RNA_0043_A07,Maybe,,AP,ORF1ab,Positive,12,N gene,Positive,13
+RS008,RNA_0043_A08,Positive,,AP,ORF9,Positive,12,N gene,Positive,13
+RS009,RNA_0043_A09,Positive,,AP,ORF1ab,Positive,12,N gene,Maybe,13
+RS010,RNA_0043_A10,Positive,,AP,ORF1ab,Positive,100.0000000000000000001,N gene,Positive,13
+RS011,RNA_0043_A11,Positive,,AP,ORF1ab,Positive,-0.1,N gene,Positive,13
+RS012,RNA_0043_A12,Positive,,AP,ORF1ab,Positive,100,N gene,Positive,0
+RS013,RNA_0043_B01,Positive,,AP,ORF1ab,Negative,12,N gene,Negative,13
+RS014,RNA_0043_B02,Positive,,AP,ORF1ab,Inconclusive,12,N gene,Unknown,13
+RS015,RNA_0043_B03,Maybe,bad date,AP,ORF9,Maybe,x,N gene,Positive,13
+RS001,RNA_0043_A01,Positive,2020-11-22 04:36:38 UTC,AP,ORF1ab,Positive,23.12345678,N gene,Negative,
+RS007,RNA_0043_A07,Maybe,,AP,ORF1ab,Positive,12,N gene,Positive,13
+RS016,RNA_0043_B04,Positive,,AP,ORF1ab,Positive,12,N gene,Positive,13
+RS017,BAD_BARCODE,Positive,,AP,ORF1ab,Positive,12,N gene,Positive,13
+,RNA_0043_B06,Positive,,AP,ORF1ab,Positive,12,N gene,Positive,13
+"""
+
+# fields set when the row is augmented, which differ between runs
+VOLATILE_FIELDS = (FIELD_CREATED_AT, FIELD_UPDATED_AT, FIELD_FILTERED_POSITIVE_TIMESTAMP, FIELD_LH_SAMPLE_UUID)
+
+
+def centre_for_file(config, filepath):
+    prefix = os.path.basename(os.path.dirname(filepath))
+    centre_config = next((c for c in config.CENTRES if c[CENTRE_KEY_PREFIX] == prefix), config.CENTRES[0])
+
+    return Centre(config, centre_config)
+
+
+def parse_file(config, centre, filepath, columnar):
+    with patch.object(config, "COLUMNAR_VALIDATION", columnar):
+        centre_file = CentreFile(os.path.basename(filepath), centre)
+
+        with patch.object(centre_file, "filepath", return_value=filepath):
+            rows = centre_file.process_csv()
+
+    for row in rows:
+        for field in VOLATILE_FIELDS:
+            del row[field]
+
+    return rows, centre_file.logging_collection.get_messages_for_import()
+
+
+def assert_engines_agree(config, centre, filepath):
+    rows, messages = parse_file(config, centre, filepath, columnar=False)
+    columnar_rows, columnar_messages = parse_file(config, centre, filepath, columnar=True)
+
+    assert columnar_rows == rows
+    assert columnar_messages == messages
+
+    return messages
+
+
+@pytest.mark.parametrize("filepath", TEST_FILES)
+def test_columnar_validation_agrees_with_row_validation_on_test_files(config, filepath):
+    assert_engines_agree(config, centre_for_file(config, filepath), filepath)
+
+
+@pytest.mark.parametrize("rows_per_chunk", [1, 4, 10000])
+def test_columnar_validation_agrees_with_row_validation_on_invalid_rows(config, tmp_path, rows_per_chunk):
+    filepath = tmp_path / "AP_sanger_report_200503_2338.csv"
+    filepath.write_text(ROWS_FAILING_EACH_RULE)
+
+    with patch.object(CentreFile, "ROWS_PER_CHUNK", rows_per_chunk):
+        messages = assert_engines_agree(config, Centre(config, config.CENTRES[0]), filepath)
+
+    # check the rows do fail each of the rules
+    for error_type in (3, 5, 9, 16, 17, 18, 19, 20, 21, 27):
+        assert any(f"(TYPE {error_type})" in message for message in messages)
+
+
+def test_validate_rows_reports_the_first_rule_failed():
+    rows: List[ModifiedRow] = [
+        {FIELD_ROOT_SAMPLE_ID: "RS001", FIELD_RESULT: "Positive", FIELD_CH1_CQ: "12.3", FIELD_CH1_RESULT: "Positive"},
+        {FIELD_ROOT_SAMPLE_ID: "RS002", FIELD_RESULT: "Maybe", FIELD_CH1_CQ: "x", FIELD_DATE_TESTED: "today"},
+        {FIELD_ROOT_SAMPLE_ID: "RS003", FIELD_RESULT: "Maybe", FIELD_DATE_TESTED: "today"},
+        {FIELD_ROOT_SAMPLE_ID: "Empty", FIELD_RESULT: "Maybe"},
+        {FIELD_ROOT_SAMPLE_ID: "RS005", FIELD_RESULT: "Positive", FIELD_CH1_TARGET: "ORF9", FIELD_CH2_CQ: "101"},
+        {FIELD_ROOT_SAMPLE_ID: "RS006", FIELD_RESULT: "Positive", FIELD_CH2_CQ: "1E+3"},
+        {FIELD_ROOT_SAMPLE_ID: "RS007", FIELD_RESULT: "Positive", FIELD_CH1_RESULT: "Negative", FIELD_CH2_RESULT: None},
+    ]
+
+    validation = validate_rows(rows, [2, 3, 4, 5, 6, 7, 8])
+
+    assert validation.errors == {
+        1: ("TYPE 19", "CH1-Cq invalid, line: 3, value: x"),
+        2: ("TYPE 27", "Date Tested has an unknown date format, line: 4"),
+        3: None,
+        4: ("TYPE 17", "CH1-Target invalid, line: 6, result: ORF9"),
+        5: ("TYPE 20", "CH2-Cq not in range (0.0, 100.0), line: 7, result: 1E+3"),
+        6: ("TYPE 21", "Positive Result does not match to CT Channel Results (none are positive), line: 8"),
+    }
+    assert validation.cq_values["12.3"] == Decimal128("12.3")
@@ -0,0 +1,236 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from crawler.constants import (
+    COLLECTION_DART_EXPORTS,
+    COLLECTION_IMPORTS,
+    COLLECTION_SAMPLES,
+    DART_STATE_PENDING,
+    DART_STATE_PICKABLE,
+    FIELD_CREATED_AT,
+    FIELD_DART_EXPORT_ATTEMPTS,
+    FIELD_DART_EXPORT_CENTRE_CONFIG,
+    FIELD_DART_EXPORT_LAST_ERROR,
+    FIELD_DART_EXPORT_NEXT_ATTEMPT_AT,
+    FIELD_DART_EXPORT_SAMPLE_UUIDS,
+    FIELD_DART_EXPORT_SAMPLES_INSERTED,
+    FIELD_LH_SAMPLE_UUID,
+    FIELD_MONGO_MESSAGE_UUID,
+    FIELD_MONGO_ROOT_SAMPLE_ID,
+    FIELD_MONGO_SAMPLE_INDEX,
+    FIELD_PLATE_BARCODE,
+    FIELD_STATUS,
+    FIELD_STATUS_FAILED,
+    FIELD_STATUS_PENDING,
+)
+from crawler.dart_export_worker import DartExportWorker
+from tests.conftest import MockedError
+
+NOW = datetime(2022, 4, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def dart_export(centre, plate_barcode, **fields):
+    return {
+        FIELD_PLATE_BARCODE: plate_barcode,
+        FIELD_MONGO_MESSAGE_UUID: f"{plate_barcode}_UUID",
+        FIELD_DART_EXPORT_CENTRE_CONFIG: centre.centre_config,
+        FIELD_DART_EXPORT_SAMPLE_UUIDS: [f"{plate_barcode}_SAMPLE_1", f"{plate_barcode}_SAMPLE_2"],
+        FIELD_DART_EXPORT_SAMPLES_INSERTED: 2,
+        FIELD_STATUS: FIELD_STATUS_PENDING,
+        FIELD_DART_EXPORT_ATTEMPTS: 0,
+        FIELD_DART_EXPORT_NEXT_ATTEMPT_AT: NOW - timedelta(minutes=1),
+        FIELD_CREATED_AT: NOW - timedelta(minutes=1),
+        **fields,
+    }
+
+
+@pytest.fixture
+def worker(config, mongo_database):
+    _, mongo_database = mongo_database
+
+    with patch.object(config, "DART_EXPORT_WORKER_BATCH_SIZE", 2):
+        with patch.object(config, "DART_EXPORT_MAX_ATTEMPTS", 3):
+            with patch.object(config, "DART_EXPORT_RETRY_DELAY", 60):
+                yield DartExportWorker(config, mongo_database)
+
+
+@pytest.fixture
+def dart_exports_collection(mongo_database):
+    return mongo_database[1][COLLECTION_DART_EXPORTS]
+
+
+@pytest.fixture
+def dart_conn():
+    with patch("crawler.dart_export_worker.create_dart_sql_server_conn") as create_dart_sql_server_conn:
+        yield create_dart_sql_server_conn
+
+
+@pytest.fixture
+def add_dart_plate():
+    with patch(
+        "crawler.dart_export_worker.add_dart_plate_if_doesnt_exist", return_value=DART_STATE_PENDING
+    ) as add_dart_plate_if_doesnt_exist:
+        yield add_dart_plate_if_doesnt_exist
+
+
+@pytest.fixture
+def add_well_properties():
+    with patch("crawler.dart_export_worker.add_dart_plate_well_properties") as add_dart_plate_well_properties:
+        yield add_dart_plate_well_properties
+
+
+def test_drain_exports_the_plates_in_batches_over_one_connection_each(
+    freezer, worker, centre, dart_exports_collection, dart_conn, add_dart_plate, add_well_properties
+):
+    dart_exports_collection.insert_many([dart_export(centre, f"PLATE-00{i}") for i in range(3)])
+
+    assert worker.drain() == 3
+
+    assert dart_conn.call_count == 2  # a batch of two plates, then a batch of one
+    assert [call.args[1] for call in add_dart_plate.call_args_list] == ["PLATE-000", "PLATE-001", "PLATE-002"]
+    assert add_dart_plate.call_args.args[2] == centre.centre_config["biomek_labware_class"]
+    assert dart_conn.return_value.cursor.return_value.commit.call_count == 3
+    assert dart_exports_collection.count_documents({}) == 0
+
+
+def test_drain_exports_the_samples_of_a_pending_plate(
+    freezer, worker, centre, mongo_database, dart_exports_collection, dart_conn, add_dart_plate, add_well_properties
+):
+    _, mongo_database = mongo_database
+    mongo_database[COLLECTION_SAMPLES].insert_many(
+        [
+            {
+                FIELD_LH_SAMPLE_UUID: sample_uuid,
+                FIELD_MONGO_ROOT_SAMPLE_ID: sample_uuid,
+                FIELD_MONGO_SAMPLE_INDEX: index,
+            }
+            for sample_uuid, index in (("PLATE-001_SAMPLE_2", 2), ("PLATE-001_SAMPLE_1", 1), ("ANOTHER_SAMPLE", 1))
+        ]
+    )
+    dart_exports_collection.insert_one(dart_export(centre, "PLATE-001"))
+
+    worker.drain()
+
+    add_well_properties.assert_called_once()
+    samples, plate_barcode = add_well_properties.call_args.args[1:]
+    assert [sample[FIELD_LH_SAMPLE_UUID] for sample in samples] == ["PLATE-001_SAMPLE_1", "PLATE-001_SAMPLE_2"]
+    assert plate_barcode == "PLATE-001"
+
+
+def test_drain_does_not_export_the_samples_of_a_plate_not_pending(
+    freezer, worker, centre, dart_exports_collection, dart_conn, add_dart_plate, add_well_properties
+):
+    add_dart_plate.return_value = DART_STATE_PICKABLE
+    dart_exports_collection.insert_one(dart_export(centre, "PLATE-001"))
+
+    assert worker.drain() == 1
+
+    add_well_properties.assert_not_called()
+
+
+def test_drain_ignores_the_exports_not_yet_due_or_failed(
+    freezer, worker, centre, dart_exports_collection, dart_conn, add_dart_plate, add_well_properties
+):
+    freezer.move_to(NOW)
+    dart_exports_collection.insert_many(
+        [
+            dart_export(centre, "PLATE-001", **{FIELD_DART_EXPORT_NEXT_ATTEMPT_AT: NOW + timedelta(minutes=1)}),
+            dart_export(centre, "PLATE-002", **{FIELD_STATUS: FIELD_STATUS_FAILED}),
+        ]
+    )
+
+    assert worker.drain() == 0
+
+    dart_conn.assert_not_called()
+    assert dart_exports_collection.count_documents({}) == 2
+
+
+def test_drain_retries_a_failed_export_after_a_delay(
+    freezer, worker, centre, dart_exports_collection, dart_conn, add_dart_plate, add_well_properties
+):
+    freezer.move_to(NOW)
+    add_dart_plate.side_effect = [MockedError("Boom!"), DART_STATE_PENDING]
+    dart_exports_collection.insert_many(
+        [dart_export(centre, "PLATE-001"), dart_export(centre, "PLATE-002", **{FIELD_DART_EXPORT_ATTEMPTS: 1})]
+    )
+
+    assert worker.drain() == 1
+
+    cursor = dart_conn.return_value.cursor.return_value
+    cursor.rollback.assert_called_once()
+    cursor.commit.assert_called_once()
+
+    failed_export = dart_exports_collection.find_one({})
+    assert failed_export[FIELD_PLATE_BARCODE] == "PLATE-001"
+    assert failed_export[FIELD_STATUS] == FIELD_STATUS_PENDING
+    assert failed_export[FIELD_DART_EXPORT_ATTEMPTS] == 1
+    assert failed_export[FIELD_DART_EXPORT_NEXT_ATTEMPT_AT].replace(tzinfo=timezone.utc) == NOW + timedelta(minutes=1)
+    assert "DART database inserts failed" in failed_export[FIELD_DART_EXPORT_LAST_ERROR]
+
+
+def test_drain_doubles_the_retry_delay_with_each_attempt(
+    freezer, worker, centre, dart_exports_collection, dart_conn, add_dart_plate, add_well_properties
+):
+    freezer.move_to(NOW)
+    dart_conn.return_value = None
+    dart_exports_collection.insert_one(dart_export(centre, "PLATE-001", **{FIELD_DART_EXPORT_ATTEMPTS: 1}))
+
+    assert worker.drain() == 0
+
+    failed_export = dart_exports_collection.find_one({})
+    assert failed_export[FIELD_DART_EXPORT_ATTEMPTS] == 2
+    assert failed_export[FIELD_DART_EXPORT_NEXT_ATTEMPT_AT].replace(tzinfo=timezone.utc) == NOW + timedelta(minutes=2)
+    assert "Error connecting to DART database" in failed_export[FIELD_DART_EXPORT_LAST_ERROR]
+
+
+def test_drain_records_an_import_with_the_error_once_the_attempts_run_out(
+    freezer, worker, centre, mongo_database, dart_exports_collection, dart_conn, add_dart_plate, add_well_properties
+):
+    _, mongo_database = mongo_database
+    dart_conn.return_value = None
+    dart_exports_collection.insert_one(dart_export(centre, "PLATE-001", **{FIELD_DART_EXPORT_ATTEMPTS: 2}))
+
+    assert worker.drain() == 0
+
+    failed_export = dart_exports_collection.find_one({})
+    assert failed_export[FIELD_STATUS] == FIELD_STATUS_FAILED
+    assert failed_export[FIELD_DART_EXPORT_ATTEMPTS] == 3
+
+    import_record = mongo_database[COLLECTION_IMPORTS].find_one({})
+    assert import_record["centre_name"] == centre.centre_config["name"]
+    assert import_record["csv_file_used"] == "PLATE-001"
+    assert import_record["number_of_records"] == 2
+    assert import_record["errors"] == [
+        "1 error was reported during processing.",
+        "Error connecting to DART database for plate with barcode 'PLATE-001' in message with UUID 'PLATE-001_UUID'",
+    ]
+
+
+def test_poll_logs_a_failure_rather_than_raising(worker):
+    error = MockedError("Boom!")
+
+    with patch.object(worker, "drain", side_effect=error):
+        with patch("crawler.dart_export_worker.logger") as logger:
+            worker.poll()
+
+    logger.exception.assert_called_once_with(error)
+
+
+def test_run_polls_until_stopped(worker):
+    with patch.object(worker, "poll", side_effect=worker.stop) as poll:
+        worker.run()
+
+    poll.assert_called_once()
+
+
+def test_start_runs_the_worker_in_a_thread(worker):
+    worker.stop()
+
+    with patch.object(worker, "poll") as poll:
+        thread = worker.start()
+        thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    poll.assert_not_called()
@@ -1,3 +1,5 @@
+from random import Random
+
 import pytest
 from bson.decimal128 import Decimal128
 
@@ -5,6 +7,8 @@ from crawler.constants import (
     FIELD_CH1_CQ,
     FIELD_CH2_CQ,
     FIELD_CH3_CQ,
+    FIELD_FILTERED_POSITIVE,
+    FIELD_MONGODB_ID,
     FIELD_RESULT,
     FIELD_ROOT_SAMPLE_ID,
     RESULT_VALUE_LIMIT_OF_DETECTION,
@@ -22,6 +26,7 @@ from crawler.filtered_positive_identifier import (
     current_filtered_positive_identifier,
     filtered_positive_identifier_by_version,
 )
+from crawler.types import SampleDoc
 
 # ----- test helpers -----
 
@@ -415,3 +420,157 @@ def test_v3_is_positive_returns_false_all_ct_values_greater_than_30():
     sample[FIELD_CH2_CQ] = Decimal128("41.12345678")
     sample[FIELD_CH3_CQ] = Decimal128("42.12345678")
     assert identifier.is_positive(sample) is False
+
+
+# ----- tests for classify_many() -----
+
+IDENTIFIERS = [
+    FilteredPositiveIdentifierV0,
+    FilteredPositiveIdentifierV1,
+    FilteredPositiveIdentifierV2,
+    FilteredPositiveIdentifierV3,
+]
+
+# CT values on and around the limit, and those which cannot be compared as integers
+EDGE_CT_VALUES = [
+    None,
+    0,
+    "",
+    Decimal128("30"),
+    Decimal128("30.0000000000000000000000000000001"),
+    Decimal128("29.9999999999999999999999999999999"),
+    Decimal128("300E-1"),
+    Decimal128("3E+1"),
+    Decimal128("0"),
+    Decimal128("-0"),
+    Decimal128("-30.5"),
+    Decimal128("0E-6176"),
+    Decimal128("1E-6176"),
+    Decimal128("1E+6111"),
+    Decimal128("18446744073709551615E-18"),
+    Decimal128("18446744073709551616E-18"),
+    Decimal128("9999999999999999999999999999999999E-33"),
+    Decimal128("NaN"),
+    Decimal128("-NaN"),
+    Decimal128("sNaN"),
+    Decimal128("Infinity"),
+    Decimal128("-Infinity"),
+]
+
+RESULTS = [RESULT_VALUE_POSITIVE, "positive", "Positive!", RESULT_VALUE_LIMIT_OF_DETECTION, "Negative", "Void", ""]
+
+ROOT_SAMPLE_IDS = ["MCM001", "CBIQA_1", "QC01", "ZZA000", "ZZA123", "zza123", "AQC01"]
+
+
+def random_ct_value(random):
+    choice = random.random()
+    if choice < 0.4:
+        return random.choice(EDGE_CT_VALUES)
+    elif choice < 0.8:
+        # a typical CT value, to a random number of decimal places
+        places = random.randint(0, 10)
+        return Decimal128(f"{random.randint(0, 45 * 10 ** places)}E-{places}")
+    else:
+        # any finite Decimal128
+        return Decimal128(f"{random.randint(-(10 ** 34) + 1, 10 ** 34 - 1)}E{random.randint(-6176, 6111)}")
+
+
+def random_sample(random):
+    sample = {
+        FIELD_RESULT: random.choice(RESULTS),
+        FIELD_ROOT_SAMPLE_ID: random.choice(ROOT_SAMPLE_IDS),
+    }
+
+    for field in (FIELD_CH1_CQ, FIELD_CH2_CQ, FIELD_CH3_CQ):
+        # missing fields are treated the same as None
+        if random.random() < 0.9:
+            sample[field] = random_ct_value(random)
+
+    return sample
+
+
+@pytest.mark.parametrize("identifier_class", IDENTIFIERS)
+@pytest.mark.parametrize("seed", range(5))
+def test_classify_many_matches_is_positive(identifier_class, seed):
+    random = Random(seed)
+    identifier = identifier_class()
+    samples = [random_sample(random) for _ in range(2000)]
+
+    assert identifier.classify_many(samples) == [identifier.is_positive(sample) for sample in samples]
+
+
+def edge_ct_value_samples():
+    # every pair of edge CT values, with a third value above the limit
+    return [
+        {**positive_sample(), FIELD_CH1_CQ: ch1_cq, FIELD_CH2_CQ: ch2_cq, FIELD_CH3_CQ: Decimal128("31")}
+        for ch1_cq in EDGE_CT_VALUES
+        for ch2_cq in EDGE_CT_VALUES
+    ]
+
+
+@pytest.mark.parametrize("identifier_class", IDENTIFIERS)
+def test_classify_many_matches_is_positive_for_every_edge_ct_value(identifier_class):
+    identifier = identifier_class()
+    samples = edge_ct_value_samples()
+
+    assert identifier.classify_many(samples) == [identifier.is_positive(sample) for sample in samples]
+
+
+def test_classify_many_returns_results_in_order():
+    identifier = FilteredPositiveIdentifierV3()
+    negative = {**positive_sample(), FIELD_RESULT: "Negative"}
+    control = {**positive_sample(), FIELD_ROOT_SAMPLE_ID: "CBIQA_1"}
+    above_limit = {
+        **positive_sample(),
+        FIELD_CH1_CQ: Decimal128("30.1"),
+        FIELD_CH2_CQ: Decimal128("31"),
+        FIELD_CH3_CQ: None,
+    }
+    no_ct_values: SampleDoc = {FIELD_RESULT: RESULT_VALUE_POSITIVE, FIELD_ROOT_SAMPLE_ID: "MCM001"}
+    nan = {**positive_sample(), FIELD_CH1_CQ: Decimal128("NaN")}
+
+    assert identifier.classify_many([positive_sample(), negative, control, above_limit, no_ct_values, nan]) == [
+        True,
+        False,
+        False,
+        False,
+        True,
+        True,
+    ]
+
+
+def test_classify_many_returns_empty_list_for_no_samples():
+    assert FilteredPositiveIdentifierV3().classify_many([]) == []
+
+
+# ----- tests for aggregation_expression() -----
+
+
+@pytest.mark.parametrize("identifier_class", IDENTIFIERS)
+def test_aggregation_expression_agrees_with_is_positive(mongo_database, identifier_class):
+    _, db = mongo_database
+    identifier = identifier_class()
+    random = Random(0)
+    samples = [random_sample(random) for _ in range(2000)] + edge_ct_value_samples()
+
+    # a collection without the unique indexes of the samples collection, as the random samples can repeat
+    collection = db["filtered_positive_identifier_samples"]
+    collection.insert_many(samples)
+    evaluated = {
+        document[FIELD_MONGODB_ID]: document[FIELD_FILTERED_POSITIVE]
+        for document in collection.aggregate(
+            [{"$project": {FIELD_FILTERED_POSITIVE: identifier.aggregation_expression()}}]
+        )
+    }
+
+    assert [evaluated[sample[FIELD_MONGODB_ID]] for sample in samples] == [
+        identifier.is_positive(sample) for sample in samples
+    ]
+
+
+def test_aggregation_expression_without_ct_values_only_checks_the_result():
+    expression = FilteredPositiveIdentifierV0().aggregation_expression()
+
+    assert expression == {
+        "$and": [{"$regexMatch": {"input": {"$toString": f"${FIELD_RESULT}"}, "regex": "^Positive", "options": "i"}}]
+    }
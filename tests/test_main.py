@@ -11,6 +11,8 @@ from crawler.constants import (
     FIELD_CENTRE_NAME,
 )
 from crawler.db.mongo import get_mongo_collection
+from crawler.db.pools import POOL_DART, POOL_MLWH_READONLY, POOL_MLWH_READWRITE, get_connection_pool
+from crawler.file_processing import Centre
 from crawler.main import run
 
 NUMBER_CENTRES = 12
@@ -86,6 +88,81 @@ def test_run(mongo_database, baracoda, testing_files_for_process, pyodbc_conn):
     assert 0 == len(subfolders), f"Wrong number of subfolders. Expected: 0, Actual: {len(subfolders)}"
 
 
+def test_run_with_workers(mongo_database, baracoda, testing_files_for_process, pyodbc_conn):
+    _, mongo_database = mongo_database
+    with patch("crawler.file_processing.CentreFile.insert_samples_from_docs_into_mlwh"):
+        run(False, False, False, "crawler.config.integration", workers=4)
+
+    imports_collection = get_mongo_collection(mongo_database, COLLECTION_IMPORTS)
+    samples_collection = get_mongo_collection(mongo_database, COLLECTION_SAMPLES)
+    source_plates_collection = get_mongo_collection(mongo_database, COLLECTION_SOURCE_PLATES)
+
+    # Processing the centres concurrently gives the same outcome as processing them one after another
+    assert source_plates_collection.count_documents({}) == NUMBER_ACCEPTED_SOURCE_PLATES
+    assert samples_collection.count_documents({}) == NUMBER_VALID_SAMPLES
+    assert imports_collection.count_documents({}) == NUMBER_OF_FILES_PROCESSED
+
+    (_, _, files) = next(os.walk("tmp/backups/ALDP/errors"))
+    assert len(files) == 3, f"Wrong number of error files. Expected: 3, Actual: {len(files)}"
+    (_, _, files) = next(os.walk("tmp/backups/RAND/successes"))
+    assert len(files) == 1, f"Wrong number of success files. Expected: 1, Actual: {len(files)}"
+
+    # check the code cleaned up the temporary files
+    (_, subfolders, files) = next(os.walk("tmp/files/"))
+    assert 0 == len(subfolders), f"Wrong number of subfolders. Expected: 0, Actual: {len(subfolders)}"
+
+
+def test_run_with_more_workers_than_the_pool_size(
+    config, mongo_database, baracoda, testing_files_for_process, pyodbc_conn
+):
+    _, mongo_database = mongo_database
+    workers = config.DB_POOL_MAX_SIZE + 4
+
+    with patch("crawler.file_processing.CentreFile.insert_samples_from_docs_into_mlwh"):
+        run(False, False, False, "crawler.config.integration", workers=workers)
+
+    # each centre processed at once can get a connection from every pool
+    for name in (POOL_DART, POOL_MLWH_READONLY, POOL_MLWH_READWRITE):
+        pool = get_connection_pool(name)
+        assert pool is not None
+        assert pool.max_size >= workers
+
+    imports_collection = get_mongo_collection(mongo_database, COLLECTION_IMPORTS)
+    samples_collection = get_mongo_collection(mongo_database, COLLECTION_SAMPLES)
+    assert samples_collection.count_documents({}) == NUMBER_VALID_SAMPLES
+    assert imports_collection.count_documents({}) == NUMBER_OF_FILES_PROCESSED
+
+
+def test_run_updates_priority_samples_once(mongo_database, baracoda, testing_files_for_process, pyodbc_conn):
+    with patch("crawler.file_processing.CentreFile.insert_samples_from_docs_into_mlwh"):
+        with patch("crawler.main.update_priority_samples") as mock_update_priority_samples:
+            run(False, False, False, "crawler.config.integration", workers=2)
+
+    mock_update_priority_samples.assert_called_once()
+
+
+def test_run_with_workers_isolates_centre_errors(mongo_database, baracoda, testing_files_for_process, pyodbc_conn):
+    _, mongo_database = mongo_database
+
+    def process_files(centre, add_to_dart):
+        if centre.centre_config["prefix"] == "ALDP":
+            raise Exception("Boom!")
+
+        return original_process_files(centre, add_to_dart)
+
+    original_process_files = Centre.process_files
+
+    with patch("crawler.file_processing.CentreFile.insert_samples_from_docs_into_mlwh"):
+        with patch.object(Centre, "process_files", autospec=True, side_effect=process_files):
+            run(False, False, False, "crawler.config.integration", workers=4)
+
+    # the failing centre did not back up any files but the other centres were still processed
+    (_, _, files) = next(os.walk("tmp/backups/ALDP/errors"))
+    assert len(files) == 0
+    (_, _, files) = next(os.walk("tmp/backups/RAND/successes"))
+    assert len(files) == 1
+
+
 def test_error_run(mongo_database, baracoda, testing_files_for_process, pyodbc_conn):
     _, mongo_database = mongo_database
 
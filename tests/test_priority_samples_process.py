@@ -1,4 +1,5 @@
-from typing import Dict, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Set, Tuple
 from unittest.mock import patch
 
 import pytest
@@ -20,6 +21,7 @@ from crawler.constants import (
     FIELD_ROOT_SAMPLE_ID,
     FIELD_SAMPLE_ID,
     FIELD_SOURCE,
+    FIELD_UPDATED_AT,
     MLWH_MONGODB_ID,
     MLWH_MUST_SEQUENCE,
     MLWH_PREFERENTIALLY_SEQUENCE,
@@ -30,11 +32,14 @@ from crawler.db.mongo import get_mongo_collection
 from crawler.helpers.logging_helpers import LoggingCollection
 from crawler.priority_samples_process import (
     centre_config_for_samples,
-    get_all_unprocessed_priority_samples_records,
     logging_collection,
     print_summary,
+    priority_samples_to_process_filter,
     update_priority_samples,
+    update_unprocessed_priority_samples_to_processed,
+    validate_prioritisation_process,
 )
+from crawler.types import SampleDoc
 from tests.conftest import MockedError
 
 
@@ -46,7 +51,7 @@ class TestPrioritySamplesProcess:
                 with patch(
                     "crawler.priority_samples_process.add_dart_plate_if_doesnt_exist"
                 ) as self.mock_add_dart_plate:
-                    with patch("crawler.db.dart.set_dart_well_properties") as self.mock_set_well_props:
+                    with patch("crawler.db.dart.set_dart_well_properties_in_bulk") as self.mock_set_well_props:
                         with patch("crawler.db.dart.map_mongo_doc_to_dart_well_props") as self.mock_map:
                             self.test_well_props = {"prop1": "value1", "test prop": "test value"}
                             self.test_well_index = 15
@@ -244,12 +249,13 @@ class TestPrioritySamplesProcess:
     ):
         _, mongo_database = mongo_database
         update_priority_samples(mongo_database, config, True)
-        assert len(get_all_unprocessed_priority_samples_records(mongo_database)) == 0
+        priority_samples_collection = get_mongo_collection(mongo_database, COLLECTION_PRIORITY_SAMPLES)
+        assert priority_samples_collection.count_documents(priority_samples_to_process_filter()) == 0
 
     def test_mlwh_insert_fails_in_update_priority_samples(self, config, mongo_database):
         _, mongo_database = mongo_database
 
-        with patch("crawler.db.mysql.run_mysql_executemany_query", side_effect=MockedError("Boom!")):
+        with patch("crawler.db.mysql.run_mysql_multi_row_upsert", side_effect=MockedError("Boom!")):
             update_priority_samples(mongo_database, config, True)
 
             assert logging_collection.get_count_of_all_errors_and_criticals() >= 1
@@ -292,16 +298,16 @@ class TestPrioritySamplesProcess:
         for doc in self.expected_dart_samples:
             self.mock_get_well_index.assert_any_call(doc[FIELD_COORDINATE])
 
-        # wells created in dart
-        assert self.mock_set_well_props.call_count == num_wells
+        # wells created in dart, in one call per plate
+        well_props_params = [params for call in self.mock_set_well_props.call_args_list for params in call.args[1]]
+        assert len(well_props_params) == num_wells * len(self.test_well_props)
 
         # Wells created from plate
         if num_wells > 0:
             for barcode in self.expected_dart_plates:
                 if self.plate_status[barcode] == DART_STATE_PENDING:
-                    self.mock_set_well_props.assert_any_call(
-                        self.mock_conn().cursor(), barcode, self.test_well_props, self.test_well_index
-                    )
+                    for prop_name, prop_value in self.test_well_props.items():
+                        assert (barcode, prop_name, prop_value, self.test_well_index) in well_props_params
 
     def test_commits_changes_to_dart(self, mongo_database, config, with_different_scenarios):
         _, mongo_database = mongo_database
@@ -318,7 +324,7 @@ class TestPrioritySamplesProcess:
     def test_adding_plate_and_wells_to_dart_fails_with_exception(self, mongo_database, config):
         _, mongo_database = mongo_database
 
-        with patch("crawler.priority_samples_process.add_dart_well_properties", side_effect=MockedError("Boom!")):
+        with patch("crawler.priority_samples_process.add_dart_plate_well_properties", side_effect=MockedError("Boom!")):
             update_priority_samples(mongo_database, config, True)
 
             assert logging_collection.get_count_of_all_errors_and_criticals() >= 1
@@ -367,3 +373,127 @@ class TestPrioritySamplesProcess:
             with patch("crawler.priority_samples_process.logging_collection", logging_collection) as logging_collection:
                 print_summary()
                 assert mock_logger.info.called is True
+
+
+def test_update_unprocessed_priority_samples_to_processed_updates_in_chunks(mongo_database):
+    _, mongo_database = mongo_database
+    priority_samples_collection = get_mongo_collection(mongo_database, COLLECTION_PRIORITY_SAMPLES)
+    priority_samples: List[SampleDoc] = [{FIELD_SAMPLE_ID: ObjectId(), FIELD_PROCESSED: False} for _ in range(5)]
+    priority_samples_collection.insert_many(priority_samples)
+
+    with patch("crawler.priority_samples_process.PRIORITY_SAMPLES_UPDATE_CHUNK_SIZE", 2):
+        with patch.object(
+            priority_samples_collection, "update_many", wraps=priority_samples_collection.update_many
+        ) as update_many:
+            with patch(
+                "crawler.priority_samples_process.get_mongo_collection", return_value=priority_samples_collection
+            ):
+                update_unprocessed_priority_samples_to_processed(mongo_database, priority_samples[:3])
+
+    # one update for each chunk of samples
+    assert update_many.call_count == 2
+
+    processed = priority_samples_collection.find({FIELD_PROCESSED: True})
+    assert {doc[FIELD_SAMPLE_ID] for doc in processed} == {doc[FIELD_SAMPLE_ID] for doc in priority_samples[:3]}
+
+
+def test_validate_prioritisation_process_logs_the_unprocessed_samples(mongo_database):
+    _, mongo_database = mongo_database
+    priority_samples_collection = get_mongo_collection(mongo_database, COLLECTION_PRIORITY_SAMPLES)
+    sample_ids = [ObjectId(), ObjectId()]
+    priority_samples_collection.insert_many(
+        [
+            {FIELD_SAMPLE_ID: sample_ids[0], FIELD_PROCESSED: False},
+            {FIELD_SAMPLE_ID: sample_ids[1], FIELD_PROCESSED: False},
+            {FIELD_SAMPLE_ID: ObjectId(), FIELD_PROCESSED: True},
+        ]
+    )
+
+    with patch("crawler.priority_samples_process.logging_collection", LoggingCollection()) as logging_collection:
+        validate_prioritisation_process(mongo_database)
+
+    assert logging_collection.aggregator_types["TYPE 32"].count_errors == 2
+    messages = logging_collection.get_messages_for_import()
+    for sample_id in sample_ids:
+        assert any(str(sample_id) in message for message in messages)
+
+
+def test_validate_prioritisation_process_only_checks_the_given_samples(mongo_database):
+    _, mongo_database = mongo_database
+    priority_samples_collection = get_mongo_collection(mongo_database, COLLECTION_PRIORITY_SAMPLES)
+    sample_ids = [ObjectId(), ObjectId()]
+    priority_samples_collection.insert_many(
+        [{FIELD_SAMPLE_ID: sample_id, FIELD_PROCESSED: False} for sample_id in sample_ids]
+    )
+
+    with patch("crawler.priority_samples_process.logging_collection", LoggingCollection()) as logging_collection:
+        validate_prioritisation_process(mongo_database, sample_ids[:1])
+
+    assert logging_collection.aggregator_types["TYPE 32"].count_errors == 1
+
+
+def test_validate_prioritisation_process_only_reports_each_unprocessed_sample_once(mongo_database):
+    _, mongo_database = mongo_database
+    priority_samples_collection = get_mongo_collection(mongo_database, COLLECTION_PRIORITY_SAMPLES)
+    sample_ids = [ObjectId(), ObjectId()]
+    priority_samples_collection.insert_one({FIELD_SAMPLE_ID: sample_ids[0], FIELD_PROCESSED: False})
+    reported_unprocessed: Set[ObjectId] = set()
+
+    def count_reported():
+        with patch("crawler.priority_samples_process.logging_collection", LoggingCollection()) as logging_collection:
+            validate_prioritisation_process(mongo_database, reported_unprocessed=reported_unprocessed)
+
+        return logging_collection.aggregator_types["TYPE 32"].count_errors
+
+    assert count_reported() == 1
+    # only the sample newly left unprocessed is reported on the next poll
+    priority_samples_collection.insert_one({FIELD_SAMPLE_ID: sample_ids[1], FIELD_PROCESSED: False})
+    assert count_reported() == 1
+    assert count_reported() == 0
+    assert reported_unprocessed == set(sample_ids)
+
+    # a sample processed since is reported again if it is left unprocessed later
+    priority_samples_collection.update_one({FIELD_SAMPLE_ID: sample_ids[0]}, {"$set": {FIELD_PROCESSED: True}})
+    assert count_reported() == 0
+    assert reported_unprocessed == {sample_ids[1]}
+    priority_samples_collection.update_one({FIELD_SAMPLE_ID: sample_ids[0]}, {"$set": {FIELD_PROCESSED: False}})
+    assert count_reported() == 1
+
+
+def test_priority_samples_to_process_filter(mongo_database):
+    _, mongo_database = mongo_database
+    priority_samples_collection = get_mongo_collection(mongo_database, COLLECTION_PRIORITY_SAMPLES)
+    since = datetime.now(tz=timezone.utc) - timedelta(hours=1)
+    two_hours_ago = since - timedelta(hours=1)
+
+    unprocessed, updated, created, old = ObjectId(), ObjectId(), ObjectId(), ObjectId()
+    priority_samples_collection.insert_many(
+        [
+            {
+                FIELD_MONGODB_ID: ObjectId.from_datetime(two_hours_ago),
+                FIELD_SAMPLE_ID: unprocessed,
+                FIELD_PROCESSED: False,
+            },
+            {
+                FIELD_MONGODB_ID: ObjectId.from_datetime(two_hours_ago + timedelta(seconds=1)),
+                FIELD_SAMPLE_ID: updated,
+                FIELD_PROCESSED: True,
+                FIELD_UPDATED_AT: since + timedelta(minutes=1),
+            },
+            {FIELD_SAMPLE_ID: created, FIELD_PROCESSED: True},
+            {
+                FIELD_MONGODB_ID: ObjectId.from_datetime(two_hours_ago + timedelta(seconds=2)),
+                FIELD_SAMPLE_ID: old,
+                FIELD_PROCESSED: True,
+                FIELD_UPDATED_AT: two_hours_ago,
+            },
+        ]
+    )
+
+    def matching_sample_ids(priority_samples_filter):
+        return {doc[FIELD_SAMPLE_ID] for doc in priority_samples_collection.find(priority_samples_filter)}
+
+    assert matching_sample_ids(priority_samples_to_process_filter()) == {unprocessed}
+    assert matching_sample_ids(priority_samples_to_process_filter(since=since)) == {unprocessed, updated, created}
+    assert matching_sample_ids(priority_samples_to_process_filter([updated, old], since)) == {updated}
+    assert matching_sample_ids(priority_samples_to_process_filter([updated, old])) == set()
@@ -0,0 +1,179 @@
+import threading
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from bson.objectid import ObjectId
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from crawler.constants import FIELD_SAMPLE_ID
+from crawler.priority_samples_worker import MONGO_ERROR_CODE_CHANGE_STREAM_NOT_SUPPORTED, PrioritySamplesWorker
+
+
+class FakeChangeStream:
+    """A change stream which yields the given changes, with None standing for the stream going quiet, then stops the
+    worker watching it.
+    """
+
+    def __init__(self, worker, changes):
+        self._worker = worker
+        self._changes = iter(changes)
+        self.alive = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+    def try_next(self):
+        try:
+            return next(self._changes)
+        except StopIteration:
+            self._worker.stop()
+            return None
+
+
+def change(sample_id):
+    return {"operationType": "insert", "fullDocument": {FIELD_SAMPLE_ID: sample_id}}
+
+
+@pytest.fixture
+def worker(config):
+    with patch.object(config, "PRIORITY_SAMPLES_WORKER_BATCH_SIZE", 2):
+        with patch.object(config, "PRIORITY_SAMPLES_WORKER_POLL_INTERVAL", 0):
+            yield PrioritySamplesWorker(config, MagicMock())
+
+
+@pytest.fixture
+def mock_update_priority_samples():
+    with patch("crawler.priority_samples_worker.update_priority_samples", return_value=0) as update_priority_samples:
+        yield update_priority_samples
+
+
+@pytest.fixture
+def priority_samples_collection():
+    with patch("crawler.priority_samples_worker.get_mongo_collection") as get_mongo_collection:
+        yield get_mongo_collection.return_value
+
+
+def test_watch_processes_the_samples_in_batches(worker, mock_update_priority_samples, priority_samples_collection):
+    sample_ids = [ObjectId() for _ in range(4)]
+    priority_samples_collection.watch.return_value = FakeChangeStream(
+        worker,
+        [change(sample_ids[0]), change(sample_ids[1]), change(sample_ids[2]), None, change(sample_ids[3])],
+    )
+
+    worker.watch()
+
+    # the unprocessed samples are caught up with once the stream is open, then each batch is processed once it is full
+    # or the stream goes quiet
+    assert [call.kwargs.get("sample_ids") for call in mock_update_priority_samples.call_args_list] == [
+        None,
+        sample_ids[:2],
+        sample_ids[2:3],
+        sample_ids[3:],
+    ]
+
+
+def test_process_only_processes_each_sample_once(worker, mock_update_priority_samples):
+    sample_id = ObjectId()
+
+    worker.process([sample_id, sample_id])
+
+    mock_update_priority_samples.assert_called_once_with(
+        worker._db,
+        worker._config,
+        worker._config.ADD_TO_DART,
+        sample_ids=[sample_id],
+        reported_unprocessed=worker._reported_unprocessed,
+    )
+
+
+def stop_after_polls(worker, mock_update_priority_samples, polls):
+    def stop(*args, **kwargs):
+        if mock_update_priority_samples.call_count == polls:
+            worker.stop()
+
+    mock_update_priority_samples.side_effect = stop
+
+
+def test_run_only_polls_once_the_collection_cannot_be_watched(
+    worker, mock_update_priority_samples, priority_samples_collection
+):
+    priority_samples_collection.watch.side_effect = OperationFailure(
+        "The $changeStream stage is only supported on replica sets", code=MONGO_ERROR_CODE_CHANGE_STREAM_NOT_SUPPORTED
+    )
+    stop_after_polls(worker, mock_update_priority_samples, 3)
+
+    with patch("crawler.priority_samples_worker.logger") as logger:
+        worker.run()
+
+    # the fallback is logged once, and the collection not watched again
+    priority_samples_collection.watch.assert_called_once()
+    assert mock_update_priority_samples.call_count == 3
+    logger.warning.assert_called_once()
+
+
+def test_run_watches_again_after_the_change_stream_fails(
+    worker, mock_update_priority_samples, priority_samples_collection
+):
+    priority_samples_collection.watch.side_effect = AutoReconnect("Boom!")
+    stop_after_polls(worker, mock_update_priority_samples, 2)
+
+    with patch("crawler.priority_samples_worker.logger") as logger:
+        worker.run()
+
+    assert priority_samples_collection.watch.call_count == 2
+    assert mock_update_priority_samples.call_count == 2
+    assert logger.warning.call_count == 2
+
+
+def test_run_catches_up_since_the_given_time(worker, mock_update_priority_samples, priority_samples_collection):
+    since = datetime(2021, 3, 1, tzinfo=timezone.utc)
+    priority_samples_collection.watch.return_value = FakeChangeStream(worker, [])
+
+    worker.run(since=since)
+
+    assert mock_update_priority_samples.call_args_list[0].kwargs["since"] == since
+    # once the stream is open, only the unprocessed samples are caught up with
+    assert mock_update_priority_samples.call_args_list[1].kwargs["since"] is None
+
+
+def test_run_continues_after_a_failure_to_prioritise(worker, mock_update_priority_samples, priority_samples_collection):
+    priority_samples_collection.watch.side_effect = lambda *args, **kwargs: FakeChangeStream(worker, [])
+
+    def fail_once(*args, **kwargs):
+        if mock_update_priority_samples.call_count == 1:
+            raise Exception("Boom!")
+
+        return 0
+
+    mock_update_priority_samples.side_effect = fail_once
+
+    with patch("crawler.priority_samples_worker.logger") as logger:
+        worker.run()
+
+    logger.exception.assert_called_once()
+    assert priority_samples_collection.watch.call_count == 2
+
+
+def test_start_runs_the_worker_in_a_thread(worker, mock_update_priority_samples, priority_samples_collection):
+    priority_samples_collection.watch.return_value = FakeChangeStream(worker, [])
+
+    thread = worker.start()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert thread is not threading.current_thread()
+    mock_update_priority_samples.assert_called_once()
+
+
+def test_catch_up_and_process_share_the_samples_reported_as_unprocessed(worker, mock_update_priority_samples):
+    worker.catch_up()
+    worker.process([ObjectId()])
+
+    assert all(
+        call.kwargs["reported_unprocessed"] is worker._reported_unprocessed
+        for call in mock_update_priority_samples.call_args_list
+    )